@@ -300,6 +300,13 @@ man_pages = [
         [author],
         1,
     ),
+    (
+        "man1/flux-account-index",
+        "flux-account-index",
+        "list and rebuild the indexes on the jobs table",
+        [author],
+        1,
+    ),
     (
         "man1/flux-account-fairshare-emulate",
         "flux-account-fairshare-emulate",
@@ -307,4 +314,18 @@ man_pages = [
         [author],
         1,
     ),
+    (
+        "man1/flux-account-stats",
+        "flux-account-stats",
+        "show request, latency, and SQL statistics of the flux-accounting service",
+        [author],
+        1,
+    ),
+    (
+        "man1/flux-account-batch",
+        "flux-account-batch",
+        "apply many operations to the flux-accounting DB in one transaction",
+        [author],
+        1,
+    ),
 ]
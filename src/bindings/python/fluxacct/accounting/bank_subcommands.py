@@ -356,11 +356,8 @@ def delete_bank(conn, cur, bank, force=False):
         if force:
             # we also need to update the job usage for the rest of the hierarchy as a
             # result of the bank (which may or may not have usage) no longer being in
-            # the database hierarchy; start from the root bank and work down
-            s_root_bank = "SELECT bank FROM bank_table WHERE parent_bank=''"
-            cur.execute(s_root_bank)
-            root_bank = cur.fetchone()[0]
-            jobs.calc_parent_bank_usage(conn, cur, root_bank)
+            # the database hierarchy
+            jobs.rollup_bank_usage(cur)
     # if an exception occurs while recursively deleting
     # the parent banks, then throw the exception and roll
     # back the changes made to the DB
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import json
+
+# the operations that can be run in a batch
+BATCH_OPERATIONS = frozenset(
+    [
+        "add_user",
+        "delete_user",
+        "edit_user",
+        "edit_all_users",
+        "add_bank",
+        "delete_bank",
+        "edit_bank",
+        "add_queue",
+        "delete_queue",
+        "edit_queue",
+        "add_project",
+        "delete_project",
+        "edit_factor",
+        "add_config",
+        "edit_config",
+        "delete_config",
+    ]
+)
+
+# the name of the savepoint each operation in a batch is run in
+SAVEPOINT = "batch_operation"
+
+
+class OperationError(Exception):
+    """Raised by the function that runs an operation of a batch when it fails."""
+
+
+class OperationMessage:
+    """
+    Stand-in for the message of a request that is passed to the handler of one
+    operation in a batch.
+
+    Args:
+        payload: The payload of the operation.
+        rolemask: The rolemask of the batch request.
+    """
+
+    def __init__(self, payload, rolemask):
+        self.payload = payload
+        self.payload_str = json.dumps(payload)
+        self.rolemask = rolemask
+
+
+class BatchConnection:
+    """
+    Wrapper around the connection that a batch is run on. The subcommands that
+    make up the operations of a batch commit their changes when they are run on
+    their own; the wrapper turns those commits into no-ops so that every
+    operation is part of the batch's transaction, and turns a rollback into a
+    rollback of only the operation that is running.
+    """
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.execute(f"ROLLBACK TO {SAVEPOINT}")
+
+
+def validate_operations(operations):
+    """
+    Check that each operation is an object that names an operation that can be
+    run in a batch and has an object as its payload.
+    """
+    if not isinstance(operations, list):
+        raise ValueError("operations must be a list")
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise ValueError(f"operation {index}: must be an object")
+        if operation.get("op") not in BATCH_OPERATIONS:
+            raise ValueError(
+                f"operation {index}: {operation.get('op')} can't be run in a batch"
+            )
+        if not isinstance(operation.get("payload", {}), dict):
+            raise ValueError(f"operation {index}: payload must be an object")
+
+
+def run_batch(conn, operations, run_operation, keep_going=False):
+    """
+    Run a list of operations in a single transaction and return a dictionary of
+    the results of the operations that were run.
+
+    Each operation is run in its own savepoint so that a failed operation leaves
+    nothing behind. By default, the batch is all-or-nothing: the first operation
+    that fails ends the batch and the transaction is rolled back. If keep_going
+    is True, every operation is run and the ones that succeeded are committed.
+
+    Args:
+        conn: The connection to the flux-accounting DB.
+        operations: A list of {"op": name, "payload": {...}} objects.
+        run_operation: A function run_operation(conn, name, payload) that runs
+            one operation on conn and returns its result, or raises an exception
+            if it fails.
+        keep_going: Commit the operations that succeeded even if others failed.
+    """
+    validate_operations(operations)
+    batch_conn = BatchConnection(conn)
+    results = []
+    failed = 0
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        for index, operation in enumerate(operations):
+            name = operation["op"]
+            conn.execute(f"SAVEPOINT {SAVEPOINT}")
+            try:
+                result = run_operation(batch_conn, name, operation.get("payload", {}))
+            except Exception as exc:
+                conn.execute(f"ROLLBACK TO {SAVEPOINT}")
+                conn.execute(f"RELEASE {SAVEPOINT}")
+                failed += 1
+                if isinstance(exc, OperationError):
+                    error = str(exc)
+                else:
+                    error = f"{type(exc).__name__}: {exc}"
+                results.append({"index": index, "op": name, "error": error})
+                if not keep_going:
+                    break
+                continue
+            conn.execute(f"RELEASE {SAVEPOINT}")
+            results.append({"index": index, "op": name, "result": result})
+    except BaseException:
+        conn.rollback()
+        raise
+
+    committed = keep_going or failed == 0
+    if committed:
+        conn.commit()
+    else:
+        conn.rollback()
+
+    return {
+        "committed": committed,
+        "total": len(operations),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+
+
+def format_results(results, json_fmt=False):
+    """
+    Format the results of a batch as a summary that lists each operation that
+    failed, or as JSON.
+    """
+    if json_fmt:
+        return json.dumps(results, indent=2)
+
+    lines = [
+        f"operation {result['index']} ({result['op']}): {result['error']}"
+        for result in results["results"]
+        if "error" in result
+    ]
+    if results["committed"]:
+        lines.append(f"applied {results['succeeded']} of {results['total']} operations")
+    else:
+        lines.append(f"no operations were applied out of {results['total']}")
+
+    return "\n".join(lines)
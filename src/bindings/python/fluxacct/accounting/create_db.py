@@ -41,6 +41,21 @@ def set_half_life_period_end(conn, priority_decay_half_life=None):
     conn.commit()
 
 
+def create_jobs_indexes(conn):
+    """
+    Create the secondary indexes on the jobs table that don't already exist. The
+    jobs table only has a primary key on id, but job records are looked up by
+    association, bank, project, and start/end time.
+
+    Args:
+        conn: The SQLite Connection object.
+    """
+    for index, columns in fluxacct.accounting.JOBS_INDEXES.items():
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {index} ON jobs ({', '.join(columns)})"
+        )
+
+
 # pylint: disable=too-many-statements
 def create_db(
     filepath,
@@ -133,7 +148,8 @@ def create_db(
         """
             CREATE TABLE IF NOT EXISTS t_half_life_period_table (
                 cluster               tinytext DEFAULT 'cluster',
-                end_half_life_period  real     DEFAULT 0.0
+                end_half_life_period  real     DEFAULT 0.0,
+                epoch                 int(11)  DEFAULT 0    NOT NULL
 
         );"""
     )
@@ -186,7 +202,8 @@ def create_db(
     conn.commit()
 
     # Jobs Table
-    # stores job records for associations
+    # stores job records for associations; nnodes, ncores, and ngpus are counted
+    # from R when a job is inserted and are NULL for records that predate them
     LOGGER.info("Creating jobs table in DB...")
     conn.execute(
         """
@@ -202,10 +219,15 @@ def create_db(
                 project             text,
                 bank                text,
                 requested_duration  real       DEFAULT 0.0,
-                actual_duration     real       DEFAULT 0.0
+                actual_duration     real       DEFAULT 0.0,
+                nnodes              int(11),
+                ncores              int(11),
+                ngpus               int(11)
             );"""
     )
     LOGGER.info("Created jobs table successfully")
+    create_jobs_indexes(conn)
+    LOGGER.info("Created indexes on jobs table successfully")
 
     # Priority Factor Table
     # stores the weights for each priority factor to be used in the plugin
@@ -326,9 +348,95 @@ def create_db(
                 bank     tinytext              NOT NULL,
                 period   int(11)               NOT NULL,
                 value    real     DEFAULT 0.0,
+                epoch    int(11)  DEFAULT 0    NOT NULL,
                 PRIMARY KEY (username, bank, period)
             );"""
     )
     LOGGER.info("Created job_usage_per_association table successfully")
 
+    # Job Records Checkpoint Table
+    # stores the t_inactive and jobid of the last job record fetched from Flux and
+    # committed to the jobs table so that fetching job records can resume from it
+    LOGGER.info("Creating job_records_checkpoint_table in DB...")
+    conn.execute(
+        """
+            CREATE TABLE IF NOT EXISTS job_records_checkpoint_table (
+                cluster     tinytext  DEFAULT 'cluster'  PRIMARY KEY,
+                t_inactive  real      DEFAULT 0.0        NOT NULL,
+                jobid       integer   DEFAULT 0          NOT NULL
+            );"""
+    )
+    LOGGER.info("Created job_records_checkpoint_table successfully")
+
+    # Usage Rollup Table
+    # stores the usage of completed jobs added up per day (local midnight of the
+    # day a job completed), association, project, and job size (number of nodes)
+    # so that usage reports don't need to read every job record in the jobs table
+    LOGGER.info("Creating usage_rollup_table in DB...")
+    conn.execute(
+        """
+            CREATE TABLE IF NOT EXISTS usage_rollup_table (
+                day           real                    NOT NULL,
+                userid        integer                 NOT NULL,
+                bank          text     DEFAULT ''     NOT NULL,
+                project       text     DEFAULT ''     NOT NULL,
+                nnodes        int(11)                 NOT NULL,
+                node_seconds  real     DEFAULT 0.0    NOT NULL,
+                core_seconds  real     DEFAULT 0.0    NOT NULL,
+                gpu_seconds   real     DEFAULT 0.0    NOT NULL,
+                njobs         int(11)  DEFAULT 0      NOT NULL,
+                PRIMARY KEY   (day, userid, bank, project, nnodes)
+            );"""
+    )
+    LOGGER.info("Created usage_rollup_table successfully")
+
+    # Usage Rollup Checkpoint Table
+    # stores the t_inactive and id of the last job record in the jobs table that was
+    # added to usage_rollup_table
+    LOGGER.info("Creating usage_rollup_checkpoint_table in DB...")
+    conn.execute(
+        """
+            CREATE TABLE IF NOT EXISTS usage_rollup_checkpoint_table (
+                cluster     tinytext  DEFAULT 'cluster'  PRIMARY KEY,
+                t_inactive  real      DEFAULT 0.0        NOT NULL,
+                jobid       char(16)  DEFAULT ''         NOT NULL
+            );"""
+    )
+    LOGGER.info("Created usage_rollup_checkpoint_table successfully")
+
+    # Priority Push Table
+    # stores a digest of each association and each of the other tables last sent
+    # to the multi-factor priority plugin by flux account-priority-update
+    # --since-last-push
+    LOGGER.info("Creating priority_push_table in DB...")
+    conn.execute(
+        """
+            CREATE TABLE IF NOT EXISTS priority_push_table (
+                tbl     tinytext  NOT NULL,
+                key     text      NOT NULL,
+                digest  text      NOT NULL,
+                PRIMARY KEY (tbl, key)
+            );"""
+    )
+    LOGGER.info("Created priority_push_table successfully")
+
+    # Fair-Share Cache Table
+    # stores the shares, usage, weight, and sorted position of the children of
+    # each bank from the last run of flux account-update-fshare --incremental
+    LOGGER.info("Creating fshare_cache_table in DB...")
+    conn.execute(
+        """
+            CREATE TABLE IF NOT EXISTS fshare_cache_table (
+                bank       tinytext               NOT NULL,
+                name       tinytext               NOT NULL,
+                is_user    int(1)                 NOT NULL,
+                shares     int(11)   DEFAULT 1    NOT NULL,
+                job_usage  real      DEFAULT 0.0  NOT NULL,
+                weight     real      DEFAULT 0.0  NOT NULL,
+                position   int(11)                NOT NULL,
+                PRIMARY KEY (bank, name, is_user)
+            );"""
+    )
+    LOGGER.info("Created fshare_cache_table successfully")
+
     conn.close()
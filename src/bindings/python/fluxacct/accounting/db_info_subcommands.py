@@ -19,8 +19,24 @@ import fluxacct
 from fluxacct.accounting.util import with_cursor
 from fluxacct.accounting import formatter as fmt
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import job_usage_calculation as jobs
 from flux.util import parse_fsd
 
+# the queries that look up job records in the jobs table, as they are issued by
+# update_job_usage(), get_jobs(), scrub_old_jobs(), and
+# flux account-fetch-job-records
+JOBS_QUERIES = {
+    "update-usage": jobs.S_NEW_JOBS,
+    "jobs-by-user": "SELECT * FROM jobs WHERE userid = ?",
+    "jobs-by-bank": "SELECT * FROM jobs WHERE bank = ?",
+    "jobs-by-project": "SELECT * FROM jobs WHERE project = ?",
+    "jobs-after-start-time": "SELECT * FROM jobs WHERE t_run > ?",
+    "jobs-before-end-time": "SELECT * FROM jobs WHERE t_inactive < ?",
+    "scrub-old-jobs": "DELETE FROM jobs WHERE t_inactive < ?",
+    "last-job-record": "SELECT MAX(t_inactive) FROM jobs",
+}
+
 
 @with_cursor
 def reconfigure_usage_bins(conn, cursor):
@@ -66,15 +82,19 @@ def reconfigure_usage_bins(conn, cursor):
 
         # re-insert the correct number of period rows for every association
         # initialized to 0.0 under the new configuration
+        cursor.execute(
+            "SELECT epoch FROM t_half_life_period_table WHERE cluster='cluster'"
+        )
+        epoch = cursor.fetchone()[0]
         for username, userid, bank in associations:
             for period in range(new_num_periods):
                 cursor.execute(
                     """
                     INSERT INTO job_usage_per_association_table
-                    (username, userid, bank, period, value)
-                    VALUES (?, ?, ?, ?, 0.0)
+                    (username, userid, bank, period, value, epoch)
+                    VALUES (?, ?, ?, ?, 0.0, ?)
                     """,
-                    (username, userid, bank, period),
+                    (username, userid, bank, period, epoch - period),
                 )
 
         # reset last_job_timestamp for all associations so that update_job_usage()
@@ -246,8 +266,30 @@ def populate_db(conn, csv_file, columns_included=None):
         raise sqlite3.OperationalError(exc)
 
 
+def columnar(associations):
+    """
+    Convert a list of associations into the columnar encoding understood by the
+    priority plugin, which sends the field names once instead of once per
+    association.
+
+    Args:
+        associations: A list of association objects with the fields in
+            fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS.
+    Returns:
+        A dictionary with a "columns" list of field names and a "rows" list with the
+        values of each association in the same order.
+    """
+    fields = fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS
+    return {
+        "columns": fields,
+        "rows": [
+            [association[field] for field in fields] for association in associations
+        ],
+    }
+
+
 @with_cursor
-def export_as_json(conn, cursor):
+def export_as_json(conn, cursor, columnar_associations=False):
     """
     Return a JSON object of certain tables in the flux-accounting database, which can
     be used to initialize the multi-factor priority plugin.
@@ -255,6 +297,8 @@ def export_as_json(conn, cursor):
     Args:
         conn: A SQLite connection object.
         cursor: A SQLite cursor object.
+        columnar_associations: Export associations in the columnar encoding instead
+            of as a list of objects.
     Returns:
         A JSON string containing flux-accounting database information.
     """
@@ -291,7 +335,9 @@ def export_as_json(conn, cursor):
         }
         associations.append(association)
 
-    config["associations"] = associations
+    config["associations"] = (
+        columnar(associations) if columnar_associations else associations
+    )
 
     # fetch all rows from queue_table
     for row in cursor.execute("SELECT * FROM queue_table"):
@@ -412,6 +458,12 @@ def edit_config(conn, cursor, key_value_strings):
                     "decay_factor must be a floating-point value between 0 and 1"
                 )
             requires_rebin = True
+        if key == "usage_period_layout":
+            # the usage periods have to be converted along with this key
+            raise ValueError(
+                "usage_period_layout can only be changed with "
+                "flux account-update-db --ring-buffer-usage"
+            )
         if key == "deny_unknown_queues":
             # ensure value is exactly "true" or "false" (case-insensitive)
             if value.lower() not in ["true", "false"]:
@@ -444,6 +496,7 @@ def delete_config(conn, cursor, key):
         "core_weight",
         "gpu_weight",
         "deny_unknown_queues",
+        "usage_period_layout",
     ]:
         raise ValueError(
             "key-value pair is not allowed to be removed from config_table"
@@ -488,3 +541,65 @@ def list_configs(conn, cursor, cols=None, json_fmt=False, format_string=""):
     if json_fmt:
         return formatter.as_json()
     return formatter.as_table()
+
+
+@with_cursor
+def view_jobs_indexes(conn, cursor, json_fmt=False):
+    """
+    List the secondary indexes on the jobs table and the query plan SQLite uses for
+    each of the queries in JOBS_QUERIES.
+
+    Args:
+        json_fmt: Print output in JSON format.
+    """
+    cursor.execute("PRAGMA index_list(jobs)")
+    existing = {row[1] for row in cursor.fetchall()}
+    indexes = [
+        {"name": index, "columns": columns, "exists": index in existing}
+        for index, columns in fluxacct.accounting.JOBS_INDEXES.items()
+    ]
+
+    plans = {}
+    for query, stmt in JOBS_QUERIES.items():
+        # the query plan does not depend on the values of the parameters
+        cursor.execute(f"EXPLAIN QUERY PLAN {stmt}", (None,) * stmt.count("?"))
+        plans[query] = [row[3] for row in cursor.fetchall()]
+
+    if json_fmt:
+        return json.dumps({"indexes": indexes, "queries": plans}, indent=2)
+
+    lines = ["indexes on jobs table:"]
+    for index in indexes:
+        missing = "" if index["exists"] else " [missing]"
+        lines.append(f"  {index['name']} ({', '.join(index['columns'])}){missing}")
+    lines.append("query plans:")
+    for query, plan in plans.items():
+        lines.append(f"  {query}")
+        lines.extend(f"    {detail}" for detail in plan)
+
+    return "\n".join(lines)
+
+
+@with_cursor
+def rebuild_jobs_indexes(conn, cursor):
+    """
+    Create any missing secondary indexes on the jobs table and rebuild all of the
+    indexes on the jobs table.
+    """
+    c.create_jobs_indexes(conn)
+    cursor.execute("REINDEX jobs")
+    conn.commit()
+
+    return 0
+
+
+@with_cursor
+def analyze_jobs_table(conn, cursor):
+    """
+    Gather statistics about the jobs table and its indexes so that the query
+    planner can choose the best index for each query.
+    """
+    cursor.execute("ANALYZE jobs")
+    conn.commit()
+
+    return 0
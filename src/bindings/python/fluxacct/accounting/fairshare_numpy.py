@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import sys
+
+import numpy as np
+
+from fluxacct.accounting.fairshare_emulator import FairShareNode
+
+
+def is_equal(val_a, val_b):
+    """Element-wise floating-point equality check of FairShareNode.is_equal()."""
+    threshold = sys.float_info.epsilon * np.maximum(
+        np.abs(val_a), np.maximum(np.abs(val_b), 1.0)
+    )
+    return np.abs(val_a - val_b) < threshold
+
+
+class NumPyFairShareCalculator:
+    """
+    Array-backed implementation of the weighted tree fair-share algorithm with
+    the same interface as FairShareCalculator. It produces the same fair-share
+    values as weighted_walk.cpp, down to the bit, including where
+    FairShareCalculator does not: usage is summed across siblings as an
+    unsigned integer, users are ordered before banks of equal weight, and the
+    children of tied banks are merged at every level of the hierarchy.
+
+    The hierarchy is stored in breadth-first order as parent-index and level
+    arrays, so the children of each node are contiguous and in the order they
+    were added. Sibling sums are segmented reductions over those arrays, and
+    instead of walking the tree, each level is sorted at once with np.lexsort:
+    the children of banks that tie with each other are sorted together, as if
+    they had one parent, which is what the walk does by merging them into a
+    virtual node. The users are then put in the order the walk visits them by
+    sorting on the position of each of their ancestors, and the ranks of users
+    that tie are assigned in one pass.
+
+    Args:
+        root: The root FairShareNode of the hierarchy.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        nodes = [root]
+        parent = [-1]
+        level = [0]
+        i = 0
+        while i < len(nodes):
+            for child in nodes[i].children:
+                nodes.append(child)
+                parent.append(i)
+                level.append(level[i] + 1)
+            i += 1
+
+        self.nodes = nodes
+        self.parent = np.array(parent, dtype=np.int64)
+        self.level = np.array(level, dtype=np.int64)
+        self.shares = np.array([node.shares for node in nodes], dtype=np.int64)
+        self.usage = np.array([node.usage for node in nodes], dtype=np.float64)
+        self.is_user = np.array([node.is_user for node in nodes], dtype=bool)
+        self.weight = np.zeros(len(nodes), dtype=np.float64)
+        self.users = []
+
+    def calculate(self):
+        """
+        Calculate fair-share values for all users in the tree and return the users
+        in the order the walk visits them, i.e. from highest fair-share to lowest.
+        """
+        users = np.flatnonzero(self.is_user)
+        if len(users) == 0:
+            return []
+
+        self._calculate_weights()
+        visit_order, tie_with_next = self._sort_levels()
+
+        # rank starts at total_users for the highest priority user; tied users
+        # all get the rank of the first user they are tied with
+        total_users = len(users)
+        users = users[visit_order]
+        tie_with_next = tie_with_next[users]
+        positions = np.arange(total_users)
+        starts = np.concatenate(([True], ~tie_with_next[:-1]))
+        tie_start = np.maximum.accumulate(np.where(starts, positions, 0))
+        fairshare = (total_users - tie_start).astype(np.float64) / float(total_users)
+
+        self.users = [self.nodes[i] for i in users.tolist()]
+        for node, value in zip(self.users, fairshare.tolist()):
+            node.fairshare = value
+
+        return self.users
+
+    def _sibling_usage_sums(self, usage, starts, lengths):
+        """
+        Sum usage across each group of siblings the way weighted_tree.cpp does:
+        the running sum is an unsigned integer, so it is truncated after each
+        child's usage is added to it.
+        """
+        truncated = np.trunc(usage).astype(np.int64)
+        running = np.cumsum(truncated)
+        sums = running[starts + lengths - 1] - running[starts] + truncated[starts]
+        # the sum before each child is added; adding the truncated usage to it
+        # is only the same as truncating the sum if the sum is exact
+        before = (
+            running
+            - truncated
+            - np.repeat(running[starts] - truncated[starts], lengths)
+        )
+        inexact = np.trunc(before.astype(np.float64) + usage) != (before + truncated)
+        for seg in np.unique(np.repeat(np.arange(len(starts)), lengths)[inexact]):
+            total = 0
+            for value in usage[starts[seg] : starts[seg] + lengths[seg]].tolist():
+                total = int(float(total) + value)
+            sums[seg] = total
+
+        return sums
+
+    def _calculate_weights(self):
+        """Calculate the weight of every node but the root from its siblings."""
+        if len(self.nodes) < 2:
+            return
+        # every node but the root, grouped by parent
+        parent = self.parent[1:]
+        shares = self.shares[1:]
+        usage = self.usage[1:]
+        starts = np.flatnonzero(np.concatenate(([True], parent[1:] != parent[:-1])))
+        lengths = np.diff(np.concatenate((starts, [len(parent)])))
+
+        shares_sum = np.repeat(np.add.reduceat(shares, starts), lengths)
+        usage_sum = np.repeat(self._sibling_usage_sums(usage, starts, lengths), lengths)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s_weight = shares.astype(np.float64) / shares_sum.astype(np.float64)
+            u_weight = usage / usage_sum.astype(np.float64)
+            weight = s_weight / u_weight
+        # zero usage gives the highest weight
+        weight = np.where(
+            np.abs(usage) < FairShareNode.EPSILON,
+            float(FairShareNode.MAX_UINT64) + 1.0,
+            weight,
+        )
+        self.weight[1:] = np.where(shares == 0, 0.0, weight)
+
+    def _sort_levels(self):
+        """
+        Sort the children of each group of siblings by weight, one level at a
+        time, and return the order in which the walk visits the users along with
+        whether each node is tied with the next one.
+        """
+        num_nodes = len(self.nodes)
+        depth = int(self.level.max())
+        tie_with_next = np.zeros(num_nodes, dtype=bool)
+        # the group that the children of each bank are sorted in; banks that tie
+        # share a group
+        group = np.zeros(num_nodes, dtype=np.int64)
+        # the position of each node's ancestors (and its own) at each level
+        keys = np.full((depth + 1, num_nodes), -1, dtype=np.int64)
+        keys[0, 0] = 0
+
+        level_starts = np.searchsorted(self.level, np.arange(depth + 2))
+        for lvl in range(1, depth + 1):
+            idx = np.arange(level_starts[lvl], level_starts[lvl + 1])
+            parent_group = group[self.parent[idx]]
+            weight = self.weight[idx]
+            is_bank = ~self.is_user[idx]
+
+            # sort by weight, highest first, then put users before banks among
+            # weights that are equal
+            order = np.lexsort((is_bank, -weight, parent_group))
+            same_group = parent_group[order][1:] == parent_group[order][:-1]
+            equal = same_group & is_equal(weight[order][:-1], weight[order][1:])
+            cluster = np.concatenate(([0], np.cumsum(~equal)))
+            order = order[np.lexsort((-weight[order], is_bank[order], cluster))]
+
+            nodes = idx[order]
+            weight = weight[order]
+            is_bank = is_bank[order]
+            parent_group = parent_group[order]
+            positions = np.arange(len(nodes))
+
+            # only siblings of the same type tie
+            tied = (
+                (parent_group[1:] == parent_group[:-1])
+                & (is_bank[1:] == is_bank[:-1])
+                & is_equal(weight[:-1], weight[1:])
+            )
+            tie_with_next[nodes[:-1]] = tied
+            # a bank that ties with the bank before it joins its group
+            starts = np.concatenate(([True], ~(tied & is_bank[:-1])))
+            group[nodes] = np.maximum.accumulate(np.where(starts, positions, 0))
+
+            keys[:lvl, nodes] = keys[:lvl, self.parent[nodes]]
+            keys[lvl, nodes] = np.where(is_bank, group[nodes], positions)
+
+        users = np.flatnonzero(self.is_user)
+        visit_order = np.lexsort(keys[::-1][:, users])
+
+        return visit_order, tie_with_next
@@ -10,6 +10,7 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import time
+import math
 import logging
 import sqlite3
 from collections import defaultdict
@@ -26,6 +27,28 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# fetch the jobs that completed after the last completed job of each association;
+# this is served by the idx_jobs_userid_bank_t_inactive index on the jobs table
+S_NEW_JOBS = """
+    SELECT r.userid,r.id,r.t_submit,r.t_run,r.t_inactive,r.ranks,r.R,r.jobspec,
+    r.project,r.bank,r.requested_duration,r.actual_duration,r.nnodes,r.ncores,
+    r.ngpus,b.ignore_older_than
+    FROM jobs r LEFT JOIN job_usage_factor_table j
+    ON r.userid = j.userid AND r.bank = j.bank
+    LEFT JOIN bank_table b
+    ON r.bank = b.bank WHERE r.t_inactive > j.last_job_timestamp
+    AND r.t_inactive > b.ignore_older_than
+    AND r.t_inactive > ?
+"""
+
+# the columns of the jobs table that add_to_usage_rollup() reads; R is only
+# selected for job records inserted before resource counts were stored
+S_ROLLUP_JOBS = """
+    SELECT userid, bank, project, t_run, t_inactive, nnodes, ncores, ngpus,
+    CASE WHEN nnodes IS NULL OR ncores IS NULL OR ngpus IS NULL THEN R END
+    FROM jobs
+    """
+
 
 def update_t_inactive(acct_conn, last_t_inactive, user, bank):
     """
@@ -98,6 +121,21 @@ def get_usage_weights(cur):
     )
 
 
+def get_decay_factor(cur):
+    """
+    Fetch the decay factor applied to usage periods with a fallback default.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        float: The decay factor, or 0.5 if it is not configured.
+    """
+    cur.execute("SELECT value FROM config_table WHERE key='decay_factor'")
+    row = cur.fetchone()
+    return float(row[0]) if row else 0.5
+
+
 def apply_decay_factor(acct_conn, user, bank, userid):
     """
     Apply a decay factor to an association's job usage period values. Since this helper
@@ -111,10 +149,7 @@ def apply_decay_factor(acct_conn, user, bank, userid):
         userid: The userid of the association.
     """
     cur = acct_conn.cursor()
-    cur.execute("SELECT value FROM config_table WHERE key='decay_factor'")
-    row = cur.fetchone()
-    # if decay_factor is not configured, fall back to 0.5
-    decay = float(row[0]) if row else 0.5
+    decay = get_decay_factor(cur)
 
     # fetch all periods ordered from oldest to most recent so we can shift
     # values forward without overwriting anything we haven't read yet
@@ -162,6 +197,66 @@ def apply_decay_factor(acct_conn, user, bank, userid):
     return result[0] if result[0] is not None else 0.0
 
 
+def sql_sum(values):
+    """
+    Add up a sequence of REAL values the same way SQLite's SUM() aggregate does.
+    SQLite 3.43.0 switched SUM() from naive summation to Kahan-Babuska-Neumaier
+    summation, so mirror whichever algorithm the linked SQLite library uses in order
+    for usage computed in Python to match usage computed with a SELECT SUM(...).
+
+    Args:
+        values: An iterable of floats.
+
+    Returns:
+        The sum of the values, or None if there were no values (like SUM()).
+    """
+    total = None
+    err = 0.0
+    for value in values:
+        if total is None:
+            total = 0.0
+        if sqlite3.sqlite_version_info < (3, 43, 0):
+            total += value
+            continue
+        tmp = total + value
+        if abs(total) > abs(value):
+            err += (total - tmp) + value
+        else:
+            err += (value - tmp) + total
+        total = tmp
+    if total is not None and sqlite3.sqlite_version_info >= (3, 43, 0):
+        if math.isfinite(err):
+            total += err
+    return total
+
+
+def sum_job_usage(user_jobs, node_weight, core_weight, gpu_weight):
+    """
+    Calculate the weighted usage of a list of new jobs for an association.
+
+    Args:
+        user_jobs: A list of JobRecord objects; sorted in place by t_inactive.
+        node_weight: The weight applied to the number of nodes used by a job.
+        core_weight: The weight applied to the number of cores used by a job.
+        gpu_weight: The weight applied to the number of GPUs used by a job.
+
+    Returns:
+        tuple: (usage of the jobs, t_inactive of the most recently completed job)
+    """
+    user_jobs.sort(key=lambda job: job.t_inactive)
+
+    per_job_factors = []
+    for job in user_jobs:
+        weighted_usage = (
+            (job.nnodes * node_weight)
+            + (job.ncores * core_weight)
+            + (job.ngpus * gpu_weight)
+        ) * job.elapsed
+        per_job_factors.append(round(weighted_usage, 5))
+
+    return sum(per_job_factors), user_jobs[-1].t_inactive
+
+
 def calc_usage_factor(
     conn,
     pdhl,
@@ -195,19 +290,9 @@ def calc_usage_factor(
     usg_current = 0.0
 
     if len(user_jobs) > 0:
-        user_jobs.sort(key=lambda job: job.t_inactive)
-
-        per_job_factors = []
-        for job in user_jobs:
-            weighted_usage = (
-                (job.nnodes * node_weight)
-                + (job.ncores * core_weight)
-                + (job.ngpus * gpu_weight)
-            ) * job.elapsed
-            per_job_factors.append(round(weighted_usage, 5))
-
-        last_t_inactive = user_jobs[-1].t_inactive
-        usg_current = sum(per_job_factors)
+        usg_current, last_t_inactive = sum_job_usage(
+            user_jobs, node_weight, core_weight, gpu_weight
+        )
 
         update_t_inactive(conn, last_t_inactive, user, bank)
 
@@ -249,6 +334,515 @@ def calc_usage_factor(
     return usg_historical
 
 
+def fetch_usage_periods(cur):
+    """
+    Fetch every row in job_usage_per_association_table in one pass and group the rows
+    by association.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        dict: A mapping of (username, bank) to a list of (period, value, userid)
+            tuples ordered by period.
+    """
+    cur.execute(
+        """
+        SELECT username, bank, period, value, userid
+        FROM job_usage_per_association_table
+        ORDER BY username, bank, period
+        """
+    )
+    periods = defaultdict(list)
+    for row in cur.fetchall():
+        periods[(row[0], row[1])].append((row[2], row[3], row[4]))
+
+    return periods
+
+
+def decay_usage_periods(periods, userid, decay):
+    """
+    In-memory equivalent of apply_decay_factor(); shift every period value one period
+    back with the decay factor applied to it and reset period 0.
+
+    Args:
+        periods: A list of (period, value, userid) tuples for an association ordered
+            by period.
+        userid: The userid of the association.
+        decay: The decay factor applied to each period.
+
+    Returns:
+        tuple: (a dict of the new value for each period, the sum of all periods
+            excluding period 0)
+    """
+    # apply_decay_factor() only writes to rows whose userid matches the association
+    owned = {period for period, _, row_userid in periods if row_userid == userid}
+    values = {period: value for period, value, _ in periods}
+    for period, value, _ in periods:
+        if period + 1 in owned:
+            values[period + 1] = value * decay
+    if 0 in owned:
+        values[0] = 0.0
+
+    usg_past = sql_sum(
+        values[period]
+        for period, _, row_userid in periods
+        if period > 0 and row_userid == userid
+    )
+
+    return values, usg_past if usg_past is not None else 0.0
+
+
+def bulk_update_usage_factors(
+    conn,
+    pdhl,
+    end_hl,
+    associations,
+    association_jobs,
+    node_weight,
+    core_weight,
+    gpu_weight,
+):
+    """
+    Set-based equivalent of calling calc_usage_factor() for every association. All
+    period rows are loaded with a single query, the decay and current/historical
+    usage for every association is computed in memory, and the results are written
+    back with one executemany() per table. Since this function does not have a
+    .commit() call after the updates, it should be called inside of a SQLite
+    TRANSACTION.
+
+    Args:
+        conn: The SQLite Connection object.
+        pdhl: The PriorityDecayHalfLife, in seconds.
+        end_hl: The timestamp of the end of the current half-life period.
+        associations: The rows of association_table to update.
+        association_jobs: A mapping of (userid, bank) to a list of new jobs.
+        node_weight: The weight applied to the number of nodes used by a job.
+        core_weight: The weight applied to the number of cores used by a job.
+        gpu_weight: The weight applied to the number of GPUs used by a job.
+    """
+    cur = conn.cursor()
+    decay = get_decay_factor(cur)
+
+    all_periods = fetch_usage_periods(cur)
+    now = time.time()
+
+    timestamps = []
+    period_values = []
+    current_values = []
+    historical_values = []
+    for assoc in associations:
+        user, bank, userid = assoc["username"], assoc["bank"], assoc["userid"]
+        user_jobs = association_jobs[(userid, bank)]
+        periods = all_periods.get((user, bank), [])
+        usage_factors = [value for _, value, _ in periods]
+
+        last_t_inactive = 0.0
+        usg_current = 0.0
+        if len(user_jobs) > 0:
+            usg_current, last_t_inactive = sum_job_usage(
+                user_jobs, node_weight, core_weight, gpu_weight
+            )
+            timestamps.append((last_t_inactive, user, bank))
+
+        if len(user_jobs) == 0 and (float(end_hl) > (now - pdhl)):
+            # no new jobs in the current half-life period; nothing to write
+            continue
+        if len(user_jobs) == 0 and (float(end_hl) < (now - pdhl)):
+            # no new jobs in the new half-life period; decay past usage periods
+            decayed, usg_historical = decay_usage_periods(periods, userid, decay)
+        elif (last_t_inactive - float(end_hl)) < pdhl:
+            # found new jobs in the current half-life period
+            usg_current += usage_factors[0]
+            usg_historical = usg_current + sum(usage_factors[1:])
+            decayed = {}
+        else:
+            # found new jobs in the new half-life period
+            decayed, usg_past = decay_usage_periods(periods, userid, decay)
+            usg_historical = usg_current + usg_past
+            usg_current = usg_historical
+
+        period_values.extend(
+            (value, user, bank, period)
+            for period, value in decayed.items()
+            if period > 0
+        )
+        current_values.append((user, userid, bank, 0, usg_current))
+        historical_values.append((usg_historical, user, bank))
+
+    cur.executemany(
+        """
+        UPDATE job_usage_factor_table SET last_job_timestamp=? WHERE username=? AND bank=?
+        """,
+        timestamps,
+    )
+    cur.executemany(
+        """
+        UPDATE job_usage_per_association_table SET value=?
+        WHERE username=? AND bank=? AND period=?
+        """,
+        period_values,
+    )
+    cur.executemany(
+        """
+        INSERT INTO job_usage_per_association_table (username, userid, bank, period, value)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (username, bank, period) DO UPDATE SET value=excluded.value
+        """,
+        current_values,
+    )
+    cur.executemany(
+        "UPDATE association_table SET job_usage=? WHERE username=? AND bank=?",
+        historical_values,
+    )
+
+
+def uses_ring_buffer(cur):
+    """
+    Check how the usage periods in job_usage_per_association_table are stored. By
+    default, the period column is the age of the period and every value is shifted
+    back one period when a half-life boundary passes. Once a DB has been migrated
+    with convert_to_ring_buffer(), every row is instead a slot in a ring buffer that
+    is tagged with the absolute half-life epoch it holds usage for, and decay is
+    applied when the value is read.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        bool: True if the usage periods are stored as a ring buffer.
+    """
+    cur.execute("SELECT value FROM config_table WHERE key='usage_period_layout'")
+    row = cur.fetchone()
+    return row is not None and row[0] == "ring"
+
+
+def get_half_life_epoch(cur):
+    """Return the number of half-life boundaries that have passed."""
+    cur.execute("SELECT epoch FROM t_half_life_period_table WHERE cluster='cluster'")
+    row = cur.fetchone()
+    return row[0] if row is not None else 0
+
+
+def decay_value(value, decay, age):
+    """
+    Decay a usage value that is age half-life periods old. The decay factor is
+    applied once per period, the same way the default layout applies it each time
+    a half-life boundary passes, so that both layouts give identical values.
+    """
+    for _ in range(age):
+        value *= decay
+
+    return value
+
+
+def fetch_ring_slots(cur):
+    """
+    Fetch every row in job_usage_per_association_table in one pass and group the
+    ring buffer slots by association.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        dict: A mapping of (username, bank) to a list of (slot, value, epoch) tuples
+            ordered by slot.
+    """
+    cur.execute(
+        """
+        SELECT username, bank, period, value, epoch
+        FROM job_usage_per_association_table
+        ORDER BY username, bank, period
+        """
+    )
+    slots = defaultdict(list)
+    for row in cur.fetchall():
+        slots[(row[0], row[1])].append((row[2], row[3], row[4]))
+
+    return slots
+
+
+def ring_usage_factors(slots, epoch, decay):
+    """
+    Lazily decay the values stored in an association's ring buffer.
+
+    Args:
+        slots: A list of (slot, value, epoch) tuples for an association.
+        epoch: The half-life epoch the values should be decayed to.
+        decay: The decay factor applied to each period.
+
+    Returns:
+        list: The decayed usage for each period, where index 0 is the usage for
+            the half-life period of the passed-in epoch. Periods without a slot
+            (or whose slot has aged out of the ring) have no usage.
+    """
+    factors = [0.0] * len(slots)
+    for _, value, row_epoch in slots:
+        age = epoch - row_epoch
+        if 0 <= age < len(slots):
+            factors[age] = decay_value(value, decay, age)
+
+    return factors
+
+
+def ring_association_usage(
+    slots, num_jobs, usg_current, last_t_inactive, end_hl, pdhl, now, epoch, decay
+):
+    """
+    Calculate the usage to write for one association in ring_update_usage_factors().
+
+    Args:
+        slots: A list of (slot, value, epoch) tuples for the association.
+        num_jobs: The number of new jobs the association has.
+        usg_current: The usage of the association's new jobs.
+        last_t_inactive: The t_inactive of the association's last new job.
+        end_hl: The timestamp of the end of the current half-life period.
+        pdhl: The PriorityDecayHalfLife, in seconds.
+        now: The current timestamp.
+        epoch: The current half-life epoch.
+        decay: The decay factor applied to each period.
+
+    Returns:
+        tuple: (usg_epoch, usg_current, usg_historical), where usg_epoch is the
+            epoch the association's past usage periods are decayed to and
+            usg_current is the value of the slot for the current period; both are
+            None if only the historical usage needs to be written. None is
+            returned if there is nothing to write.
+    """
+    if num_jobs == 0 and (float(end_hl) > (now - pdhl)):
+        # no new jobs in the current half-life period; nothing to write
+        return None
+    if num_jobs == 0 and (float(end_hl) < (now - pdhl)):
+        # no new jobs in the new half-life period; the epoch bump decays every
+        # past usage period, so only the historical usage needs to be written
+        factors = ring_usage_factors(slots, epoch + 1, decay)
+        usg_past = sql_sum(factors[1:])
+        return None, None, usg_past if usg_past is not None else 0.0
+    if (last_t_inactive - float(end_hl)) < pdhl:
+        # found new jobs in the current half-life period; past usage periods
+        # are not decayed for this association
+        factors = ring_usage_factors(slots, epoch, decay)
+        usg_current += factors[0] if factors else 0.0
+        return epoch, usg_current, usg_current + sum(factors[1:])
+
+    # found new jobs in the new half-life period; past usage periods are decayed
+    # once
+    factors = ring_usage_factors(slots, epoch + 1, decay)
+    usg_past = sql_sum(factors[1:])
+    usg_historical = usg_current + (usg_past if usg_past is not None else 0.0)
+    return epoch + 1, usg_historical, usg_historical
+
+
+def ring_update_usage_factors(
+    conn,
+    pdhl,
+    end_hl,
+    associations,
+    association_jobs,
+    node_weight,
+    core_weight,
+    gpu_weight,
+):
+    """
+    Ring buffer equivalent of bulk_update_usage_factors(). A half-life boundary does
+    not rewrite any period rows; check_end_hl() bumps the epoch in
+    t_half_life_period_table and every value stored for an older epoch is decayed
+    once more the next time it is read. Only the slot for the current epoch is
+    written. Since this function does not have a .commit() call after the updates,
+    it should be called inside of a SQLite TRANSACTION.
+
+    Args:
+        conn: The SQLite Connection object.
+        pdhl: The PriorityDecayHalfLife, in seconds.
+        end_hl: The timestamp of the end of the current half-life period.
+        associations: The rows of association_table to update.
+        association_jobs: A mapping of (userid, bank) to a list of new jobs.
+        node_weight: The weight applied to the number of nodes used by a job.
+        core_weight: The weight applied to the number of cores used by a job.
+        gpu_weight: The weight applied to the number of GPUs used by a job.
+    """
+    cur = conn.cursor()
+    decay = get_decay_factor(cur)
+
+    all_slots = fetch_ring_slots(cur)
+    now = time.time()
+    epoch = get_half_life_epoch(cur)
+    # check_end_hl() will move to the next epoch at the end of this update
+    crossed = float(end_hl) < (now - pdhl)
+    current_epoch = epoch + 1 if crossed else epoch
+
+    timestamps = []
+    epoch_shifts = []
+    slot_values = []
+    new_slots = []
+    historical_values = []
+    for assoc in associations:
+        user, bank, userid = assoc["username"], assoc["bank"], assoc["userid"]
+        user_jobs = association_jobs[(userid, bank)]
+        slots = all_slots.get((user, bank), [])
+
+        last_t_inactive = 0.0
+        usg_current = 0.0
+        if len(user_jobs) > 0:
+            usg_current, last_t_inactive = sum_job_usage(
+                user_jobs, node_weight, core_weight, gpu_weight
+            )
+            timestamps.append((last_t_inactive, user, bank))
+
+        usage = ring_association_usage(
+            slots,
+            len(user_jobs),
+            usg_current,
+            last_t_inactive,
+            end_hl,
+            pdhl,
+            now,
+            epoch,
+            decay,
+        )
+        if usage is None:
+            continue
+        usg_epoch, usg_current, usg_historical = usage
+        if usg_epoch is None:
+            historical_values.append((usg_historical, user, bank))
+            continue
+
+        if usg_epoch != current_epoch:
+            # the association's past usage was decayed a different number of times
+            # than the epoch moves; shift its slots so they keep the same age
+            epoch_shifts.append((current_epoch - usg_epoch, user, bank))
+
+        if not slots:
+            new_slots.append((user, userid, bank, 0, usg_current, current_epoch))
+            historical_values.append((usg_historical, user, bank))
+            continue
+        # reuse the slot that already holds the current period, falling back to
+        # the oldest slot in the ring
+        slot = min(
+            slots,
+            key=lambda s, e=usg_epoch: (s[2] != e, s[2]),
+        )[0]
+        slot_values.append((usg_current, current_epoch, user, bank, slot))
+        historical_values.append((usg_historical, user, bank))
+
+    cur.executemany(
+        """
+        UPDATE job_usage_factor_table SET last_job_timestamp=? WHERE username=? AND bank=?
+        """,
+        timestamps,
+    )
+    cur.executemany(
+        """
+        UPDATE job_usage_per_association_table SET epoch=epoch+?
+        WHERE username=? AND bank=?
+        """,
+        epoch_shifts,
+    )
+    cur.executemany(
+        """
+        UPDATE job_usage_per_association_table SET value=?, epoch=?
+        WHERE username=? AND bank=? AND period=?
+        """,
+        slot_values,
+    )
+    cur.executemany(
+        """
+        INSERT INTO job_usage_per_association_table
+        (username, userid, bank, period, value, epoch)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        new_slots,
+    )
+    cur.executemany(
+        "UPDATE association_table SET job_usage=? WHERE username=? AND bank=?",
+        historical_values,
+    )
+
+
+def view_ring_usage_periods(conn, cur, user):
+    """
+    Select the job usage periods for a user's associations from a ring buffer in the
+    same shape as the default layout: one row per period, where the period is the
+    age of the usage and the value has been decayed. Slots that have aged out of the
+    ring are left out.
+
+    Args:
+        conn: The SQLite Connection object.
+        cur: The SQLite Cursor object to run the SELECT on.
+        user: The username of the associations.
+    """
+    decay = get_decay_factor(cur)
+    conn.create_function(
+        "usage_decay", 2, lambda value, age: decay_value(value, decay, age)
+    )
+
+    cur.execute(
+        """
+        SELECT username, userid, bank, period, usage_decay(value, period) AS value
+        FROM (
+            SELECT username, userid, bank, value, ? - epoch AS period,
+                   COUNT(*) OVER (PARTITION BY username, bank) AS num_periods
+            FROM job_usage_per_association_table
+            WHERE username=?
+        )
+        WHERE period >= 0 AND period < num_periods
+        ORDER BY bank, period
+        """,
+        (get_half_life_epoch(cur), user),
+    )
+
+
+@with_cursor
+def convert_to_ring_buffer(conn, cur):
+    """
+    Convert the usage periods in job_usage_per_association_table from the default
+    layout to a ring buffer. Each row keeps its slot and is tagged with the epoch of
+    the half-life period it holds usage for; its value is stored with the decay it
+    has accumulated so far divided back out so that reading it at the current epoch
+    gives the same value as before. Converting a DB that already uses a ring buffer
+    does nothing.
+
+    Args:
+        conn: The SQLite Connection object.
+        cur: The SQLite Cursor object.
+
+    Returns:
+        int: The number of rows converted.
+    """
+    if uses_ring_buffer(cur):
+        return 0
+
+    decay = get_decay_factor(cur)
+    epoch = get_half_life_epoch(cur)
+
+    cur.execute(
+        "SELECT username, bank, period, value FROM job_usage_per_association_table"
+    )
+    rows = [
+        (
+            value / decay**period if period == 0 or decay > 0 else 0.0,
+            epoch - period,
+            username,
+            bank,
+            period,
+        )
+        for username, bank, period, value in cur.fetchall()
+    ]
+    cur.executemany(
+        """
+        UPDATE job_usage_per_association_table SET value=?, epoch=?
+        WHERE username=? AND bank=? AND period=?
+        """,
+        rows,
+    )
+    cur.execute(
+        "INSERT INTO config_table (key, value) VALUES ('usage_period_layout', 'ring') "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+    )
+
+    return len(rows)
+
+
 def check_end_hl(acct_conn, pdhl):
     hl_period = pdhl
 
@@ -265,65 +859,76 @@ def check_end_hl(acct_conn, pdhl):
     end_hl = row[0]
 
     if float(end_hl) < (time.time() - hl_period):
-        # update new end of half-life period timestamp
+        # update new end of half-life period timestamp and move on to the next
+        # half-life epoch
         update_timestamp_stmt = """
             UPDATE t_half_life_period_table
-            SET end_half_life_period=?
+            SET end_half_life_period=?, epoch=epoch+1
             WHERE cluster='cluster'
             """
         acct_conn.execute(update_timestamp_stmt, ((float(end_hl) + hl_period),))
 
 
-def calc_bank_usage(cur, bank):
-    # fetch the job_usage value for every user under the passed-in bank
-    s_associations = "SELECT job_usage FROM association_table WHERE bank=?"
-    cur.execute(s_associations, (bank,))
-    job_usage_list = cur.fetchall()
-
-    total_usage = 0.0
-    if job_usage_list:
-        # aggregate job usage for bank
-        for job_usage in job_usage_list:
-            total_usage += job_usage[0]
-
-    # update the bank_table with the total job usage for the bank
-    u_job_usage = "UPDATE bank_table SET job_usage=? WHERE bank=?"
-    cur.execute(
-        u_job_usage,
-        (
-            total_usage,
-            bank,
-        ),
-    )
-
-    return total_usage
-
-
-def calc_parent_bank_usage(acct_conn, cur, bank):
-    # find all sub-banks of the current bank
-    cur.execute("SELECT bank FROM bank_table WHERE parent_bank=?", (bank,))
-    sub_banks = cur.fetchall()
+def rollup_bank_usage(cur):
+    """
+    Update the job usage of every bank in the hierarchy under the root bank. A bank
+    with no sub banks gets the total job usage of its associations and every other
+    bank gets the total job usage of its sub banks. The bank hierarchy and the job
+    usage of every association are loaded with two queries, the totals are added up
+    from the bottom of the hierarchy to the root bank, and every bank's job usage is
+    written with a single executemany(). Since this function does not have a
+    .commit() call after the updates, it should be called inside of a SQLite
+    TRANSACTION.
 
-    total_usage = 0.0
-    if len(sub_banks) == 0:
-        # we've reached a bank with no sub banks, so take the usage from that bank
-        # and add it to the total usage for the parent bank
-        total_usage = calc_bank_usage(cur, bank)
-    else:
-        # for each sub bank, keep traversing to find the usage for
-        # each bank with users in it
-        for sub_bank in sub_banks:
-            sub_usage = calc_parent_bank_usage(acct_conn, cur, sub_bank[0])
-            total_usage += sub_usage
+    Args:
+        cur: The SQLite Cursor object.
+    """
+    cur.execute("SELECT bank_id, bank, parent_bank FROM bank_table ORDER BY bank_id")
+    sub_banks = defaultdict(list)
+    for bank_id, bank, parent_bank in cur.fetchall():
+        sub_banks[parent_bank].append((bank_id, bank))
+    if not sub_banks[""]:
+        # there is no root bank in the hierarchy
+        return
+
+    cur.execute("SELECT bank, job_usage FROM association_table ORDER BY rowid")
+    association_usage = defaultdict(list)
+    for bank, job_usage in cur.fetchall():
+        association_usage[bank].append(job_usage)
+
+    # walk the hierarchy depth-first from the root bank so that a bank's total is
+    # added up after the totals of all of its sub banks; totals are added up in the
+    # order the rows are stored in
+    bank_usage = {}
+    updates = []
+    stack = [(sub_banks[""][0], False)]
+    while stack:
+        (bank_id, bank), visited = stack.pop()
+        if not visited:
+            stack.append(((bank_id, bank), True))
+            stack.extend((sub_bank, False) for sub_bank in reversed(sub_banks[bank]))
+            continue
+        if sub_banks[bank]:
+            usage = [bank_usage[sub_bank] for sub_bank, _ in sub_banks[bank]]
+        else:
+            usage = association_usage[bank]
+        bank_usage[bank_id] = sum(usage, 0.0)
+        updates.append((bank_usage[bank_id], bank_id))
 
-    # update the usage for this bank itself
-    u_job_usage = "UPDATE bank_table SET job_usage=? WHERE bank=?"
-    cur.execute(u_job_usage, (total_usage, bank))
+    cur.executemany("UPDATE bank_table SET job_usage=? WHERE bank_id=?", updates)
 
-    return total_usage
 
+def update_job_usage(acct_conn, bulk=False):
+    """
+    Update the job usage for every association and bank in the flux-accounting DB.
 
-def update_job_usage(acct_conn):
+    Args:
+        acct_conn: The SQLite Connection object.
+        bulk: Compute the usage for every association in memory and write it back
+            with a handful of bulk statements instead of issuing queries for each
+            association. Both modes produce identical results. A DB whose usage
+            periods are stored as a ring buffer is always updated in bulk.
+    """
     LOGGER.info(
         "beginning job-usage update for flux-accounting DB; "
         "slow response times may occur"
@@ -364,17 +969,7 @@ def update_job_usage(acct_conn):
         )
 
         # fetch new jobs for every association based on their last completed job
-        s_new_jobs = """
-            SELECT r.userid,r.id,r.t_submit,r.t_run,r.t_inactive,r.ranks,r.R,r.jobspec,
-            r.project,r.bank,r.requested_duration,r.actual_duration,b.ignore_older_than
-            FROM jobs r LEFT JOIN job_usage_factor_table j
-            ON r.userid = j.userid AND r.bank = j.bank
-            LEFT JOIN bank_table b
-            ON r.bank = b.bank WHERE r.t_inactive > j.last_job_timestamp
-            AND r.t_inactive > b.ignore_older_than
-            AND r.t_inactive > ?
-        """
-        cur.execute(s_new_jobs, (last_reconfigured,))
+        cur.execute(S_NEW_JOBS, (last_reconfigured,))
         new_jobs = cur.fetchall()
         new_job_records = j.convert_to_obj(new_jobs)
         # convert new jobs to a dictionary where they key is a tuple of the user ID and bank
@@ -392,31 +987,52 @@ def update_job_usage(acct_conn):
         )
 
         # update the job usage for every user in the association_table
-        for row in result:
-            calc_usage_factor(
+        if uses_ring_buffer(cur):
+            ring_update_usage_factors(
                 conn=acct_conn,
                 pdhl=pdhl,
-                user=row["username"],
-                bank=row["bank"],
-                userid=row["userid"],
                 end_hl=end_hl,
-                user_jobs=association_jobs[(row["userid"], row["bank"])],
+                associations=result,
+                association_jobs=association_jobs,
                 node_weight=node_weight,
                 core_weight=core_weight,
                 gpu_weight=gpu_weight,
             )
-
-        # find the root bank in the flux-accounting database
-        s_root_bank = "SELECT bank FROM bank_table WHERE parent_bank=''"
-        cur.execute(s_root_bank)
-        result = cur.fetchall()
-        parent_bank = result[0][0]  # store the name of the root bank
+        elif bulk:
+            bulk_update_usage_factors(
+                conn=acct_conn,
+                pdhl=pdhl,
+                end_hl=end_hl,
+                associations=result,
+                association_jobs=association_jobs,
+                node_weight=node_weight,
+                core_weight=core_weight,
+                gpu_weight=gpu_weight,
+            )
+        else:
+            for row in result:
+                calc_usage_factor(
+                    conn=acct_conn,
+                    pdhl=pdhl,
+                    user=row["username"],
+                    bank=row["bank"],
+                    userid=row["userid"],
+                    end_hl=end_hl,
+                    user_jobs=association_jobs[(row["userid"], row["bank"])],
+                    node_weight=node_weight,
+                    core_weight=core_weight,
+                    gpu_weight=gpu_weight,
+                )
 
         # update the job usage for every bank in the bank_table
-        calc_parent_bank_usage(acct_conn, cur, parent_bank)
+        rollup_bank_usage(cur)
 
         check_end_hl(acct_conn, pdhl)
 
+        # add the job records fetched since the last update to the daily usage
+        # rollup used for usage reports
+        update_usage_rollup(cur)
+
         LOGGER.info("job-usage update for flux-accounting DB now complete")
 
         return 0
@@ -433,6 +1049,10 @@ def scrub_old_jobs(conn, num_weeks=26):
     # (there are 604,800 seconds in a week)
     cutoff_time = time.time() - (num_weeks * 604800)
 
+    # make sure the usage of the jobs about to be removed is kept in the daily usage
+    # rollup used for usage reports
+    update_usage_rollup(cur)
+
     # fetch all jobs that finished before this time
     select_stmt = "DELETE FROM jobs WHERE t_inactive < ?"
     cur.execute(select_stmt, (cutoff_time,))
@@ -520,6 +1140,304 @@ def format_line(key, data, tunit, sizebins):
     return "{:<24s}{}\n".format(key, datastr)
 
 
+def day_start(timestamp):
+    """
+    Return the timestamp of the local midnight that starts the day timestamp falls
+    in.
+    """
+    return (
+        datetime.fromtimestamp(timestamp)
+        .replace(hour=0, minute=0, second=0, microsecond=0)
+        .timestamp()
+    )
+
+
+def next_day_start(timestamp):
+    """
+    Return the timestamp of the local midnight that starts the day after the day
+    timestamp falls in.
+    """
+    # a day is between 23 and 25 hours long, so 36 hours after midnight is always
+    # in the next day
+    return day_start(day_start(timestamp) + 36 * 60 * 60)
+
+
+def get_rollup_checkpoint(cur):
+    """
+    Return the (t_inactive, id) of the last job record in the jobs table that was
+    added to usage_rollup_table, or (0.0, "") if no job records have been added yet.
+    """
+    cur.execute(
+        "SELECT t_inactive, jobid FROM usage_rollup_checkpoint_table "
+        "WHERE cluster='cluster'"
+    )
+    row = cur.fetchone()
+
+    return (row[0], row[1]) if row is not None else (0.0, "")
+
+
+def set_rollup_checkpoint(cur, checkpoint):
+    cur.execute(
+        """
+        INSERT INTO usage_rollup_checkpoint_table (cluster, t_inactive, jobid)
+        VALUES ('cluster', ?, ?)
+        ON CONFLICT(cluster) DO UPDATE
+        SET t_inactive=excluded.t_inactive, jobid=excluded.jobid
+        """,
+        checkpoint,
+    )
+
+
+def get_last_job_key(cur):
+    """
+    Return the (t_inactive, id) of the last job record in the jobs table, or None
+    if the jobs table is empty.
+    """
+    cur.execute(
+        "SELECT t_inactive, id FROM jobs ORDER BY t_inactive DESC, id DESC LIMIT 1"
+    )
+    row = cur.fetchone()
+
+    return (row[0], row[1]) if row is not None else None
+
+
+def add_to_usage_rollup(cur, rows):
+    """
+    Add the usage of job records to usage_rollup_table. The resources of a job record
+    that was inserted before resource counts were stored are counted from its R; a
+    job record whose R can't be parsed is not added. Since this function does not
+    have a .commit() call after the updates, it should be called inside of a SQLite
+    TRANSACTION.
+
+    Args:
+        cur: The SQLite Cursor object.
+        rows: The job records to add, as selected by S_ROLLUP_JOBS. They are read
+            one at a time, so they can be an open cursor other than cur.
+
+    Returns:
+        The number of job records added to usage_rollup_table.
+    """
+    rollup = {}
+    num_jobs = 0
+    for row in rows:
+        userid, bank, project, t_run, t_inactive = row[0:5]
+        counts = row[5:8]
+        if None in counts:
+            counts = j.count_resources(row[8])
+            if counts is None:
+                # can't convert R to a ResourceSet object; skip this job
+                continue
+        nnodes, ncores, ngpus = counts
+        elapsed = t_inactive - t_run
+
+        key = (day_start(t_inactive), userid, bank or "", project or "", nnodes)
+        usage = rollup.setdefault(key, [0.0, 0.0, 0.0, 0])
+        usage[0] += nnodes * elapsed
+        usage[1] += ncores * elapsed
+        usage[2] += ngpus * elapsed
+        usage[3] += 1
+        num_jobs += 1
+
+    cur.executemany(
+        """
+        INSERT INTO usage_rollup_table
+        (day, userid, bank, project, nnodes, node_seconds, core_seconds, gpu_seconds,
+        njobs)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(day, userid, bank, project, nnodes) DO UPDATE SET
+        node_seconds=node_seconds+excluded.node_seconds,
+        core_seconds=core_seconds+excluded.core_seconds,
+        gpu_seconds=gpu_seconds+excluded.gpu_seconds,
+        njobs=njobs+excluded.njobs
+        """,
+        [(*key, *usage) for key, usage in rollup.items()],
+    )
+
+    return num_jobs
+
+
+def update_usage_rollup(cur):
+    """
+    Add the usage of every job record inserted into the jobs table since the last
+    update to usage_rollup_table. Job records are inserted in the order they became
+    inactive, so the (t_inactive, id) of the last one added is saved in
+    usage_rollup_checkpoint_table; unlike a rowid, it does not change when the jobs
+    table is vacuumed or recreated. Since this function does not have a .commit()
+    call after the updates, it should be called inside of a SQLite TRANSACTION.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        The number of job records added to usage_rollup_table.
+    """
+    last_job = get_last_job_key(cur)
+    if last_job is None:
+        return 0
+    t_inactive, jobid = get_rollup_checkpoint(cur)
+
+    rows = cur.connection.cursor()
+    rows.execute(
+        S_ROLLUP_JOBS + " WHERE t_inactive > ? OR (t_inactive = ? AND id > ?)",
+        (t_inactive, t_inactive, jobid),
+    )
+    num_jobs = add_to_usage_rollup(cur, rows)
+    set_rollup_checkpoint(cur, last_job)
+
+    return num_jobs
+
+
+def add_jobs_to_usage_rollup(cur, jobids):
+    """
+    Add job records that were inserted into the jobs table out of order, i.e. at or
+    before the rollup checkpoint, such as ones copied from another job archive, to
+    usage_rollup_table. The job records after the checkpoint are left for the next
+    update_usage_rollup(). Since this function does not have a .commit() call after
+    the updates, it should be called inside of a SQLite TRANSACTION.
+
+    Args:
+        cur: The SQLite Cursor object.
+        jobids: The IDs of the inserted job records.
+
+    Returns:
+        The number of job records added to usage_rollup_table.
+    """
+    t_inactive, jobid = get_rollup_checkpoint(cur)
+    num_jobs = 0
+    # stay under SQLite's limit on the number of parameters in a statement
+    for start in range(0, len(jobids), 500):
+        chunk = jobids[start : start + 500]
+        rows = cur.connection.cursor()
+        rows.execute(
+            S_ROLLUP_JOBS
+            + f" WHERE id IN ({', '.join('?' * len(chunk))}) "
+            + "AND (t_inactive < ? OR (t_inactive = ? AND id <= ?))",
+            (*chunk, t_inactive, t_inactive, jobid),
+        )
+        num_jobs += add_to_usage_rollup(cur, rows)
+
+    return num_jobs
+
+
+def fetch_report_usage(conn, start, end, user=None, bank=None):
+    """
+    Stream the job usage that counts towards a usage report, one
+    (username, bank, nnodes, node-seconds) tuple at a time, for the jobs that
+    completed at or after start and before end.
+
+    The usage of every whole day in the range is read from usage_rollup_table. The
+    rest of the range, along with any job records that haven't been added to
+    usage_rollup_table yet, is read from the jobs table one job at a time. Jobs are
+    counted by when they completed, no matter when they started, so a report is
+    the same whether or not its jobs have been added to usage_rollup_table. The
+    number of nodes of a job record that was inserted before resource counts were
+    stored is counted from its R, and a job whose R can't be parsed is skipped.
+    Usage without a bank, or whose username does not start with a letter or digit,
+    is skipped.
+
+    Args:
+        conn: The SQLite Connection object.
+        start: Only report jobs that completed at or after this timestamp.
+        end: Only report jobs that completed before this timestamp.
+        user: Only report jobs for a specific user.
+        bank: Only report jobs for a specific bank.
+    """
+    cur = conn.cursor()
+    filters = ""
+    filter_params = []
+    if user is not None:
+        filters += " AND userid = ?"
+        filter_params.append(j.get_userid(cur, user))
+    if bank is not None:
+        filters += " AND bank = ?"
+        filter_params.append(bank)
+
+    # the whole days in the range are [first_day, last_day)
+    first_day = start if day_start(start) == start else next_day_start(start)
+    last_day = day_start(end)
+
+    select_stmt = (
+        "SELECT userid, bank, nnodes, t_run, t_inactive, "
+        "CASE WHEN nnodes IS NULL THEN R END "
+        "FROM jobs WHERE t_inactive >= ? AND t_inactive < ?"
+    )
+    params = [start, end]
+    if first_day < last_day:
+        t_inactive, jobid = get_rollup_checkpoint(cur)
+        select_stmt += (
+            " AND (t_inactive < ? OR t_inactive >= ? OR t_inactive > ? "
+            "OR (t_inactive = ? AND id > ?))"
+        )
+        params += [first_day, last_day, t_inactive, t_inactive, jobid]
+    rows = cur.execute(select_stmt + filters, params + filter_params)
+
+    usernames = {}
+    for userid, job_bank, nnodes, t_run, t_inactive, r_spec in rows:
+        if not job_bank:
+            continue
+        if userid not in usernames:
+            usernames[userid] = util.get_username(userid)
+        username = usernames[userid]
+        if not username[:1].isalnum():
+            continue
+        if nnodes is None:
+            counts = j.count_resources(r_spec)
+            if counts is None:
+                # can't convert R to a ResourceSet object; skip this job
+                continue
+            nnodes = counts[0]
+
+        yield username, job_bank, nnodes, nnodes * (t_inactive - t_run)
+
+    if first_day >= last_day:
+        return
+
+    select_stmt = (
+        "SELECT userid, bank, nnodes, SUM(node_seconds) FROM usage_rollup_table "
+        "WHERE day >= ? AND day < ?"
+    )
+    rows = cur.execute(
+        select_stmt + filters + " GROUP BY userid, bank, nnodes",
+        [first_day, last_day] + filter_params,
+    )
+    for userid, job_bank, nnodes, node_seconds in rows:
+        if not job_bank:
+            continue
+        if userid not in usernames:
+            usernames[userid] = util.get_username(userid)
+        username = usernames[userid]
+        if not username[:1].isalnum():
+            continue
+
+        yield username, job_bank, nnodes, node_seconds
+
+
+def report_range(start=None, end=None):
+    """
+    Convert the start and end of a usage report to seconds-since-epoch timestamps.
+    The report defaults to the jobs that completed yesterday.
+
+    Args:
+        start: Start date in the following format: YY/MM/DD
+        end: End date in the following format: YY/MM/DD
+    """
+    if start:
+        start = util.parse_timestamp(start)
+    else:
+        # default to grabbing jobs from the last day
+        yesterday = datetime.now() - timedelta(days=1)
+        start = util.parse_timestamp(yesterday.strftime("%m/%d/%y"))
+
+    if end:
+        end = util.parse_timestamp(end)
+    else:
+        # default to grabbing jobs up until right now
+        today = datetime.now()
+        end = util.parse_timestamp(today.strftime("%m/%d/%y"))
+
+    return start, end
+
+
 def view_usage_report(
     conn,
     start=None,
@@ -545,20 +1463,7 @@ def view_usage_report(
         time_unit: The time unit used for calculating usage (per hour, minute, or
             second).
     """
-    if start:
-        start = util.parse_timestamp(start)
-    else:
-        # default to grabbing jobs from the last day
-        yesterday = datetime.now() - timedelta(days=1)
-        start = util.parse_timestamp(yesterday.strftime("%m/%d/%y"))
-
-    if end:
-        # end = process_timearg(end)
-        end = util.parse_timestamp(end)
-    else:
-        # default to grabbing jobs up until right now
-        today = datetime.now()
-        end = util.parse_timestamp(today.strftime("%m/%d/%y"))
+    start, end = report_range(start, end)
 
     # get job size bins
     sizebins = [0]
@@ -572,48 +1477,18 @@ def view_usage_report(
     total = {}
     ktotal = {}
 
-    result = j.view_jobs(
-        conn,
-        fields="{username} {bank} {nnodes} {t_run} {t_inactive}",
-        after_start_time=(start - 7 * 24 * 60 * 60),
-        before_end_time=end,
-        user=user,
-        bank=bank,
-    )
-
-    for i, line in enumerate(result.split("\n")):
-        if i == 0:
-            # skip header line
-            continue
-        if not line or not line[0].isalnum():
-            continue
-
-        parts = line.split()
-        if len(parts) < 5:
-            # could not find all necessary job attributes; skip this job
-            continue
-
-        username, bank, nnodes, t_run, t_inactive = (
-            parts[0],
-            parts[1],
-            parts[2],
-            parts[3],
-            parts[4],
-        )
-
-        nnodes = int(nnodes)
-        t_run = float(t_run)
-        t_inactive = float(t_inactive)
-
-        if t_inactive < start or t_inactive > end:
-            # job is outside of the set time range; skip this job
-            continue
-
-        association = f"{bank}:{username}"
-        key = get_key(association, report_type, username, bank)
+    keys = {}
+    for username, job_bank, nnodes, jobusage in fetch_report_usage(
+        conn, start, end, user, bank
+    ):
+        if (username, job_bank) not in keys:
+            association = f"{job_bank}:{username}"
+            keys[(username, job_bank)] = get_key(
+                association, report_type, username, job_bank
+            )
+        key = keys[(username, job_bank)]
 
         if key:
-            jobusage = nnodes * (t_inactive - t_run)
             ktotal[key] = ktotal.get(key, 0) + jobusage
 
             for sizebin in reversed(sizebins):
@@ -676,8 +1551,6 @@ def clear_usage(conn, cur, banks, ignore_older_than=None):
             )
             # reset all usage periods for associations under this bank
             clear_usage_period_columns(cur, bank)
-            # propagate new usage up parent banks to root bank
-            util.update_parent_bank_usage(conn, bank)
             if ignore_older_than is not None:
                 # update bank_table with new ignore timestamp
                 cur.execute(
@@ -697,7 +1570,9 @@ def clear_usage(conn, cur, banks, ignore_older_than=None):
                         bank,
                     ),
                 )
-            # commit changes
-            conn.commit()
+        # propagate new usage up parent banks to root bank
+        rollup_bank_usage(cur)
+        # commit changes
+        conn.commit()
 
     return 0
@@ -10,6 +10,7 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import json
+import sqlite3
 
 from flux.resource import ResourceSet
 from flux.job.JobID import JobID
@@ -105,36 +106,58 @@ def convert_to_str(job_records, fmt_string=None):
     return output.build_table(job_records)
 
 
+def count_resources(r_spec):
+    """
+    Count the resources allocated to a job.
+
+    Args:
+        r_spec: The job's resource set, as a JSON string.
+
+    Returns:
+        A tuple of (nnodes, ncores, ngpus), or None if r_spec can't be converted
+        to a ResourceSet.
+    """
+    try:
+        rset = ResourceSet(r_spec)
+        return (rset.nnodes, rset.ncores, rset.ngpus)
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
 def convert_to_obj(rows, jobid_format="f58"):
     """
     Convert the results of a query to the jobs table to a list of JobRecord
-    objects.
+    objects. The rows are sqlite3.Row objects, and each column is looked up by
+    name. The resource counts stored with each job are used when the query
+    selected them; otherwise, or for job records that were inserted before they
+    were stored, they are counted from R.
     """
     job_records = []
 
     for row in rows:
-        try:
-            # attempt to create a ResourceSet from R
-            rset = ResourceSet(row[6])
-            job_nnodes = rset.nnodes
-            job_ncores = rset.ncores
-            job_ngpus = rset.ngpus
-        except (ValueError, TypeError, KeyError):
+        columns = row.keys()
+        counts = None
+        if all(col in columns for col in ("nnodes", "ncores", "ngpus")):
+            counts = (row["nnodes"], row["ncores"], row["ngpus"])
+        if counts is None or None in counts:
+            counts = count_resources(row["R"])
+        if counts is None:
             # can't convert R to a ResourceSet object; skip it
             continue
+        job_nnodes, job_ncores, job_ngpus = counts
 
         job_record = JobRecord(
-            userid=row[0],
-            jobid=row[1],
-            t_submit=row[2],
-            t_run=row[3],
-            t_inactive=row[4],
+            userid=row["userid"],
+            jobid=row["id"],
+            t_submit=row["t_submit"],
+            t_run=row["t_run"],
+            t_inactive=row["t_inactive"],
             nnodes=job_nnodes,
-            resources=row[6],
-            project=row[8] if row[8] is not None else "",
-            bank=row[9] if row[9] is not None else "",
-            requested_duration=row[10],
-            actual_duration=row[11],
+            resources=row["R"],
+            project=row["project"] if row["project"] is not None else "",
+            bank=row["bank"] if row["bank"] is not None else "",
+            requested_duration=row["requested_duration"],
+            actual_duration=row["actual_duration"],
             ncores=job_ncores,
             ngpus=job_ngpus,
             jobid_format=jobid_format,
@@ -236,10 +259,32 @@ def get_userid_from_db(cursor, username):
     result = cursor.fetchone()
 
     if result is not None:
-        return result["userid"]
+        return result[0]
     return FLUX_USERID_UNKNOWN
 
 
+def get_userid(cursor, username):
+    """
+    Get the userid for a username, falling back to the userid stored in the
+    flux-accounting DB if the username can't be found on the system. The userids in
+    the association_table are seeded into the user cache so that they are not
+    looked up one username at a time.
+
+    Args:
+        cursor: The SQLite Cursor object used to execute queries.
+        username: The name of the user.
+    """
+    userid = util.get_uid(username)
+    if userid != FLUX_USERID_UNKNOWN:
+        return userid
+    util.user_cache.seed(cursor)
+    userid = util.user_cache.lookup_seeded(username)
+    if userid == FLUX_USERID_UNKNOWN:
+        # the association may have been added after the cache was seeded
+        return get_userid_from_db(cursor, username)
+    return userid
+
+
 def get_jobs(conn, **kwargs):
     """
     A function to return jobs from the jobs table in the flux-accounting
@@ -277,16 +322,13 @@ def get_jobs(conn, **kwargs):
 
     select_stmt = (
         "SELECT userid,id,t_submit,t_run,t_inactive,ranks,R,jobspec,project,bank,"
-        "requested_duration,actual_duration FROM jobs"
+        "requested_duration,actual_duration,nnodes,ncores,ngpus FROM jobs"
     )
     where_clauses = []
     params_list = []
 
     if "user" in params:
-        if util.get_uid(params["user"]) == FLUX_USERID_UNKNOWN:
-            params["user"] = get_userid_from_db(conn.cursor(), params["user"])
-        else:
-            params["user"] = util.get_uid(params["user"])
+        params["user"] = get_userid(conn.cursor(), params["user"])
         where_clauses.append("userid = ?")
         params_list.append(params["user"])
     if "after_start_time" in params:
@@ -330,6 +372,8 @@ def get_jobs(conn, **kwargs):
         select_stmt += " WHERE " + " AND ".join(where_clauses)
 
     cur = conn.cursor()
+    # convert_to_obj() looks up the columns of each job record by name
+    cur.row_factory = sqlite3.Row
     cur.execute(select_stmt, tuple(params_list))
     job_records = cur.fetchall()
 
@@ -427,7 +427,7 @@ def job_priorities(
         if bank is None or job.bank == bank:
             row = {
                 "JOBID": JobID(job.id).f58,
-                "USER": job.username,
+                "USER": util.get_username(job.userid),
                 "BANK": job.bank,
                 "BANKPRIO": banks[job.bank].priority,
                 "BANKFACT": priority_weights.get("bank", 0),
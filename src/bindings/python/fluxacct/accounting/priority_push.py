@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2020 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import json
+import pwd
+import hashlib
+import errno
+import itertools
+
+import fluxacct.accounting
+from fluxacct.accounting import db_info_subcommands as d
+
+
+def fetch_associations(cur):
+    # fetch all rows from association_table; yield one association at a time so
+    # that the whole table is never held in memory at once
+    for row in cur.execute(
+        """SELECT userid, bank, default_bank,
+           fairshare, max_running_jobs, max_active_jobs,
+           queues, active, projects, default_project, max_nodes, max_cores,
+           max_sched_jobs FROM association_table"""
+    ):
+        # create a JSON payload with the results of the query
+        single_user_data = {
+            "userid": int(row["userid"]),
+            "bank": str(row["bank"]),
+            "def_bank": str(row["default_bank"]),
+            "fairshare": float(row["fairshare"]),
+            "max_running_jobs": int(row["max_running_jobs"]),
+            "max_active_jobs": int(row["max_active_jobs"]),
+            "queues": str(row["queues"]),
+            "active": int(row["active"]),
+            "projects": str(row["projects"]),
+            "def_project": str(row["default_project"]),
+            "max_nodes": int(row["max_nodes"]),
+            "max_cores": int(row["max_cores"]),
+            "max_sched_jobs": int(row["max_sched_jobs"]),
+        }
+        yield single_user_data
+
+
+def fetch_queues(cur):
+    bulk_q_data = []
+
+    # fetch all rows from queue_table
+    for row in cur.execute("SELECT * FROM queue_table"):
+        # create a JSON payload with the results of the query
+        single_q_data = {
+            "queue": str(row["queue"]),
+            "min_nodes_per_job": int(row["min_nodes_per_job"]),
+            "max_nodes_per_job": int(row["max_nodes_per_job"]),
+            "max_time_per_job": int(row["max_time_per_job"]),
+            "priority": int(row["priority"]),
+            "max_running_jobs": int(row["max_running_jobs"]),
+            "max_nodes_per_assoc": int(row["max_nodes_per_assoc"]),
+            "max_sched_jobs": int(row["max_sched_jobs"]),
+            "max_sched_nodes_per_assoc": int(row["max_sched_nodes_per_assoc"]),
+            "max_sched_cores_per_assoc": int(row["max_sched_cores_per_assoc"]),
+        }
+        bulk_q_data.append(single_q_data)
+
+    return bulk_q_data
+
+
+def fetch_projects(cur):
+    bulk_proj_data = []
+
+    # fetch all rows from project_table
+    for row in cur.execute("SELECT project FROM project_table"):
+        # create a JSON payload with the results of the query
+        single_project = {
+            "project": str(row["project"]),
+        }
+        bulk_proj_data.append(single_project)
+
+    return bulk_proj_data
+
+
+def fetch_banks(cur):
+    bulk_bank_data = []
+
+    # fetch rows from bank_table
+    for row in cur.execute("SELECT bank, priority FROM bank_table"):
+        single_bank = {
+            "bank": str(row["bank"]),
+            "priority": float(row["priority"]),
+        }
+        bulk_bank_data.append(single_bank)
+
+    return bulk_bank_data
+
+
+def fetch_factors(cur):
+    bulk_factor_data = []
+
+    # fetch rows from priority_factor_weight_table
+    for row in cur.execute("SELECT * FROM priority_factor_weight_table"):
+        single_priority_factor = {
+            "factor": str(row["factor"]),
+            "weight": int(row["weight"]),
+        }
+        bulk_factor_data.append(single_priority_factor)
+
+    return bulk_factor_data
+
+
+def fetch_plugin_config(cur):
+    # fetch config values for plugin
+    plugin_config = {}
+    cur.execute("SELECT value FROM config_table WHERE key='deny_unknown_queues'")
+    row = cur.fetchone()
+    if row:
+        plugin_config["deny_unknown_queues"] = row["value"].lower() == "true"
+    else:
+        # if key is missing, default to False
+        plugin_config["deny_unknown_queues"] = False
+
+    return plugin_config
+
+
+# the max number of associations sent to the plugin in one message
+CHUNK_SIZE = 10000
+
+# the tables besides association_table that are sent to the plugin, the key
+# each one is sent under, the function that fetches it, and the plugin service
+# that receives it on its own; the plugin replaces all of its data for a table
+# whenever the table is sent
+PLUGIN_TABLES = [
+    ("queue_table", "queues", fetch_queues, "rec_q_update"),
+    ("project_table", "projects", fetch_projects, "rec_proj_update"),
+    ("bank_table", "banks", fetch_banks, "rec_bank_update"),
+    (
+        "priority_factor_weight_table",
+        "priority_factors",
+        fetch_factors,
+        "rec_fac_update",
+    ),
+    ("config_table", "config", fetch_plugin_config, "rec_config_update"),
+]
+
+
+def chunked(associations, chunk_size):
+    chunk = []
+    for association in associations:
+        chunk.append(association)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def send_update(
+    handle,
+    update,
+    associations=(),
+    nassociations=0,
+    reprioritize=True,
+    chunk_size=CHUNK_SIZE,
+    reprioritize_all=False,
+):
+    """
+    Send an update to the plugin with rec_bulk_update, which the plugin applies all
+    at once before reprioritizing jobs. The associations are sent in chunks of at
+    most chunk_size associations, one message per chunk, and the rest of the update
+    is sent with the last chunk. Associations are sent in the columnar encoding,
+    falling back to a list of objects for a plugin that rejects it. Fall back to
+    sending each section with its own service for a plugin that does not have
+    rec_bulk_update.
+
+    Args:
+        handle: the Flux handle.
+        update: a dictionary with any of the "deleted", "queues", "projects",
+            "banks", "priority_factors", and "config" sections.
+        associations: an iterable of the associations to send.
+        nassociations: the number of associations in associations.
+        reprioritize: reprioritize the jobs affected by the update once it is
+            applied.
+        chunk_size: the max number of associations to send in one message.
+        reprioritize_all: reprioritize every job instead of only the jobs affected
+            by the update.
+
+    Returns:
+        the response from the plugin to the associations in the update.
+    """
+    nchunks = max(1, -(-nassociations // chunk_size))
+    chunks = chunked(associations, chunk_size)
+    first_chunk = next(chunks, [])
+    columnar = True
+    try:
+        chunk = first_chunk
+        i = 0
+        while i < nchunks:
+            data = d.columnar(chunk) if columnar else chunk
+            payload = {"chunk": i, "nchunks": nchunks, "associations": data}
+            if i == nchunks - 1:
+                payload.update(update, reprioritize=reprioritize)
+                if reprioritize_all:
+                    payload["reprioritize_all"] = True
+            try:
+                resp = handle.rpc(
+                    "job-manager.mf_priority.rec_bulk_update", payload
+                ).get()
+            except OSError as exc:
+                if exc.errno != errno.EPROTO or i > 0 or not columnar:
+                    raise
+                # the plugin predates the columnar encoding; start over and send
+                # the associations as a list of objects
+                columnar = False
+                continue
+            i += 1
+            chunk = next(chunks, [])
+        return resp
+    except OSError as exc:
+        if exc.errno != errno.ENOSYS or chunk is not first_chunk:
+            raise
+
+    resp = None
+    for i, chunk in enumerate(itertools.chain([first_chunk], chunks)):
+        data = {"data": chunk}
+        if i == 0:
+            data["deleted"] = update.get("deleted", [])
+        resp = handle.rpc("job-manager.mf_priority.rec_update", data).get()
+    for _, key, _, service in PLUGIN_TABLES:
+        if key in update:
+            data = {"data": update[key]}
+            handle.rpc(f"job-manager.mf_priority.{service}", data).get()
+    if reprioritize_all:
+        handle.rpc("job-manager.mf_priority.reprioritize", {"all": True}).get()
+    elif reprioritize:
+        handle.rpc("job-manager.mf_priority.reprioritize").get()
+
+    return resp
+
+
+def bulk_update(
+    handle, conn, owner_info, chunk_size=CHUNK_SIZE, reprioritize_all=False
+):
+    """
+    Send everything in the flux-accounting DB to the plugin.
+
+    Args:
+        handle: the Flux handle.
+        conn: a connection to the flux-accounting DB whose row_factory is
+            sqlite3.Row.
+        owner_info: the association of the instance owner, which is sent along
+            with the associations in the DB.
+        chunk_size: the max number of associations to send in one message.
+        reprioritize_all: reprioritize every job instead of only the jobs affected
+            by the update.
+
+    Returns:
+        the number of associations sent.
+    """
+    cur = conn.cursor()
+
+    # read every table in one transaction so that the number of associations
+    # counted matches the number that are sent
+    cur.execute("BEGIN")
+    update = {}
+    for _, key, fetch, _ in PLUGIN_TABLES:
+        update[key] = fetch(cur)
+
+    # the instance owner is sent last so that it takes precedence over an
+    # association in the DB with the same userid and bank
+    nassociations = cur.execute("SELECT COUNT(*) FROM association_table").fetchone()[0]
+    associations = itertools.chain(fetch_associations(cur), [owner_info])
+    send_update(
+        handle,
+        update,
+        associations,
+        nassociations + 1,
+        chunk_size=chunk_size,
+        reprioritize_all=reprioritize_all,
+    )
+    conn.rollback()
+
+    cur.close()
+
+    return nassociations + 1
+
+
+def association_key(association):
+    return json.dumps([association["userid"], association["bank"]])
+
+
+def digest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def delta_update(
+    handle, conn, owner_info, chunk_size=CHUNK_SIZE, reprioritize_all=False
+):
+    """
+    Send only what has changed in the flux-accounting DB since the last push to the
+    plugin. Each association sent and each of the other tables is recorded as a
+    digest in the priority_push_table; associations whose digest has changed are
+    sent, associations that have been removed are sent as tombstones, and the other
+    tables are sent in full if any of their rows changed. Fall back to a full push if
+    there is no record of a previous push or if the plugin reports that it holds
+    fewer associations than the DB. Takes the same arguments as bulk_update().
+
+    Returns:
+        the number of associations sent, including removed associations.
+    """
+    cur = conn.cursor()
+
+    pushed = {}
+    for row in cur.execute("SELECT tbl, key, digest FROM priority_push_table"):
+        pushed.setdefault(row["tbl"], {})[row["key"]] = row["digest"]
+    pushed_associations = pushed.get("association_table", {})
+
+    associations = {}
+    for association in fetch_associations(cur):
+        associations[association_key(association)] = (association, digest(association))
+    changed = [
+        key
+        for key, (_, assoc_digest) in associations.items()
+        if pushed_associations.get(key) != assoc_digest
+    ]
+    deleted = [key for key in pushed_associations if key not in associations]
+    tombstones = [
+        {"userid": userid, "bank": bank}
+        for userid, bank in (json.loads(key) for key in deleted)
+    ]
+
+    tables = {}
+    for table, key, fetch, _ in PLUGIN_TABLES:
+        table_data = fetch(cur)
+        tables[table] = (key, table_data, digest(table_data))
+
+    full = not pushed_associations
+    if not full:
+        update = {"deleted": tombstones}
+        changed_tables = [
+            table
+            for table, (_, _, table_digest) in tables.items()
+            if pushed.get(table, {}).get("*") != table_digest
+        ]
+        for table in changed_tables:
+            key, table_data, _ = tables[table]
+            update[key] = table_data
+        resp = send_update(
+            handle,
+            update,
+            [associations[key][0] for key in changed] + [owner_info],
+            len(changed) + 1,
+            reprioritize=bool(changed or deleted or changed_tables),
+            chunk_size=chunk_size,
+            reprioritize_all=reprioritize_all,
+        )
+        if not resp or resp.get("associations", 0) < len(associations):
+            # the plugin has lost its data (e.g. it was reloaded); resend everything
+            full = True
+    if full:
+        changed = list(associations)
+        changed_tables = list(tables)
+        update = {"deleted": tombstones}
+        for key, table_data, _ in tables.values():
+            update[key] = table_data
+        send_update(
+            handle,
+            update,
+            [association for association, _ in associations.values()] + [owner_info],
+            len(associations) + 1,
+            chunk_size=chunk_size,
+            reprioritize_all=reprioritize_all,
+        )
+
+    # record what the plugin now holds
+    updates = [("association_table", key, associations[key][1]) for key in changed]
+    updates += [(table, "*", tables[table][2]) for table in changed_tables]
+    cur.executemany(
+        "INSERT INTO priority_push_table (tbl, key, digest) VALUES (?, ?, ?) "
+        "ON CONFLICT (tbl, key) DO UPDATE SET digest=excluded.digest",
+        updates,
+    )
+    cur.executemany(
+        "DELETE FROM priority_push_table WHERE tbl='association_table' AND key=?",
+        [(key,) for key in deleted],
+    )
+    conn.commit()
+
+    cur.close()
+
+    return len(changed) + len(deleted) + 1
+
+
+def instance_owner_info(handle):
+    # get uid, username of instance owner
+    owner_uid = handle.attr_get("security.owner")
+    try:
+        # look up corresponding username of instance owner
+        owner_info = pwd.getpwuid(int(owner_uid))
+        owner_username = owner_info.pw_name
+    except KeyError:
+        # can't find instance owner info; set username to the uid
+        owner_username = owner_uid
+
+    # construct instance owner dictionary
+    instance_owner_data = {
+        "userid": int(owner_uid),
+        "bank": owner_username,
+        "def_bank": owner_username,
+        "fairshare": 0.5,
+        "max_running_jobs": 1000000,
+        "max_active_jobs": 1000000,
+        "queues": "",
+        "active": 1,
+        "projects": "*",
+        "def_project": "*",
+        "max_nodes": 1000000,
+        "max_cores": 1000000,
+        "max_sched_jobs": fluxacct.accounting.INTEGER_MAX,
+    }
+
+    return instance_owner_data
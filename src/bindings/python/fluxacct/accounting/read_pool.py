@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import os
+import queue
+import sqlite3
+import threading
+
+# the default number of threads (and read-only connections) in a ReadPool
+READ_POOL_SIZE = 4
+
+
+def connect_read_only(path):
+    """
+    Open a read-only connection to a flux-accounting database.
+
+    Args:
+        path: The path to the flux-accounting database.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+
+    return conn
+
+
+class ReadPool:
+    """
+    A bounded pool of threads that run read-only work against a flux-accounting
+    database, each on its own read-only connection.
+
+    Work is run in the order it is submitted. Its results are not returned from the
+    worker threads; they are queued for the thread that owns the pool, which is
+    woken up by the pool's file descriptor becoming readable and delivers them by
+    calling run_completions().
+
+    The database should be in WAL mode so that readers and the writer do not block
+    each other.
+
+    Args:
+        path: The path to the flux-accounting database.
+        size: The number of worker threads.
+        trace_callback: If set, passed to set_trace_callback() of each worker
+            thread's connection.
+    """
+
+    def __init__(self, path, size=READ_POOL_SIZE, trace_callback=None):
+        if size < 1:
+            raise ValueError("read pool size must be at least 1")
+        self.path = path
+        self.size = size
+        self.trace_callback = trace_callback
+        self._work = queue.Queue()
+        self._completions = queue.Queue()
+        self._rfd, self._wfd = os.pipe()
+        os.set_blocking(self._rfd, False)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"read-pool-{i}", daemon=True)
+            for i in range(size)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def notify_fd(self):
+        """The file descriptor that is readable when there are completions."""
+        return self._rfd
+
+    def submit(self, func, callback):
+        """
+        Run func(conn) in a worker thread on its read-only connection. Once it has
+        returned, callback(result, exc) is called from run_completions(), where exc
+        is the exception func raised (and result is None), or None.
+        """
+        self._work.put((func, callback))
+
+    def _worker(self):
+        conn = None
+        error = None
+        try:
+            conn = connect_read_only(self.path)
+            if self.trace_callback is not None:
+                conn.set_trace_callback(self.trace_callback)
+        except sqlite3.Error as exc:
+            # report the failure to each piece of work this thread picks up
+            error = exc
+        while True:
+            item = self._work.get()
+            if item is None:
+                break
+            func, callback = item
+            result = None
+            exc = None
+            try:
+                if conn is None:
+                    raise error
+                result = func(conn)
+            # pylint: disable=broad-except
+            except Exception as err:
+                exc = err
+            if conn is not None and conn.in_transaction:
+                # a statement that tried to write, e.g. a DELETE that failed on the
+                # read-only connection, implicitly began a transaction; end it so
+                # that the next piece of work does not read from a stale snapshot
+                conn.rollback()
+            self._completions.put((callback, result, exc))
+            # leave the last reference to the work to the thread that owns the pool
+            item = func = callback = result = exc = None
+            os.write(self._wfd, b"\0")
+        if conn is not None:
+            conn.close()
+
+    def run_completions(self):
+        """
+        Call the callback of every piece of work that has completed. Return the
+        number of callbacks called.
+        """
+        try:
+            while os.read(self._rfd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        count = 0
+        while True:
+            try:
+                callback, result, exc = self._completions.get_nowait()
+            except queue.Empty:
+                break
+            callback(result, exc)
+            count += 1
+
+        return count
+
+    def close(self):
+        """
+        Stop the worker threads once they have finished the work already submitted
+        and close their connections. Completions that have not been delivered are
+        dropped.
+        """
+        for _ in self._threads:
+            self._work.put(None)
+        for thread in self._threads:
+            thread.join()
+        os.close(self._rfd)
+        os.close(self._wfd)
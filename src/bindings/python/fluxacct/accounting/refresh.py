@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+
+import flux
+
+from fluxacct.accounting import job_usage_calculation as jobs
+from fluxacct.accounting import priority_push as push
+
+# the number of seconds a refresh that is running is waited for when the service
+# stops
+STOP_TIMEOUT = 30
+
+
+def connect(path):
+    """
+    Open a read-write connection to a flux-accounting database for a refresh.
+
+    Args:
+        path: The path to the flux-accounting database.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=rw", uri=True)
+    conn.execute("PRAGMA foreign_keys = 1")
+    conn.row_factory = sqlite3.Row
+
+    return conn
+
+
+def update_usage(path, conn):
+    """
+    Update the job usage of every association and bank with the jobs that have
+    completed since the last update. Return the number of rows written.
+    """
+    total_changes = conn.total_changes
+    jobs.update_job_usage(conn, bulk=True)
+
+    return conn.total_changes - total_changes
+
+
+def fairshare_values(conn):
+    """Return the fair-share value of every association, keyed by its rowid."""
+    return dict(conn.execute("SELECT rowid, fairshare FROM association_table"))
+
+
+def update_fshare(path, conn):
+    """
+    Recalculate the fair-share of every association with flux account-update-fshare.
+    Return the number of associations whose fair-share value changed.
+    """
+    before = fairshare_values(conn)
+    result = subprocess.run(
+        ["flux", "account-update-fshare", "-p", path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"flux account-update-fshare exited with {result.returncode}: "
+            f"{result.stdout.strip()}"
+        )
+
+    after = fairshare_values(conn)
+
+    return sum(1 for rowid, value in after.items() if before.get(rowid) != value)
+
+
+def priority_update(path, conn):
+    """
+    Send what has changed in the DB since the last push to the priority plugin.
+    Return the number of associations sent.
+    """
+    handle = flux.Flux()
+    owner_info = push.instance_owner_info(handle)
+
+    return push.delta_update(handle, conn, owner_info)
+
+
+# the phases of a refresh, in the order they run
+PHASES = (
+    ("update-usage", update_usage),
+    ("update-fshare", update_fshare),
+    ("priority-update", priority_update),
+)
+
+
+class Refresher:
+    """
+    Run the cycle that keeps job usage, fair-share, and the priority plugin up to
+    date, which is otherwise run by flux account-update-usage, flux
+    account-update-fshare, and flux account-priority-update, in a background
+    thread with its own connection to the DB.
+
+    One refresh runs at a time. Its status is not returned from the background
+    thread; the thread that owns the Refresher is woken up by its file descriptor
+    becoming readable once the refresh is done and collects it by calling
+    finish().
+
+    A phase that fails ends the refresh; the phases after it are not run.
+
+    Args:
+        path: The path to the flux-accounting database.
+        phases: A sequence of (name, func) tuples, where func(path, conn) runs a
+            phase and returns the number of rows it touched.
+    """
+
+    def __init__(self, path, phases=PHASES):
+        self.path = path
+        self.phases = phases
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last = None
+        self._current = None
+        self._thread = None
+        self._rfd, self._wfd = os.pipe()
+        os.set_blocking(self._rfd, False)
+
+    @property
+    def notify_fd(self):
+        """The file descriptor that is readable once a refresh is done."""
+        return self._rfd
+
+    def start(self):
+        """
+        Start a refresh in a background thread. Return False if a refresh is
+        already running, in which case it is counted as skipped.
+        """
+        if self.running:
+            self.skipped += 1
+            return False
+        self.running = True
+        self._current = None
+        self._thread = threading.Thread(target=self._run, name="refresh", daemon=True)
+        self._thread.start()
+
+        return True
+
+    def _run(self):
+        status = {"started": time.time(), "phases": [], "error": None}
+        conn = None
+        name = "connect"
+        try:
+            conn = connect(self.path)
+            for name, func in self.phases:
+                start = time.perf_counter()
+                rows = func(self.path, conn)
+                status["phases"].append(
+                    {"name": name, "seconds": time.perf_counter() - start, "rows": rows}
+                )
+        # pylint: disable=broad-except
+        except Exception as exc:
+            status["error"] = f"{name}: {type(exc).__name__}: {exc}"
+        finally:
+            if conn is not None:
+                conn.close()
+        status["finished"] = time.time()
+        self._current = status
+        os.write(self._wfd, b"\0")
+
+    def finish(self):
+        """
+        Collect the status of the refresh that is done and return it, or return
+        None if there is no refresh that is done.
+        """
+        try:
+            while os.read(self._rfd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        if not self.running or self._current is None:
+            return None
+        self._thread.join()
+        self.running = False
+        self.last = self._current
+        self.runs += 1
+        if self.last["error"] is not None:
+            self.failures += 1
+
+        return self.last
+
+    def status(self):
+        """Return a dictionary of the refresh counters and the last refresh done."""
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last": self.last,
+        }
+
+    def close(self, timeout=None):
+        """
+        Wait up to timeout seconds (or, if timeout is None, for as long as it
+        takes) for a refresh that is running to finish and close the file
+        descriptors. Return False if the refresh is still running, in which case
+        the file descriptors are left open for it to finish with.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+        os.close(self._rfd)
+        os.close(self._wfd)
+
+        return True
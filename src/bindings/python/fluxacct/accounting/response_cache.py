@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import collections
+import json
+import threading
+
+# the default max number of responses held in a ResponseCache
+RESPONSE_CACHE_SIZE = 256
+
+
+class ResponseCache:
+    """
+    A bounded cache of the responses to read-only requests to the flux-accounting
+    service, keyed by the request's endpoint and its payload. Once the cache is
+    full, the least recently used response is evicted.
+
+    Every response is read from one generation of the DB. Invalidating the cache,
+    which the service does after each write it makes to the DB and whenever it
+    notices that another process has written to it, starts a new generation and
+    drops every response held.
+
+    Args:
+        maxsize: The max number of responses to hold. 0 disables the cache.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, payload):
+        """
+        Return the key of a request, which is the same for every request to
+        endpoint with an equal payload regardless of the order of its keys.
+        """
+        return (endpoint, json.dumps(payload, sort_keys=True, separators=(",", ":")))
+
+    def get(self, key):
+        """Return the response held for key, or None."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response, generation):
+        """
+        Hold response for key, unless the cache has been invalidated since
+        generation, which is the generation that was current when the response
+        started being read from the DB. Return whether the response is held.
+        """
+        with self._lock:
+            if self.maxsize < 1 or generation != self.generation:
+                return False
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self):
+        """Drop every response held and start a new generation."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def reset_stats(self):
+        """Reset the cache's hit and miss counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self):
+        """Return a dictionary of the cache's size and hit and miss counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
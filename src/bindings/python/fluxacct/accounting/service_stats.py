@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import bisect
+import heapq
+import json
+import math
+import threading
+import time
+
+# the upper bounds, in seconds, of the buckets of a LatencyHistogram: 1us to ~67s
+LATENCY_BUCKETS = tuple(2**i / 1e6 for i in range(27))
+# the percentiles reported for each LatencyHistogram
+PERCENTILES = (50, 90, 99)
+# the number of slowest SQL statements held
+SLOW_STATEMENTS = 10
+# the max number of characters of a SQL statement that is held
+MAX_STATEMENT_LENGTH = 256
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies that takes a fixed amount of memory no matter how
+    many latencies are added to it. Each latency is counted in the smallest bucket
+    whose upper bound it does not exceed; latencies over the largest bound are
+    counted in an overflow bucket.
+
+    Args:
+        bounds: The sorted upper bounds, in seconds, of the buckets.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """
+        Return an estimate of the pct-th percentile of the latencies added, which
+        is the upper bound of the bucket it falls in (or the max latency added, if
+        that is smaller).
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        # the percentile falls in the overflow bucket
+        return self.max
+
+    def to_dict(self):
+        stats = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+        for pct in PERCENTILES:
+            stats[f"p{pct}"] = self.percentile(pct)
+
+        return stats
+
+
+class EndpointStats:
+    """The statistics of the requests made to one endpoint of the service."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.latency = LatencyHistogram()
+        self.request_bytes = 0
+        self.max_request_bytes = 0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+    def add(self, seconds, request_bytes, response_bytes, error, cache_hit):
+        self.requests += 1
+        self.errors += int(error)
+        self.cache_hits += int(cache_hit)
+        self.latency.add(seconds)
+        self.request_bytes += request_bytes
+        self.max_request_bytes = max(self.max_request_bytes, request_bytes)
+        self.response_bytes += response_bytes
+        self.max_response_bytes = max(self.max_response_bytes, response_bytes)
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "latency": self.latency.to_dict(),
+            "request_bytes": {
+                "total": self.request_bytes,
+                "max": self.max_request_bytes,
+            },
+            "response_bytes": {
+                "total": self.response_bytes,
+                "max": self.max_response_bytes,
+            },
+            "sql": {"statements": self.statements, "seconds": self.sql_seconds},
+        }
+
+
+class ServiceStats:
+    """
+    Statistics about the requests answered by the flux-accounting service and the
+    SQL statements run while answering them, held in memory until they are reset.
+
+    Requests are recorded by the service once they are answered. SQL statements
+    are recorded by passing trace_statement() to set_trace_callback() of each
+    connection the service's handlers use; SQLite only reports when a statement
+    starts, so a statement is timed from when it starts until the next statement
+    run by the same thread starts or the request's handler returns.
+
+    Args:
+        slow_statements: The number of slowest SQL statements held.
+    """
+
+    def __init__(self, slow_statements=SLOW_STATEMENTS):
+        self.slow_statements = slow_statements
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Drop every statistic held."""
+        with self._lock:
+            self.since = time.time()
+            self.endpoints = {}
+            # a min-heap of (seconds, endpoint, statement)
+            self._slowest = []
+
+    def _endpoint(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_request(
+        self,
+        endpoint,
+        seconds,
+        request_bytes,
+        response_bytes,
+        error=False,
+        cache_hit=False,
+    ):
+        """Record a request to endpoint that was answered in seconds."""
+        with self._lock:
+            self._endpoint(endpoint).add(
+                seconds, request_bytes, response_bytes, error, cache_hit
+            )
+
+    def begin_sql(self, endpoint):
+        """
+        Attribute the SQL statements run by this thread to endpoint until
+        end_sql() is called.
+        """
+        self._local.endpoint = endpoint
+        self._local.statement = None
+        self._local.statement_start = 0.0
+
+    def end_sql(self):
+        self._finish_statement(time.perf_counter())
+        self._local.endpoint = None
+
+    def trace_statement(self, statement):
+        """The trace callback of each connection used by the service's handlers."""
+        now = time.perf_counter()
+        self._finish_statement(now)
+        # statements run outside of a handler are not recorded
+        if getattr(self._local, "endpoint", None) is not None:
+            if len(statement) > MAX_STATEMENT_LENGTH:
+                statement = statement[: MAX_STATEMENT_LENGTH - 3] + "..."
+            self._local.statement = statement
+            self._local.statement_start = now
+
+    def _finish_statement(self, now):
+        statement = getattr(self._local, "statement", None)
+        if statement is None:
+            return
+        self._local.statement = None
+        seconds = now - self._local.statement_start
+        entry = (seconds, self._local.endpoint, statement)
+        with self._lock:
+            stats = self._endpoint(self._local.endpoint)
+            stats.statements += 1
+            stats.sql_seconds += seconds
+            if len(self._slowest) < self.slow_statements:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "since": self.since,
+                "endpoints": {
+                    name: stats.to_dict()
+                    for name, stats in sorted(self.endpoints.items())
+                },
+                "slowest_statements": [
+                    {"seconds": seconds, "endpoint": endpoint, "statement": statement}
+                    for seconds, endpoint, statement in sorted(
+                        self._slowest, reverse=True
+                    )
+                ],
+            }
+
+
+def format_stats(stats, json_fmt=False):
+    """
+    Format the statistics of the flux-accounting service as a table, or as JSON.
+
+    Args:
+        stats: The statistics returned by ServiceStats.to_dict(), along with the
+            statistics of the service's response cache under "cache".
+        json_fmt: Format the statistics as JSON.
+    """
+    if json_fmt:
+        return json.dumps(stats, indent=2)
+
+    def msecs(seconds):
+        return f"{seconds * 1000:.3f}"
+
+    since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stats["since"]))
+    lines = [f"statistics since {since}", ""]
+    header = (
+        f"{'endpoint':<20} {'requests':>8} {'errors':>6} {'hits':>6} "
+        f"{'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9} "
+        f"{'sql(ms)':>9} {'req(B)':>8} {'resp(B)':>9}"
+    )
+    lines.append(header)
+    for name, endpoint in stats["endpoints"].items():
+        latency = endpoint["latency"]
+        requests = max(endpoint["requests"], 1)
+        lines.append(
+            f"{name:<20} {endpoint['requests']:>8} {endpoint['errors']:>6} "
+            f"{endpoint['cache_hits']:>6} {msecs(latency['p50']):>9} "
+            f"{msecs(latency['p90']):>9} {msecs(latency['p99']):>9} "
+            f"{msecs(latency['max']):>9} "
+            f"{msecs(endpoint['sql']['seconds'] / requests):>9} "
+            f"{endpoint['request_bytes']['total'] // requests:>8} "
+            f"{endpoint['response_bytes']['total'] // requests:>9}"
+        )
+
+    cache = stats.get("cache")
+    if cache is not None:
+        lines.append("")
+        lines.append(
+            f"response cache: {cache['size']}/{cache['maxsize']} responses held, "
+            f"{cache['hits']} hits, {cache['misses']} misses, "
+            f"{cache['evictions']} evictions, "
+            f"{cache['invalidations']} invalidations"
+        )
+
+    lines.append("")
+    lines.append("slowest SQL statements:")
+    for entry in stats["slowest_statements"]:
+        lines.append(
+            f"  {msecs(entry['seconds']):>9} ms  {entry['endpoint']:<20} "
+            f"{' '.join(entry['statement'].split())}"
+        )
+
+    return "\n".join(lines)
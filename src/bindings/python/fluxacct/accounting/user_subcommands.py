@@ -15,6 +15,7 @@ import time
 from flux.constants import FLUX_USERID_UNKNOWN
 import fluxacct.accounting
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import job_usage_calculation as jobs
 from fluxacct.accounting import sql_util as sql
 from fluxacct.accounting import util
 from fluxacct.accounting.util import with_cursor
@@ -285,14 +286,17 @@ def insert_per_assoc_usage_rows(conn, cur, username, uid, bank):
         # fall back to default behavior, which is just 4 1-week long periods
         num_periods = 4
 
+    # tag each period with the half-life epoch it covers so that the rows are also
+    # valid if the usage periods are stored as a ring buffer
+    epoch = jobs.get_half_life_epoch(cur)
     for period in range(num_periods):
         conn.execute(
             """
             INSERT OR IGNORE INTO job_usage_per_association_table
-            (username, userid, bank, period, value)
-            VALUES (?, ?, ?, ?, 0.0)
+            (username, userid, bank, period, value, epoch)
+            VALUES (?, ?, ?, ?, 0.0, ?)
             """,
-            (username, uid, bank, period),
+            (username, uid, bank, period, epoch - period),
         )
 
 
@@ -323,9 +327,14 @@ def view_user(
     if job_usage:
         # only return a breakdown of the association's job usage factors that make up
         # their historical usage
-        cur.execute(
-            "SELECT * FROM job_usage_per_association_table WHERE username=?", (user,)
-        )
+        if jobs.uses_ring_buffer(cur):
+            jobs.view_ring_usage_periods(conn, cur, user)
+        else:
+            cur.execute(
+                "SELECT username, userid, bank, period, value "
+                "FROM job_usage_per_association_table WHERE username=?",
+                (user,),
+            )
         formatter = fmt.AccountingFormatter(cur)
     else:
         sql.validate_columns(cols, fluxacct.accounting.ASSOCIATION_TABLE)
@@ -539,6 +548,7 @@ def add_user(
 
     # commit changes
     conn.commit()
+    util.clear_user_cache()
 
     return 0
 
@@ -573,6 +583,8 @@ def delete_user(conn, cur, username, bank, force=False):
     )
     # commit changes
     conn.commit()
+    if force:
+        util.clear_user_cache()
 
     # check if bank being deleted is the user's default bank
     default_bank = get_default_bank(cur, username)
@@ -727,6 +739,8 @@ def edit_user(conn, cur, username, bank=None, **kwargs):
 
     # commit changes
     conn.commit()
+    if updates.get("userid") is not None:
+        util.clear_user_cache()
 
     return 0
 
@@ -868,4 +882,7 @@ def sync_userids(conn, cur):
         cur.execute(update_stmt)
         conn.commit()
 
+        # drop the seeded userids of only the associations that changed
+        util.user_cache.drop_seeded({row[0] for row in result})
+
     return 0
@@ -10,9 +10,12 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import pwd
+import time
 import logging
 import functools
 import contextlib
+import threading
+import collections
 
 from flux.constants import FLUX_USERID_UNKNOWN
 from flux.util import parse_datetime
@@ -20,31 +23,152 @@ from flux.job.JobID import JobID
 import fluxacct.accounting
 
 
-def get_uid(username):
+# the max number of lookups held in the uid <-> username cache and how long (in
+# seconds) each one is held before it is looked up again
+USER_CACHE_SIZE = 8192
+USER_CACHE_TTL = 300
+
+
+class UserCache:
     """
-    Get the userid for a given username. If the userid cannot be found, just return
-    the username.
+    A process-wide cache of uid <-> username lookups. Each lookup, including ones
+    that fail, is held for a fixed amount of time; once the cache is full, the least
+    recently used lookup is evicted.
 
     Args:
-        username: The username.
+        maxsize: The max number of lookups to hold.
+        ttl: The number of seconds a lookup is held.
     """
+
+    def __init__(self, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._seeded = None
+
+    def get(self, key, lookup):
+        """
+        Return the value held for key, calling lookup() to fetch it if it is not
+        held or has expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+        value = lookup()
+        self.put(key, value, now)
+        return value
+
+    def put(self, key, value, now=None):
+        """Hold value for key, evicting the least recently used lookups."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def seed(self, cur):
+        """
+        Hold the userid of every username in the association_table for lookups of
+        users that can't be found on the system. The association_table is only read
+        again once the seeded lookups have expired.
+
+        Args:
+            cur: The SQLite Cursor object used to execute queries.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._seeded is not None and self._seeded > now:
+                return
+        rows = cur.execute(
+            "SELECT username, MIN(userid) FROM association_table "
+            "WHERE userid!=? GROUP BY username",
+            (FLUX_USERID_UNKNOWN,),
+        ).fetchall()
+        for username, userid in rows:
+            self.put(("db_uid", username), userid, now)
+        with self._lock:
+            self._seeded = now + self.ttl
+
+    def lookup_seeded(self, username):
+        """
+        Return the userid seeded from the association_table for username, or
+        FLUX_USERID_UNKNOWN if there is none.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(("db_uid", username))
+            if entry is None or entry[1] <= now:
+                return FLUX_USERID_UNKNOWN
+            self._entries.move_to_end(("db_uid", username))
+            return entry[0]
+
+    def drop_seeded(self, usernames):
+        """
+        Drop the userids seeded from the association_table for usernames, e.g.
+        after they have changed. Lookups of them fall back to the flux-accounting
+        DB until the cache is seeded again.
+        """
+        with self._lock:
+            for username in usernames:
+                self._entries.pop(("db_uid", username), None)
+
+    def clear(self):
+        """Drop every lookup held in the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._seeded = None
+
+
+user_cache = UserCache()
+
+
+def _getpwnam_uid(username):
     try:
         return pwd.getpwnam(username).pw_uid
     except KeyError:
         return FLUX_USERID_UNKNOWN
 
 
-def get_username(userid):
-    """
-    Get the username for a given userid. If the username cannot be found, just return
-    the userid as a string.
-    """
+def _getpwuid_name(userid):
     try:
         return pwd.getpwuid(userid).pw_name
     except KeyError:
         return str(userid)
 
 
+def get_uid(username):
+    """
+    Get the userid for a given username. If the userid cannot be found, just return
+    the username. Lookups are held in the user cache.
+
+    Args:
+        username: The username.
+    """
+    return user_cache.get(("uid", username), lambda: _getpwnam_uid(username))
+
+
+def get_username(userid):
+    """
+    Get the username for a given userid. If the username cannot be found, just return
+    the userid as a string. Lookups are held in the user cache.
+    """
+    return user_cache.get(("username", userid), lambda: _getpwuid_name(userid))
+
+
+def clear_user_cache():
+    """
+    Drop every uid <-> username lookup held in the user cache, e.g. after userids
+    in the association_table have changed.
+    """
+    user_cache.clear()
+
+
 def parse_timestamp(timestamp):
     """
     Parse a timestamp and convert it to a seconds-since-epoch timestamp. Try to first
@@ -113,47 +237,6 @@ def with_cursor(func):
     return wrapper
 
 
-def update_parent_bank_usage(conn, bank):
-    """
-    Recursively update the job_usage for a bank's parent banks up to the root.
-
-    This function should be called after a leaf bank's job_usage has been updated.
-    It will propagate the changes up through the hierarchy.
-
-    Args:
-        conn: The SQLite Connection object.
-        bank: The name of the bank whose parents need updating.
-    """
-    cur = conn.cursor()
-
-    cur.execute("SELECT parent_bank FROM bank_table WHERE bank=?", (bank,))
-    result = cur.fetchone()
-
-    if result is None:
-        return
-
-    parent_bank = result[0]
-
-    if parent_bank == "":
-        # reached the root bank (no parent); stop recursion
-        return
-
-    # calculate the total usage of all sub-banks under the parent
-    cur.execute(
-        "SELECT SUM(job_usage) FROM bank_table WHERE parent_bank=?", (parent_bank,)
-    )
-    total_usage = cur.fetchone()[0] or 0.0
-
-    # update the parent bank's usage
-    cur.execute(
-        "UPDATE bank_table SET job_usage=? WHERE bank=?", (total_usage, parent_bank)
-    )
-    conn.commit()
-
-    # recursively update the parent's parent
-    update_parent_bank_usage(conn, parent_bank)
-
-
 class JobIDFormat:
     """
     Wrapper around flux.job.JobID that allows for the specification of a specific format
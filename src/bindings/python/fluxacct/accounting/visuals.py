@@ -12,6 +12,8 @@
 import shutil
 import sys
 
+from fluxacct.accounting import job_usage_calculation as jobs
+
 
 class RenderBarGraph:
     """A class for displaying a horizontal bar graph."""
@@ -141,7 +143,45 @@ class BankUsageGraph(RenderBarGraph):
         return row["bank"]
 
 
-def show_usage(conn, table, limit=10):
+class UsageReportGraph(RenderBarGraph):
+    def __init__(self, conn, table, limit, start, end, bar_char="█", fallback_char="#"):
+        """
+        A subclass of RenderBarGraph to display the node-seconds used by the jobs of
+        each association or bank that completed in a time range. Order the data in
+        descending order by node-seconds. Allow for a configurable amount of data to
+        be displayed in the graph.
+
+        Args:
+            conn: The SQLite Connection object.
+            table: Whether to display the usage of "associations" or "banks".
+            limit: The max number of rows to display on the graph.
+            start: Only include jobs that completed at or after this timestamp.
+            end: Only include jobs that completed before this timestamp.
+            bar_char: The character used to display the horizontal bar on the graph.
+            fallback_char: A fallback character used to display the horizontal bar on
+                the graph.
+        """
+        self.table = table
+        self.limit = limit
+        self.start = start
+        self.end = end
+        super().__init__(conn, None, bar_char=bar_char, fallback_char=fallback_char)
+
+    def fetch_rows(self):
+        usage = {}
+        for username, bank, _, node_seconds in jobs.fetch_report_usage(
+            self.conn, self.start, self.end
+        ):
+            label = f"{username} / {bank}" if self.table == "associations" else bank
+            usage[label] = usage.get(label, 0) + node_seconds
+        rows = sorted(usage.items(), key=lambda row: row[1], reverse=True)
+        return rows[: self.limit]
+
+    def make_label(self, row):
+        return row[0]
+
+
+def show_usage(conn, table, limit=10, start=None, end=None):
     """
     Create a horizontal bar graph for displaying job usage data for either associations
     or banks.
@@ -150,7 +190,15 @@ def show_usage(conn, table, limit=10):
         conn: The SQLite Connection object.
         table: The name of the table to pull job usage data from.
         limit: The max number of rows to display on the graph.
+        start: Graph the node-seconds of the jobs that completed at or after this
+            date instead of job usage values.
+        end: Graph the node-seconds of the jobs that completed before this date
+            instead of job usage values.
     """
+    if start is not None or end is not None:
+        start, end = jobs.report_range(start, end)
+        return UsageReportGraph(conn, table, limit, start, end).draw()
+
     if table == "associations":
         return AssociationUsageGraph(conn, limit=limit).draw()
 
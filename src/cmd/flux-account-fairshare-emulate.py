@@ -51,6 +51,12 @@ def main():
         action="store_true",
         help="output results in parsable pipe-delimited format",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="engine used to calculate fair-share values; numpy requires NumPy",
+    )
 
     args = parser.parse_args()
 
@@ -76,7 +82,18 @@ def main():
         print(f"fairshare-emulate: ValueError: {exc}", file=sys.stderr)
         sys.exit(1)
 
-    calculator = fairshare_emulator.FairShareCalculator(root)
+    if args.engine == "numpy":
+        try:
+            from fluxacct.accounting import fairshare_numpy
+        except ImportError:
+            print(
+                "fairshare-emulate: ImportError: --engine=numpy requires NumPy",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        calculator = fairshare_numpy.NumPyFairShareCalculator(root)
+    else:
+        calculator = fairshare_emulator.FairShareCalculator(root)
     users = calculator.calculate()
 
     if args.parsable:
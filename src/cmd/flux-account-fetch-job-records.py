@@ -19,9 +19,12 @@ from contextlib import closing
 import logging
 
 import flux
+import flux.constants
 import flux.job
 import fluxacct.accounting
 from fluxacct.accounting import util
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as job_usage
 
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +33,13 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# the default number of job-info lookups to keep outstanding at a time
+MAX_INFLIGHT_DEFAULT = 256
+# the default number of job records to insert into the DB per transaction
+CHUNK_SIZE_DEFAULT = 1000
+# how far before the checkpoint, in seconds, to ask job-list for inactive jobs
+CHECKPOINT_LOOKBACK = 1.0
+
 
 def set_db_loc(args):
     path = args.path if args.path else fluxacct.accounting.DB_PATH
@@ -65,102 +75,239 @@ def get_jobs(rpc_handle):
         sys.exit(1)
 
 
-# fetch new jobs using Flux's job-list and job-info interfaces;
-# create job records for each newly seen job
-def fetch_new_jobs(last_timestamp=0.0):
+def build_job_record(single_job, data):
+    """
+    Create a job record from the attributes returned by job-list and the R and
+    jobspec returned by job-info for a single job.
+
+    Args:
+        single_job: The job's attributes from job-list.
+        data: The response from job-info, or None if the job could not be found.
+
+    Returns:
+        A dictionary with the job's record, or None if the job should not be added
+        to the jobs table.
+    """
+    if data is None:
+        # this job never ran; don't add it to a user's list of job records
+        return None
+
+    single_record = {}
+    # get attributes from job-list
+    for attr in single_job:
+        single_record[attr] = single_job[attr]
+
+    if data["R"] is not None:
+        single_record["R"] = data["R"]
+    if data["jobspec"] is not None:
+        single_record["jobspec"] = data["jobspec"]
+        try:
+            jobspec = json.loads(single_record["jobspec"])
+            # using .get() here ensures no KeyError is raised if
+            # "attributes" or "project" are missing; will set
+            # single_record["project"] to None if it can't be found
+            accounting_attributes = jobspec.get("attributes", {}).get("system", {})
+            single_record["project"] = accounting_attributes.get("project")
+            single_record["bank"] = accounting_attributes.get("bank")
+            # store requested job duration
+            single_record["requested_duration"] = accounting_attributes.get("duration")
+            # compute actual job duration
+            single_record["actual_duration"] = 0.0
+            t_inactive = single_job.get("t_inactive")
+            t_run = single_job.get("t_run")
+            if t_inactive is not None and t_run is not None:
+                single_record["actual_duration"] = t_inactive - t_run
+        except json.JSONDecodeError as exc:
+            # the job's jobspec can't be decoded; don't add any of its elements
+            # to the job dictionary
+            return None
+
+    required_keys = [
+        "userid",
+        "t_submit",
+        "t_run",
+        "t_inactive",
+        "ranks",
+        "id",
+        "R",
+        "jobspec",
+    ]
+    if not all(
+        key in single_record and single_record.get(key) is not None
+        for key in required_keys
+    ):
+        # job does not have all required fields to be added to jobs table
+        # in DB; skip this entry
+        return None
+
+    return single_record
+
+
+def lookup_jobs(handle, jobs, callback, max_inflight=MAX_INFLIGHT_DEFAULT):
+    """
+    Look up R and jobspec for each job with job-info, keeping at most max_inflight
+    lookups outstanding at a time instead of waiting for each response before
+    sending the next request.
+
+    Args:
+        handle: The Flux handle.
+        jobs: An iterable of jobs returned by job-list.
+        callback: Called with each job and its job-info response as the responses
+            arrive; the response is None if the job could not be found.
+        max_inflight: The maximum number of outstanding lookups.
+    """
+    if max_inflight < 1:
+        raise ValueError("max_inflight must be at least 1")
+
+    pending = iter(jobs)
+
+    def lookup_next():
+        single_job = next(pending, None)
+        if single_job is None:
+            return
+        flux.job.job_info_lookup(
+            handle,
+            single_job["id"],
+            keys=["R", "jobspec"],
+            flags=flux.constants.FLUX_JOB_LOOKUP_CURRENT,
+        ).then(lookup_cb, single_job)
+
+    def lookup_cb(future, single_job):
+        try:
+            data = future.get()
+        except FileNotFoundError:
+            # the job does not exist
+            data = None
+        callback(single_job, data)
+        lookup_next()
+
+    for _ in range(max_inflight):
+        lookup_next()
+    handle.reactor_run()
+
+
+def create_job_records(handle, jobs, max_inflight=MAX_INFLIGHT_DEFAULT):
+    """
+    Look up the R and jobspec of each job returned by job-list and create a job
+    record for each job that can be added to the jobs table.
+
+    Args:
+        handle: The Flux handle.
+        jobs: A list of jobs returned by job-list.
+        max_inflight: The maximum number of outstanding job-info lookups.
+
+    Returns:
+        A list of dictionaries where each dictionary contains information about a
+        single job record.
+    """
+    job_records = []
+
+    def add_job_record(single_job, data):
+        single_record = build_job_record(single_job, data)
+        if single_record is not None:
+            job_records.append(single_record)
+
+    # attributes needed using job-info
+    lookup_jobs(handle, jobs, add_job_record, max_inflight)
+
+    return job_records
+
+
+def get_checkpoint(cur):
+    """
+    Get the high-water mark of the job records that have been fetched so far.
+
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        A tuple of the t_inactive and jobid of the last job record committed to the
+        jobs table. If no checkpoint has been recorded yet, fall back to the most
+        recent t_inactive in the jobs table.
+    """
+    cur.execute(
+        "SELECT t_inactive, jobid FROM job_records_checkpoint_table "
+        "WHERE cluster='cluster'"
+    )
+    row = cur.fetchone()
+    if row is not None:
+        return (row[0], row[1])
+
+    cur.execute("SELECT MAX(t_inactive) FROM jobs")
+    row = cur.fetchone()
+    return (row[0] if row[0] else 0.0, 0)
+
+
+# fetch new jobs using Flux's job-list and job-info interfaces; create job records
+# for each newly seen job and insert them into the flux-accounting DB in chunks
+def fetch_new_jobs(
+    conn, cur, max_inflight=MAX_INFLIGHT_DEFAULT, chunk_size=CHUNK_SIZE_DEFAULT
+):
     handle = flux.Flux()
+    last_t_inactive, last_jobid = get_checkpoint(cur)
 
     # attributes needed using job-list
     custom_attrs = ["userid", "t_submit", "t_run", "t_inactive", "ranks"]
 
-    # construct and send RPC
+    # construct and send RPC; job-list only returns jobs that became inactive
+    # strictly after "since", so look back a little further to pick up any jobs
+    # that share a t_inactive with the last job record but were not committed
     rpc_handle = flux.job.job_list_inactive(
         handle,
         attrs=custom_attrs,
-        since=last_timestamp,
+        since=max(last_t_inactive - CHECKPOINT_LOOKBACK, 0.0),
         max_entries=0,
     )
-    jobs = get_jobs(rpc_handle)
-
-    # job_records is a list of dictionaries where each dictionary contains
-    # information about a single job record
-    job_records = []
-    for single_job in jobs:
-        single_record = {}
-        # get attributes from job-list
-        for attr in single_job:
-            single_record[attr] = single_job[attr]
-
-        # attributes needed using job-info
-        data = flux.job.job_kvs_lookup(
-            handle, single_job["id"], keys=["R", "jobspec"], decode=False
-        )
-
-        if data is None:
-            # this job never ran; don't add it to a user's list of job records
-            continue
-        if data["R"] is not None:
-            single_record["R"] = data["R"]
-        if data["jobspec"] is not None:
-            single_record["jobspec"] = data["jobspec"]
-            try:
-                jobspec = json.loads(single_record["jobspec"])
-                # using .get() here ensures no KeyError is raised if
-                # "attributes" or "project" are missing; will set
-                # single_record["project"] to None if it can't be found
-                accounting_attributes = jobspec.get("attributes", {}).get("system", {})
-                single_record["project"] = accounting_attributes.get("project")
-                single_record["bank"] = accounting_attributes.get("bank")
-                # store requested job duration
-                single_record["requested_duration"] = accounting_attributes.get(
-                    "duration"
-                )
-                # compute actual job duration
-                single_record["actual_duration"] = 0.0
-                t_inactive = single_job.get("t_inactive")
-                t_run = single_job.get("t_run")
-                if t_inactive is not None and t_run is not None:
-                    single_record["actual_duration"] = t_inactive - t_run
-            except json.JSONDecodeError as exc:
-                # the job's jobspec can't be decoded; don't add any of its elements
-                # to the job dictionary
-                continue
 
-        required_keys = [
-            "userid",
-            "t_submit",
-            "t_run",
-            "t_inactive",
-            "ranks",
-            "id",
-            "R",
-            "jobspec",
-        ]
-        if not all(
-            key in single_record and single_record.get(key) is not None
-            for key in required_keys
-        ):
-            # job does not have all required fields to be added to jobs table
-            # in DB; skip this entry
-            continue
+    # the checkpoint is only correct if jobs are committed in the order they
+    # became inactive, so sort the (small) job-list results before looking up
+    # the (large) R and jobspec of each job a chunk at a time
+    def job_order(single_job):
+        return (single_job.get("t_inactive", 0.0), single_job["id"])
+
+    jobs = sorted(
+        (
+            single_job
+            for single_job in get_jobs(rpc_handle)
+            if job_order(single_job) > (last_t_inactive, last_jobid)
+        ),
+        key=job_order,
+    )
 
-        # append job to job_records list
-        job_records.append(single_record)
+    num_job_records = 0
+    for start in range(0, len(jobs), chunk_size):
+        chunk = jobs[start : start + chunk_size]
+        job_records = create_job_records(handle, chunk, max_inflight)
+        insert_jobs_in_db(conn, cur, job_records, checkpoint=job_order(chunk[-1]))
+        num_job_records += len(job_records)
+        LOGGER.debug(
+            "committed %d job records up to job %s", num_job_records, chunk[-1]["id"]
+        )
 
-    return job_records
+    return num_job_records
 
 
 # insert newly seen jobs into the "jobs" table in the flux-accounting DB
-def insert_jobs_in_db(conn, cur, job_records):
+def insert_jobs_in_db(conn, cur, job_records, checkpoint=None):
+    """
+    Insert a chunk of job records into the jobs table in a single transaction.
+
+    Args:
+        conn: The SQLite Connection object.
+        cur: The SQLite Cursor object.
+        job_records: A list of job records.
+        checkpoint: An optional (t_inactive, jobid) tuple to record as the
+            high-water mark of the job records fetched so far in the same
+            transaction.
+    """
+    rows = []
     for single_job in job_records:
         try:
-            cur.execute(
-                """
-                INSERT OR IGNORE INTO jobs
-                (id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, project,
-                bank, requested_duration, actual_duration)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+            # count the job's resources once here so that they don't need to be
+            # counted from R every time the job record is read; if R can't be
+            # parsed, leave them NULL
+            counts = j.count_resources(single_job["R"]) or (None, None, None)
+            rows.append(
                 (
                     single_job["id"],
                     single_job["userid"],
@@ -176,12 +323,33 @@ def insert_jobs_in_db(conn, cur, job_records):
                     single_job["bank"] if single_job.get("bank") is not None else "",
                     single_job.get("requested_duration"),
                     single_job.get("actual_duration"),
-                ),
+                    *counts,
+                )
             )
         except KeyError:
             # one of the key-value pairs is missing or invalid; skip the entry
             continue
 
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO jobs
+        (id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, project,
+        bank, requested_duration, actual_duration, nnodes, ncores, ngpus)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    if checkpoint is not None:
+        cur.execute(
+            """
+            INSERT INTO job_records_checkpoint_table (cluster, t_inactive, jobid)
+            VALUES ('cluster', ?, ?)
+            ON CONFLICT(cluster) DO UPDATE
+            SET t_inactive=excluded.t_inactive, jobid=excluded.jobid
+            """,
+            checkpoint,
+        )
+
     conn.commit()
 
 
@@ -193,18 +361,20 @@ def copy_db_contents(old_cur, cur, conn):
     """
     insert_stmt = """
     INSERT OR IGNORE INTO jobs
-    (id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec)
-    VALUES (?,?,?,?,?,?,?,?)
+    (id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec,nnodes,ncores,ngpus)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?)
     """
 
     old_cur.execute(select_stmt)
     result = old_cur.fetchall()
 
     if result:
+        copied = []
         for row in result:
             if row[6] == "":
                 # this job never ran; skip it
                 continue
+            counts = j.count_resources(row[6]) or (None, None, None)
             cur.execute(
                 insert_stmt,
                 (
@@ -216,9 +386,15 @@ def copy_db_contents(old_cur, cur, conn):
                     row[5],
                     row[6],
                     row[7],
+                    *counts,
                 ),
             )
+            if cur.rowcount == 1:
+                copied.append(row[0])
 
+        # the copied job records may have become inactive before the ones already
+        # added to the daily usage rollup
+        job_usage.add_jobs_to_usage_rollup(cur, copied)
         conn.commit()
 
 
@@ -237,6 +413,28 @@ def main():
     parser.add_argument(
         "-c", "--copy", dest="copy", help="copy contents from a job-archive DB"
     )
+    parser.add_argument(
+        "--max-inflight",
+        dest="max_inflight",
+        type=int,
+        default=MAX_INFLIGHT_DEFAULT,
+        metavar="N",
+        help=(
+            "maximum number of job-info lookups to keep outstanding at a time "
+            f"(default: {MAX_INFLIGHT_DEFAULT})"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        default=CHUNK_SIZE_DEFAULT,
+        metavar="N",
+        help=(
+            "number of job records to insert into the DB per transaction "
+            f"(default: {CHUNK_SIZE_DEFAULT})"
+        ),
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -245,6 +443,10 @@ def main():
         help="increase verbosity of output",
     )
     args = parser.parse_args()
+    if args.max_inflight < 1:
+        parser.error("--max-inflight must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
     util.config_logging(args.verbose, LOGGER)
 
     path = set_db_loc(args)
@@ -258,22 +460,20 @@ def main():
             old_cur = old_archive_conn.cursor()
             with closing(old_cur):
                 copy_db_contents(old_cur, cur, conn)
-
-        # get the timestamp of the last seen job
-        timestamp = 0.0
-        cur.execute("SELECT MAX(t_inactive) FROM jobs")
-        timestamp_arr = cur.fetchall()
-
-        if timestamp_arr[0][0]:
-            timestamp = timestamp_arr[0][0]
+            # the copied job records may be newer than the checkpoint; fall back
+            # to the most recent job record in the DB
+            cur.execute("DELETE FROM job_records_checkpoint_table")
+            conn.commit()
 
         try:
-            job_records = []
             LOGGER.info("beginning INSERT of newly found jobs into flux-accounting DB")
-            job_records = fetch_new_jobs(timestamp)
-
-            insert_jobs_in_db(conn, cur, job_records=job_records)
-            LOGGER.info("INSERT of newly found jobs into flux-accounting DB complete")
+            num_job_records = fetch_new_jobs(
+                conn, cur, args.max_inflight, args.chunk_size
+            )
+            LOGGER.info(
+                "INSERT of %d newly found jobs into flux-accounting DB complete",
+                num_job_records,
+            )
         except Exception as exc:
             LOGGER.exception(exc)
 
@@ -13,14 +13,13 @@ import argparse
 import sys
 import os
 import sqlite3
-import json
 import subprocess
-import pwd
 
 import flux
 
 import fluxacct.accounting
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting import priority_push as push
 
 
 def set_db_loc(args):
@@ -62,155 +61,6 @@ def est_sqlite_conn(path):
     return conn
 
 
-def bulk_update(path):
-    conn = est_sqlite_conn(path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    data = {}
-    bulk_user_data = []
-    bulk_q_data = []
-    bulk_proj_data = []
-    bulk_bank_data = []
-    bulk_factor_data = []
-
-    # fetch all rows from association_table (will print out tuples)
-    for row in cur.execute(
-        """SELECT userid, bank, default_bank,
-           fairshare, max_running_jobs, max_active_jobs,
-           queues, active, projects, default_project, max_nodes, max_cores,
-           max_sched_jobs FROM association_table"""
-    ):
-        # create a JSON payload with the results of the query
-        single_user_data = {
-            "userid": int(row["userid"]),
-            "bank": str(row["bank"]),
-            "def_bank": str(row["default_bank"]),
-            "fairshare": float(row["fairshare"]),
-            "max_running_jobs": int(row["max_running_jobs"]),
-            "max_active_jobs": int(row["max_active_jobs"]),
-            "queues": str(row["queues"]),
-            "active": int(row["active"]),
-            "projects": str(row["projects"]),
-            "def_project": str(row["default_project"]),
-            "max_nodes": int(row["max_nodes"]),
-            "max_cores": int(row["max_cores"]),
-            "max_sched_jobs": int(row["max_sched_jobs"]),
-        }
-        bulk_user_data.append(single_user_data)
-
-    data = {"data": bulk_user_data}
-
-    flux.Flux().rpc("job-manager.mf_priority.rec_update", json.dumps(data)).get()
-
-    # fetch all rows from queue_table
-    for row in cur.execute("SELECT * FROM queue_table"):
-        # create a JSON payload with the results of the query
-        single_q_data = {
-            "queue": str(row["queue"]),
-            "min_nodes_per_job": int(row["min_nodes_per_job"]),
-            "max_nodes_per_job": int(row["max_nodes_per_job"]),
-            "max_time_per_job": int(row["max_time_per_job"]),
-            "priority": int(row["priority"]),
-            "max_running_jobs": int(row["max_running_jobs"]),
-            "max_nodes_per_assoc": int(row["max_nodes_per_assoc"]),
-            "max_sched_jobs": int(row["max_sched_jobs"]),
-            "max_sched_nodes_per_assoc": int(row["max_sched_nodes_per_assoc"]),
-            "max_sched_cores_per_assoc": int(row["max_sched_cores_per_assoc"]),
-        }
-        bulk_q_data.append(single_q_data)
-
-    data = {"data": bulk_q_data}
-
-    flux.Flux().rpc("job-manager.mf_priority.rec_q_update", json.dumps(data)).get()
-
-    # fetch all rows from project_table
-    for row in cur.execute("SELECT project FROM project_table"):
-        # create a JSON payload with the results of the query
-        single_project = {
-            "project": str(row["project"]),
-        }
-        bulk_proj_data.append(single_project)
-
-    data = {"data": bulk_proj_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_proj_update", data).get()
-
-    # fetch rows from bank_table
-    for row in cur.execute("SELECT bank, priority FROM bank_table"):
-        single_bank = {
-            "bank": str(row["bank"]),
-            "priority": float(row["priority"]),
-        }
-        bulk_bank_data.append(single_bank)
-
-    data = {"data": bulk_bank_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_bank_update", data).get()
-
-    # fetch rows from priority_factor_weight_table
-    for row in cur.execute("SELECT * FROM priority_factor_weight_table"):
-        single_priority_factor = {
-            "factor": str(row["factor"]),
-            "weight": int(row["weight"]),
-        }
-        bulk_factor_data.append(single_priority_factor)
-
-    data = {"data": bulk_factor_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_fac_update", data).get()
-
-    # fetch config values for plugin
-    plugin_config = {}
-    cur.execute("SELECT value FROM config_table WHERE key='deny_unknown_queues'")
-    row = cur.fetchone()
-    if row:
-        plugin_config["deny_unknown_queues"] = row["value"].lower() == "true"
-    else:
-        # if key is missing, default to False
-        plugin_config["deny_unknown_queues"] = False
-
-    data = {"data": plugin_config}
-    flux.Flux().rpc("job-manager.mf_priority.rec_config_update", data).get()
-
-    flux.Flux().rpc("job-manager.mf_priority.reprioritize")
-
-    # close DB connection
-    cur.close()
-
-
-def send_instance_owner_info():
-    handle = flux.Flux()
-    # get uid, username of instance owner
-    owner_uid = handle.attr_get("security.owner")
-    try:
-        # look up corresponding username of instance owner
-        owner_info = pwd.getpwuid(int(owner_uid))
-        owner_username = owner_info.pw_name
-    except KeyError:
-        # can't find instance owner info; set username to the uid
-        owner_username = owner_uid
-
-    # construct instance owner dictionary
-    instance_owner_data = {
-        "userid": int(owner_uid),
-        "bank": owner_username,
-        "def_bank": owner_username,
-        "fairshare": 0.5,
-        "max_running_jobs": 1000000,
-        "max_active_jobs": 1000000,
-        "queues": "",
-        "active": 1,
-        "projects": "*",
-        "def_project": "*",
-        "max_nodes": 1000000,
-        "max_cores": 1000000,
-        "max_sched_jobs": fluxacct.accounting.INTEGER_MAX,
-    }
-
-    flux.Flux().rpc(
-        "job-manager.mf_priority.rec_update",
-        json.dumps({"data": [instance_owner_data]}),
-    ).get()
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="""
@@ -222,12 +72,47 @@ def main():
     parser.add_argument(
         "-p", "--path", dest="path", help="specify location of database file"
     )
+    parser.add_argument(
+        "--since-last-push",
+        action="store_true",
+        help="only send data that has changed since the last push to the plugin",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=push.CHUNK_SIZE,
+        metavar="N",
+        help="send at most N associations to the plugin in one message",
+    )
+    parser.add_argument(
+        "--reprioritize-all",
+        action="store_true",
+        help=(
+            "reprioritize every job after the update instead of only the jobs "
+            "affected by it"
+        ),
+    )
     args = parser.parse_args()
 
     path = set_db_loc(args)
 
-    bulk_update(path)
-    send_instance_owner_info()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be a positive integer")
+
+    # use one handle for every message sent to the plugin
+    handle = flux.Flux()
+    owner_info = push.instance_owner_info(handle)
+    conn = est_sqlite_conn(path)
+    conn.row_factory = sqlite3.Row
+    if args.since_last_push:
+        push.delta_update(
+            handle, conn, owner_info, args.chunk_size, args.reprioritize_all
+        )
+    else:
+        push.bulk_update(
+            handle, conn, owner_info, args.chunk_size, args.reprioritize_all
+        )
+    conn.close()
 
 
 if __name__ == "__main__":
@@ -11,10 +11,14 @@
 ###############################################################
 import signal
 import sys
+import json
 import sqlite3
 import os
 import argparse
+import collections
 import logging
+import threading
+import time
 
 import flux
 import flux.constants
@@ -31,6 +35,29 @@ from fluxacct.accounting import db_info_subcommands as d
 from fluxacct.accounting import priorities as prio
 from fluxacct.accounting import visuals as vis
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting import read_pool as rp
+from fluxacct.accounting import response_cache as rc
+from fluxacct.accounting import service_stats as ss
+from fluxacct.accounting import refresh as rf
+from fluxacct.accounting import batch as bt
+
+# read-only endpoints whose responses only depend on their payload and the DB
+CACHED_ENDPOINTS = {
+    "view_user",
+    "view_bank",
+    "list_banks",
+    "view_queue",
+    "view_project",
+    "list_projects",
+    "list_queues",
+    "list_users",
+    "view_factor",
+    "list_factors",
+    "show_usage",
+    "view_config",
+    "list_configs",
+    "bank_info",
+}
 
 
 def establish_sqlite_connection(path):
@@ -60,12 +87,73 @@ def background():
         sys.exit(0)
 
 
+class DeferredResponse:
+    """
+    Stand-in for the Flux handle that is passed to the handler of a request. The
+    Flux handle can only be used from the reactor thread, so the handler's response
+    is recorded and sent from the reactor once it returns.
+    """
+
+    def __init__(self):
+        self.responses = []
+
+    def respond(self, msg, payload=None):
+        # encode the payload here so that it can also be held in the response cache
+        if payload is not None and not isinstance(payload, str):
+            payload = json.dumps(payload)
+        self.responses.append(("respond", (msg, payload)))
+
+    def respond_error(self, msg, errnum, errstr):
+        self.responses.append(("respond_error", (msg, errnum, errstr)))
+
+    @property
+    def payload(self):
+        """The encoded payload of the handler's response if it succeeded, or None."""
+        if len(self.responses) == 1 and self.responses[0][0] == "respond":
+            return self.responses[0][1][1]
+        return None
+
+    @property
+    def error(self):
+        """Whether the handler responded with an error."""
+        return any(method == "respond_error" for method, _ in self.responses)
+
+    @property
+    def size(self):
+        """The number of bytes in the payloads and error strings of the responses."""
+        return sum(
+            len(args[-1] or "") if method == "respond" else len(args[-1])
+            for method, args in self.responses
+        )
+
+    def send(self, handle):
+        for method, args in self.responses:
+            getattr(handle, method)(*args)
+
+
 # pylint: disable=broad-except, too-many-public-methods
 class AccountingService:
-    def __init__(self, flux_handle, conn):
+    def __init__(self, flux_handle, conn, cache_size=rc.RESPONSE_CACHE_SIZE):
 
         self.handle = flux_handle
-        self.conn = conn
+        self.primary_conn = conn
+        # read-only requests are run in the read pool once it is started
+        self.read_pool = None
+        self.local = threading.local()
+        # job usage, fair-share, and the priority plugin are refreshed in the
+        # background once the refresh timer is started
+        self.refresher = None
+        self.refresh_interval = 0.0
+        self.refresh_timer = None
+        self.refresh_watcher = None
+        # privileged requests that arrive while a refresh is running are held
+        # until it finishes
+        self.deferred_writes = collections.deque()
+        self.cache = rc.ResponseCache(cache_size)
+        self.service_stats = ss.ServiceStats()
+        self.primary_conn.set_trace_callback(self.service_stats.trace_statement)
+        # changes whenever another process commits a write to the DB
+        self.data_version = self.data_version_now()
 
         try:
             # register service with broker
@@ -123,11 +211,16 @@ class AccountingService:
             "add_config",
             "edit_config",
             "delete_config",
+            "index",
+            "batch",
         ]
 
         for name in general_endpoints:
             watcher = self.handle.msg_watcher_create(
-                getattr(self, name), FLUX_MSGTYPE_REQUEST, f"accounting.{name}", self
+                self.read_request,
+                FLUX_MSGTYPE_REQUEST,
+                f"accounting.{name}",
+                getattr(self, name),
             )
             self.handle.msg_handler_allow_rolemask(
                 watcher.handle, flux.constants.FLUX_ROLE_USER
@@ -136,11 +229,296 @@ class AccountingService:
 
         for name in privileged_endpoints:
             self.handle.msg_watcher_create(
-                getattr(self, name), FLUX_MSGTYPE_REQUEST, f"accounting.{name}", self
+                self.write_request,
+                FLUX_MSGTYPE_REQUEST,
+                f"accounting.{name}",
+                getattr(self, name),
             ).start()
 
+        # the slowest SQL statements in the statistics hold the values bound to
+        # them, which can come from any user's requests, so only the instance
+        # owner can see them
+        self.handle.msg_watcher_create(
+            self.stats, FLUX_MSGTYPE_REQUEST, "accounting.stats", self
+        ).start()
+
+        watcher = self.handle.msg_watcher_create(
+            self.refresh_status,
+            FLUX_MSGTYPE_REQUEST,
+            "accounting.refresh_status",
+            self,
+        )
+        self.handle.msg_handler_allow_rolemask(
+            watcher.handle, flux.constants.FLUX_ROLE_USER
+        )
+        watcher.start()
+
+    @property
+    def conn(self):
+        # handlers run in the read pool use their worker thread's read-only
+        # connection; everything else uses the primary connection
+        return getattr(self.local, "conn", self.primary_conn)
+
+    def start_read_pool(self, path, size):
+        """
+        Run read-only requests in a pool of worker threads, each with its own
+        read-only connection to the DB, so that a slow request does not hold up
+        the requests behind it. Writes stay on the primary connection in the
+        reactor thread.
+        """
+        # let readers and the writer access the DB at the same time
+        self.primary_conn.execute("PRAGMA journal_mode=WAL")
+        self.read_pool = rp.ReadPool(
+            path, size, trace_callback=self.service_stats.trace_statement
+        )
+        self.handle.fd_watcher_create(
+            self.read_pool.notify_fd,
+            self.read_pool_cb,
+            events=flux.constants.FLUX_POLLIN,
+        ).start()
+
+    def read_pool_cb(self, handle, watcher, fd_int, revents, arg):
+        # send the responses of the requests that have completed in the read pool
+        if self.read_pool is not None:
+            self.read_pool.run_completions()
+
+    def stop_read_pool(self):
+        if self.read_pool is not None:
+            self.read_pool.close()
+            self.read_pool = None
+
+    def start_refresh(self, path, interval):
+        """
+        Every interval seconds, update job usage, recalculate fair-share, and push
+        what changed to the priority plugin in a background thread with its own
+        connection to the DB. A refresh that is due while the last one is still
+        running is skipped.
+        """
+        # let the refresh write to the DB while requests read from it
+        self.primary_conn.execute("PRAGMA journal_mode=WAL")
+        self.refresher = rf.Refresher(path)
+        self.refresh_interval = interval
+        self.refresh_watcher = self.handle.fd_watcher_create(
+            self.refresher.notify_fd,
+            self.refresh_done_cb,
+            events=flux.constants.FLUX_POLLIN,
+        )
+        self.refresh_watcher.start()
+        self.refresh_timer = self.handle.timer_watcher_create(
+            interval, self.refresh_cb, repeat=interval
+        )
+        self.refresh_timer.start()
+
+    def refresh_cb(self, handle, watcher, revents, arg):
+        if not self.refresher.start():
+            LOGGER.warning("refresh: last refresh is still running; skipping")
+
+    def refresh_done_cb(self, handle, watcher, fd_int, revents, arg):
+        status = self.refresher.finish()
+        if status is not None and status["error"] is not None:
+            LOGGER.error("refresh: %s", status["error"])
+        self.run_deferred_writes()
+
+    def refresh_running(self):
+        return self.refresher is not None and self.refresher.running
+
+    def run_deferred_writes(self):
+        """
+        Run the privileged requests that were held while a refresh was running, in
+        the order they arrived.
+        """
+        while self.deferred_writes and not self.refresh_running():
+            self.run_write_request(*self.deferred_writes.popleft())
+
+    def stop_refresh(self):
+        if self.refresh_timer is not None:
+            self.refresh_timer.stop()
+            self.refresh_timer = None
+        if self.refresh_watcher is not None:
+            self.refresh_watcher.stop()
+            self.refresh_watcher = None
+        if self.refresher is not None:
+            # a refresh that is still running after the timeout is abandoned; its
+            # transaction is rolled back when the service exits
+            if not self.refresher.close(timeout=rf.STOP_TIMEOUT):
+                LOGGER.warning(
+                    "refresh: still running after %ds; abandoning it", rf.STOP_TIMEOUT
+                )
+            self.refresher = None
+        while self.deferred_writes:
+            handle, _, msg, handler, _ = self.deferred_writes.popleft()
+            handle.respond_error(
+                msg, 0, f"{handler.__name__}: flux-accounting service is shutting down"
+            )
+
+    def data_version_now(self):
+        return self.primary_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def check_data_version(self):
+        """
+        Invalidate the response cache if another process, e.g. a cron job that
+        updates job usage, has committed a write to the DB since the last check.
+        """
+        data_version = self.data_version_now()
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.cache.invalidate()
+
+    def cache_key(self, name, payload):
+        """
+        Return the key of a read-only request in the response cache, or None if its
+        response can't be cached.
+        """
+        if self.cache.maxsize < 1 or name not in CACHED_ENDPOINTS:
+            return None
+        if not isinstance(payload, dict):
+            return None
+        # a date range can be relative to the current time
+        if name == "show_usage" and (payload.get("start") or payload.get("end")):
+            return None
+        return self.cache.key(name, payload)
+
+    def run_handler(self, handler, watcher, msg):
+        """
+        Run the handler of a request, recording its response and the SQL
+        statements it runs, and return its response.
+        """
+        response = DeferredResponse()
+        self.service_stats.begin_sql(handler.__name__)
+        try:
+            handler(response, watcher, msg, self)
+        finally:
+            self.service_stats.end_sql()
+        return response
+
+    def read_request(self, handle, watcher, msg, handler):
+        """
+        Answer a read-only request from the response cache, or run its handler in
+        the read pool and send its response from the reactor once it completes.
+        """
+        start = time.perf_counter()
+        name = handler.__name__
+        request_bytes = len(msg.payload_str or "")
+        key = self.cache_key(name, msg.payload)
+        if key is not None:
+            self.check_data_version()
+            payload = self.cache.get(key)
+            if payload is not None:
+                handle.respond(msg, payload)
+                self.service_stats.record_request(
+                    name,
+                    time.perf_counter() - start,
+                    request_bytes,
+                    len(payload),
+                    cache_hit=True,
+                )
+                return
+        generation = self.cache.generation
+
+        def run(conn):
+            self.local.conn = conn
+            try:
+                return self.run_handler(handler, watcher, msg)
+            finally:
+                del self.local.conn
+
+        def done(response, exc):
+            if exc is not None:
+                errstr = f"{type(exc).__name__}: {exc}"
+                handle.respond_error(msg, 0, errstr)
+                self.service_stats.record_request(
+                    name,
+                    time.perf_counter() - start,
+                    request_bytes,
+                    len(errstr),
+                    error=True,
+                )
+                return
+            if key is not None and response.payload is not None:
+                # a response read while the DB was being written to is not held
+                self.check_data_version()
+                self.cache.put(key, response.payload, generation)
+            response.send(handle)
+            self.service_stats.record_request(
+                name,
+                time.perf_counter() - start,
+                request_bytes,
+                response.size,
+                error=response.error,
+            )
+
+        if self.read_pool is None:
+            done(run(self.primary_conn), None)
+        else:
+            self.read_pool.submit(run, done)
+
+    def write_request(self, handle, watcher, msg, handler):
+        """
+        Run the handler of a privileged request, which can write to the DB. A
+        refresh holds a write transaction on its own connection for as long as it
+        runs, so a request that arrives during a refresh is held until it finishes
+        instead of blocking the reactor on the DB's lock.
+        """
+        start = time.perf_counter()
+        if self.refresh_running():
+            self.deferred_writes.append((handle, watcher, msg, handler, start))
+            return
+        self.run_write_request(handle, watcher, msg, handler, start)
+
+    def run_write_request(self, handle, watcher, msg, handler, start):
+        """
+        Run the handler of a privileged request and drop every response held in the
+        response cache once it returns.
+        """
+        try:
+            response = self.run_handler(handler, watcher, msg)
+        finally:
+            self.cache.invalidate()
+        response.send(handle)
+        self.service_stats.record_request(
+            handler.__name__,
+            time.perf_counter() - start,
+            len(msg.payload_str or ""),
+            response.size,
+            error=response.error,
+        )
+
+    def stats(self, handle, watcher, msg, arg):
+        try:
+            stats = self.service_stats.to_dict()
+            stats["cache"] = self.cache.stats()
+            val = ss.format_stats(stats, json_fmt=msg.payload.get("json"))
+
+            if msg.payload.get("reset"):
+                self.service_stats.reset()
+                self.cache.reset_stats()
+
+            payload = {"stats": val}
+
+            handle.respond(msg, payload)
+        except KeyError as exc:
+            handle.respond_error(msg, 0, f"stats: missing key in payload: {exc}")
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"stats: {type(exc).__name__}: {exc}")
+
+    def refresh_status(self, handle, watcher, msg, arg):
+        try:
+            payload = {
+                "enabled": self.refresher is not None,
+                "interval": self.refresh_interval,
+            }
+            if self.refresher is not None:
+                payload.update(self.refresher.status())
+                payload["deferred_writes"] = len(self.deferred_writes)
+
+            handle.respond(msg, payload)
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"refresh-status: {type(exc).__name__}: {exc}")
+
     def shutdown(self, handle, watcher, signum, arg):
         print("Shutting down...", file=sys.stderr)
+        self.stop_refresh()
+        self.stop_read_pool()
         self.conn.close()
         self.handle.service_unregister("accounting").get()
         self.handle.reactor_stop()
@@ -148,6 +526,8 @@ class AccountingService:
     # watches for a shutdown message
     def shutdown_service(self, handle, watcher, msg, arg):
         print("Shutting down...", file=sys.stderr)
+        self.stop_refresh()
+        self.stop_read_pool()
         self.conn.close()
         self.handle.service_unregister("accounting").get()
         self.handle.reactor_stop()
@@ -712,6 +1092,8 @@ class AccountingService:
                 conn=self.conn,
                 table=msg.payload["table"],
                 limit=msg.payload.get("limit"),
+                start=msg.payload.get("start"),
+                end=msg.payload.get("end"),
             )
 
             payload = {"show_usage": val}
@@ -764,7 +1146,10 @@ class AccountingService:
 
     def export_json(self, handle, watcher, msg, arg):
         try:
-            val = d.export_as_json(conn=self.conn)
+            val = d.export_as_json(
+                conn=self.conn,
+                columnar_associations=msg.payload.get("columnar", False),
+            )
 
             payload = {"export_json": val}
 
@@ -893,6 +1278,59 @@ class AccountingService:
         except Exception as exc:
             handle.respond_error(msg, 0, f"list-configs: {type(exc).__name__}: {exc}")
 
+    def index(self, handle, watcher, msg, arg):
+        try:
+            if msg.payload.get("rebuild"):
+                d.rebuild_jobs_indexes(self.conn)
+            if msg.payload.get("analyze"):
+                d.analyze_jobs_table(self.conn)
+            val = d.view_jobs_indexes(self.conn, json_fmt=msg.payload.get("json"))
+
+            payload = {"index": val}
+
+            handle.respond(msg, payload)
+        except KeyError as exc:
+            handle.respond_error(msg, 0, f"index: missing key in payload: {exc}")
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"index: {type(exc).__name__}: {exc}")
+
+    def batch(self, handle, watcher, msg, arg):
+        def run_operation(conn, name, payload):
+            # run the operation's handler on the batch's connection
+            response = DeferredResponse()
+            self.local.conn = conn
+            try:
+                getattr(self, name)(
+                    response, watcher, bt.OperationMessage(payload, msg.rolemask), arg
+                )
+            finally:
+                del self.local.conn
+            for method, args in response.responses:
+                if method == "respond_error":
+                    raise bt.OperationError(args[-1])
+            return list(json.loads(response.payload).values())[0]
+
+        try:
+            results = bt.run_batch(
+                self.conn,
+                msg.payload["operations"],
+                run_operation,
+                keep_going=msg.payload.get("keep_going", False),
+            )
+            val = bt.format_results(results, json_fmt=msg.payload.get("json"))
+
+            if not results["committed"]:
+                handle.respond_error(msg, 0, f"batch: {val}")
+                return
+
+            payload = {"batch": val}
+
+            handle.respond(msg, payload)
+        except KeyError as exc:
+            handle.respond_error(msg, 0, f"batch: missing key in payload: {exc}")
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"batch: {type(exc).__name__}: {exc}")
+
     def bank_info(self, handle, watcher, msg, arg):
         try:
             val = b.bank_info(
@@ -932,7 +1370,44 @@ def main():
         dest="background",
         help="used for testing",
     )
+    parser.add_argument(
+        "--read-threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="run read-only requests in a pool of N threads, each with its own "
+        "read-only connection to the DB, and put the DB in WAL mode; 0 runs "
+        "every request in the reactor (default: 0)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=rc.RESPONSE_CACHE_SIZE,
+        metavar="N",
+        help="hold the responses to up to N read-only requests until the DB is "
+        f"written to; 0 disables the cache (default: {rc.RESPONSE_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        default="0",
+        metavar="FSD",
+        help="update job usage, recalculate fair-share, and push changes to the "
+        "priority plugin every FSD (e.g. 5m), in place of running flux "
+        "account-update-usage, flux account-update-fshare, and flux "
+        "account-priority-update; 0 disables the refresh (default: 0)",
+    )
     args = parser.parse_args()
+    try:
+        refresh_interval = flux.util.parse_fsd(args.refresh_interval)
+    except ValueError as exc:
+        LOGGER.error("--refresh-interval: %s", exc)
+        sys.exit(1)
+    if args.read_threads < 0:
+        LOGGER.error("--read-threads must be 0 or greater")
+        sys.exit(1)
+    if args.cache_size < 0:
+        LOGGER.error("--cache-size must be 0 or greater")
+        sys.exit(1)
 
     # try to connect to flux-accounting database; if connection fails, exit
     # flux-accounting service
@@ -948,11 +1423,17 @@ def main():
         sys.exit(1)
 
     handle = flux.Flux()
-    server = AccountingService(handle, conn)
+    server = AccountingService(handle, conn, args.cache_size)
 
     if args.background:
         background()
 
+    # worker threads do not survive a fork, so start them after backgrounding
+    if args.read_threads > 0:
+        server.start_read_pool(db_path, args.read_threads)
+    if refresh_interval > 0:
+        server.start_refresh(db_path, refresh_interval)
+
     handle.reactor_run()
 
 
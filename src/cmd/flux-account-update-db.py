@@ -21,6 +21,8 @@ from argparse import RawDescriptionHelpFormatter
 
 import fluxacct.accounting
 from fluxacct.accounting import create_db as c
+from fluxacct.accounting import job_usage_calculation as jobs
+from fluxacct.accounting import jobs_table_subcommands as j
 from fluxacct.accounting import util
 
 LOGGER = logging.getLogger(__name__)
@@ -341,7 +343,106 @@ def migrate_job_usage_to_per_assoc(cur):
     LOGGER.info("migration complete")
 
 
-def update_db(path, new_db):
+def backfill_job_resource_counts(cur, batch_size=10000):
+    """
+    Count the nodes, cores, and GPUs of every job record in the jobs table that was
+    inserted before they were stored alongside the job. Job records whose R can't
+    be parsed are left as-is.
+
+    Args:
+        cur: the Cursor object used to interact with the database.
+        batch_size: the number of job records to read from the jobs table at a time.
+    """
+    LOGGER.info("backfilling resource counts for job records...")
+    last_id = ""
+    num_jobs = 0
+    while True:
+        cur.execute(
+            "SELECT id, R FROM jobs WHERE nnodes IS NULL AND id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        counts = []
+        for jobid, job_resources in rows:
+            resources = j.count_resources(job_resources)
+            if resources is not None:
+                counts.append((*resources, jobid))
+        cur.executemany(
+            "UPDATE jobs SET nnodes=?, ncores=?, ngpus=? WHERE id=?", counts
+        )
+        num_jobs += len(counts)
+    LOGGER.info("backfilled resource counts for %d job records", num_jobs)
+
+
+def table_exists(cur, table):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,))
+    return cur.fetchone() is not None
+
+
+def roll_up_pending_jobs(cur):
+    """
+    Add the job records that have not been added to the daily usage rollup yet.
+    Databases created before the rollup checkpoint was the (t_inactive, id) of the
+    last job record added still keep it as a rowid.
+
+    Args:
+        cur: The SQLite Cursor object.
+    """
+    cur.execute("PRAGMA table_info(usage_rollup_checkpoint_table)")
+    if "last_rowid" not in [column[1] for column in cur.fetchall()]:
+        jobs.update_usage_rollup(cur)
+        return
+
+    cur.execute(
+        "SELECT last_rowid FROM usage_rollup_checkpoint_table WHERE cluster='cluster'"
+    )
+    row = cur.fetchone()
+    rows = cur.connection.cursor()
+    rows.execute(jobs.S_ROLLUP_JOBS + " WHERE rowid > ?", (row[0] if row else 0,))
+    jobs.add_to_usage_rollup(cur, rows)
+
+
+def update_usage_rollup(cur, has_usage_rollup):
+    """
+    Bring the daily usage rollup up to date with the jobs table.
+
+    Args:
+        cur: The SQLite Cursor object.
+        has_usage_rollup: Whether the DB had a usage_rollup_table before it was
+            updated. If it did, every job record had already been added to it
+            before update_columns(), which may have reset the rollup checkpoint.
+            Otherwise, it is filled in from every job record in the jobs table.
+    """
+    if has_usage_rollup:
+        last_job = jobs.get_last_job_key(cur)
+        if last_job is not None:
+            jobs.set_rollup_checkpoint(cur, last_job)
+        return
+
+    LOGGER.info("adding job records to usage_rollup_table...")
+    num_jobs = jobs.update_usage_rollup(cur)
+    LOGGER.info("added %d job records to usage_rollup_table", num_jobs)
+
+
+def migrate_usage_ring_buffer(conn):
+    """
+    Convert job_usage_per_association_table to store each association's usage
+    periods as a ring buffer keyed by half-life epoch, where decay is applied when a
+    period is read instead of shifting every period row when a half-life boundary
+    passes. Converting a DB that already stores its periods this way does nothing.
+
+    Args:
+        conn: the Connection object used to interact with the database.
+    """
+    LOGGER.info("converting job usage periods to a ring buffer...")
+    num_rows = jobs.convert_to_ring_buffer(conn)
+    LOGGER.info("converted %d job usage period rows", num_rows)
+
+
+def update_db(path, new_db, ring_buffer_usage=False):
     LOGGER.info("starting database update for %s", path)
     # create a backup of the database
     backup_path = path + ".backup"
@@ -366,10 +467,23 @@ def update_db(path, new_db):
 
             new_cur = new_conn.cursor()
 
+            # update_columns() may recreate the rollup checkpoint table, so any
+            # job records not yet in the daily usage rollup are added first
+            has_usage_rollup = table_exists(old_cur, "usage_rollup_table")
+            if has_usage_rollup:
+                roll_up_pending_jobs(old_cur)
+
             update_tables(old_cur, new_cur)
             migrate_job_usage_to_per_assoc(old_cur)
 
             update_columns(old_cur, new_cur)
+            backfill_job_resource_counts(old_cur)
+            # recreating the jobs table in update_columns() drops its indexes
+            LOGGER.info("adding any missing indexes on jobs table...")
+            c.create_jobs_indexes(old_conn)
+            update_usage_rollup(old_cur, has_usage_rollup)
+            if ring_buffer_usage:
+                migrate_usage_ring_buffer(old_conn)
 
             init_priority_factor_table(old_cur)
             init_config_table(old_cur)
@@ -422,6 +536,14 @@ def main():
         dest="new_db",
         help="(testing only) specify location of new template database file",
     )
+    parser.add_argument(
+        "--ring-buffer-usage",
+        action="store_true",
+        help=(
+            "store each association's job usage periods as a ring buffer keyed by "
+            "half-life epoch so that a half-life boundary does not rewrite them"
+        ),
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -435,7 +557,7 @@ def main():
 
     old_db = set_db_loc(args)
 
-    update_db(old_db, args.new_db)
+    update_db(old_db, args.new_db, args.ring_buffer_usage)
 
 
 if __name__ == "__main__":
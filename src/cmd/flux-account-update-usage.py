@@ -59,6 +59,14 @@ def main():
     parser.add_argument(
         "-p", "--path", dest="path", help="specify location of database file"
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help=(
+            "compute job usage for every association in memory and write it back "
+            "with bulk statements instead of updating one association at a time"
+        ),
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -73,7 +81,7 @@ def main():
     conn = est_sqlite_conn(path)
 
     try:
-        job_usage.update_job_usage(conn)
+        job_usage.update_job_usage(conn, bulk=args.bulk)
     except sqlite3.OperationalError as exc:
         LOGGER.exception(
             "SQLite operational error during job-usage update; rolled back. "
@@ -10,17 +10,23 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import argparse
+import collections
+import contextlib
+import io
 import sys
+import json
 import logging
-import subprocess
+import shlex
 
 import flux
 from flux.constants import FLUX_USERID_UNKNOWN
 import fluxacct.accounting
 
-from fluxacct.accounting import create_db as c
 from fluxacct.accounting import INTEGER_MAX
 
+# the default number of requests to keep outstanding at a time with --stdin
+MAX_INFLIGHT_DEFAULT = 64
+
 
 def add_path_arg(parser):
     parser.add_argument(
@@ -28,6 +34,24 @@ def add_path_arg(parser):
     )
 
 
+def add_stdin_arg(parser):
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="read commands from stdin, one per line, and print their output in "
+        "the order they were read",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        dest="max_inflight",
+        type=int,
+        default=MAX_INFLIGHT_DEFAULT,
+        metavar="N",
+        help="maximum number of requests to keep outstanding at a time with "
+        f"--stdin (default: {MAX_INFLIGHT_DEFAULT})",
+    )
+
+
 def add_view_user_arg(subparsers):
     subparser_view_user = subparsers.add_parser(
         "view-user",
@@ -1421,6 +1445,24 @@ def add_show_usage_arg(subparsers):
         default=10,
         metavar="LIMIT",
     )
+    subparsers_visuals.add_argument(
+        "-s",
+        "--start",
+        help=(
+            "graph node-seconds of the jobs that completed since this time; "
+            "accepts the same formats as view-usage-report"
+        ),
+        metavar="DATE",
+    )
+    subparsers_visuals.add_argument(
+        "-e",
+        "--end",
+        help=(
+            "graph node-seconds of the jobs that completed before this time; "
+            "accepts the same formats as view-usage-report"
+        ),
+        metavar="DATE",
+    )
 
 
 def add_synchronize_userids_arg(subparsers):
@@ -1442,6 +1484,11 @@ def add_export_json_arg(subparsers):
         formatter_class=flux.util.help_formatter(),
     )
     subparsers_init_plugin.set_defaults(func="export_json")
+    subparsers_init_plugin.add_argument(
+        "--columnar",
+        action="store_true",
+        help="export associations as a list of column names and a list of rows",
+    )
 
 
 def view_usage_report(subparsers):
@@ -1634,50 +1681,255 @@ def add_list_configs(subparsers):
     )
 
 
-def add_arguments_to_parser(parser, subparsers):
+def add_index_arg(subparsers):
+    subparser_index = subparsers.add_parser(
+        "index",
+        help="list the indexes on the jobs table and the queries that use them",
+        formatter_class=flux.util.help_formatter(),
+    )
+    subparser_index.set_defaults(func="index")
+    subparser_index.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="create any missing indexes and rebuild all indexes on the jobs table",
+    )
+    subparser_index.add_argument(
+        "--analyze",
+        action="store_true",
+        help="gather statistics about the jobs table for the query planner",
+    )
+    subparser_index.add_argument(
+        "--json",
+        action="store_true",
+        help="print output in JSON format",
+    )
+
+
+def add_stats_arg(subparsers):
+    subparser_stats = subparsers.add_parser(
+        "stats",
+        help="show request, latency, and SQL statistics of the flux-accounting service",
+        formatter_class=flux.util.help_formatter(),
+    )
+    subparser_stats.set_defaults(func="stats")
+    subparser_stats.add_argument(
+        "--reset",
+        action="store_true",
+        help="reset the statistics after showing them",
+    )
+    subparser_stats.add_argument(
+        "--json",
+        action="store_true",
+        help="print output in JSON format",
+    )
+
+
+def add_batch_arg(subparsers):
+    subparser_batch = subparsers.add_parser(
+        "batch",
+        help="apply many operations to the flux-accounting DB in one transaction",
+        formatter_class=flux.util.help_formatter(),
+    )
+    subparser_batch.set_defaults(func="batch")
+    subparser_batch.add_argument(
+        "-f",
+        "--file",
+        required=True,
+        help="read operations from FILE, one JSON object per line, or from "
+        "stdin if FILE is -",
+        metavar="FILE",
+    )
+    subparser_batch.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="apply the operations that succeed even if others fail; by default, "
+        "no operation is applied if any of them fails",
+    )
+    subparser_batch.add_argument(
+        "--json",
+        action="store_true",
+        help="print the result of each operation in JSON format",
+    )
+
+
+# map each subcommand to the function that adds its parser, in the order they
+# are listed in the help message
+SUBCOMMANDS = {
+    "view-user": add_view_user_arg,
+    "list-users": add_list_users_arg,
+    "add-user": add_add_user_arg,
+    "delete-user": add_delete_user_arg,
+    "edit-user": add_edit_user_arg,
+    "view-job-records": add_view_job_records_arg,
+    "create-db": add_create_db_arg,
+    "add-bank": add_add_bank_arg,
+    "view-bank": add_view_bank_arg,
+    "delete-bank": add_delete_bank_arg,
+    "edit-bank": add_edit_bank_arg,
+    "list-banks": add_list_banks_arg,
+    "bank-info": add_bank_info_arg,
+    "update-usage": add_update_usage_arg,
+    "add-queue": add_add_queue_arg,
+    "view-queue": add_view_queue_arg,
+    "edit-queue": add_edit_queue_arg,
+    "delete-queue": add_delete_queue_arg,
+    "add-project": add_add_project_arg,
+    "view-project": add_view_project_arg,
+    "delete-project": add_delete_project_arg,
+    "list-projects": add_list_projects_arg,
+    "scrub-old-jobs": add_scrub_job_records_arg,
+    "export-db": add_export_db_arg,
+    "pop-db": add_pop_db_arg,
+    "list-queues": add_list_queues_arg,
+    "view-factor": add_view_priority_factor_arg,
+    "edit-factor": add_edit_priority_factor_arg,
+    "list-factors": add_list_priority_factors,
+    "reset-factors": add_reset_priority_factors_arg,
+    "jobs": add_jobs_arg,
+    "show-usage": add_show_usage_arg,
+    "edit-all-users": add_edit_all_users_arg,
+    "sync-userids": add_synchronize_userids_arg,
+    "export-json": add_export_json_arg,
+    "view-usage-report": view_usage_report,
+    "clear-usage": add_clear_usage_arg,
+    "add-config": add_add_config_arg,
+    "view-config": add_view_config_arg,
+    "edit-config": add_edit_config_arg,
+    "delete-config": add_delete_config_arg,
+    "list-configs": add_list_configs,
+    "index": add_index_arg,
+    "stats": add_stats_arg,
+    "batch": add_batch_arg,
+}
+
+
+def find_subcommand(argv):
+    """
+    Return the subcommand named on the command line, or None if there is none
+    or the top-level help message was asked for.
+    """
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-p", "--path", "--max-inflight"):
+            # skip the option's value
+            next(args, None)
+        elif arg in ("-h", "--help"):
+            return None
+        elif not arg.startswith("-"):
+            return arg
+
+    return None
+
+
+def add_arguments_to_parser(parser, subparsers, subcommand=None):
+    """
+    Add the top-level arguments and the parser of each subcommand. If
+    subcommand is a known subcommand, only its parser is added, since building
+    the parsers of all of the subcommands makes up most of the time it takes to
+    start up.
+    """
     add_path_arg(parser)
-    add_view_user_arg(subparsers)
-    add_list_users_arg(subparsers)
-    add_add_user_arg(subparsers)
-    add_delete_user_arg(subparsers)
-    add_edit_user_arg(subparsers)
-    add_view_job_records_arg(subparsers)
-    add_create_db_arg(subparsers)
-    add_add_bank_arg(subparsers)
-    add_view_bank_arg(subparsers)
-    add_delete_bank_arg(subparsers)
-    add_edit_bank_arg(subparsers)
-    add_list_banks_arg(subparsers)
-    add_bank_info_arg(subparsers)
-    add_update_usage_arg(subparsers)
-    add_add_queue_arg(subparsers)
-    add_view_queue_arg(subparsers)
-    add_edit_queue_arg(subparsers)
-    add_delete_queue_arg(subparsers)
-    add_add_project_arg(subparsers)
-    add_view_project_arg(subparsers)
-    add_delete_project_arg(subparsers)
-    add_list_projects_arg(subparsers)
-    add_scrub_job_records_arg(subparsers)
-    add_export_db_arg(subparsers)
-    add_pop_db_arg(subparsers)
-    add_list_queues_arg(subparsers)
-    add_view_priority_factor_arg(subparsers)
-    add_edit_priority_factor_arg(subparsers)
-    add_list_priority_factors(subparsers)
-    add_reset_priority_factors_arg(subparsers)
-    add_jobs_arg(subparsers)
-    add_show_usage_arg(subparsers)
-    add_edit_all_users_arg(subparsers)
-    add_synchronize_userids_arg(subparsers)
-    add_export_json_arg(subparsers)
-    view_usage_report(subparsers)
-    add_clear_usage_arg(subparsers)
-    add_add_config_arg(subparsers)
-    add_view_config_arg(subparsers)
-    add_edit_config_arg(subparsers)
-    add_delete_config_arg(subparsers)
-    add_list_configs(subparsers)
+    add_stdin_arg(parser)
+    if subcommand in SUBCOMMANDS:
+        SUBCOMMANDS[subcommand](subparsers)
+        return
+    for add_subcommand_arg in SUBCOMMANDS.values():
+        add_subcommand_arg(subparsers)
+
+
+def batch_operation_argv(subparser, operation):
+    """
+    Build the command line of a subcommand from the arguments of an operation of
+    a batch, keyed by the names of the subcommand's arguments. Raise ValueError
+    if an argument is not one of the subcommand's.
+    """
+    actions = {}
+    # pylint: disable=protected-access
+    for action in subparser._actions:
+        if action.dest != argparse.SUPPRESS:
+            actions.setdefault(action.dest, action)
+
+    options = []
+    positionals = {}
+    for key, val in operation.items():
+        action = actions.get(key.replace("-", "_"))
+        if action is None:
+            raise ValueError(f"unknown argument {key}")
+        if val is None:
+            continue
+        vals = [str(item) for item in val] if isinstance(val, list) else [str(val)]
+        if len(vals) != 1 and action.nargs not in ("+", "*"):
+            raise ValueError(f"{key} takes one value")
+        if not action.option_strings:
+            positionals[action.dest] = vals
+        elif action.nargs == 0:
+            # a flag, e.g. --parsable
+            if val:
+                options.append(action.option_strings[-1])
+        elif action.nargs in ("+", "*"):
+            options.append(action.option_strings[-1])
+            options.extend(vals)
+        else:
+            options.append(f"{action.option_strings[-1]}={vals[0]}")
+
+    argv = options
+    if positionals:
+        argv.append("--")
+        for action in subparser._actions:
+            if not action.option_strings:
+                argv.extend(positionals.get(action.dest, []))
+
+    return argv
+
+
+def read_batch_operations(path):
+    """
+    Read a file of operations, one JSON object per line, and return them as the
+    operations of a batch. Each object names the subcommand to run in its "op"
+    key and gives the subcommand's arguments in the rest of its keys. The
+    arguments are parsed by the subcommand's parser, so arguments that are not
+    given are set to the subcommand's defaults and an operation that the
+    subcommand would reject on the command line is reported with its line number.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding="utf-8") as ops_file:
+            lines = ops_file.read().splitlines()
+
+    parser = argparse.ArgumentParser(prog="flux account batch")
+    subparsers = parser.add_subparsers()
+    operations = []
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            operation = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"{path}:{lineno}: {exc}") from exc
+        if not isinstance(operation, dict) or "op" not in operation:
+            raise ValueError(f'{path}:{lineno}: operation must have an "op" key')
+        name = str(operation.pop("op")).replace("_", "-")
+        if name not in SUBCOMMANDS:
+            raise ValueError(f"{path}:{lineno}: unknown subcommand {name}")
+        if name not in subparsers.choices:
+            SUBCOMMANDS[name](subparsers)
+        subparser = subparsers.choices[name]
+
+        err = io.StringIO()
+        try:
+            argv = batch_operation_argv(subparser, operation)
+            with contextlib.redirect_stderr(err):
+                args = subparser.parse_args(argv)
+        except SystemExit as exc:
+            err_lines = err.getvalue().strip().splitlines()
+            msg = err_lines[-1] if err_lines else "invalid operation"
+            raise ValueError(f"{path}:{lineno}: {msg}") from exc
+        except ValueError as exc:
+            raise ValueError(f"{path}:{lineno}: {name}: {exc}") from exc
+        operations.append({"op": args.func, "payload": vars(args)})
+
+    return operations
 
 
 def set_db_location(args):
@@ -1686,7 +1938,11 @@ def set_db_location(args):
     return path
 
 
-def select_accounting_function(args, parser):
+def accounting_request(args):
+    """
+    Return the topic and payload of the flux-accounting service request that
+    runs a command, or None if the command is not run by the service.
+    """
     data = vars(args)
 
     # map each command to the corresponding accounting RPC call
@@ -1731,18 +1987,129 @@ def select_accounting_function(args, parser):
         "edit_config": "accounting.edit_config",
         "delete_config": "accounting.delete_config",
         "list_configs": "accounting.list_configs",
+        "index": "accounting.index",
+        "stats": "accounting.stats",
+        "batch": "accounting.batch",
     }
 
-    if args.func in func_map:
-        return_val = flux.Flux().rpc(func_map[args.func], data).get()
-    else:
+    if args.func == "batch":
+        # send the operations in the file instead of the path to the file
+        data["operations"] = read_batch_operations(args.file)
+
+    if args.func not in func_map:
+        return None
+
+    return func_map[args.func], data
+
+
+def select_accounting_function(args, parser):
+    request = accounting_request(args)
+    if request is None:
         parser.print_usage()
         return
 
+    return_val = flux.Flux().rpc(*request).get()
+
     if list(return_val.values())[0] != 0:
         print(list(return_val.values())[0])
 
 
+def parse_line(parser, line):
+    """
+    Parse one line of commands read with --stdin. Raise ValueError with the
+    parser's error message if the line can't be parsed.
+    """
+    err = io.StringIO()
+    try:
+        # the parser prints its help to stdout, where it would land between the
+        # responses to other lines
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(err):
+            args = parser.parse_args(shlex.split(line))
+    except SystemExit as exc:
+        if exc.code == 0:
+            raise ValueError(
+                "-h/--help can't be used in a line read with --stdin"
+            ) from exc
+        lines = err.getvalue().strip().splitlines()
+        raise ValueError(lines[-1] if lines else "invalid command") from exc
+    except ValueError as exc:
+        # e.g. unbalanced quotes
+        raise ValueError(f"invalid command: {exc}") from exc
+    if args.stdin:
+        raise ValueError("--stdin can't be used in a line read with --stdin")
+    if args.subcommand is None:
+        raise ValueError("the following arguments are required: subcommand")
+
+    return args
+
+
+def run_stdin(handle, parser, lines, max_inflight=MAX_INFLIGHT_DEFAULT):
+    """
+    Run the command on each line, sending the requests to the flux-accounting
+    service on one handle and keeping at most max_inflight of them outstanding
+    at a time instead of waiting for each response before sending the next
+    request. The responses are printed in the order of the lines. Return the
+    number of lines that failed.
+
+    Args:
+        handle: The Flux handle.
+        parser: The parser of flux account's arguments.
+        lines: An iterable of lines, each holding the arguments of one command.
+        max_inflight: The maximum number of outstanding requests.
+    """
+    if max_inflight < 1:
+        raise ValueError("max_inflight must be at least 1")
+
+    pending = enumerate(lines, start=1)
+    # the response or error of each line that is done, until it is printed
+    done = {}
+    order = collections.deque()
+    failed = 0
+
+    def print_done():
+        nonlocal failed
+        while order and order[0] in done:
+            lineno = order.popleft()
+            error, val = done.pop(lineno)
+            if error:
+                failed += 1
+                LOGGER.error("line %d: %s", lineno, val)
+            elif val != 0:
+                print(val)
+
+    def send_next():
+        # skip the lines that don't need a request until one is sent
+        for lineno, line in pending:
+            if not line.strip():
+                continue
+            order.append(lineno)
+            try:
+                request = accounting_request(parse_line(parser, line))
+                if request is None:
+                    raise ValueError("command can't be run with --stdin")
+            except ValueError as exc:
+                done[lineno] = (True, str(exc))
+                print_done()
+                continue
+            handle.rpc(*request).then(response_cb, lineno)
+            return
+
+    def response_cb(future, lineno):
+        try:
+            done[lineno] = (False, list(future.get().values())[0])
+        except OSError as exc:
+            done[lineno] = (True, exc.strerror or str(exc))
+        print_done()
+        send_next()
+
+    for _ in range(max_inflight):
+        send_next()
+    handle.reactor_run()
+    print_done()
+
+    return failed
+
+
 LOGGER = logging.getLogger("flux-account")
 
 
@@ -1756,16 +2123,28 @@ def main():
         """
     )
     subparsers = parser.add_subparsers(help="sub-command help", dest="subcommand")
-    subparsers.required = True
 
-    add_arguments_to_parser(parser, subparsers)
+    add_arguments_to_parser(parser, subparsers, find_subcommand(sys.argv[1:]))
     args = parser.parse_args()
 
+    if args.stdin:
+        if args.subcommand is not None:
+            parser.error("a subcommand can't be given with --stdin")
+        if args.max_inflight < 1:
+            parser.error("--max-inflight must be at least 1")
+        if run_stdin(flux.Flux(), parser, sys.stdin, args.max_inflight) > 0:
+            sys.exit(1)
+        sys.exit(0)
+    if args.subcommand is None:
+        parser.error("the following arguments are required: subcommand")
+
     path = set_db_location(args)
 
     # if we are creating the DB for the first time, we need
     # to ONLY create the DB and then exit out successfully
     if args.func == "create_db":
+        from fluxacct.accounting import create_db as c
+
         c.create_db(
             path,
             args.priority_usage_reset_period,
@@ -1781,6 +2160,8 @@ def main():
             "update-usage is deprecated. Use 'flux account-update-usage instead."
         )
         LOGGER.info("running 'flux account-update-usage locally")
+        import subprocess
+
         try:
             handle = flux.Flux()
             if handle.get_rank() != 0:
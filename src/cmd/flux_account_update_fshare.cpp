@@ -9,6 +9,9 @@
 \************************************************************/
 #include <iostream>
 #include <iomanip>
+#include <string>
+#include <unordered_map>
+#include <vector>
 
 extern "C" {
 #if HAVE_CONFIG_H
@@ -28,21 +31,90 @@ const std::string DBPATH = std::string (X_LOCALSTATEDIR)
 
 static void show_usage ()
 {
-    std::cout << "usage: flux update-fshare [-p DB_PATH]\n"
+    std::cout << "usage: flux update-fshare [-p DB_PATH] [--incremental]\n"
               << "optional arguments:\n"
               << "\t-h,--help\t\t\tShow this help message\n"
               << "\t-p DB_PATH"
-              << "\t\t\tSpecify location of the flux-accounting database"
+              << "\t\t\tSpecify location of the flux-accounting database\n"
+              << "\t--incremental"
+              << "\t\t\tOnly sort the banks whose children changed since "
+              << "the last\n\t\t\t\t\tincremental update and only write "
+              << "the fairshare values\n\t\t\t\t\tthat changed"
               << std::endl;
 }
 
 
+/*
+get_fshares () stores the fair-share of each association in a subtree as it is
+written to the DB, i.e. with six decimal places.
+*/
+static void get_fshares (
+            const std::shared_ptr<weighted_tree_node_t> &node,
+            std::unordered_map<const weighted_tree_node_t *, std::string> &m)
+{
+    if (node->is_user ()) {
+        m[node.get ()] = std::to_string (node->get_fshare ());
+        return;
+    }
+    for (int i = 0; i < node->get_num_children (); i++)
+        get_fshares (node->get_child (i), m);
+}
+
+
+/*
+update_fshare_incremental () recalculates the fair-share of every association
+with the weights and sorted order of the children of each bank whose children
+are unchanged since the last incremental update restored from the
+fshare_cache_table, and writes back only the fair-share values that changed.
+*/
+static int update_fshare_incremental (const std::string &filepath,
+                                      std::shared_ptr<weighted_tree_node_t> root)
+{
+    data_reader_db_t data_reader;
+    data_writer_db_t data_writer;
+    weighted_cache_t cache;
+    std::unordered_map<const weighted_tree_node_t *, std::string> fshares;
+    std::vector<std::shared_ptr<weighted_tree_node_t>> changed;
+
+    if (data_reader.load_weighted_cache (filepath, cache) < 0) {
+        std::cout << data_reader.err_message () << std::endl;
+        return -1;
+    }
+
+    get_fshares (root, fshares);
+    if (cache.apply (root) < 0) {
+        std::cout << "Unable to restore cached weights" << std::endl;
+        return -1;
+    }
+
+    weighted_walk_t walker (root);
+
+    if (walker.run () < 0) {
+        std::cout << "Unable to calculate fairshare values" << std::endl;
+        return -1;
+    }
+
+    for (const auto &user : walker.get_users ()) {
+        if (fshares[user.get ()] != std::to_string (user->get_fshare ()))
+            changed.push_back (user);
+    }
+
+    if (data_writer.write_changed_acct_info (filepath, changed, cache) < 0) {
+        std::cout << data_writer.err_message () << std::endl;
+        return -1;
+    }
+
+    return 0;
+}
+
+
 int main (int argc, char** argv)
 {
     std::shared_ptr<weighted_tree_node_t> root;
     data_reader_db_t data_reader;
     data_writer_db_t data_writer;
     std::string filepath;
+    bool incremental = false;
     int rc;
 
     for (int i = 1; i < argc; ++i) {
@@ -50,6 +122,8 @@ int main (int argc, char** argv)
         if (arg == "-p") {
             filepath = argv[i + 1];
             i++;
+        } else if (arg == "--incremental") {
+            incremental = true;
         } else {
             show_usage ();
             rc = -1;
@@ -68,6 +142,9 @@ int main (int argc, char** argv)
         return -1;
     }
 
+    if (incremental)
+        return update_fshare_incremental (filepath, root);
+
     weighted_walk_t walker (root);
 
     if (walker.run () < 0) {
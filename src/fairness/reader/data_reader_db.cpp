@@ -437,3 +437,64 @@ done:
     return root;
 
 }
+
+int data_reader_db_t::load_weighted_cache (const std::string &path,
+                                           weighted_cache_t &cache)
+{
+    std::string s_cache;
+    sqlite3_stmt *c_cache = nullptr;
+    sqlite3 *DB = nullptr;
+    int rc = 0;
+
+    rc = sqlite3_open_v2 (path.c_str (), &DB, SQLITE_OPEN_READONLY, NULL);
+    if (rc != SQLITE_OK) {
+        m_err_msg = "error opening DB: " + std::string (sqlite3_errmsg (DB));
+        sqlite3_close (DB);
+        errno = EIO;
+
+        return -1;
+    }
+
+    s_cache = "SELECT bank, name, is_user, shares, job_usage, weight, position "
+              "FROM fshare_cache_table";
+
+    rc = sqlite3_prepare_v2 (DB, s_cache.c_str (), -1, &c_cache, 0);
+    if (rc != SQLITE_OK) {
+        m_err_msg = sqlite3_errmsg (DB);
+        errno = EINVAL;
+        goto done;
+    }
+
+    rc = sqlite3_step (c_cache);
+    while (rc == SQLITE_ROW) {
+        std::string bank = reinterpret_cast<char const *> (
+            sqlite3_column_text (c_cache, 0));
+        weighted_cache_entry_t entry = {
+            reinterpret_cast<char const *> (sqlite3_column_text (c_cache, 1)),
+            sqlite3_column_int (c_cache, 2) != 0,
+            static_cast<uint64_t> (sqlite3_column_int64 (c_cache, 3)),
+            sqlite3_column_double (c_cache, 4),
+            sqlite3_column_double (c_cache, 5),
+            static_cast<uint64_t> (sqlite3_column_int64 (c_cache, 6))
+        };
+
+        if (cache.add (bank, entry) < 0) {
+            m_err_msg = "Failed to add cached weight";
+            rc = SQLITE_NOMEM;
+            goto done;
+        }
+        rc = sqlite3_step (c_cache);
+    }
+    if (rc != SQLITE_DONE) {
+        m_err_msg = "Unable to fetch data";
+        errno = EINVAL;
+        goto done;
+    }
+    rc = SQLITE_OK;
+
+done:
+    sqlite3_finalize (c_cache);
+    sqlite3_close (DB);
+
+    return (rc == SQLITE_OK) ? 0 : -1;
+}
@@ -11,6 +11,7 @@
 #include <cerrno>
 
 #include "src/fairness/weighted_tree/weighted_walk.hpp"
+#include "src/fairness/weighted_tree/weighted_cache.hpp"
 #include "src/fairness/reader/data_reader_base.hpp"
 
 using namespace Flux::accounting;
@@ -32,6 +33,16 @@ public:
     std::shared_ptr<weighted_tree_node_t> load_accounting_db (
                                                     const std::string &path);
 
+    /*! Load the weights and sorted order of the children of each bank from
+     *  the last incremental fair-share update into a weighted tree cache.
+     *
+     * \param path      path to a flux-accounting SQLite database
+     * \param cache     the cache to add the children of each bank to
+     * \return          0 on success; -1 on error
+     */
+    int load_weighted_cache (const std::string &path,
+                             weighted_cache_t &cache);
+
 private:
     int delete_prepared_statements (sqlite3_stmt *c_root_bank,
                                     sqlite3_stmt *c_shrs,
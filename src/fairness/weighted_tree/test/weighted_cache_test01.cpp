@@ -0,0 +1,255 @@
+/************************************************************\
+ * Copyright 2026 Lawrence Livermore National Security, LLC
+ * (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+ *
+ * This file is part of the Flux resource manager framework.
+ * For details, see https://github.com/flux-framework.
+ *
+ * SPDX-License-Identifier: LGPL-3.0
+\************************************************************/
+
+extern "C" {
+#if HAVE_CONFIG_H
+#include "config.h"
+#endif
+}
+
+#include <cstdlib>
+#include <map>
+#include <random>
+#include <string>
+#include <vector>
+#include "src/fairness/weighted_tree/weighted_walk.hpp"
+#include "src/fairness/weighted_tree/weighted_cache.hpp"
+#include "src/common/libtap/tap.h"
+
+using namespace Flux::accounting;
+
+// a node of a hierarchy; parent is the index of the node's parent bank, and
+// every parent comes before its children
+struct node_spec_t {
+    int parent;
+    std::string name;
+    bool is_user;
+    uint64_t shares;
+    double usage;
+};
+
+/*
+ * Build a weighted tree out of a hierarchy, adding up the usage of each bank
+ * from its associations the same way data_reader_db_t does.
+ */
+static std::shared_ptr<weighted_tree_node_t> build_tree (
+                                    const std::vector<node_spec_t> &specs)
+{
+    std::vector<std::shared_ptr<weighted_tree_node_t>> nodes;
+    std::vector<double> bank_usage (specs.size (), 0.0);
+
+    for (const auto &spec : specs) {
+        std::shared_ptr<weighted_tree_node_t> parent =
+            (spec.parent < 0) ? nullptr : nodes[spec.parent];
+        auto node = std::make_shared<weighted_tree_node_t> (parent,
+                                                            spec.name,
+                                                            spec.is_user,
+                                                            spec.shares,
+                                                            spec.is_user
+                                                                ? spec.usage
+                                                                : 0);
+        if (parent)
+            parent->add_child (node);
+        if (spec.is_user)
+            bank_usage[spec.parent] += spec.usage;
+        nodes.push_back (node);
+    }
+    for (size_t i = 0; i < specs.size (); i++) {
+        if (specs[i].is_user || bank_usage[i] == 0.0)
+            continue;
+        for (auto n = nodes[i]; n != nullptr; n = n->get_parent ())
+            n->set_usage (n->get_usage () + bank_usage[i]);
+    }
+    return nodes[0];
+}
+
+/*
+ * Generate a random hierarchy of banks with associations in the banks at its
+ * lowest level, with few distinct shares and usage values so that ties are
+ * common.
+ */
+static std::vector<node_spec_t> random_hierarchy (std::mt19937 &gen)
+{
+    std::vector<node_spec_t> specs;
+    std::vector<uint64_t> shares = {0, 1, 1, 2, 10};
+    std::vector<double> usage = {0, 1, 1, 10, 100, 2.5};
+    int depth = std::uniform_int_distribution<int> (1, 3) (gen);
+
+    specs.push_back ({-1, "root", false, 1, 0});
+    for (size_t i = 0; i < specs.size (); i++) {
+        if (specs[i].is_user)
+            continue;
+        int level = 0;
+        for (int p = specs[i].parent; p >= 0; p = specs[p].parent)
+            level++;
+        int num_children = std::uniform_int_distribution<int> (1, 5) (gen);
+        for (int c = 0; c < num_children; c++) {
+            bool is_user = (level + 1 == depth);
+            std::string name = specs[i].name + "." + std::to_string (c);
+            specs.push_back ({static_cast<int> (i),
+                              is_user ? "user" + name : name,
+                              is_user,
+                              shares[gen () % shares.size ()],
+                              is_user ? usage[gen () % usage.size ()] : 0});
+        }
+    }
+    return specs;
+}
+
+/*
+ * Walk a tree and return the fair-share of each association keyed by its
+ * bank and username.
+ */
+static std::map<std::string, double> walk (
+                                    std::shared_ptr<weighted_tree_node_t> root)
+{
+    std::map<std::string, double> fshares;
+    weighted_walk_t walker (root);
+
+    walker.run ();
+    for (const auto &user : walker.get_users ())
+        fshares[user->get_parent ()->get_name () + "/" + user->get_name ()] =
+            user->get_fshare ();
+    return fshares;
+}
+
+/*
+ * Change the usage of a few associations in a hierarchy.
+ */
+static void change_usage (std::vector<node_spec_t> &specs,
+                          std::mt19937 &gen,
+                          int num_changes)
+{
+    std::vector<size_t> users;
+    for (size_t i = 0; i < specs.size (); i++) {
+        if (specs[i].is_user)
+            users.push_back (i);
+    }
+    for (int i = 0; i < num_changes && !users.empty (); i++)
+        specs[users[gen () % users.size ()]].usage += gen () % 50;
+}
+
+static void test_first_walk ()
+{
+    std::mt19937 gen (1);
+    std::vector<node_spec_t> specs = random_hierarchy (gen);
+    auto root = build_tree (specs);
+    weighted_cache_t cache;
+
+    ok (cache.apply (root) == 0, "apply an empty cache to a tree");
+    ok (cache.get_num_restored () == 0 && !cache.get_dirty_banks ().empty (),
+        "every bank with children is dirty with an empty cache");
+    ok (walk (root) == walk (build_tree (specs)),
+        "fair-share values with an empty cache match a full walk");
+    ok (cache.update () == 0 && cache.size () > 0,
+        "update the cache after the walk");
+
+    root = build_tree (specs);
+    ok (cache.apply (root) == 0 && cache.get_dirty_banks ().empty ()
+            && cache.get_num_restored () == cache.size (),
+        "every bank is restored from the cache when nothing changed");
+    ok (walk (root) == walk (build_tree (specs)),
+        "fair-share values of a fully restored tree match a full walk");
+}
+
+static void test_incremental_walks ()
+{
+    bool equal = true;
+    uint64_t restored = 0;
+    uint64_t dirty = 0;
+
+    for (int seed = 0; seed < 200; seed++) {
+        std::mt19937 gen (seed);
+        std::vector<node_spec_t> specs = random_hierarchy (gen);
+        weighted_cache_t cache;
+
+        for (int round = 0; round < 5; round++) {
+            auto root = build_tree (specs);
+            cache.apply (root);
+            restored += cache.get_num_restored ();
+            dirty += cache.get_dirty_banks ().size ();
+
+            std::map<std::string, double> incremental = walk (root);
+            cache.update ();
+            // the values must be bit-for-bit identical
+            equal = equal && (incremental == walk (build_tree (specs)));
+
+            change_usage (specs, gen, 1 + gen () % 3);
+        }
+    }
+    ok (equal, "incremental fair-share values match full walks");
+    ok (restored > 0 && dirty > 0,
+        "incremental walks restored %ju banks and re-sorted %ju banks",
+        static_cast<uintmax_t> (restored), static_cast<uintmax_t> (dirty));
+}
+
+static void test_changed_hierarchy ()
+{
+    std::vector<node_spec_t> specs = {
+        {-1, "root", false, 1, 0},
+        {0, "A", false, 1, 0},
+        {0, "B", false, 1, 0},
+        {1, "user1", true, 1, 10},
+        {1, "user2", true, 1, 10},
+        {2, "user3", true, 1, 5},
+    };
+    weighted_cache_t cache;
+    auto root = build_tree (specs);
+
+    cache.apply (root);
+    walk (root);
+    cache.update ();
+
+    // move user2 to bank B and remove bank A's other association
+    std::vector<node_spec_t> changed = {
+        {-1, "root", false, 1, 0},
+        {0, "B", false, 1, 0},
+        {1, "user2", true, 1, 10},
+        {1, "user3", true, 1, 5},
+    };
+    root = build_tree (changed);
+    cache.apply (root);
+    ok (cache.get_stale_banks () == std::vector<std::string> {"A"},
+        "a bank that was removed is stale");
+    ok (cache.get_dirty_banks ().size () == 2 && cache.get_num_restored () == 0,
+        "banks whose children were added or removed are dirty");
+    ok (walk (root) == walk (build_tree (changed)),
+        "fair-share values after a change to the hierarchy match a full walk");
+    cache.update ();
+    ok (cache.size () == 2, "the stale bank is removed from the cache");
+
+    // a change in the shares of an association only makes its bank dirty
+    // since the bank's own shares and usage are unchanged
+    changed[3].shares = 2;
+    root = build_tree (changed);
+    cache.apply (root);
+    ok (cache.get_num_restored () == 1 && cache.get_dirty_banks ().size () == 1
+            && cache.get_dirty_banks ()[0]->get_name () == "B",
+        "a change in the shares of an association makes its bank dirty");
+}
+
+int main (int argc, char *argv[])
+{
+    plan (13);
+
+    test_first_walk ();
+
+    test_incremental_walks ();
+
+    test_changed_hierarchy ();
+
+    done_testing ();
+
+    return EXIT_SUCCESS;
+}
+
+/*
+ * vi:tabstop=4 shiftwidth=4 expandtab
+ */
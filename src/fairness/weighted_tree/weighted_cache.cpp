@@ -0,0 +1,199 @@
+/************************************************************\
+ * Copyright 2026 Lawrence Livermore National Security, LLC
+ * (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+ *
+ * This file is part of the Flux resource manager framework.
+ * For details, see https://github.com/flux-framework.
+ *
+ * SPDX-License-Identifier: LGPL-3.0
+\************************************************************/
+extern "C" {
+#if HAVE_CONFIG_H
+#include "config.h"
+#endif
+}
+
+#include <cerrno>
+#include <utility>
+#include "src/fairness/weighted_tree/weighted_cache.hpp"
+
+using namespace Flux::accounting;
+
+
+/******************************************************************************
+ *                                                                            *
+ *               Private Methods of Weighted Tree Cache Class                 *
+ *                                                                            *
+ ******************************************************************************/
+
+bool weighted_cache_t::restore_children (
+                           std::shared_ptr<weighted_tree_node_t> &node,
+                           const std::vector<weighted_cache_entry_t> &cached)
+{
+    size_t num_children = node->m_children.size ();
+    std::map<std::pair<std::string, bool>,
+             const weighted_cache_entry_t *> entries;
+    std::vector<std::shared_ptr<weighted_tree_node_t>> sorted (num_children);
+    std::vector<double> weights (num_children);
+
+    if (cached.size () != num_children)
+        return false;
+    for (const auto &entry : cached)
+        entries[std::make_pair (entry.name, entry.is_user)] = &entry;
+
+    // every child must be in the cache with the same shares and usage, and
+    // the cached positions must be a permutation of the children
+    for (auto &child : node->m_children) {
+        auto it = entries.find (std::make_pair (child->get_name (),
+                                                child->is_user ()));
+        if (it == entries.end ())
+            return false;
+        const weighted_cache_entry_t *entry = it->second;
+        if (entry->shares != child->get_shares ()
+            || entry->usage != child->get_usage ()
+            || entry->position >= num_children
+            || sorted[entry->position] != nullptr)
+            return false;
+        sorted[entry->position] = child;
+        weights[entry->position] = entry->weight;
+    }
+
+    for (size_t i = 0; i < num_children; i++)
+        sorted[i]->m_weight = weights[i];
+    node->m_children = sorted;
+    node->m_children_sorted = true;
+    return true;
+}
+
+int weighted_cache_t::apply_subtree (std::shared_ptr<weighted_tree_node_t> &node,
+                                     std::set<std::string> &seen)
+{
+    int rc = 0;
+    if (node->is_user ())
+        return rc;
+
+    try {
+        auto it = m_banks.find (node->get_name ());
+        if (it != m_banks.end ()) {
+            seen.insert (node->get_name ());
+            if (restore_children (node, it->second))
+                m_num_restored++;
+            else
+                m_dirty_banks.push_back (node);
+        } else if (node->get_num_children () > 0) {
+            m_dirty_banks.push_back (node);
+        }
+    } catch (std::bad_alloc &) {
+        errno = ENOMEM;
+        return -1;
+    }
+
+    for (auto &child : node->m_children) {
+        if ( (rc = apply_subtree (child, seen)) < 0)
+            return rc;
+    }
+    return rc;
+}
+
+
+/******************************************************************************
+ *                                                                            *
+ *               Public Methods of Weighted Tree Cache Class                  *
+ *                                                                            *
+ ******************************************************************************/
+
+int weighted_cache_t::add (const std::string &bank,
+                           const weighted_cache_entry_t &entry)
+{
+    int rc = 0;
+    try {
+        m_banks[bank].push_back (entry);
+    } catch (std::bad_alloc &) {
+        errno = ENOMEM;
+        rc = -1;
+    }
+    return rc;
+}
+
+int weighted_cache_t::apply (std::shared_ptr<weighted_tree_node_t> root)
+{
+    int rc = 0;
+    std::set<std::string> seen;
+
+    if (!root) {
+        errno = EINVAL;
+        return -1;
+    }
+
+    m_num_restored = 0;
+    m_dirty_banks.clear ();
+    m_stale_banks.clear ();
+    if ( (rc = apply_subtree (root, seen)) < 0)
+        return rc;
+
+    try {
+        for (const auto &bank : m_banks) {
+            if (seen.find (bank.first) == seen.end ())
+                m_stale_banks.push_back (bank.first);
+        }
+    } catch (std::bad_alloc &) {
+        errno = ENOMEM;
+        rc = -1;
+    }
+    return rc;
+}
+
+int weighted_cache_t::update ()
+{
+    int rc = 0;
+    try {
+        for (const auto &bank : m_stale_banks)
+            m_banks.erase (bank);
+        for (const auto &bank : m_dirty_banks) {
+            std::vector<weighted_cache_entry_t> &cached =
+                                                    m_banks[bank->get_name ()];
+            cached.clear ();
+            for (int i = 0; i < bank->get_num_children (); i++) {
+                std::shared_ptr<weighted_tree_node_t> child =
+                                                        bank->get_child (i);
+                cached.push_back ({child->get_name (),
+                                   child->is_user (),
+                                   child->get_shares (),
+                                   child->get_usage (),
+                                   child->get_weight (),
+                                   static_cast<uint64_t> (i)});
+            }
+        }
+    } catch (std::bad_alloc &) {
+        errno = ENOMEM;
+        rc = -1;
+    }
+    m_dirty_banks.clear ();
+    m_stale_banks.clear ();
+    return rc;
+}
+
+const std::vector<std::shared_ptr<weighted_tree_node_t>> &
+    weighted_cache_t::get_dirty_banks () const
+{
+    return m_dirty_banks;
+}
+
+const std::vector<std::string> &weighted_cache_t::get_stale_banks () const
+{
+    return m_stale_banks;
+}
+
+uint64_t weighted_cache_t::get_num_restored () const
+{
+    return m_num_restored;
+}
+
+size_t weighted_cache_t::size () const
+{
+    return m_banks.size ();
+}
+
+/*
+ * vi:tabstop=4 shiftwidth=4 expandtab
+ */
@@ -0,0 +1,108 @@
+/************************************************************\
+ * Copyright 2026 Lawrence Livermore National Security, LLC
+ * (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+ *
+ * This file is part of the Flux resource manager framework.
+ * For details, see https://github.com/flux-framework.
+ *
+ * SPDX-License-Identifier: LGPL-3.0
+\************************************************************/
+
+#ifndef WEIGHTED_CACHE_HPP
+#define WEIGHTED_CACHE_HPP
+
+#include <map>
+#include <set>
+#include <string>
+#include <vector>
+#include "src/fairness/weighted_tree/weighted_tree.hpp"
+
+namespace Flux {
+namespace accounting {
+
+
+/*! The shares and usage of a child of a bank at the time of the last walk,
+ *  along with the weight calculated for it and its position among its sorted
+ *  siblings.
+ */
+struct weighted_cache_entry_t {
+    std::string name;
+    bool is_user;
+    uint64_t shares;
+    double usage;
+    double weight;
+    uint64_t position;
+};
+
+
+/*! Weighted Tree Cache Class:
+ *  Holds the weights and sorted order of the children of each bank from the
+ *  last walk of a weighted tree. The weights of a bank's children and the
+ *  order they are sorted in only depend on the shares and usage of those
+ *  children, so a bank whose children are unchanged since the last walk can
+ *  have them restored instead of calculated and sorted again, and the walk
+ *  produces the same fair-share values as it would without the cache.
+ */
+class weighted_cache_t {
+public:
+    /*! Add a cached child of a bank.
+     *
+     * \param bank      name of the bank the child belongs to
+     * \param entry     the cached shares, usage, weight, and position of the
+     *                  child
+     * \return          0 on success; -1 on error
+     */
+    int add (const std::string &bank, const weighted_cache_entry_t &entry);
+
+    /*! Restore the weights and sorted order of the children of every bank in
+     *  a weighted tree whose children have the same shares and usage as when
+     *  they were cached. The other banks are recorded as dirty, and the banks
+     *  in the cache that are no longer in the tree as stale.
+     *
+     * \param root      root of a weighted tree that has not been walked yet
+     * \return          0 on success; -1 on error
+     */
+    int apply (std::shared_ptr<weighted_tree_node_t> root);
+
+    /*! Replace the cached children of the dirty banks with their children
+     *  as they were sorted by a walk of the tree passed to apply (), and
+     *  remove the stale banks.
+     *
+     * \return          0 on success; -1 on error
+     */
+    int update ();
+
+    /*! The banks whose children were not restored by apply (). */
+    const std::vector<std::shared_ptr<weighted_tree_node_t>> &
+        get_dirty_banks () const;
+
+    /*! The banks in the cache that are not in the tree passed to apply (). */
+    const std::vector<std::string> &get_stale_banks () const;
+
+    /*! The number of banks whose children were restored by apply (). */
+    uint64_t get_num_restored () const;
+
+    /*! The number of banks in the cache. */
+    size_t size () const;
+
+private:
+    int apply_subtree (std::shared_ptr<weighted_tree_node_t> &node,
+                       std::set<std::string> &seen);
+    bool restore_children (std::shared_ptr<weighted_tree_node_t> &node,
+                           const std::vector<weighted_cache_entry_t> &cached);
+
+    uint64_t m_num_restored = 0;
+    std::map<std::string, std::vector<weighted_cache_entry_t>> m_banks;
+    std::vector<std::shared_ptr<weighted_tree_node_t>> m_dirty_banks;
+    std::vector<std::string> m_stale_banks;
+};
+
+
+} // namespace accounting
+} // namespace Flux
+
+#endif // WEIGHTED_CACHE_HPP
+
+/*
+ * vi:tabstop=4 shiftwidth=4 expandtab
+ */
@@ -52,6 +52,7 @@ public:
 
 private:
     friend class weighted_walk_t;
+    friend class weighted_cache_t;
 
     bool is_equal (double a, double b) const;
     void calc_set_weight (uint64_t sibling_shares_sum,
@@ -65,6 +66,9 @@ private:
     uint64_t m_subtree_leaf_size = 0;
     double m_weight = 0.0f;
     bool m_tie_with_next = false;
+    // true when the weights and order of m_children were restored from a
+    // weighted_cache_t and don't need to be calculated and sorted again
+    bool m_children_sorted = false;
     std::weak_ptr<weighted_tree_node_t> m_parent =
                                         std::weak_ptr<weighted_tree_node_t> ();
     std::vector<std::shared_ptr<weighted_tree_node_t>> m_children;
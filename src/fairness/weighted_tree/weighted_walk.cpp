@@ -138,8 +138,10 @@ int weighted_walk_t::handle_internal (std::shared_ptr<weighted_tree_node_t> &n)
     std::vector<std::shared_ptr<weighted_tree_node_t>> tie_aware_children;
 
     // Sort all of the grand children (with respect to their original parent)
-    for (i = 0; i < n->get_num_children (); i++)
-        n->get_child (i)->calc_and_sort_weighted_children ();
+    for (i = 0; i < n->get_num_children (); i++) {
+        if (!n->m_children[i]->m_children_sorted)
+            n->m_children[i]->calc_and_sort_weighted_children ();
+    }
 
     // build tie-aware children vector
     // Carefully handle ties by creating a new "virtual" child node and merge
@@ -239,7 +241,8 @@ int weighted_walk_t::run ()
     // It is important to handle ties carefully. Please see
     // further comments in weighted_depth_first_visit regarding
     // tie handling.
-    m_root->calc_and_sort_weighted_children ();
+    if (!m_root->m_children_sorted)
+        m_root->calc_and_sort_weighted_children ();
     if ( (rc = weighted_depth_first_visit (m_root)) < 0)
         return rc;
     std::sort (m_users.begin (), m_users.end (),
@@ -217,6 +217,119 @@ int data_writer_db_t::update_fairshare_values (
 }
 
 
+int data_writer_db_t::update_fairshare_value (
+                            sqlite3 *DB,
+                            sqlite3_stmt *c_ud,
+                            const std::shared_ptr<weighted_tree_node_t> &user)
+{
+    int rc;
+    std::string fshare = std::to_string (user->get_fshare ());
+
+    // bind parameters to compiled SQL statement
+    if (bind_param (DB, c_ud, 1, fshare.c_str ()) == nullptr
+        || bind_param (DB, c_ud, 2, user->get_name ().c_str ()) == nullptr
+        || bind_param (DB,
+                       c_ud,
+                       3,
+                       user->get_parent ()->get_name ().c_str ()) == nullptr)
+        return -1;
+
+    // execute UPDATE statement
+    rc = sqlite3_step (c_ud);
+    if (rc != SQLITE_DONE) {
+        m_err_msg += "Unable to update association_table\n";
+        errno = EINVAL;
+
+        return -1;
+    }
+
+    if (reset_and_clear_bindings (DB, c_ud) != SQLITE_OK) {
+        errno = EINVAL;
+
+        return -1;
+    }
+
+    return 0;
+}
+
+
+int data_writer_db_t::update_weighted_cache (sqlite3 *DB,
+                                             const weighted_cache_t &cache)
+{
+    int rc = -1;
+    sqlite3_stmt *c_del = nullptr;
+    sqlite3_stmt *c_ins = nullptr;
+    std::vector<std::string> banks = cache.get_stale_banks ();
+
+    c_del = compile_stmt (DB, "DELETE FROM fshare_cache_table WHERE bank=?");
+    if (c_del == nullptr)
+        goto done;
+
+    c_ins = compile_stmt (DB, "INSERT INTO fshare_cache_table "
+                              "(bank, name, is_user, shares, job_usage, "
+                              "weight, position) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)");
+    if (c_ins == nullptr)
+        goto done;
+
+    // the cached children of the dirty banks are replaced and the stale
+    // banks are removed
+    for (const auto &bank : cache.get_dirty_banks ())
+        banks.push_back (bank->get_name ());
+    for (const auto &bank : banks) {
+        if (bind_param (DB, c_del, 1, bank.c_str ()) == nullptr)
+            goto done;
+        if (sqlite3_step (c_del) != SQLITE_DONE) {
+            m_err_msg += "Unable to update fshare_cache_table\n";
+            errno = EINVAL;
+            goto done;
+        }
+        if (reset_and_clear_bindings (DB, c_del) != SQLITE_OK)
+            goto done;
+    }
+
+    for (const auto &bank : cache.get_dirty_banks ()) {
+        for (int i = 0; i < bank->get_num_children (); i++) {
+            std::shared_ptr<weighted_tree_node_t> child = bank->get_child (i);
+
+            if (bind_param (DB, c_ins, 1, bank->get_name ().c_str ()) == nullptr
+                || bind_param (DB,
+                               c_ins,
+                               2,
+                               child->get_name ().c_str ()) == nullptr)
+                goto done;
+            if (sqlite3_bind_int (c_ins, 3, child->is_user () ? 1 : 0)
+                    != SQLITE_OK
+                || sqlite3_bind_int64 (c_ins, 4, child->get_shares ())
+                    != SQLITE_OK
+                || sqlite3_bind_double (c_ins, 5, child->get_usage ())
+                    != SQLITE_OK
+                || sqlite3_bind_double (c_ins, 6, child->get_weight ())
+                    != SQLITE_OK
+                || sqlite3_bind_int64 (c_ins, 7, i) != SQLITE_OK) {
+                m_err_msg = std::string (sqlite3_errmsg (DB)) + "\n";
+                errno = EINVAL;
+                goto done;
+            }
+            if (sqlite3_step (c_ins) != SQLITE_DONE) {
+                m_err_msg += "Unable to update fshare_cache_table\n";
+                errno = EINVAL;
+                goto done;
+            }
+            if (reset_and_clear_bindings (DB, c_ins) != SQLITE_OK)
+                goto done;
+        }
+    }
+    rc = 0;
+
+done:
+    sqlite3_finalize (c_del);
+    sqlite3_finalize (c_ins);
+
+    return rc;
+}
+
+
 /******************************************************************************
  *                                                                            *
  *                         Public DB Writer API                               *
@@ -279,3 +392,63 @@ int data_writer_db_t::write_acct_info (
 
     return rc;
 }
+
+
+int data_writer_db_t::write_changed_acct_info (
+            const std::string &path,
+            const std::vector<std::shared_ptr<weighted_tree_node_t>> &users,
+            const weighted_cache_t &cache)
+{
+    int rc = 0;
+    sqlite3 *DB = nullptr;
+    sqlite3_stmt *c_ud = nullptr;
+    char *errmsg = nullptr;
+
+    DB = open_db (path.c_str ());
+    if (DB == nullptr) {
+        errno = EINVAL;
+
+        return -1;
+    }
+
+    // take the write lock upfront to fail fast if another writer is active
+    rc = sqlite3_exec (DB, "BEGIN IMMEDIATE;", nullptr, nullptr, &errmsg);
+    sqlite3_free (errmsg);
+    if (rc != SQLITE_OK) {
+        m_err_msg = "BEGIN IMMEDIATE failed: "
+                    + std::string (sqlite3_errmsg(DB));
+        sqlite3_close (DB);
+        return -1;
+    }
+
+    c_ud = compile_stmt (DB, "UPDATE association_table SET fairshare=? "
+                             "WHERE username=? AND bank=?");
+    if (c_ud == nullptr) {
+        rc = -1;
+        goto done;
+    }
+
+    rc = 0;
+    for (const auto &user : users) {
+        if ( (rc = update_fairshare_value (DB, c_ud, user)) < 0)
+            goto done;
+    }
+
+    rc = update_weighted_cache (DB, cache);
+
+done:
+    sqlite3_finalize (c_ud);
+    if (rc == 0) {
+        if (sqlite3_exec (DB, "COMMIT;", nullptr, nullptr, nullptr)
+            != SQLITE_OK) {
+            m_err_msg = "COMMIT failed: " + std::string (sqlite3_errmsg (DB));
+            rc = -1;
+        }
+    } else {
+        sqlite3_exec (DB, "ROLLBACK;", nullptr, nullptr, nullptr);
+    }
+    // close DB connection
+    sqlite3_close (DB);
+
+    return rc;
+}
@@ -12,6 +12,7 @@
 #include <cerrno>
 
 #include "src/fairness/weighted_tree/weighted_walk.hpp"
+#include "src/fairness/weighted_tree/weighted_cache.hpp"
 #include "src/fairness/writer/data_writer_base.hpp"
 
 using namespace Flux::accounting;
@@ -34,6 +35,20 @@ public:
     int write_acct_info (const std::string &path,
                          std::shared_ptr<weighted_tree_node_t> node);
 
+    /*! Write the fairshare values of only the given associations to a
+     *  flux-accounting DB, along with the weights and sorted order of the
+     *  children of the banks that a weighted tree cache has marked dirty.
+     *
+     * \param path      path to a flux-accounting database
+     * \param users     the associations whose fairshare values changed
+     * \param cache     the cache that was applied to the walked tree
+     * \return          integer return code indicating success or failure
+     */
+    int write_changed_acct_info (
+            const std::string &path,
+            const std::vector<std::shared_ptr<weighted_tree_node_t>> &users,
+            const weighted_cache_t &cache);
+
 private:
     /*! Open a connection to a flux-accounting SQLite database.
      *
@@ -80,6 +95,26 @@ private:
     int update_fairshare_values (sqlite3 *DB,
                                  sqlite3_stmt *c_ud,
                                  std::shared_ptr<weighted_tree_node_t> node);
+
+    /*! Update the fairshare value of one association.
+     *
+     * \param DB        pointer to a SQLite database
+     * \param c_ud      pointer to the compiled UPDATE statement
+     * \param user      node of the association
+     * \return          integer return code indicating success or failure
+     */
+    int update_fairshare_value (sqlite3 *DB,
+                                sqlite3_stmt *c_ud,
+                                const std::shared_ptr<weighted_tree_node_t> &user);
+
+    /*! Replace the cached children of the dirty banks of a weighted tree
+     *  cache and remove its stale banks from the fshare_cache_table.
+     *
+     * \param DB        pointer to a SQLite database
+     * \param cache     the cache that was applied to the walked tree
+     * \return          integer return code indicating success or failure
+     */
+    int update_weighted_cache (sqlite3 *DB, const weighted_cache_t &cache);
 };
 
 } // namespace writer
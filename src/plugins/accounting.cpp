@@ -12,9 +12,9 @@
 
 Association* get_association (int userid,
                               const char *bank,
-                              std::map<int, std::map<std::string, Association>>
-                                &users,
-                              std::map<int, std::string> &users_def_bank)
+                              UsersMap &users,
+                              std::unordered_map<int, std::string>
+                                &users_def_bank)
 {
     auto it = users.find (userid);
     if (it == users.end ())
@@ -169,24 +169,66 @@ error:
 }
 
 
-json_t* convert_map_to_json (std::map<int, std::map<std::string, Association>>
-                                &users)
+bool Association::same_settings (const Association &a) const
+{
+    return bank_name == a.bank_name
+           && fairshare == a.fairshare
+           && max_run_jobs == a.max_run_jobs
+           && max_active_jobs == a.max_active_jobs
+           && max_sched_jobs == a.max_sched_jobs
+           && queues == a.queues
+           && active == a.active
+           && projects == a.projects
+           && def_project == a.def_project
+           && max_nodes == a.max_nodes
+           && max_cores == a.max_cores;
+}
+
+
+bool same_queue_settings (const Queue &a, const Queue &b)
+{
+    return a.name == b.name
+           && a.min_nodes_per_job == b.min_nodes_per_job
+           && a.max_nodes_per_job == b.max_nodes_per_job
+           && a.max_time_per_job == b.max_time_per_job
+           && a.priority == b.priority
+           && a.max_running_jobs == b.max_running_jobs
+           && a.max_nodes_per_assoc == b.max_nodes_per_assoc
+           && a.max_sched_jobs == b.max_sched_jobs
+           && a.max_sched_nodes_per_assoc == b.max_sched_nodes_per_assoc
+           && a.max_sched_cores_per_assoc == b.max_sched_cores_per_assoc;
+}
+
+
+json_t* convert_map_to_json (const UsersMap &users)
 {
     json_t *accounting_data = json_array ();
     if (!accounting_data)
         return nullptr;
 
-    // each Association in the users map is a pair; the first item is the
-    // userid and the second is a list of banks they belong to
-    for (const auto& association : users) {
+    // the users map is unordered, so sort the users by userid and each
+    // user's banks by name to keep the output stable across queries
+    std::vector<int> userids;
+    userids.reserve (users.size ());
+    for (const auto &association : users)
+        userids.push_back (association.first);
+    std::sort (userids.begin (), userids.end ());
+
+    for (int userid : userids) {
+        const auto &user_banks = users.at (userid);
+        std::vector<std::string> bank_names;
+        bank_names.reserve (user_banks.size ());
+        for (const auto &bank : user_banks)
+            bank_names.push_back (bank.first);
+        std::sort (bank_names.begin (), bank_names.end ());
+
         json_t *banks = json_array ();
         if (!banks) {
             json_decref (accounting_data);
             return nullptr;
         }
-        for (const auto &bank : association.second) {
-            // bank.second refers to an Association object
-            json_t *b = bank.second.to_json ();
+        for (const auto &bank_name : bank_names) {
+            json_t *b = user_banks.at (bank_name).to_json ();
             if (!b || json_array_append_new (banks, b) < 0) {
                 json_decref (accounting_data);
                 json_decref (banks);
@@ -196,7 +238,7 @@ json_t* convert_map_to_json (std::map<int, std::map<std::string, Association>>
 
         json_t *u = json_pack ("{siso}",
                                "userid",
-                               association.first,
+                               userid,
                                "banks", banks);
         if (!u || json_array_append_new (accounting_data, u) < 0) {
             json_decref (accounting_data);
@@ -233,7 +275,7 @@ bool has_text (const char *s) {
 
 int get_queue_info (char *queue,
                     const std::vector<std::string> &permissible_queues,
-                    const std::map<std::string, Queue> &queues)
+                    const std::unordered_map<std::string, Queue> &queues)
 {
     if (queue != NULL) {
         // check #1) the queue passed in exists in the queues map;
@@ -264,9 +306,9 @@ int get_queue_info (char *queue,
 }
 
 
-bool check_map_for_dne_only (std::map<int, std::map<std::string, Association>>
-                               &users,
-                             std::map<int, std::string> &users_def_bank)
+bool check_map_for_dne_only (const UsersMap &users,
+                             const std::unordered_map<int, std::string>
+                               &users_def_bank)
 {
     for (const auto& entry : users) {
         auto it = users_def_bank.find(entry.first);
@@ -315,28 +357,36 @@ bool Association::under_max_run_jobs (int pending)
 
 
 bool Association::under_queue_max_run_jobs (
-                                const std::string &queue,
-                                std::map<std::string, Queue> queues) {
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues) {
+    auto qit = queues.find (queue);
+    if (qit == queues.end ())
+        // queue is unknown to flux-accounting; skip check
+        return true;
     bool under_queue_max_run_jobs = queue_usage[queue].cur_run_jobs
-                                    < queues[queue].max_running_jobs;
+                                    < qit->second.max_running_jobs;
 
     return under_queue_max_run_jobs;
 }
 
 
 bool Association::under_queue_max_run_jobs (
-                                const std::string &queue,
-                                std::map<std::string, Queue> queues,
-                                int pending) {
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending) {
+    auto qit = queues.find (queue);
+    if (qit == queues.end ())
+        // queue is unknown to flux-accounting; skip check
+        return true;
     bool under_queue_max_run_jobs = (queue_usage[queue].cur_run_jobs + pending)
-                                    < queues[queue].max_running_jobs;
+                                    < qit->second.max_running_jobs;
 
     return under_queue_max_run_jobs;
 }
 
 
 double get_bank_priority (const char *bank,
-                          const std::map<std::string, Bank> &banks)
+                          const std::unordered_map<std::string, Bank> &banks)
 {
     try {
         return banks.at (bank).priority;
@@ -357,9 +407,9 @@ bool Association::under_max_resources (const Job &job)
 }
 
 bool Association::under_queue_max_resources (
-                                    const Job &job,
-                                    const std::string &queue,
-                                    const std::map<std::string, Queue> &queues)
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
@@ -387,34 +437,34 @@ bool Association::under_max_sched_jobs (int pending)
 }
 
 bool Association::under_queue_max_sched_jobs (
-                                const std::string &queue,
-                                std::map<std::string, Queue> &queues)
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
         // queue is unknown to flux-accounting; skip check
         return true;
 
-    return queue_usage[queue].cur_sched_jobs < queues[queue].max_sched_jobs;
+    return queue_usage[queue].cur_sched_jobs < qit->second.max_sched_jobs;
 }
 
 bool Association::under_queue_max_sched_jobs (
-                                const std::string &queue,
-                                std::map<std::string, Queue> &queues,
-                                int pending)
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
         return true;
     return (queue_usage[queue].cur_sched_jobs + pending)
-           < queues[queue].max_sched_jobs;
+           < qit->second.max_sched_jobs;
 }
 
 
 bool Association::under_queue_max_sched_nodes (
-                                        const Job &job,
-                                        const std::string &queue,
-                                        std::map<std::string, Queue> &queues)
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
@@ -433,10 +483,10 @@ bool Association::under_queue_max_sched_nodes (
 
 
 bool Association::under_queue_max_sched_nodes (
-                                        const Job &job,
-                                        const std::string &queue,
-                                        std::map<std::string, Queue> &queues,
-                                        int pending)
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
@@ -456,9 +506,9 @@ bool Association::under_queue_max_sched_nodes (
 
 
 bool Association::under_queue_max_sched_cores (
-                                        const Job &job,
-                                        const std::string &queue,
-                                        std::map<std::string, Queue> &queues)
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
@@ -476,10 +526,10 @@ bool Association::under_queue_max_sched_cores (
 }
 
 bool Association::under_queue_max_sched_cores (
-                                        const Job &job,
-                                        const std::string &queue,
-                                        std::map<std::string, Queue> &queues,
-                                        int pending)
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending)
 {
     auto qit = queues.find (queue);
     if (qit == queues.end ())
@@ -498,7 +548,8 @@ bool Association::under_queue_max_sched_cores (
 }
 
 
-json_t* convert_queues_to_json (const std::map<std::string, Queue> &queues)
+json_t* convert_queues_to_json (
+                const std::unordered_map<std::string, Queue> &queues)
 {
     json_t *root = json_object ();
     if (!root)
@@ -555,10 +606,159 @@ json_t* convert_projects_to_json (const std::vector<std::string> projects)
     return known_projects;
 }
 
+// the fields of an association sent by flux-accounting, in the order that they
+// are unpacked in
+static const char *association_fields[] = {
+    "userid", "bank", "def_bank", "fairshare", "max_running_jobs",
+    "max_active_jobs", "queues", "active", "projects", "def_project",
+    "max_nodes", "max_cores", "max_sched_jobs",
+};
+static const int num_association_fields =
+    sizeof (association_fields) / sizeof (association_fields[0]);
+
+// the values of one association sent by flux-accounting
+struct AssociationFields {
+    int uid;
+    const char *bank;
+    const char *def_bank;
+    double fshare;
+    int max_running_jobs;
+    int max_active_jobs;
+    const char *assoc_queues;
+    int active;
+    const char *assoc_projects;
+    const char *def_project;
+    int max_nodes;
+    int max_cores;
+    int max_sched_jobs;
+};
+
+
+static void load_association (
+                    const AssociationFields &f,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank)
+{
+    Association *a;
+    a = &users[f.uid][f.bank];
+
+    a->bank_name = f.bank;
+    a->fairshare = f.fshare;
+    a->max_run_jobs = f.max_running_jobs;
+    a->max_active_jobs = f.max_active_jobs;
+    a->active = f.active;
+    a->def_project = f.def_project;
+    a->max_nodes = f.max_nodes;
+    a->max_cores = f.max_cores;
+    a->max_sched_jobs = f.max_sched_jobs;
+
+    // split queues comma-delimited string and add it to b->queues vector
+    a->queues.clear ();
+    if (has_text (f.assoc_queues))
+        split_string_and_push_back (f.assoc_queues, a->queues);
+    // do the same thing for the association's projects
+    a->projects.clear ();
+    if (has_text (f.assoc_projects))
+        split_string_and_push_back (f.assoc_projects, a->projects);
+
+    users_def_bank[f.uid] = f.def_bank;
+}
+
+
+/*
+ * Load associations in the columnar encoding, {"columns": [...], "rows":
+ * [[...], ...]}, where each row holds the values of one association in the
+ * order of "columns".
+ */
+static int load_associations_columnar (
+                    json_t *data,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank,
+                    std::string *errmsg)
+{
+    json_t *columns = json_object_get (data, "columns");
+    json_t *rows = json_object_get (data, "rows");
+    int index[num_association_fields];
+    size_t i, j;
+    json_t *el;
+
+    if (!columns || !json_is_array (columns) || !rows || !json_is_array (rows)) {
+        if (errmsg)
+            *errmsg = "associations data is missing columns or rows";
+        return -1;
+    }
+
+    // find the column of each field
+    for (int k = 0; k < num_association_fields; k++)
+        index[k] = -1;
+    json_array_foreach (columns, j, el) {
+        const char *column = json_string_value (el);
+        if (!column)
+            continue;
+        for (int k = 0; k < num_association_fields; k++) {
+            if (association_fields[k] == std::string (column))
+                index[k] = j;
+        }
+    }
+    for (int k = 0; k < num_association_fields; k++) {
+        if (index[k] < 0) {
+            if (errmsg)
+                *errmsg = std::string ("associations data is missing column ")
+                          + association_fields[k];
+            return -1;
+        }
+    }
+
+    json_array_foreach (rows, i, el) {
+        json_t *v[num_association_fields];
+
+        if (!json_is_array (el)) {
+            if (errmsg)
+                *errmsg = "association row is not an array";
+            return -1;
+        }
+        for (int k = 0; k < num_association_fields; k++)
+            v[k] = json_array_get (el, index[k]);
+
+        if (!json_is_integer (v[0]) || !json_is_string (v[1])
+            || !json_is_string (v[2]) || !json_is_number (v[3])
+            || !json_is_integer (v[4]) || !json_is_integer (v[5])
+            || !json_is_string (v[6]) || !json_is_integer (v[7])
+            || !json_is_string (v[8]) || !json_is_string (v[9])
+            || !json_is_integer (v[10]) || !json_is_integer (v[11])
+            || !json_is_integer (v[12])) {
+            if (errmsg)
+                *errmsg = "association row " + std::to_string (i)
+                          + " has a missing or invalid value";
+            return -1;
+        }
+
+        AssociationFields f;
+        f.uid = json_integer_value (v[0]);
+        f.bank = json_string_value (v[1]);
+        f.def_bank = json_string_value (v[2]);
+        f.fshare = json_number_value (v[3]);
+        f.max_running_jobs = json_integer_value (v[4]);
+        f.max_active_jobs = json_integer_value (v[5]);
+        f.assoc_queues = json_string_value (v[6]);
+        f.active = json_integer_value (v[7]);
+        f.assoc_projects = json_string_value (v[8]);
+        f.def_project = json_string_value (v[9]);
+        f.max_nodes = json_integer_value (v[10]);
+        f.max_cores = json_integer_value (v[11]);
+        f.max_sched_jobs = json_integer_value (v[12]);
+
+        load_association (f, users, users_def_bank);
+    }
+
+    return 0;
+}
+
+
 int load_associations (
                     json_t *data,
-                    std::map<int, std::map<std::string, Association>> &users,
-                    std::map<int, std::string> &users_def_bank,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank,
                     std::string *errmsg)
 {
     char *bank, *def_bank, *assoc_queues, *assoc_projects, *def_project = NULL;
@@ -569,6 +769,9 @@ int load_associations (
     int num_data = 0;
     int active = 1;
 
+    if (data && json_is_object (data))
+        return load_associations_columnar (data, users, users_def_bank, errmsg);
+
     if (!data || !json_is_array (data)) {
         if (errmsg)
             *errmsg = "associations data is NULL or not an array";
@@ -600,36 +803,19 @@ int load_associations (
             return -1;
         }
 
-        Association *a;
-        a = &users[uid][bank];
-
-        a->bank_name = bank;
-        a->fairshare = fshare;
-        a->max_run_jobs = max_running_jobs;
-        a->max_active_jobs = max_active_jobs;
-        a->active = active;
-        a->def_project = def_project;
-        a->max_nodes = max_nodes;
-        a->max_cores = max_cores;
-        a->max_sched_jobs = max_sched_jobs;
-
-        // split queues comma-delimited string and add it to b->queues vector
-        a->queues.clear ();
-        if (has_text (assoc_queues))
-            split_string_and_push_back (assoc_queues, a->queues);
-        // do the same thing for the association's projects
-        a->projects.clear ();
-        if (has_text (assoc_projects))
-            split_string_and_push_back (assoc_projects, a->projects);
-
-        users_def_bank[uid] = def_bank;
+        AssociationFields f = {uid, bank, def_bank, fshare, max_running_jobs,
+                               max_active_jobs, assoc_queues, active,
+                               assoc_projects, def_project, max_nodes,
+                               max_cores, max_sched_jobs};
+        load_association (f, users, users_def_bank);
     }
 
     return 0;
 }
 
 
-int load_queues (json_t *data, std::map<std::string, Queue> &queues,
+int load_queues (json_t *data,
+                 std::unordered_map<std::string, Queue> &queues,
                  std::string *errmsg)
 {
     char *queue = NULL;
@@ -719,7 +905,7 @@ int load_projects (json_t *data, std::vector<std::string> &projects,
 }
 
 
-int load_banks (json_t *data, std::map<std::string, Bank> &banks,
+int load_banks (json_t *data, std::unordered_map<std::string, Bank> &banks,
                 std::string *errmsg)
 {
     char *bank_name = NULL;
@@ -798,11 +984,11 @@ int load_priority_factors (json_t *data,
 
 int initialize_plugin (
                     json_t *config_obj,
-                    std::map<int, std::map<std::string, Association>> &users,
-                    std::map<int, std::string> &users_def_bank,
-                    std::map<std::string, Queue> &queues,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank,
+                    std::unordered_map<std::string, Queue> &queues,
                     std::vector<std::string> &projects,
-                    std::map<std::string, Bank> &banks,
+                    std::unordered_map<std::string, Bank> &banks,
                     std::map<std::string, int> &priority_weights,
                     std::string *errmsg)
 {
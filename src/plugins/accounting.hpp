@@ -96,6 +96,13 @@ public:
     int cur_sched_cores = 0;// number of cores in SCHED state in queue
 };
 
+// a job of an association that has a priority and is waiting to be scheduled
+class PendingJob {
+public:
+    int urgency = FLUX_JOB_URGENCY_DEFAULT; // urgency of the job
+    std::string queue;                      // queue the job was submitted under
+};
+
 // all attributes are per-user/bank
 class Association {
 public:
@@ -121,9 +128,13 @@ public:
     int cur_cores;                     // current number of used cores
     std::unordered_map<std::string, QueueUsage>
       queue_usage;                     // the association's usage per-queue
+    std::unordered_map<flux_jobid_t, PendingJob>
+      pending_jobs;                    // jobs waiting to be scheduled
 
     // methods
     json_t* to_json () const;    // convert object to JSON string
+    // compare the attributes set by flux-accounting with another association
+    bool same_settings (const Association &a) const;
     // check to see if a job can be released from all flux-accounting
     // dependencies
     //
@@ -135,59 +146,75 @@ public:
     // evaluated against the correct headroom for that limit
     bool under_max_run_jobs ();
     bool under_max_run_jobs (int pending);
-    bool under_queue_max_run_jobs (const std::string &queue,
-                                   std::map<std::string, Queue> queues);
-    bool under_queue_max_run_jobs (const std::string &queue,
-                                   std::map<std::string, Queue> queues,
-                                   int pending);
+    bool under_queue_max_run_jobs (
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues);
+    bool under_queue_max_run_jobs (
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending);
     bool under_max_resources (const Job &job);
     bool under_queue_max_resources (
-                                  const Job &job,
-                                  const std::string &queue,
-                                  const std::map<std::string, Queue> &queues);
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues);
     bool under_max_sched_jobs ();
     bool under_max_sched_jobs (int pending);
-    bool under_queue_max_sched_jobs (const std::string &queue,
-                                     std::map<std::string, Queue> &queues);
-    bool under_queue_max_sched_jobs (const std::string &queue,
-                                     std::map<std::string, Queue> &queues,
-                                     int pending);
-    bool under_queue_max_sched_nodes (const Job &job,
-                                      const std::string &queue,
-                                      std::map<std::string, Queue> &queues);
-    bool under_queue_max_sched_cores (const Job &job,
-                                      const std::string &queue,
-                                      std::map<std::string, Queue> &queues);
-    bool under_queue_max_sched_nodes (const Job &job,
-                                      const std::string &queue,
-                                      std::map<std::string, Queue> &queues,
-                                      int pending);
-    bool under_queue_max_sched_cores (const Job &job,
-                                      const std::string &queue,
-                                      std::map<std::string, Queue> &queues,
-                                      int pending);
+    bool under_queue_max_sched_jobs (
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues);
+    bool under_queue_max_sched_jobs (
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending);
+    bool under_queue_max_sched_nodes (
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues);
+    bool under_queue_max_sched_cores (
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues);
+    bool under_queue_max_sched_nodes (
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending);
+    bool under_queue_max_sched_cores (
+                        const Job &job,
+                        const std::string &queue,
+                        const std::unordered_map<std::string, Queue> &queues,
+                        int pending);
 };
 
+// the users map: userid -> bank name -> Association; it is looked up on every
+// job state transition, so it is hashed rather than ordered
+typedef std::unordered_map<int, std::unordered_map<std::string, Association>>
+    UsersMap;
+
 class Bank {
 public:
     std::string name;        // name of the bank
     double priority = 0.0;   // priority associated with jobs under this bank
 };
 
+// compare the attributes set by flux-accounting of two queues
+bool same_queue_settings (const Queue &a, const Queue &b);
+
 // get an Association object that points to user/bank in the users map;
 // return nullptr on failure
 Association* get_association (int userid,
                               const char *bank,
-                              std::map<int, std::map<std::string, Association>>
-                                &users,
-                              std::map<int, std::string> &users_def_bank);
+                              UsersMap &users,
+                              std::unordered_map<int, std::string>
+                                &users_def_bank);
 
 // iterate through the users map and construct a JSON object of each user/bank
-json_t* convert_map_to_json (std::map<int, std::map<std::string, Association>>
-                                 &users);
+json_t* convert_map_to_json (const UsersMap &users);
 
 // convert the queues map to a JSON object to be returned in query_cb ()
-json_t* convert_queues_to_json (const std::map<std::string, Queue> &queues);
+json_t* convert_queues_to_json (
+                const std::unordered_map<std::string, Queue> &queues);
 
 // convert the projects vector to a JSON object to be returned in query_cb ()
 json_t* convert_projects_to_json (const std::vector<std::string> projects);
@@ -203,14 +230,14 @@ bool has_text (const char *s);
 // integer priority associated with the queue
 int get_queue_info (char *queue,
                     const std::vector<std::string> &permissible_queues,
-                    const std::map<std::string, Queue> &queues);
+                    const std::unordered_map<std::string, Queue> &queues);
 
 // check the contents of the users map to see if every user's bank is a
 // temporary "DNE" value; if it is, the plugin is still waiting on
 // flux-accounting data
-bool check_map_for_dne_only (std::map<int, std::map<std::string, Association>>
-                               &users,
-                             std::map<int, std::string> &users_def_bank);
+bool check_map_for_dne_only (const UsersMap &users,
+                             const std::unordered_map<int, std::string>
+                               &users_def_bank);
 
 // validate a potentially passed-in project by an association
 int get_project_info (const char *project,
@@ -219,18 +246,19 @@ int get_project_info (const char *project,
 
 // return the associated priority with a bank
 double get_bank_priority (const char *bank,
-                          const std::map<std::string, Bank> &banks);
+                          const std::unordered_map<std::string, Bank> &banks);
 
-// load an array of associations into a map of Association objects
+// load an array of associations, or associations in the columnar encoding
+// {"columns": [...], "rows": [[...], ...]}, into a map of Association objects
 int load_associations (
                     json_t *data,
-                    std::map<int, std::map<std::string, Association>> &users,
-                    std::map<int, std::string> &users_def_bank,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank,
                     std::string *errmsg);
 
 // load an array of queues into a map of Queue objects
 int load_queues (json_t *data,
-                 std::map<std::string, Queue> &queues,
+                 std::unordered_map<std::string, Queue> &queues,
                  std::string *errmsg);
 
 // load an array of projects into a vector
@@ -240,7 +268,7 @@ int load_projects (json_t *data,
 
 // load an array of banks into a map of Bank objects
 int load_banks (json_t *data,
-                std::map<std::string, Bank> &banks,
+                std::unordered_map<std::string, Bank> &banks,
                 std::string *errmsg);
 
 // load an array of priority factor weights into a map of priority factors
@@ -252,11 +280,11 @@ int load_priority_factors (json_t *data,
 // database information
 int initialize_plugin (
                     json_t *config_obj,
-                    std::map<int, std::map<std::string, Association>> &users,
-                    std::map<int, std::string> &users_def_bank,
-                    std::map<std::string, Queue> &queues,
+                    UsersMap &users,
+                    std::unordered_map<int, std::string> &users_def_bank,
+                    std::unordered_map<std::string, Queue> &queues,
                     std::vector<std::string> &projects,
-                    std::map<std::string, Bank> &banks,
+                    std::unordered_map<std::string, Bank> &banks,
                     std::map<std::string, int> &priority_weights,
                     std::string *errmsg);
 
@@ -30,6 +30,7 @@ extern "C" {
 #include <sstream>
 #include <cstdint>
 #include <new>
+#include <set>
 
 // custom Association class file
 #include "accounting.hpp"
@@ -49,14 +50,47 @@ extern "C" {
 #define DEFAULT_BANK_WEIGHT 0
 #define DEFAULT_URGENCY_WEIGHT 1000
 
-std::map<int, std::map<std::string, Association>> users;
-std::map<std::string, Queue> queues;
-std::map<std::string, Bank> banks;
-std::map<int, std::string> users_def_bank;
+UsersMap users;
+std::unordered_map<std::string, Queue> queues;
+std::unordered_map<std::string, Bank> banks;
+std::unordered_map<int, std::string> users_def_bank;
 std::vector<std::string> projects;
 std::map<std::string, int> priority_weights;
 bool deny_unknown_queues = false;
 
+// a bulk update from rec_bulk_update_cb () that is parsed but not yet applied;
+// an update sent in more than one chunk is staged here until its last chunk
+// arrives
+struct StagedUpdate {
+    int nchunks = 0;
+    int next_chunk = 0;
+    UsersMap users;
+    std::unordered_map<int, std::string> users_def_bank;
+    std::vector<std::pair<int, std::string>> deleted;
+    bool has_queues = false;
+    std::unordered_map<std::string, Queue> queues;
+    bool has_projects = false;
+    std::vector<std::string> projects;
+    bool has_banks = false;
+    std::unordered_map<std::string, Bank> banks;
+    bool has_priority_weights = false;
+    std::map<std::string, int> priority_weights;
+    bool has_config = false;
+    int deny_unknown_queues = 0;
+};
+StagedUpdate staged;
+
+// the associations, banks, and queues changed by updates received since jobs
+// were last reprioritized; only the jobs affected by them are reprioritized
+// unless "all" is set
+struct ChangeSet {
+    bool all = false;
+    std::set<std::pair<int, std::string>> associations;
+    std::set<std::string> banks;
+    std::set<std::string> queues;
+};
+ChangeSet changed;
+
 /******************************************************************************
  *                                                                            *
  *                           Helper Functions                                 *
@@ -76,8 +110,10 @@ bool deny_unknown_queues = false;
  *
  * bank: a factor that can further affect the priority of a job based on the
  *     bank the job is submitted under.
+ *
+ * "id" is the job to calculate the priority of, or FLUX_JOBTAP_CURRENT_JOB.
  */
-int64_t priority_calculation (flux_plugin_t *p, int urgency)
+int64_t priority_calculation (flux_plugin_t *p, flux_jobid_t id, int urgency)
 {
     double fshare_factor = 0.0, priority = 0.0, bank_factor = 0.0;
     int queue_factor = 0;
@@ -97,11 +133,11 @@ int64_t priority_calculation (flux_plugin_t *p, int urgency)
 
     b = static_cast<Association *> (flux_jobtap_job_aux_get (
                                                     p,
-                                                    FLUX_JOBTAP_CURRENT_JOB,
+                                                    id,
                                                     "mf_priority:bank_info"));
 
     if (b == NULL) {
-        flux_jobtap_raise_exception (p, FLUX_JOBTAP_CURRENT_JOB, "mf_priority",
+        flux_jobtap_raise_exception (p, id, "mf_priority",
                                      0, "job.state.priority: bank info is " \
                                      "missing");
         return -1;
@@ -116,7 +152,7 @@ int64_t priority_calculation (flux_plugin_t *p, int urgency)
     // the "flux account jobs" command, which has handling in the case that a
     // fair-share value cannot be retrieved.
     if (flux_jobtap_event_post_pack (p,
-                                     FLUX_JOBTAP_CURRENT_JOB,
+                                     id,
                                      "memo",
                                      "{s:f}",
                                      "fairshare", b->fairshare) < 0)
@@ -143,7 +179,7 @@ int64_t priority_calculation (flux_plugin_t *p, int urgency)
 static int update_jobspec_bank (flux_plugin_t *p, int userid)
 {
     char *bank = NULL;
-    std::map<int, std::map<std::string, Association>>::iterator it;
+    UsersMap::iterator it;
 
     it = users.find (userid);
     if (it == users.end ()) {
@@ -535,6 +571,113 @@ static void free_job (void *arg)
 }
 
 
+/*
+ * Copy the attributes sent by flux-accounting for a set of associations into
+ * the users map, keeping the job and resource counts the plugin tracks for
+ * them, and record the associations that changed. Jobs submitted by a user
+ * the plugin did not know about wait in PRIORITY under a temporary "DNE" bank,
+ * so an update for such a user requires every job to be reprioritized.
+ */
+static void apply_associations (
+                const UsersMap &src,
+                const std::unordered_map<int, std::string> &src_def_bank)
+{
+    for (const auto &entry : src) {
+        auto user_it = users.find (entry.first);
+        bool new_user = (user_it == users.end ());
+
+        if (!new_user && user_it->second.count ("DNE") > 0)
+            changed.all = true;
+
+        for (const auto &bank_entry : entry.second) {
+            const Association &src_a = bank_entry.second;
+
+            if (!new_user) {
+                auto bank_it = user_it->second.find (bank_entry.first);
+                if (bank_it != user_it->second.end ()
+                    && bank_it->second.same_settings (src_a))
+                    continue;
+            }
+
+            Association &a = users[entry.first][bank_entry.first];
+
+            a.bank_name = src_a.bank_name;
+            a.fairshare = src_a.fairshare;
+            a.max_run_jobs = src_a.max_run_jobs;
+            a.max_active_jobs = src_a.max_active_jobs;
+            a.active = src_a.active;
+            a.def_project = src_a.def_project;
+            a.max_nodes = src_a.max_nodes;
+            a.max_cores = src_a.max_cores;
+            a.max_sched_jobs = src_a.max_sched_jobs;
+            a.queues = src_a.queues;
+            a.projects = src_a.projects;
+
+            changed.associations.emplace (entry.first, bank_entry.first);
+        }
+    }
+    for (const auto &entry : src_def_bank)
+        users_def_bank[entry.first] = entry.second;
+}
+
+
+/*
+ * Mark an association that has been removed from the flux-accounting DB as
+ * inactive.
+ */
+static void deactivate_association (int userid, const std::string &bank)
+{
+    auto it = users.find (userid);
+    if (it == users.end ())
+        return;
+    auto bank_it = it->second.find (bank);
+    if (bank_it == it->second.end () || bank_it->second.active == 0)
+        return;
+
+    bank_it->second.active = 0;
+    changed.associations.emplace (userid, bank);
+}
+
+
+/*
+ * Record the queues that were added, removed, or changed by an update.
+ */
+static void record_queue_changes (
+                const std::unordered_map<std::string, Queue> &old_queues)
+{
+    for (const auto &entry : queues) {
+        auto it = old_queues.find (entry.first);
+        if (it == old_queues.end ()
+            || !same_queue_settings (it->second, entry.second))
+            changed.queues.insert (entry.first);
+    }
+    for (const auto &entry : old_queues) {
+        if (queues.count (entry.first) == 0)
+            changed.queues.insert (entry.first);
+    }
+}
+
+
+/*
+ * Record the banks that were added, removed, or whose priority changed in an
+ * update.
+ */
+static void record_bank_changes (
+                const std::unordered_map<std::string, Bank> &old_banks)
+{
+    for (const auto &entry : banks) {
+        auto it = old_banks.find (entry.first);
+        if (it == old_banks.end ()
+            || it->second.priority != entry.second.priority)
+            changed.banks.insert (entry.first);
+    }
+    for (const auto &entry : old_banks) {
+        if (banks.count (entry.first) == 0)
+            changed.banks.insert (entry.first);
+    }
+}
+
+
 /******************************************************************************
  *                                                                            *
  *                               Callbacks                                    *
@@ -557,6 +700,7 @@ static void rec_factor_cb (flux_t *h,
     int num_data = 0;
     size_t index;
     json_t *el;
+    std::map<std::string, int> old_weights = priority_weights;
 
     if (flux_request_unpack (msg, NULL, "{s:o}", "data", &data) < 0) {
         flux_log_error (h, "failed to unpack custom_priority.trigger msg");
@@ -582,6 +726,10 @@ static void rec_factor_cb (flux_t *h,
             priority_weights[factor] = weight;
     }
 
+    // a new weight changes the priority of every job
+    if (priority_weights != old_weights)
+        changed.all = true;
+
     if (flux_respond (h, msg, NULL) < 0)
         flux_log_error (h, "flux_respond");
     return;
@@ -647,13 +795,29 @@ static int query_cb (flux_plugin_t *p,
 
     json_decref (project_data);
 
+    // advertise the encodings of associations accepted by rec_bulk_update
+    if (flux_plugin_arg_pack (args,
+                              FLUX_PLUGIN_ARG_OUT,
+                              "{s:[ss]}",
+                              "association_formats",
+                              "objects",
+                              "columnar") < 0)
+        flux_log_error (flux_jobtap_get_flux (p),
+                        "mf_priority: query_cb: flux_plugin_arg_pack: %s",
+                        flux_plugin_arg_strerror (args));
+
     return 0;
 }
 
 
 /*
  * Unpack a payload from an external bulk update service and place it in the
- * multimap datastructure.
+ * multimap datastructure. "data" is either a list of associations or the
+ * columnar encoding {"columns": [...], "rows": [...]}. Associations listed under
+ * the optional "deleted" key have been removed from the flux-accounting DB since
+ * the last update and are marked inactive. Respond with the number of
+ * associations held by the plugin so that a caller sending only changed
+ * associations can tell whether the plugin needs a full update instead.
  */
 static void rec_update_cb (flux_t *h,
                            flux_msg_handler_t *mh,
@@ -665,21 +829,42 @@ static void rec_update_cb (flux_t *h,
     int max_sched_jobs = INT16_MAX;
     double fshare = 0.0;
     json_t *data, *jtemp = NULL;
+    json_t *deleted = NULL;
     json_error_t error;
     int num_data = 0;
     int active = 1;
+    size_t index;
+    json_t *el;
+    int num_associations = 0;
     std::stringstream s_stream;
-
-    if (flux_request_unpack (msg, NULL, "{s:o}", "data", &data) < 0) {
+    std::string errmsg;
+    UsersMap update_users;
+    std::unordered_map<int, std::string> update_def_bank;
+
+    if (flux_request_unpack (msg,
+                             NULL,
+                             "{s:o, s?o}",
+                             "data", &data,
+                             "deleted", &deleted) < 0) {
         flux_log_error (h, "failed to unpack custom_priority.trigger msg");
         goto error;
     }
 
-    if (!data || !json_is_array (data)) {
+    if (data && json_is_object (data)) {
+        // associations were sent in the columnar encoding
+        if (load_associations (data,
+                               update_users,
+                               update_def_bank,
+                               &errmsg) < 0) {
+            flux_log (h, LOG_ERR, "mf_priority: rec_update: %s", errmsg.c_str ());
+            errno = EPROTO;
+            goto error;
+        }
+    } else if (!data || !json_is_array (data)) {
         flux_log (h, LOG_ERR, "mf_priority: invalid bulk_update payload");
         goto error;
-    }
-    num_data = json_array_size (data);
+    } else
+        num_data = json_array_size (data);
 
     for (int i = 0; i < num_data; i++) {
         json_t *el = json_array_get(data, i);
@@ -703,7 +888,7 @@ static void rec_update_cb (flux_t *h,
             flux_log (h, LOG_ERR, "mf_priority unpack: %s", error.text);
 
         Association *b;
-        b = &users[uid][bank];
+        b = &update_users[uid][bank];
 
         b->bank_name = bank;
         b->fairshare = fshare;
@@ -724,11 +909,30 @@ static void rec_update_cb (flux_t *h,
         if (has_text (assoc_projects))
             split_string_and_push_back (assoc_projects, b->projects);
 
-        users_def_bank[uid] = def_bank;
+        update_def_bank[uid] = def_bank;
     }
 
-    if (flux_respond (h, msg, NULL) < 0)
-        flux_log_error (h, "flux_respond");
+    // copy the update into the users map, keeping track of what changed
+    apply_associations (update_users, update_def_bank);
+
+    if (deleted && json_is_array (deleted)) {
+        json_array_foreach (deleted, index, el) {
+            if (json_unpack_ex (el, &error, 0,
+                                "{s:i, s:s}",
+                                "userid", &uid,
+                                "bank", &bank) < 0) {
+                flux_log (h, LOG_ERR, "mf_priority unpack: %s", error.text);
+                continue;
+            }
+            deactivate_association (uid, bank);
+        }
+    }
+
+    for (const auto &entry : users)
+        num_associations += entry.second.size ();
+
+    if (flux_respond_pack (h, msg, "{s:i}", "associations", num_associations) < 0)
+        flux_log_error (h, "flux_respond_pack");
     return;
 error:
     flux_respond_error (h, msg, errno, flux_msg_last_error (msg));
@@ -750,6 +954,7 @@ static void rec_q_cb (flux_t *h,
     json_t *data, *jtemp = NULL;
     json_error_t error;
     int num_data = 0;
+    std::unordered_map<std::string, Queue> old_queues;
 
     if (flux_request_unpack (msg, NULL, "{s:o}", "data", &data) < 0) {
         flux_log_error (h, "failed to unpack custom_priority.trigger msg");
@@ -762,8 +967,8 @@ static void rec_q_cb (flux_t *h,
     }
     num_data = json_array_size (data);
 
-    // clear queues map
-    queues.clear ();
+    // clear queues map, keeping the old queues to see which ones changed
+    old_queues.swap (queues);
 
     for (int i = 0; i < num_data; i++) {
         json_t *el = json_array_get(data, i);
@@ -801,6 +1006,7 @@ static void rec_q_cb (flux_t *h,
         q->max_sched_nodes_per_assoc = max_sched_nodes_per_assoc;
         q->max_sched_cores_per_assoc = max_sched_cores_per_assoc;
     }
+    record_queue_changes (old_queues);
 
     if (flux_respond (h, msg, NULL) < 0)
         flux_log_error (h, "flux_respond");
@@ -873,6 +1079,7 @@ static void rec_bank_cb (flux_t *h,
     int num_data = 0;
     size_t index;
     json_t *el;
+    std::unordered_map<std::string, Bank> old_banks;
 
     if (flux_request_unpack (msg, NULL, "{s:o}", "data", &data) < 0) {
         flux_log_error (h, "failed to unpack custom_priority.trigger msg");
@@ -885,8 +1092,8 @@ static void rec_bank_cb (flux_t *h,
     }
     num_data = json_array_size (data);
 
-    // clear the banks map
-    banks.clear ();
+    // clear the banks map, keeping the old banks to see which ones changed
+    old_banks.swap (banks);
 
     for (int i = 0; i < num_data; i++) {
         json_t *el = json_array_get(data, i);
@@ -903,6 +1110,7 @@ static void rec_bank_cb (flux_t *h,
         b->name = bank_name;
         b->priority = priority;
     }
+    record_bank_changes (old_banks);
 
     if (flux_respond (h, msg, NULL) < 0)
         flux_log_error (h, "flux_respond");
@@ -952,20 +1160,12 @@ error:
 }
 
 
-static void reprior_cb (flux_t *h,
-                        flux_msg_handler_t *mh,
-                        const flux_msg_t *msg,
-                        void *arg)
+/*
+ * Check every association with held jobs to see if any of them can now be
+ * released after an update.
+ */
+static void release_held_jobs (flux_t *h, flux_plugin_t *p)
 {
-    flux_plugin_t *p = (flux_plugin_t*) arg;
-
-    if (flux_jobtap_reprioritize_all (p) < 0)
-        goto error;
-    if (flux_respond (h, msg, NULL) < 0)
-        flux_log_error (h, "flux_respond");
-
-    // iterate through map that stores associations and held job IDs; check to
-    // see if any previously-held jobs can now be released with the update
     for (auto &entry: users) {
         auto &banks = entry.second;
 
@@ -979,6 +1179,111 @@ static void reprior_cb (flux_t *h,
             }
         }
     }
+}
+
+
+/*
+ * Reprioritize the jobs affected by the updates received since jobs were last
+ * reprioritized: the pending jobs of changed associations, of associations
+ * under changed banks, and in changed queues. Every job is reprioritized
+ * instead if "all" is true or an update changed something that affects every
+ * job, in which case "all" is set to true. Return the number of jobs
+ * reprioritized on their own, or -1 on error.
+ */
+static int reprioritize_changed (flux_plugin_t *p, bool &all)
+{
+    flux_t *h = flux_jobtap_get_flux (p);
+    int count = 0;
+
+    if (all || changed.all) {
+        all = true;
+        if (flux_jobtap_reprioritize_all (p) < 0)
+            return -1;
+        changed = ChangeSet ();
+        return 0;
+    }
+
+    for (auto &entry : users) {
+        for (auto &bank_entry : entry.second) {
+            Association &a = bank_entry.second;
+            bool assoc_changed =
+                changed.associations.count ({entry.first, bank_entry.first}) > 0
+                || changed.banks.count (a.bank_name) > 0;
+
+            if (a.pending_jobs.empty ()
+                || (!assoc_changed && changed.queues.empty ()))
+                continue;
+
+            auto it = a.pending_jobs.begin ();
+            while (it != a.pending_jobs.end ()) {
+                flux_jobid_t id = it->first;
+
+                if (!assoc_changed && changed.queues.count (it->second.queue) == 0) {
+                    ++it;
+                    continue;
+                }
+                // the job is no longer pending under this association
+                if (flux_jobtap_job_aux_get (p, id, "mf_priority:bank_info")
+                    != &a) {
+                    it = a.pending_jobs.erase (it);
+                    continue;
+                }
+
+                int64_t priority = priority_calculation (p,
+                                                         id,
+                                                         it->second.urgency);
+                if (priority < 0
+                    || flux_jobtap_reprioritize_job (p, id, priority) < 0)
+                    flux_log_error (h,
+                                    "mf_priority: failed to reprioritize job "
+                                    "%ju",
+                                    (uintmax_t) id);
+                else
+                    count++;
+                ++it;
+            }
+        }
+    }
+    changed = ChangeSet ();
+
+    return count;
+}
+
+
+/*
+ * Reprioritize the jobs affected by updates since the last reprioritization,
+ * or every job if "all" is true in the payload. Respond with the number of
+ * jobs reprioritized on their own and whether every job was reprioritized.
+ */
+static void reprior_cb (flux_t *h,
+                        flux_msg_handler_t *mh,
+                        const flux_msg_t *msg,
+                        void *arg)
+{
+    flux_plugin_t *p = (flux_plugin_t*) arg;
+    int force_all = 0;
+    bool all;
+    int count;
+
+    // a request with no payload reprioritizes only the affected jobs
+    if (flux_msg_has_payload (msg)
+        && flux_request_unpack (msg, NULL, "{s?b}", "all", &force_all) < 0) {
+        flux_log_error (h, "failed to unpack reprioritize msg");
+        goto error;
+    }
+    all = (force_all != 0);
+    if ((count = reprioritize_changed (p, all)) < 0)
+        goto error;
+    if (flux_respond_pack (h,
+                           msg,
+                           "{s:i, s:b}",
+                           "reprioritized", count,
+                           "all", all) < 0)
+        flux_log_error (h, "flux_respond_pack");
+
+    // iterate through map that stores associations and held job IDs; check to
+    // see if any previously-held jobs can now be released with the update
+    release_held_jobs (h, p);
     return;
 error:
     flux_respond_error (h, msg, errno, flux_msg_last_error (msg));
@@ -986,6 +1291,227 @@ error:
 }
 
 
+/*
+ * Parse the sections of one chunk of a bulk update into the staged update.
+ */
+static int stage_bulk_update (json_t *db_associations,
+                              json_t *deleted,
+                              json_t *db_queues,
+                              json_t *db_projects,
+                              json_t *db_banks,
+                              json_t *db_factors,
+                              json_t *db_config,
+                              std::string *errmsg)
+{
+    size_t index;
+    json_t *el;
+
+    if (db_associations && load_associations (db_associations,
+                                              staged.users,
+                                              staged.users_def_bank,
+                                              errmsg) < 0)
+        return -1;
+    if (deleted && json_is_array (deleted)) {
+        json_array_foreach (deleted, index, el) {
+            int uid;
+            char *bank = NULL;
+            if (json_unpack (el, "{s:i, s:s}", "userid", &uid, "bank", &bank) < 0) {
+                *errmsg = "deleted association is missing userid or bank";
+                return -1;
+            }
+            staged.deleted.emplace_back (uid, bank);
+        }
+    }
+    if (db_queues) {
+        if (load_queues (db_queues, staged.queues, errmsg) < 0)
+            return -1;
+        staged.has_queues = true;
+    }
+    if (db_projects) {
+        if (load_projects (db_projects, staged.projects, errmsg) < 0)
+            return -1;
+        staged.has_projects = true;
+    }
+    if (db_banks) {
+        if (load_banks (db_banks, staged.banks, errmsg) < 0)
+            return -1;
+        staged.has_banks = true;
+    }
+    if (db_factors) {
+        if (!staged.has_priority_weights)
+            staged.priority_weights = priority_weights;
+        if (load_priority_factors (db_factors,
+                                   staged.priority_weights,
+                                   errmsg) < 0)
+            return -1;
+        staged.has_priority_weights = true;
+    }
+    if (db_config) {
+        staged.deny_unknown_queues = deny_unknown_queues ? 1 : 0;
+        if (json_unpack (db_config,
+                         "{s?b}",
+                         "deny_unknown_queues",
+                         &staged.deny_unknown_queues) < 0) {
+            *errmsg = "invalid config";
+            return -1;
+        }
+        staged.has_config = true;
+    }
+
+    return 0;
+}
+
+
+/*
+ * Apply a fully staged bulk update to the plugin's data.
+ */
+static void apply_staged_update ()
+{
+    apply_associations (staged.users, staged.users_def_bank);
+
+    for (const auto &key : staged.deleted)
+        deactivate_association (key.first, key.second);
+
+    if (staged.has_queues) {
+        std::unordered_map<std::string, Queue> old_queues;
+        old_queues.swap (queues);
+        queues = std::move (staged.queues);
+        record_queue_changes (old_queues);
+    }
+    if (staged.has_projects)
+        projects = std::move (staged.projects);
+    if (staged.has_banks) {
+        std::unordered_map<std::string, Bank> old_banks;
+        old_banks.swap (banks);
+        banks = std::move (staged.banks);
+        record_bank_changes (old_banks);
+    }
+    if (staged.has_priority_weights) {
+        // a new weight changes the priority of every job
+        if (staged.priority_weights != priority_weights)
+            changed.all = true;
+        priority_weights = std::move (staged.priority_weights);
+    }
+    if (staged.has_config)
+        deny_unknown_queues = (staged.deny_unknown_queues != 0);
+}
+
+
+/*
+ * Unpack a payload with any of the "associations", "deleted", "queues",
+ * "projects", "banks", "priority_factors", and "config" sections of a bulk
+ * update. Every section is parsed before any of them are applied, so a payload
+ * with an invalid section changes nothing, and the update is applied in full
+ * before the jobs it affects are reprioritized once (unless "reprioritize" is
+ * false), or every job if "reprioritize_all" is true. Respond with the number
+ * of associations held by the plugin. "associations" is either a list of
+ * objects or the columnar encoding {"columns": [...], "rows": [...]}.
+ *
+ * A large update can be split into "nchunks" messages sent in order with
+ * "chunk" set to 0, 1, ..., nchunks - 1. Each chunk is parsed as it arrives and
+ * nothing is applied until the last one has been parsed; a chunk that arrives
+ * out of order or can't be parsed discards the whole update.
+ */
+static void rec_bulk_update_cb (flux_t *h,
+                                flux_msg_handler_t *mh,
+                                const flux_msg_t *msg,
+                                void *arg)
+{
+    flux_plugin_t *p = (flux_plugin_t*) arg;
+    json_t *db_associations = NULL;
+    json_t *deleted = NULL;
+    json_t *db_queues = NULL;
+    json_t *db_projects = NULL;
+    json_t *db_banks = NULL;
+    json_t *db_factors = NULL;
+    json_t *db_config = NULL;
+    int reprioritize = 1;
+    int reprioritize_all = 0;
+    bool all;
+    int chunk = 0;
+    int nchunks = 1;
+    int num_associations = 0;
+    std::string errmsg;
+
+    if (flux_request_unpack (msg,
+                             NULL,
+                             "{s?o s?o s?o s?o s?o s?o s?o s?b s?b s?i s?i}",
+                             "associations", &db_associations,
+                             "deleted", &deleted,
+                             "queues", &db_queues,
+                             "projects", &db_projects,
+                             "banks", &db_banks,
+                             "priority_factors", &db_factors,
+                             "config", &db_config,
+                             "reprioritize", &reprioritize,
+                             "reprioritize_all", &reprioritize_all,
+                             "chunk", &chunk,
+                             "nchunks", &nchunks) < 0) {
+        flux_log_error (h, "failed to unpack rec_bulk_update msg");
+        goto error;
+    }
+
+    if (chunk == 0)
+        staged = StagedUpdate ();
+    else if (nchunks != staged.nchunks || chunk != staged.next_chunk) {
+        flux_log (h,
+                  LOG_ERR,
+                  "mf_priority: rec_bulk_update: expected chunk %d of %d, "
+                  "got chunk %d of %d",
+                  staged.next_chunk,
+                  staged.nchunks,
+                  chunk,
+                  nchunks);
+        staged = StagedUpdate ();
+        errno = EPROTO;
+        goto error;
+    }
+    staged.nchunks = nchunks;
+    staged.next_chunk = chunk + 1;
+
+    if (stage_bulk_update (db_associations,
+                           deleted,
+                           db_queues,
+                           db_projects,
+                           db_banks,
+                           db_factors,
+                           db_config,
+                           &errmsg) < 0) {
+        flux_log (h, LOG_ERR, "mf_priority: rec_bulk_update: %s", errmsg.c_str ());
+        staged = StagedUpdate ();
+        errno = EPROTO;
+        goto error;
+    }
+
+    if (staged.next_chunk < staged.nchunks) {
+        // wait for the rest of the update
+        if (flux_respond_pack (h, msg, "{s:i}", "chunk", chunk) < 0)
+            flux_log_error (h, "flux_respond_pack");
+        return;
+    }
+
+    // every chunk was parsed; apply the update
+    apply_staged_update ();
+    staged = StagedUpdate ();
+
+    all = (reprioritize_all != 0);
+    if ((reprioritize || all) && reprioritize_changed (p, all) < 0)
+        goto error;
+
+    for (const auto &entry : users)
+        num_associations += entry.second.size ();
+
+    if (flux_respond_pack (h, msg, "{s:i}", "associations", num_associations) < 0)
+        flux_log_error (h, "flux_respond_pack");
+
+    if (reprioritize || all)
+        release_held_jobs (h, p);
+    return;
+error:
+    flux_respond_error (h, msg, errno, flux_msg_last_error (msg));
+}
+
+
 /*
  * Unpack the urgency and userid from a submitted job and call
  * priority_calculation (), which will return a new job priority to be packed.
@@ -1154,7 +1680,19 @@ static int priority_cb (flux_plugin_t *p,
         }
     }
 
-    priority = priority_calculation (p, urgency);
+    priority = priority_calculation (p, FLUX_JOBTAP_CURRENT_JOB, urgency);
+
+    // remember the job so that it can be reprioritized on its own when its
+    // association, bank, or queue is updated
+    b = static_cast<Association *> (flux_jobtap_job_aux_get (
+                                                    p,
+                                                    FLUX_JOBTAP_CURRENT_JOB,
+                                                    "mf_priority:bank_info"));
+    if (b != nullptr && priority >= 0) {
+        PendingJob &pending = b->pending_jobs[id];
+        pending.urgency = urgency;
+        pending.queue = j->queue;
+    }
 
     if (flux_plugin_arg_pack (args,
                               FLUX_PLUGIN_ARG_OUT,
@@ -1795,6 +2333,9 @@ static int run_cb (flux_plugin_t *p,
         return -1;
     }
 
+    // the job is no longer waiting to be scheduled
+    b->pending_jobs.erase (j->id);
+
     if (queue != NULL) {
         // a queue was passed-in; increment counter of the number of
         // queue-specific running jobs for this association
@@ -1854,6 +2395,7 @@ static int job_updated (flux_plugin_t *p,
                         void *data)
 {
     int userid;
+    flux_jobid_t id;
     char *bank = NULL;
     char *updated_queue = NULL;
     char *updated_bank = NULL;
@@ -1862,7 +2404,8 @@ static int job_updated (flux_plugin_t *p,
     flux_t *h = flux_jobtap_get_flux (p);
     if (flux_plugin_arg_unpack (args,
                                 FLUX_PLUGIN_ARG_IN,
-                                "{s:i, s{s{s{s?s}}}, s:{s?s, s?s}}",
+                                "{s:I, s:i, s{s{s{s?s}}}, s:{s?s, s?s}}",
+                                "id", &id,
                                 "userid", &userid,
                                 "jobspec", "attributes", "system", "bank",
                                 &bank,
@@ -1905,6 +2448,12 @@ static int job_updated (flux_plugin_t *p,
 
         // update the active jobs count of the old bank
         a->cur_active_jobs--;
+        // move the job to the pending jobs of the updated bank
+        auto pending_it = a->pending_jobs.find (id);
+        if (pending_it != a->pending_jobs.end ()) {
+            a_new->pending_jobs[id] = pending_it->second;
+            a->pending_jobs.erase (pending_it);
+        }
         // assign the new Association object to the original Association object
         a = a_new;
         // update the active jobs count of the updated bank
@@ -1922,12 +2471,17 @@ static int job_updated (flux_plugin_t *p,
             flux_log_error (h, "flux_jobtap_job_aux_set");
     }
 
-    if (updated_queue != NULL)
+    if (updated_queue != NULL) {
         // the queue for the job has been updated, so fetch the priority
         // associated with this queue and assign it to the Association object
         // associated with the job
         a->queue_factor = get_queue_info (updated_queue, a->queues, queues);
 
+        auto pending_it = a->pending_jobs.find (id);
+        if (pending_it != a->pending_jobs.end ())
+            pending_it->second.queue = updated_queue;
+    }
+
     return 0;
 }
 
@@ -2106,6 +2660,9 @@ static int inactive_cb (flux_plugin_t *p,
     // if a queue cannot be found, just set it to ""
     queue_str = queue ? queue : "";
 
+    // a job that is canceled before it runs is still in the pending jobs
+    b->pending_jobs.erase (jobid);
+
     b->cur_active_jobs--;
     if (!flux_jobtap_job_event_posted (p, FLUX_JOBTAP_CURRENT_JOB, "alloc")) {
         // check to see if this job exists in the Association object's list of
@@ -2210,12 +2767,17 @@ extern "C" int flux_plugin_init (flux_plugin_t *p)
 {
     // explicitly reset all global state of internal data structures
     users.clear ();
+    // jobs that were pending before the plugin was loaded are not known to it
+    // yet, so the first update reprioritizes every job
+    changed = ChangeSet ();
+    changed.all = true;
     queues.clear ();
     banks.clear ();
     users_def_bank.clear ();
     projects.clear ();
     priority_weights.clear ();
     deny_unknown_queues = false;
+    staged = StagedUpdate ();
 
     json_t *config_obj = NULL;
     flux_t *h = flux_jobtap_get_flux (p);
@@ -2260,7 +2822,11 @@ extern "C" int flux_plugin_init (flux_plugin_t *p)
         || flux_jobtap_service_register (p, "rec_fac_update", rec_factor_cb, p)
         < 0
         || flux_jobtap_service_register (p, "rec_config_update", rec_config_cb, p)
-        < 0)
+        < 0
+        || flux_jobtap_service_register (p,
+                                         "rec_bulk_update",
+                                         rec_bulk_update_cb,
+                                         p) < 0)
         return -1;
 
     // initialize the weights of the priority factors with default values
@@ -24,10 +24,10 @@ extern "C" {
 #include "src/common/libtap/tap.h"
 
 // define a test users map to run tests on
-std::map<int, std::map<std::string, Association>> users;
-std::map<int, std::string> users_def_bank;
+UsersMap users;
+std::unordered_map<int, std::string> users_def_bank;
 // define a test queues map
-std::map<std::string, Queue> queues;
+std::unordered_map<std::string, Queue> queues;
 // define a vector of chargeable projects
 std::vector<std::string> projects;
 bool deny_unknown_queues = false;
@@ -36,11 +36,10 @@ bool deny_unknown_queues = false;
 /*
  * helper function to add a user/bank to the users map
  */
-void add_user_to_map (
-                std::map<int, std::map<std::string, Association>> &users,
-                int userid,
-                const std::string& bank,
-                Association a)
+void add_user_to_map (UsersMap &users,
+                      int userid,
+                      const std::string& bank,
+                      Association a)
 {
     // insert user to users map
     users[userid][bank] = {
@@ -71,8 +70,7 @@ void add_user_to_map (
 /*
  * helper function to add test users to the users map
  */
-void initialize_map (
-    std::map<int, std::map<std::string, Association>> &users)
+void initialize_map (UsersMap &users)
 {
     Association user1 = {"bank_A", 0.5, 5, 0, 7, 0, 2147483647, 0, {},
                          {}, 0, 0.0, 1, {"*"}, "*", 2147483647, 2147483647, 0, 0,
@@ -111,8 +109,7 @@ void initialize_projects () {
 
 
 // ensure we can access a user/bank in the users map
-static void test_direct_map_access (
-    std::map<int, std::map<std::string, Association>> &users)
+static void test_direct_map_access (UsersMap &users)
 {
     ok (users[1001]["bank_A"].bank_name == "bank_A", 
         "a user/bank from users map can be accessed directly");
@@ -288,6 +285,47 @@ static void test_under_queue_max_running_jobs_false ()
 }
 
 
+// ensure associations are compared by the attributes set by flux-accounting
+static void test_association_same_settings ()
+{
+    Association a = {"bank_A", 0.5, 5, 0, 7, 0, 0, 2147483647, {},
+                     {"bronze"}, 0, 0.0, 1, {"*"}, "*", 2147483647, 2147483647,
+                     0, 0, {}};
+    Association b = a;
+
+    // the counts tracked by the plugin are not compared
+    b.cur_run_jobs = 3;
+    b.cur_active_jobs = 4;
+    b.queue_factor = 100;
+    ok (a.same_settings (b) == true,
+        "associations with the same attributes have the same settings");
+
+    b.fairshare = 0.25;
+    ok (a.same_settings (b) == false,
+        "an association with a new fair-share has different settings");
+
+    b = a;
+    b.queues.push_back ("silver");
+    ok (a.same_settings (b) == false,
+        "an association with new queues has different settings");
+}
+
+
+// ensure queues are compared by the attributes set by flux-accounting
+static void test_same_queue_settings ()
+{
+    Queue bronze = queues["bronze"];
+    Queue updated = bronze;
+
+    ok (same_queue_settings (bronze, updated) == true,
+        "queues with the same attributes have the same settings");
+
+    updated.priority = 500;
+    ok (same_queue_settings (bronze, updated) == false,
+        "a queue with a new priority has different settings");
+}
+
+
 // ensure false is returned because we have valid flux-accounting data in map
 static void test_check_map_dne_false ()
 {
@@ -341,6 +379,8 @@ int main (int argc, char* argv[])
     test_check_map_dne_true ();
     test_under_queue_max_running_jobs_true ();
     test_under_queue_max_running_jobs_false ();
+    test_association_same_settings ();
+    test_same_queue_settings ();
 
     // indicate we are done testing
     done_testing ();
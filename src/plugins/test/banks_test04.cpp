@@ -25,14 +25,14 @@ extern "C" {
 #include "src/common/libtap/tap.h"
 
 // define a test banks map
-std::map<std::string, Bank> banks;
+std::unordered_map<std::string, Bank> banks;
 bool deny_unknown_queues = false;
 
 
 /*
  * initialize a map of Bank objects for testing
  */
-void initialize_map (std::map<std::string, Bank> &banks)
+void initialize_map (std::unordered_map<std::string, Bank> &banks)
 {
     Bank A = { "A", 100 };
     Bank B = { "B", 200 };
@@ -0,0 +1,280 @@
+/************************************************************\
+ * Copyright 2026 Lawrence Livermore National Security, LLC
+ * (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+ *
+ * This file is part of the Flux resource manager framework.
+ * For details, see https://github.com/flux-framework.
+ *
+ * SPDX-License-Identifier: LGPL-3.0
+\************************************************************/
+
+/*
+ * A micro-benchmark of the per-job work done by the priority plugin in its
+ * job.new, job.state.depend, job.state.run, and job.state.inactive callbacks.
+ * The callbacks need a running job manager, so this benchmark repeats the
+ * association lookups, limit checks, and usage updates each callback makes
+ * against the same users, queues, and banks maps the plugin keeps, and
+ * reports how many of each callback can be processed per second.
+ *
+ * usage: plugin_bench [NJOBS]
+ */
+
+extern "C" {
+#if HAVE_CONFIG_H
+#include "config.h"
+#endif
+}
+
+#include <chrono>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <limits>
+#include <string>
+#include <vector>
+
+#include "src/plugins/accounting.hpp"
+#include "src/plugins/job.hpp"
+
+#define NUM_ASSOCIATIONS 100000
+#define BANKS_PER_USER 2
+#define NUM_QUEUES 32
+#define QUEUES_PER_ASSOCIATION 4
+#define NUM_BANKS 64
+#define DEFAULT_NUM_JOBS 1000000
+
+UsersMap users;
+std::unordered_map<int, std::string> users_def_bank;
+std::unordered_map<std::string, Queue> queues;
+std::unordered_map<std::string, Bank> banks;
+bool deny_unknown_queues = false;
+
+// a submitted job and the association it was submitted under
+struct BenchJob {
+    int userid;
+    std::string bank;
+    Job job;
+    Association *a = nullptr;
+};
+
+
+static std::string queue_name (int i)
+{
+    return "queue" + std::to_string (i % NUM_QUEUES);
+}
+
+
+static std::string bank_name (int i)
+{
+    return "bank" + std::to_string (i % NUM_BANKS);
+}
+
+
+/*
+ * Load NUM_QUEUES queues, NUM_BANKS banks, and NUM_ASSOCIATIONS associations
+ * with limits that no job in the benchmark reaches, so that no job is held.
+ */
+static void initialize_maps ()
+{
+    for (int i = 0; i < NUM_QUEUES; i++) {
+        Queue q;
+        q.name = queue_name (i);
+        q.priority = i;
+        queues[q.name] = q;
+    }
+    for (int i = 0; i < NUM_BANKS; i++) {
+        Bank b;
+        b.name = bank_name (i);
+        b.priority = i;
+        banks[b.name] = b;
+    }
+    for (int i = 0; i < NUM_ASSOCIATIONS; i++) {
+        int userid = 50000 + i / BANKS_PER_USER;
+        std::string bank = bank_name (i);
+
+        Association a {};
+        a.bank_name = bank;
+        a.fairshare = 0.5;
+        a.max_run_jobs = std::numeric_limits<int>::max ();
+        a.max_active_jobs = std::numeric_limits<int>::max ();
+        a.max_sched_jobs = std::numeric_limits<int>::max ();
+        a.max_nodes = std::numeric_limits<int>::max ();
+        a.max_cores = std::numeric_limits<int>::max ();
+        a.active = 1;
+        a.projects = {"*"};
+        a.def_project = "*";
+        for (int q = 0; q < QUEUES_PER_ASSOCIATION; q++)
+            a.queues.push_back (queue_name (i + q));
+
+        users[userid][bank] = a;
+        if (i % BANKS_PER_USER == 0)
+            users_def_bank[userid] = bank;
+    }
+}
+
+
+/*
+ * Create jobs submitted under randomly chosen associations and queues.
+ */
+static std::vector<BenchJob> create_jobs (int njobs)
+{
+    std::vector<BenchJob> jobs (njobs);
+
+    srand (1);
+    for (int i = 0; i < njobs; i++) {
+        int assoc = rand () % NUM_ASSOCIATIONS;
+
+        jobs[i].userid = 50000 + assoc / BANKS_PER_USER;
+        jobs[i].bank = bank_name (assoc);
+        jobs[i].job.id = i + 1;
+        jobs[i].job.nnodes = 1 + rand () % 4;
+        jobs[i].job.ncores = jobs[i].job.nnodes * 4;
+        jobs[i].job.queue = queue_name (assoc
+                                        + rand () % QUEUES_PER_ASSOCIATION);
+    }
+
+    return jobs;
+}
+
+
+// job.new: look up the association and validate the job's queue and bank
+static int bench_new (BenchJob &j)
+{
+    Association *b = get_association (j.userid,
+                                      j.bank.c_str (),
+                                      users,
+                                      users_def_bank);
+    if (b == nullptr)
+        return -1;
+
+    b->queue_factor = get_queue_info (const_cast<char *> (
+                                          j.job.queue.c_str ()),
+                                      b->queues,
+                                      queues);
+    b->bank_factor = get_bank_priority (b->bank_name.c_str (), banks);
+    if (b->max_active_jobs > 0 && b->cur_active_jobs >= b->max_active_jobs)
+        return -1;
+
+    b->cur_active_jobs++;
+    j.a = b;
+
+    return 0;
+}
+
+
+// job.state.depend: check every limit that could hold the job
+static int bench_depend (BenchJob &j)
+{
+    Association *b = j.a;
+    const std::string &queue = j.job.queue;
+    int deps = 0;
+
+    deps += !b->under_queue_max_run_jobs (queue, queues);
+    deps += !b->under_queue_max_sched_jobs (queue, queues);
+    deps += !b->under_queue_max_sched_nodes (j.job, queue, queues);
+    deps += !b->under_queue_max_sched_cores (j.job, queue, queues);
+    deps += !b->under_queue_max_resources (j.job, queue, queues);
+    deps += !b->under_max_run_jobs ();
+    deps += !b->under_max_sched_jobs ();
+    deps += !b->under_max_resources (j.job);
+
+    return deps;
+}
+
+
+// job.state.run: move the job's usage from SCHED to RUN
+static void bench_run (BenchJob &j)
+{
+    Association *b = j.a;
+    QueueUsage &usage = b->queue_usage[j.job.queue];
+
+    b->pending_jobs.erase (j.job.id);
+    usage.cur_run_jobs++;
+    b->cur_run_jobs++;
+    b->cur_nodes += j.job.nnodes;
+    b->cur_cores += j.job.ncores;
+    usage.cur_nodes += j.job.nnodes;
+    b->cur_sched_jobs--;
+    usage.cur_sched_jobs--;
+    usage.cur_sched_nodes -= j.job.nnodes;
+    usage.cur_sched_cores -= j.job.ncores;
+}
+
+
+// job.state.inactive: release the usage of a job that ran
+static void bench_inactive (BenchJob &j)
+{
+    Association *b = j.a;
+    QueueUsage &usage = b->queue_usage[j.job.queue];
+
+    b->pending_jobs.erase (j.job.id);
+    b->cur_active_jobs--;
+    b->cur_run_jobs--;
+    b->cur_nodes -= j.job.nnodes;
+    b->cur_cores -= j.job.ncores;
+    usage.cur_nodes -= j.job.nnodes;
+}
+
+
+static void report (const char *callback,
+                    int njobs,
+                    std::chrono::steady_clock::time_point start)
+{
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now ()
+                                            - start;
+
+    printf ("%-20s %14.0f callbacks/s\n", callback, njobs / elapsed.count ());
+}
+
+
+int main (int argc, char* argv[])
+{
+    int njobs = DEFAULT_NUM_JOBS;
+    int deps = 0;
+
+    if (argc > 1 && (njobs = atoi (argv[1])) <= 0) {
+        fprintf (stderr, "usage: %s [NJOBS]\n", argv[0]);
+        return 1;
+    }
+
+    initialize_maps ();
+    std::vector<BenchJob> jobs = create_jobs (njobs);
+    printf ("%d associations, %d queues, %d jobs\n",
+            NUM_ASSOCIATIONS, NUM_QUEUES, njobs);
+
+    auto start = std::chrono::steady_clock::now ();
+    for (auto &j : jobs) {
+        if (bench_new (j) < 0) {
+            fprintf (stderr, "job.new: job %ju rejected\n",
+                     (uintmax_t) j.job.id);
+            return 1;
+        }
+    }
+    report ("job.new", njobs, start);
+
+    start = std::chrono::steady_clock::now ();
+    for (auto &j : jobs)
+        deps += bench_depend (j);
+    report ("job.state.depend", njobs, start);
+
+    // job.priority records each job as pending until it runs
+    for (auto &j : jobs)
+        j.a->pending_jobs[j.job.id] = PendingJob ();
+
+    start = std::chrono::steady_clock::now ();
+    for (auto &j : jobs)
+        bench_run (j);
+    report ("job.state.run", njobs, start);
+
+    start = std::chrono::steady_clock::now ();
+    for (auto &j : jobs)
+        bench_inactive (j);
+    report ("job.state.inactive", njobs, start);
+
+    if (deps > 0) {
+        fprintf (stderr, "job.state.depend: %d dependencies added\n", deps);
+        return 1;
+    }
+
+    return 0;
+}
@@ -25,17 +25,16 @@ extern "C" {
 #include "src/common/libtap/tap.h"
 
 // define a test users map to run tests on
-std::map<int, std::map<std::string, Association>> users;
+UsersMap users;
 // define a test queues map
-std::map<std::string, Queue> queues;
+std::unordered_map<std::string, Queue> queues;
 bool deny_unknown_queues = false;
 
 
 /*
  * add an association
  */
-void initialize_map (
-    std::map<int, std::map<std::string, Association>> &users)
+void initialize_map (UsersMap &users)
 {
     Association user1 {};
     user1.bank_name = "bank_A";
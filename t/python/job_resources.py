@@ -0,0 +1,28 @@
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import json
+
+
+# build the R of a job that ran on nnodes nodes with 4 cores and ngpus GPUs each
+def make_r_spec(nnodes, ngpus=0):
+    children = {"core": "0-3"}
+    if ngpus > 0:
+        children["gpu"] = "0" if ngpus == 1 else f"0-{ngpus - 1}"
+    return json.dumps(
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": f"0-{nnodes - 1}", "children": children}],
+                "starttime": 0,
+                "expiration": 0,
+                "nodelist": [f"fluke[0-{nnodes - 1}]"],
+            },
+        }
+    )
@@ -64,6 +64,11 @@ class TestDB(unittest.TestCase):
             "priority_factor_weight_table",
             "config_table",
             "job_usage_per_association_table",
+            "job_records_checkpoint_table",
+            "usage_rollup_table",
+            "usage_rollup_checkpoint_table",
+            "priority_push_table",
+            "fshare_cache_table",
         ]
         self.assertEqual(list_of_tables, expected)
 
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import shutil
+import sqlite3
+import time
+import json
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import job_usage_calculation as jobs
+
+from job_resources import make_r_spec
+
+
+# every table that update_job_usage() writes to
+TABLES = {
+    "association_table": "username, bank",
+    "bank_table": "bank",
+    "job_usage_factor_table": "username, bank",
+    "job_usage_per_association_table": "username, bank, period",
+    "t_half_life_period_table": "cluster",
+}
+
+
+class TestBulkJobUsage(unittest.TestCase):
+    @staticmethod
+    def insert_job(conn, job_id, userid, bank, t_run, t_inactive, nnodes=1):
+        jobspec = json.dumps({"attributes": {"system": {"bank": bank}}})
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                userid,
+                t_run,
+                t_run,
+                t_inactive,
+                "0",
+                make_r_spec(nnodes),
+                jobspec,
+                bank,
+            ),
+        )
+        conn.commit()
+
+    def insert_jobs(self, job_id, t_run):
+        # insert the same job into both databases; job durations are deliberately
+        # not round numbers so that any difference in summation order shows up
+        for conn in (conn_loop, conn_bulk):
+            self.insert_job(conn, job_id, 50001, "A", t_run, t_run + 100.123, 2)
+            self.insert_job(conn, job_id + 1, 50002, "A", t_run, t_run + 33.337, 1)
+            self.insert_job(conn, job_id + 2, 50002, "B", t_run, t_run + 71.771, 3)
+            self.insert_job(conn, job_id + 3, 50004, "C", t_run, t_run + 9.99, 1)
+
+    def assert_same_tables(self):
+        for table, order in TABLES.items():
+            select_stmt = f"SELECT * FROM {table} ORDER BY {order}"
+            rows_loop = [tuple(row) for row in conn_loop.execute(select_stmt)]
+            rows_bulk = [tuple(row) for row in conn_bulk.execute(select_stmt)]
+            # compare with == instead of assertAlmostEqual; both engines must
+            # produce bit-identical values
+            self.assertEqual(rows_loop, rows_bulk, f"{table} differs")
+
+    @classmethod
+    @mock.patch("time.time", mock.MagicMock(return_value=0))
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        self.bulk_dbname = "bulk_" + self.dbname
+        c.create_db(
+            self.dbname,
+            priority_decay_half_life="15m",
+            priority_usage_reset_period="1h",
+        )
+        global conn_loop
+        global conn_bulk
+
+        conn_loop = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn_loop, "root", 1)
+        b.add_bank(conn_loop, "A", 1, "root")
+        b.add_bank(conn_loop, "B", 1, "root")
+        b.add_bank(conn_loop, "C", 1, "root")
+        u.add_user(conn_loop, username="user1", bank="A", uid=50001)
+        u.add_user(conn_loop, username="user2", bank="A", uid=50002)
+        u.add_user(conn_loop, username="user2", bank="B", uid=50002)
+        u.add_user(conn_loop, username="user3", bank="B", uid=50003)
+        u.add_user(conn_loop, username="user4", bank="C", uid=50004)
+        # give one association period rows whose userid no longer matches the
+        # association; the per-association path only decays rows whose userid
+        # matches, so the bulk engine needs to do the same
+        conn_loop.execute(
+            "UPDATE job_usage_per_association_table SET userid=60004 "
+            "WHERE username='user4' AND period=2"
+        )
+        conn_loop.commit()
+
+        shutil.copyfile(self.dbname, self.bulk_dbname)
+        conn_bulk = sqlite3.connect(self.bulk_dbname, timeout=60)
+
+    # new jobs in the current half-life period
+    @mock.patch("time.time", mock.MagicMock(return_value=200))
+    def test_01_new_jobs_current_period(self):
+        self.insert_jobs(100, 10)
+        jobs.update_job_usage(conn_loop)
+        jobs.update_job_usage(conn_bulk, bulk=True)
+        self.assert_same_tables()
+
+    # more new jobs in the same half-life period get added to period 0
+    @mock.patch("time.time", mock.MagicMock(return_value=700))
+    def test_02_more_jobs_current_period(self):
+        self.insert_jobs(200, 500)
+        jobs.update_job_usage(conn_loop)
+        jobs.update_job_usage(conn_bulk, bulk=True)
+        self.assert_same_tables()
+
+    # new jobs in a new half-life period; past usage gets decayed
+    @mock.patch("time.time", mock.MagicMock(return_value=1900))
+    def test_03_new_jobs_new_period(self):
+        self.insert_jobs(300, 1700)
+        jobs.update_job_usage(conn_loop)
+        jobs.update_job_usage(conn_bulk, bulk=True)
+        self.assert_same_tables()
+
+    # no new jobs in a new half-life period; past usage gets decayed
+    @mock.patch("time.time", mock.MagicMock(return_value=3900))
+    def test_04_no_jobs_new_period(self):
+        jobs.update_job_usage(conn_loop)
+        jobs.update_job_usage(conn_bulk, bulk=True)
+        self.assert_same_tables()
+
+    # usage eventually decays through every period
+    def test_05_decay_through_all_periods(self):
+        for now in (5000, 6000, 7000, 8000, 9000):
+            with mock.patch("time.time", mock.MagicMock(return_value=now)):
+                jobs.update_job_usage(conn_loop)
+                jobs.update_job_usage(conn_bulk, bulk=True)
+            self.assert_same_tables()
+
+    # sql_sum() agrees with SQLite's SUM() aggregate
+    def test_06_sql_sum(self):
+        values = [0.1, 1e16, 0.3, -1e16, 123.45678, 1 / 3]
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (id integer PRIMARY KEY, value real)")
+        conn.executemany("INSERT INTO t (value) VALUES (?)", [(v,) for v in values])
+        expected = conn.execute("SELECT SUM(value) FROM t ORDER BY id").fetchone()[0]
+        self.assertEqual(jobs.sql_sum(values), expected)
+        self.assertIsNone(jobs.sql_sum([]))
+
+    @classmethod
+    def tearDownClass(self):
+        conn_loop.close()
+        conn_bulk.close()
+        os.remove(self.dbname)
+        os.remove(self.bulk_dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
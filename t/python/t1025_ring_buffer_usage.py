@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import shutil
+import sqlite3
+import time
+import json
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import db_info_subcommands as d
+from fluxacct.accounting import job_usage_calculation as jobs
+
+from job_resources import make_r_spec
+
+
+USERS = ["user1", "user2", "user3", "user4", "user5"]
+
+
+class TestRingBufferUsage(unittest.TestCase):
+    # the decay factor applied to each usage period
+    DECAY_FACTOR = 0.5
+
+    @staticmethod
+    def insert_job(conn, job_id, userid, bank, t_run, t_inactive, nnodes=1):
+        jobspec = json.dumps({"attributes": {"system": {"bank": bank}}})
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                userid,
+                t_run,
+                t_run,
+                t_inactive,
+                "0",
+                make_r_spec(nnodes),
+                jobspec,
+                bank,
+            ),
+        )
+        conn.commit()
+
+    def insert_jobs(self, job_id, t_run):
+        for conn in self.conns():
+            self.insert_job(conn, job_id, 50001, "A", t_run, t_run + 100.123, 2)
+            self.insert_job(conn, job_id + 1, 50002, "A", t_run, t_run + 33.337, 1)
+            self.insert_job(conn, job_id + 2, 50002, "B", t_run, t_run + 71.771, 3)
+            self.insert_job(conn, job_id + 3, 50004, "C", t_run, t_run + 9.99, 1)
+            self.insert_job(conn, job_id + 4, 50005, "C", t_run, t_run + 500.5, 4)
+
+    @staticmethod
+    def conns():
+        return [conn for conn in (conn_shift, conn_ring, conn_migrated) if conn]
+
+    @staticmethod
+    def periods(conn, user):
+        try:
+            rows = json.loads(u.view_user(conn, user, job_usage=True))
+        except ValueError:
+            return {}
+        return {(row["bank"], row["period"]): row["value"] for row in rows}
+
+    def update_and_compare(self):
+        for conn in self.conns():
+            jobs.update_job_usage(conn)
+        expected_usage = [
+            tuple(row)
+            for row in conn_shift.execute(
+                "SELECT username, bank, job_usage FROM association_table "
+                "ORDER BY username, bank"
+            )
+        ]
+        expected_bank_usage = [
+            tuple(row)
+            for row in conn_shift.execute(
+                "SELECT bank, job_usage FROM bank_table ORDER BY bank"
+            )
+        ]
+        for conn in self.conns()[1:]:
+            # both layouts must produce bit-identical usage
+            usage = [
+                tuple(row)
+                for row in conn.execute(
+                    "SELECT username, bank, job_usage FROM association_table "
+                    "ORDER BY username, bank"
+                )
+            ]
+            bank_usage = [
+                tuple(row)
+                for row in conn.execute(
+                    "SELECT bank, job_usage FROM bank_table ORDER BY bank"
+                )
+            ]
+            self.assertEqual(usage, expected_usage)
+            self.assertEqual(bank_usage, expected_bank_usage)
+            # the lazily decayed periods match the periods shifted in place; a
+            # period whose slot has aged out of the ring holds no usage
+            for user in USERS:
+                expected = self.periods(conn_shift, user)
+                periods = self.periods(conn, user)
+                self.assertTrue(set(periods).issubset(expected))
+                for key, value in expected.items():
+                    self.assertEqual(periods.get(key, 0.0), value)
+
+    @classmethod
+    @mock.patch("time.time", mock.MagicMock(return_value=0))
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        self.ring_dbname = "ring_" + self.dbname
+        self.migrated_dbname = "migrated_" + self.dbname
+        c.create_db(
+            self.dbname,
+            priority_decay_half_life="15m",
+            priority_usage_reset_period="1h",
+            decay_factor=self.DECAY_FACTOR,
+        )
+        global conn_shift
+        global conn_ring
+        global conn_migrated
+
+        conn_shift = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn_shift, "root", 1)
+        b.add_bank(conn_shift, "A", 1, "root")
+        b.add_bank(conn_shift, "B", 1, "root")
+        b.add_bank(conn_shift, "C", 1, "root")
+        u.add_user(conn_shift, username="user1", bank="A", uid=50001)
+        u.add_user(conn_shift, username="user2", bank="A", uid=50002)
+        u.add_user(conn_shift, username="user2", bank="B", uid=50002)
+        u.add_user(conn_shift, username="user3", bank="B", uid=50003)
+        u.add_user(conn_shift, username="user4", bank="C", uid=50004)
+
+        shutil.copyfile(self.dbname, self.ring_dbname)
+        conn_ring = sqlite3.connect(self.ring_dbname, timeout=60)
+        jobs.convert_to_ring_buffer(conn_ring)
+        conn_ring.commit()
+        # converted once usage has accumulated in test_03
+        conn_migrated = None
+
+    # new jobs in the current half-life period
+    @mock.patch("time.time", mock.MagicMock(return_value=200))
+    def test_01_new_jobs_current_period(self):
+        self.insert_jobs(100, 10)
+        self.update_and_compare()
+
+    # more new jobs in the same half-life period get added to the current period
+    @mock.patch("time.time", mock.MagicMock(return_value=700))
+    def test_02_more_jobs_current_period(self):
+        self.insert_jobs(200, 500)
+        self.update_and_compare()
+
+    # a DB with existing usage can be converted to a ring buffer
+    def test_03_convert_existing_usage(self):
+        global conn_migrated
+        shutil.copyfile(self.dbname, self.migrated_dbname)
+        conn_migrated = sqlite3.connect(self.migrated_dbname, timeout=60)
+        self.assertEqual(jobs.convert_to_ring_buffer(conn_migrated), 20)
+        conn_migrated.commit()
+        # converting a second time does nothing
+        self.assertEqual(jobs.convert_to_ring_buffer(conn_migrated), 0)
+        for user in USERS:
+            self.assertEqual(
+                self.periods(conn_migrated, user), self.periods(conn_shift, user)
+            )
+
+    # new jobs after a half-life boundary; some of them completed before the
+    # boundary and are added to the current period without decaying past usage
+    @mock.patch("time.time", mock.MagicMock(return_value=1900))
+    def test_04_new_jobs_new_period(self):
+        self.insert_jobs(300, 1700)
+        self.update_and_compare()
+        epoch = conn_ring.execute("SELECT epoch FROM t_half_life_period_table")
+        self.assertEqual(epoch.fetchone()[0], 1)
+
+    # no new jobs in a new half-life period; past usage gets decayed
+    @mock.patch("time.time", mock.MagicMock(return_value=3900))
+    def test_05_no_jobs_new_period(self):
+        select_stmt = "SELECT * FROM job_usage_per_association_table ORDER BY rowid"
+        rows = conn_ring.execute(select_stmt).fetchall()
+        self.update_and_compare()
+        # a half-life boundary does not rewrite any period rows in a ring buffer
+        self.assertEqual(conn_ring.execute(select_stmt).fetchall(), rows)
+
+    # an association added later gets slots for the epochs before it; some of the
+    # new jobs completed before the last half-life boundary
+    @mock.patch("time.time", mock.MagicMock(return_value=4400))
+    def test_06_add_association(self):
+        for conn in self.conns():
+            u.add_user(conn, username="user5", bank="C", uid=50005)
+        self.insert_jobs(400, 3500)
+        self.update_and_compare()
+
+    # usage eventually decays through every period
+    def test_07_decay_through_all_periods(self):
+        for now in (5000, 6000, 7000, 8000, 9000):
+            with mock.patch("time.time", mock.MagicMock(return_value=now)):
+                self.update_and_compare()
+        usage = conn_ring.execute("SELECT SUM(job_usage) FROM association_table")
+        self.assertEqual(usage.fetchone()[0], 0.0)
+
+    # the layout of the usage periods can't be changed by editing config_table
+    def test_08_layout_is_protected(self):
+        with self.assertRaises(ValueError):
+            d.edit_config(conn_ring, ["usage_period_layout=shift"])
+        with self.assertRaises(ValueError):
+            d.delete_config(conn_ring, "usage_period_layout")
+
+    @classmethod
+    def tearDownClass(self):
+        for conn in self.conns():
+            conn.close()
+        os.remove(self.dbname)
+        os.remove(self.ring_dbname)
+        os.remove(self.migrated_dbname)
+
+
+# both layouts give bit-identical usage for a decay factor that is not a power of
+# two, which is only the case if it is applied once per period
+class TestRingBufferUsageDecayFactor(TestRingBufferUsage):
+    DECAY_FACTOR = 0.3
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
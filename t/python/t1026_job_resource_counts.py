@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+import json
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+
+from job_resources import make_r_spec
+
+# a job that ran on two nodes with 4 cores and one GPU each
+R_SPEC = make_r_spec(2, ngpus=1)
+
+
+class TestJobResourceCounts(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=50001)
+
+    @staticmethod
+    def insert_job(job_id, r_spec, counts=(None, None, None), t_inactive=100):
+        jobspec = json.dumps({"attributes": {"system": {"bank": "A"}}})
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank, "
+            "nnodes, ncores, ngpus) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, 50001, 0, 0, t_inactive, "0", r_spec, jobspec, "A", *counts),
+        )
+        conn.commit()
+
+    # the resources of a job are counted from R
+    def test_01_count_resources(self):
+        self.assertEqual(j.count_resources(R_SPEC), (2, 8, 2))
+
+    # R that can't be converted to a ResourceSet has no resource counts
+    def test_02_count_resources_bad_R(self):
+        self.assertIsNone(j.count_resources("foo"))
+        self.assertIsNone(j.count_resources(None))
+
+    # stored resource counts are used without converting R to a ResourceSet
+    def test_03_stored_counts(self):
+        self.insert_job(1, R_SPEC, j.count_resources(R_SPEC))
+        with mock.patch(
+            "fluxacct.accounting.jobs_table_subcommands.ResourceSet",
+            side_effect=ValueError,
+        ):
+            job_records = j.convert_to_obj(j.get_jobs(conn, jobid=1))
+        self.assertEqual(len(job_records), 1)
+        self.assertEqual(job_records[0].nnodes, 2)
+        self.assertEqual(job_records[0].ncores, 8)
+        self.assertEqual(job_records[0].ngpus, 2)
+
+    # job records inserted before resource counts were stored fall back to R
+    def test_04_legacy_job_record(self):
+        self.insert_job(2, R_SPEC)
+        job_records = j.convert_to_obj(j.get_jobs(conn, jobid=2))
+        self.assertEqual(len(job_records), 1)
+        self.assertEqual(job_records[0].nnodes, 2)
+        self.assertEqual(job_records[0].ncores, 8)
+        self.assertEqual(job_records[0].ngpus, 2)
+
+    # legacy job records with an R that can't be parsed are skipped
+    def test_05_legacy_job_record_bad_R(self):
+        self.insert_job(3, "foo")
+        self.assertEqual(j.convert_to_obj(j.get_jobs(conn, jobid=3)), [])
+
+    # rows from queries that don't select the resource counts still work
+    def test_06_rows_without_counts(self):
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        rows = cur.execute(
+            "SELECT userid, id, t_submit, t_run, t_inactive, R, project, bank, "
+            "requested_duration, actual_duration FROM jobs WHERE id=1"
+        ).fetchall()
+        job_records = j.convert_to_obj(rows)
+        self.assertEqual(len(job_records), 1)
+        self.assertEqual(job_records[0].nnodes, 2)
+
+    # job usage is the same whether the resource counts are stored or not
+    @mock.patch("time.time", mock.MagicMock(return_value=604800))
+    def test_07_job_usage(self):
+        jobs.update_job_usage(conn)
+        stored_usage = conn.execute(
+            "SELECT job_usage FROM association_table WHERE username='user1'"
+        ).fetchone()[0]
+        self.assertEqual(stored_usage, 400.0)
+
+        conn.execute("UPDATE jobs SET nnodes=NULL, ncores=NULL, ngpus=NULL")
+        conn.execute("UPDATE job_usage_per_association_table SET value=0.0")
+        conn.execute("UPDATE job_usage_factor_table SET last_job_timestamp=0")
+        conn.commit()
+        jobs.update_job_usage(conn)
+        legacy_usage = conn.execute(
+            "SELECT job_usage FROM association_table WHERE username='user1'"
+        ).fetchone()[0]
+        self.assertEqual(legacy_usage, stored_usage)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+import json
+
+import fluxacct.accounting
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import db_info_subcommands as d
+
+
+class TestJobsIndexes(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+
+    @staticmethod
+    def index_names():
+        return {row[1] for row in conn.execute("PRAGMA index_list(jobs)")}
+
+    # create_db() creates every index on the jobs table
+    def test_01_indexes_created(self):
+        self.assertTrue(
+            set(fluxacct.accounting.JOBS_INDEXES).issubset(self.index_names())
+        )
+
+    # every query on the jobs table uses an index instead of scanning the table
+    def test_02_queries_use_indexes(self):
+        plans = json.loads(d.view_jobs_indexes(conn, json_fmt=True))["queries"]
+        self.assertEqual(set(plans), set(d.JOBS_QUERIES))
+        for query, plan in plans.items():
+            jobs_steps = [step for step in plan if step.split()[1] in ("jobs", "r")]
+            self.assertTrue(jobs_steps, query)
+            for step in jobs_steps:
+                self.assertIn("INDEX idx_jobs_", step, query)
+
+    # job usage is looked up by association and the time a job completed
+    def test_03_update_usage_plan(self):
+        plans = json.loads(d.view_jobs_indexes(conn, json_fmt=True))["queries"]
+        self.assertIn(
+            "SEARCH r USING INDEX idx_jobs_userid_bank_t_inactive "
+            "(userid=? AND bank=? AND t_inactive>?)",
+            plans["update-usage"],
+        )
+
+    # a missing index is reported as missing and gets recreated by a rebuild
+    def test_04_rebuild_missing_index(self):
+        conn.execute("DROP INDEX idx_jobs_t_run")
+        indexes = json.loads(d.view_jobs_indexes(conn, json_fmt=True))["indexes"]
+        missing = [index["name"] for index in indexes if not index["exists"]]
+        self.assertEqual(missing, ["idx_jobs_t_run"])
+        self.assertIn("idx_jobs_t_run (t_run) [missing]", d.view_jobs_indexes(conn))
+
+        d.rebuild_jobs_indexes(conn)
+        self.assertIn("idx_jobs_t_run", self.index_names())
+        self.assertNotIn("[missing]", d.view_jobs_indexes(conn))
+
+    # ANALYZE stores statistics about the indexes on the jobs table
+    def test_05_analyze(self):
+        d.analyze_jobs_table(conn)
+        tables = [
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        ]
+        self.assertIn("sqlite_stat1", tables)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
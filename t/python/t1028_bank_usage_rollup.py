@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import random
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import job_usage_calculation as jobs
+
+
+class TestBankUsageRollup(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+        global cur
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        # a hierarchy with leaf banks at different depths:
+        #
+        # root
+        #  ├── A
+        #  │   ├── A1 (user1, user2)
+        #  │   └── A2
+        #  │       └── A2a (user3)
+        #  ├── B (user1, user4)
+        #  └── C
+        #      └── C1 (no associations)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        b.add_bank(conn, "B", 1, "root")
+        b.add_bank(conn, "C", 1, "root")
+        b.add_bank(conn, "A1", 1, "A")
+        b.add_bank(conn, "A2", 1, "A")
+        b.add_bank(conn, "C1", 1, "C")
+        b.add_bank(conn, "A2a", 1, "A2")
+        u.add_user(conn, username="user1", bank="A1", uid=50001)
+        u.add_user(conn, username="user2", bank="A1", uid=50002)
+        u.add_user(conn, username="user3", bank="A2a", uid=50003)
+        u.add_user(conn, username="user1", bank="B", uid=50001)
+        u.add_user(conn, username="user4", bank="B", uid=50004)
+
+    @staticmethod
+    def set_association_usage(usage):
+        for (username, bank), job_usage in usage.items():
+            cur.execute(
+                "UPDATE association_table SET job_usage=? WHERE username=? AND bank=?",
+                (job_usage, username, bank),
+            )
+        conn.commit()
+
+    @staticmethod
+    def bank_usage():
+        cur.execute("SELECT bank, job_usage FROM bank_table")
+        return {row["bank"]: row["job_usage"] for row in cur.fetchall()}
+
+    @staticmethod
+    def expected_bank_usage(bank="root"):
+        # walk down the hierarchy one bank at a time and add up usage in the order
+        # the rows are stored in
+        cur.execute("SELECT bank FROM bank_table WHERE parent_bank=?", (bank,))
+        sub_banks = [row[0] for row in cur.fetchall()]
+        usage = {}
+        total_usage = 0.0
+        if sub_banks:
+            for sub_bank in sub_banks:
+                usage.update(TestBankUsageRollup.expected_bank_usage(sub_bank))
+                total_usage += usage[sub_bank]
+        else:
+            cur.execute("SELECT job_usage FROM association_table WHERE bank=?", (bank,))
+            for row in cur.fetchall():
+                total_usage += row[0]
+        usage[bank] = total_usage
+        return usage
+
+    # every bank gets the total usage of the hierarchy beneath it
+    def test_01_rollup(self):
+        self.set_association_usage(
+            {
+                ("user1", "A1"): 100.0,
+                ("user2", "A1"): 25.5,
+                ("user3", "A2a"): 10.0,
+                ("user1", "B"): 3.0,
+                ("user4", "B"): 4.0,
+            }
+        )
+        jobs.rollup_bank_usage(cur)
+        conn.commit()
+        self.assertEqual(
+            self.bank_usage(),
+            {
+                "root": 142.5,
+                "A": 135.5,
+                "A1": 125.5,
+                "A2": 10.0,
+                "A2a": 10.0,
+                "B": 7.0,
+                "C": 0.0,
+                "C1": 0.0,
+            },
+        )
+
+    # totals are bit-identical to adding up usage one bank at a time
+    def test_02_rollup_order(self):
+        random.seed(0)
+        for _ in range(10):
+            self.set_association_usage(
+                {
+                    (username, bank): random.uniform(0, 1e6) / 3
+                    for username, bank in cur.execute(
+                        "SELECT username, bank FROM association_table"
+                    ).fetchall()
+                }
+            )
+            jobs.rollup_bank_usage(cur)
+            conn.commit()
+            self.assertEqual(self.bank_usage(), self.expected_bank_usage())
+
+    # the rollup loads the hierarchy and usage in two queries and writes every
+    # bank in one statement
+    def test_03_rollup_statements(self):
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            jobs.rollup_bank_usage(cur)
+        finally:
+            conn.set_trace_callback(None)
+        conn.commit()
+        selects = [stmt for stmt in statements if stmt.startswith("SELECT")]
+        updates = [stmt for stmt in statements if stmt.startswith("UPDATE")]
+        self.assertEqual(len(selects), 2)
+        self.assertEqual(len(updates), len(self.bank_usage()))
+
+    # clearing the usage of a bank updates the usage of its parent banks
+    def test_04_clear_usage(self):
+        self.set_association_usage(
+            {
+                ("user1", "A1"): 100.0,
+                ("user2", "A1"): 25.5,
+                ("user3", "A2a"): 10.0,
+                ("user1", "B"): 3.0,
+                ("user4", "B"): 4.0,
+            }
+        )
+        jobs.rollup_bank_usage(cur)
+        conn.commit()
+        jobs.clear_usage(conn, ["A1"])
+        usage = self.bank_usage()
+        self.assertEqual(usage["A1"], 0.0)
+        self.assertEqual(usage["A"], 10.0)
+        self.assertEqual(usage["root"], 17.0)
+
+    # deleting a bank updates the usage of the rest of the hierarchy
+    def test_05_delete_bank(self):
+        b.delete_bank(conn, "B", force=True)
+        usage = self.bank_usage()
+        self.assertNotIn("B", usage)
+        self.assertEqual(usage["root"], 10.0)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import random
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+
+from job_resources import make_r_spec
+
+START = 1000000
+END = 2000000
+
+
+def reference_report(
+    conn, start, end, user=None, bank=None, report_type=None, job_size_bins=None
+):
+    # build the report from the job records listed by view_jobs()
+    sizebins = [0]
+    if job_size_bins:
+        if job_size_bins[0].isdigit():
+            sizebins = [int(sz) for sz in job_size_bins.split(",")]
+        else:
+            sizebins = [0, 2, 8, 32, 128, 512, 2048, 8192]
+    data = {}
+    total = {}
+    ktotal = {}
+    result = j.view_jobs(
+        conn,
+        fields="{username} {bank} {nnodes} {t_run} {t_inactive}",
+        before_end_time=end,
+        user=user,
+        bank=bank,
+    )
+    for line in result.split("\n")[1:]:
+        if not line or not line[0].isalnum() or len(line.split()) < 5:
+            continue
+        username, job_bank, nnodes, t_run, t_inactive = line.split()
+        nnodes, t_run, t_inactive = int(nnodes), float(t_run), float(t_inactive)
+        if t_inactive < start or t_inactive > end:
+            continue
+        key = jobs.get_key(f"{job_bank}:{username}", report_type, username, job_bank)
+        if key:
+            jobusage = nnodes * (t_inactive - t_run)
+            ktotal[key] = ktotal.get(key, 0) + jobusage
+            for sizebin in reversed(sizebins):
+                if nnodes >= sizebin:
+                    data.setdefault(key, {})
+                    data[key][sizebin] = data[key].get(sizebin, 0) + jobusage
+                    total[sizebin] = total.get(sizebin, 0) + jobusage
+                    break
+    report = jobs.format_header(report_type, None, sizebins)
+    for key in sorted(ktotal.keys(), key=lambda k: ktotal[k], reverse=True):
+        report += jobs.format_line(key, data[key], None, sizebins)
+    return report + jobs.format_line("TOTAL", total, None, sizebins)
+
+
+class TestUsageReport(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "C", 1, "root")
+        u.add_user(conn, username="user3", bank="C", uid=50003)
+
+    @staticmethod
+    def insert_job(job_id, userid, bank, t_run, t_inactive, nnodes, stored=True):
+        r_spec = make_r_spec(nnodes) if nnodes else "foo"
+        counts = (nnodes, 4 * nnodes, 0) if stored else (None, None, None)
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank, "
+            "nnodes, ncores, ngpus) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                userid,
+                t_run,
+                t_run,
+                t_inactive,
+                "0",
+                r_spec,
+                "{}",
+                bank,
+                *counts,
+            ),
+        )
+        conn.commit()
+
+    # the report adds up node-seconds per association for jobs that completed in
+    # the time range
+    def test_01_association_report(self):
+        self.insert_job(1, 50001, "A", START + 100, START + 200, 2)
+        self.insert_job(2, 50001, "A", START + 100, START + 110, 1, stored=False)
+        self.insert_job(3, 50002, "B", START + 100, START + 400, 1)
+        # completed before the start of the report
+        self.insert_job(4, 50002, "B", START - 500, START - 100, 1)
+        # R can't be parsed and no resource counts are stored
+        self.insert_job(5, 50002, "B", START + 100, START + 200, 0, stored=False)
+        # no bank
+        self.insert_job(6, 50002, None, START + 100, START + 200, 1)
+        report = jobs.view_usage_report(conn, START, END)
+        self.assertEqual(
+            report,
+            "association(nodesec)              total\n"
+            "B:50002                          300.00\n"
+            "A:50001                          210.00\n"
+            "TOTAL                            510.00\n",
+        )
+
+    # reports are identical to ones built from the formatted job records
+    def test_02_same_as_job_records(self):
+        random.seed(0)
+        for job_id in range(100, 400):
+            t_run = random.uniform(START - 1000000, END)
+            self.insert_job(
+                job_id,
+                random.choice([50001, 50002, 50003, 50004]),
+                random.choice(["A", "B", "C"]),
+                t_run,
+                t_run + random.uniform(0, 100000),
+                random.choice([1, 2, 3, 9, 40, 600]),
+                stored=random.random() < 0.5,
+            )
+        for report_type in (None, "byuser", "bybank"):
+            for job_size_bins in (None, "1,4,16", "default"):
+                for user, bank in ((None, None), ("user3", None), (None, "C")):
+                    self.assertEqual(
+                        jobs.view_usage_report(
+                            conn,
+                            START,
+                            END,
+                            user=user,
+                            bank=bank,
+                            report_type=report_type,
+                            job_size_bins=job_size_bins,
+                        ),
+                        reference_report(
+                            conn,
+                            START,
+                            END,
+                            user=user,
+                            bank=bank,
+                            report_type=report_type,
+                            job_size_bins=job_size_bins,
+                        ),
+                    )
+
+    # usernames are looked up once per user, not once per job
+    def test_03_username_lookups(self):
+        with mock.patch(
+            "fluxacct.accounting.util.get_username", side_effect=str
+        ) as get_username:
+            jobs.view_usage_report(conn, START, END)
+        self.assertEqual(get_username.call_count, 4)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
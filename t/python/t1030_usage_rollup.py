@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+from fluxacct.accounting import visuals as vis
+
+from job_resources import make_r_spec
+
+# the local midnights that start five consecutive days
+DAYS = [jobs.day_start(1767312000)]
+for _ in range(4):
+    DAYS.append(jobs.next_day_start(DAYS[-1]))
+
+
+class TestUsageRollup(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+
+    @staticmethod
+    def insert_job(job_id, userid, bank, t_inactive, elapsed, nnodes, stored=True):
+        r_spec = make_r_spec(nnodes, ngpus=1) if nnodes else "foo"
+        counts = (nnodes, 4 * nnodes, nnodes) if stored else (None, None, None)
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, project, "
+            "bank, nnodes, ncores, ngpus) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                userid,
+                t_inactive - elapsed,
+                t_inactive - elapsed,
+                t_inactive,
+                "0",
+                r_spec,
+                "{}",
+                "P1",
+                bank,
+                *counts,
+            ),
+        )
+        conn.commit()
+
+    def insert_jobs(self, job_id):
+        # jobs spread over every day, some at the edges of a day; durations are
+        # whole or half seconds so that usage adds up to the same value in any order
+        for day in DAYS[:-1]:
+            self.insert_job(job_id, 50001, "A", day, 100, 2)
+            self.insert_job(job_id + 1, 50001, "A", day + 3600, 60.5, 1, stored=False)
+            self.insert_job(job_id + 2, 50002, "B", day + 43200, 600, 4)
+            self.insert_job(job_id + 3, 50002, "B", day + 43200, 30, 0, stored=False)
+            self.insert_job(job_id + 4, 50003, "A", day + 86399.5, 1000, 16)
+            job_id += 5
+
+    @staticmethod
+    def reports(start, end):
+        return [
+            jobs.view_usage_report(
+                conn,
+                start,
+                end,
+                user=user,
+                bank=bank,
+                report_type=report_type,
+                job_size_bins=job_size_bins,
+            )
+            for report_type in (None, "byuser", "bybank")
+            for job_size_bins in (None, "1,4,16", "default")
+            for user, bank in ((None, None), ("50002", None), (None, "A"))
+        ]
+
+    @staticmethod
+    def ranges():
+        # whole days, ranges with partial days at either end, and a range with no
+        # whole days in it
+        return [
+            (DAYS[0], DAYS[-1]),
+            (DAYS[1], DAYS[3]),
+            (DAYS[0] + 1800, DAYS[3] + 50000),
+            (DAYS[1] + 3600, DAYS[2]),
+            (DAYS[2] + 60, DAYS[2] + 50000),
+        ]
+
+    # job records are added to the rollup per day, association, project, and size
+    def test_01_update_usage_rollup(self):
+        self.insert_jobs(100)
+        self.expected = {span: self.reports(*span) for span in self.ranges()}
+        type(self).expected = self.expected
+
+        cur = conn.cursor()
+        # the job whose R can't be parsed is not added
+        self.assertEqual(jobs.update_usage_rollup(cur), 16)
+        conn.commit()
+        self.assertEqual(jobs.update_usage_rollup(cur), 0)
+        rows = cur.execute(
+            "SELECT * FROM usage_rollup_table WHERE day=? ORDER BY userid, nnodes",
+            (DAYS[1],),
+        ).fetchall()
+        self.assertEqual(
+            [tuple(row) for row in rows],
+            [
+                (DAYS[1], 50001, "A", "P1", 1, 60.5, 242.0, 60.5, 1),
+                (DAYS[1], 50001, "A", "P1", 2, 200.0, 800.0, 200.0, 1),
+                (DAYS[1], 50002, "B", "P1", 4, 2400.0, 9600.0, 2400.0, 1),
+                (DAYS[1], 50003, "A", "P1", 16, 16000.0, 64000.0, 16000.0, 1),
+            ],
+        )
+
+    # reports read from the rollup are the same as ones read from job records
+    def test_02_reports_from_rollup(self):
+        for span in self.ranges():
+            with mock.patch(
+                "fluxacct.accounting.jobs_table_subcommands.count_resources",
+                wraps=j.count_resources,
+            ) as count_resources:
+                self.assertEqual(self.reports(*span), self.expected[span], span)
+            if span in ((DAYS[0], DAYS[-1]), (DAYS[1], DAYS[3])):
+                # whole days are not re-read from job records
+                count_resources.assert_not_called()
+
+    # job records that haven't been added to the rollup yet are still reported
+    def test_03_jobs_not_rolled_up(self):
+        self.insert_job(900, 50004, "C", DAYS[3] + 86399.75, 10, 1)
+        report = jobs.view_usage_report(conn, DAYS[0], DAYS[-1])
+        self.assertIn("C:50004", report)
+        jobs.update_usage_rollup(conn.cursor())
+        conn.commit()
+        self.assertEqual(jobs.view_usage_report(conn, DAYS[0], DAYS[-1]), report)
+
+    # usage is still reported after the job records are scrubbed
+    @mock.patch("time.time", mock.MagicMock(return_value=DAYS[-1] + 52 * 604800))
+    def test_04_scrub_old_jobs(self):
+        report = jobs.view_usage_report(conn, DAYS[0], DAYS[-1])
+        # this job record is added to the rollup before it gets scrubbed
+        self.insert_job(901, 50004, "C", DAYS[3] + 86399.8, 10, 1)
+        jobs.scrub_old_jobs(conn)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+        self.assertNotEqual(jobs.view_usage_report(conn, DAYS[0], DAYS[-1]), report)
+        self.assertIn(
+            "C:50004                           20.00",
+            jobs.view_usage_report(conn, DAYS[0], DAYS[-1]),
+        )
+
+    # job records inserted after the rows of the jobs table are renumbered, which
+    # VACUUM may do to a table without an INTEGER PRIMARY KEY, are rolled up
+    def test_05_insert_after_renumbering(self):
+        cur = conn.cursor()
+        self.insert_job(902, 50005, "C", DAYS[3] + 86399.85, 10, 1)
+        self.insert_job(903, 50005, "C", DAYS[3] + 86399.9, 10, 1)
+        self.assertEqual(jobs.update_usage_rollup(cur), 2)
+        conn.commit()
+        conn.execute("DELETE FROM jobs WHERE id=902")
+        conn.execute("UPDATE jobs SET rowid=1 WHERE id=903")
+        conn.commit()
+        # the new job record can get a rowid at or below one already rolled up
+        self.insert_job(904, 50005, "C", DAYS[3] + 86399.95, 10, 1)
+        self.assertEqual(jobs.update_usage_rollup(cur), 1)
+        conn.commit()
+        conn.execute("DELETE FROM jobs")
+        conn.commit()
+        self.assertIn(
+            "C:50005                           30.00",
+            jobs.view_usage_report(conn, DAYS[0], DAYS[-1]),
+        )
+
+    # job records inserted before the rollup checkpoint, such as ones copied from
+    # another job archive, are only added to the rollup when asked for
+    def test_06_add_jobs_to_usage_rollup(self):
+        cur = conn.cursor()
+        self.insert_job(905, 50006, "C", DAYS[1] + 7200, 10, 1)
+        self.insert_job(906, 50006, "C", DAYS[3] + 86399.97, 10, 1)
+        self.assertEqual(jobs.add_jobs_to_usage_rollup(cur, [905, 906]), 1)
+        self.assertEqual(jobs.update_usage_rollup(cur), 1)
+        conn.commit()
+        conn.execute("DELETE FROM jobs")
+        conn.commit()
+        self.assertIn(
+            "C:50006                           20.00",
+            jobs.view_usage_report(conn, DAYS[0], DAYS[-1]),
+        )
+
+    # the usage graph can be limited to a range of time
+    def test_07_show_usage(self):
+        graph = vis.show_usage(conn, "banks", limit=2, start=DAYS[0], end=DAYS[-1])
+        lines = graph.split("\n")
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("A "))
+        self.assertTrue(lines[1].startswith("B "))
+        graph = vis.show_usage(conn, "associations", start=DAYS[0], end=DAYS[-1])
+        self.assertIn("50005 / C", graph)
+
+    # a job is reported by when it completed, so one that started long before the
+    # range is reported the same before and after it is added to the rollup
+    def test_08_job_started_before_range(self):
+        start, end = DAYS[-1], jobs.next_day_start(DAYS[-1])
+        self.insert_job(907, 50007, "D", DAYS[-1] + 3600, 9 * 86400, 1)
+        report = jobs.view_usage_report(conn, start, end)
+        self.assertIn("D:50007                       777600.00", report)
+        self.assertEqual(jobs.update_usage_rollup(conn.cursor()), 1)
+        conn.commit()
+        self.assertEqual(jobs.view_usage_report(conn, start, end), report)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import pwd
+import sqlite3
+import time
+
+from unittest import mock
+
+from flux.constants import FLUX_USERID_UNKNOWN
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import util
+
+# a tuple-compatible struct like pwd.struct_passwd
+PASSWD = {
+    1001: pwd.struct_passwd(("user1", "x", 1001, 1001, "", "/", "/bin/sh")),
+}
+
+
+def fake_getpwuid(userid):
+    try:
+        return PASSWD[userid]
+    except KeyError:
+        raise KeyError(f"getpwuid(): uid not found: {userid}")
+
+
+def fake_getpwnam(username):
+    for entry in PASSWD.values():
+        if entry.pw_name == username:
+            return entry
+    raise KeyError(f"getpwnam(): name not found: {username}")
+
+
+@mock.patch("pwd.getpwnam", side_effect=fake_getpwnam)
+@mock.patch("pwd.getpwuid", side_effect=fake_getpwuid)
+class TestUserCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user2", bank="A", uid=50002)
+        u.add_user(conn, username="user3", bank="A", uid=50003)
+        for job_id, userid in enumerate((1001, 1001, 50002, 50002, 50003)):
+            conn.execute(
+                "INSERT INTO jobs "
+                "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank, "
+                "nnodes, ncores, ngpus) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, userid, 0, 0, 100, "0", "{}", "{}", "A", 1, 1, 0),
+            )
+        conn.commit()
+
+    def setUp(self):
+        util.clear_user_cache()
+
+    # each userid is looked up once no matter how many job records it has
+    def test_01_job_records(self, getpwuid, getpwnam):
+        job_records = j.convert_to_obj(j.get_jobs(conn))
+        self.assertEqual(
+            [job.username for job in job_records],
+            ["user1", "user1", "50002", "50002", "50003"],
+        )
+        self.assertEqual(getpwuid.call_count, 3)
+        j.convert_to_obj(j.get_jobs(conn))
+        self.assertEqual(getpwuid.call_count, 3)
+
+    # lookups of usernames that can't be found on the system are also held
+    def test_02_get_uid(self, getpwuid, getpwnam):
+        self.assertEqual(util.get_uid("user1"), 1001)
+        self.assertEqual(util.get_uid("user2"), FLUX_USERID_UNKNOWN)
+        self.assertEqual(util.get_uid("user1"), 1001)
+        self.assertEqual(util.get_uid("user2"), FLUX_USERID_UNKNOWN)
+        self.assertEqual(getpwnam.call_count, 2)
+
+    # users that can't be found on the system fall back to association_table, which
+    # is only read once for every user in it
+    def test_03_get_userid_seeded(self, getpwuid, getpwnam):
+        cur = conn.cursor()
+        with mock.patch.object(
+            j, "get_userid_from_db", wraps=j.get_userid_from_db
+        ) as get_userid_from_db:
+            self.assertEqual(j.get_userid(cur, "user1"), 1001)
+            self.assertEqual(j.get_userid(cur, "user2"), 50002)
+            self.assertEqual(j.get_userid(cur, "user3"), 50003)
+            self.assertEqual(j.get_userid(cur, "user4"), FLUX_USERID_UNKNOWN)
+            # only the user that isn't in association_table is looked up by itself
+            get_userid_from_db.assert_called_once_with(cur, "user4")
+        self.assertEqual(len(j.get_jobs(conn, user="user2")), 2)
+
+    # lookups expire after the cache's TTL
+    def test_04_ttl(self, getpwuid, getpwnam):
+        cache = util.UserCache(ttl=10)
+        with mock.patch("time.monotonic", return_value=100):
+            self.assertEqual(cache.get(("username", 1001), lambda: "user1"), "user1")
+            self.assertEqual(cache.get(("username", 1001), lambda: "other"), "user1")
+        with mock.patch("time.monotonic", return_value=110):
+            self.assertEqual(cache.get(("username", 1001), lambda: "other"), "other")
+
+    # the least recently used lookup is evicted once the cache is full
+    def test_05_maxsize(self, getpwuid, getpwnam):
+        cache = util.UserCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a", lambda: None)
+        cache.put("c", 3)
+        self.assertEqual(cache.get("a", lambda: None), 1)
+        self.assertEqual(cache.get("c", lambda: None), 3)
+        self.assertIsNone(cache.get("b", lambda: None))
+
+    # changing a userid in association_table drops the seeded userids
+    def test_06_edit_userid(self, getpwuid, getpwnam):
+        cur = conn.cursor()
+        self.assertEqual(j.get_userid(cur, "user2"), 50002)
+        u.edit_user(conn, username="user2", userid=60002)
+        self.assertEqual(j.get_userid(cur, "user2"), 60002)
+
+    # sync_userids() drops the seeded userids of only the associations it updates
+    def test_07_sync_userids(self, getpwuid, getpwnam):
+        cur = conn.cursor()
+        # the userid of user2 was changed in test_06
+        u.sync_userids(conn)
+        self.assertEqual(j.get_userid(cur, "user3"), 50003)
+        # association_table is edited outside of edit_user(), so the seeded userid
+        # is stale
+        conn.execute("UPDATE association_table SET userid=70003 WHERE username='user3'")
+        conn.commit()
+        self.assertEqual(j.get_userid(cur, "user3"), 50003)
+        u.sync_userids(conn)
+        self.assertEqual(util.user_cache.lookup_seeded("user2"), 60002)
+        self.assertEqual(util.user_cache.lookup_seeded("user3"), FLUX_USERID_UNKNOWN)
+        self.assertEqual(j.get_userid(cur, "user3"), 70003)
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+import json
+
+import fluxacct.accounting
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import db_info_subcommands as d
+
+
+class TestExportColumnar(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        b.add_bank(conn, "B", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=50001)
+        u.add_user(conn, username="user1", bank="B", uid=50001, max_running_jobs=3)
+        u.add_user(conn, username="user2", bank="B", uid=50002)
+
+    # associations are exported as a list of objects by default
+    def test_01_export_objects(self):
+        config = json.loads(d.export_as_json(conn))
+        self.assertIsInstance(config["associations"], list)
+        self.assertEqual(len(config["associations"]), 3)
+        self.assertEqual(
+            list(config["associations"][0]),
+            fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS,
+        )
+
+    # the columnar encoding holds the same associations as the list of objects
+    def test_02_export_columnar(self):
+        objects = json.loads(d.export_as_json(conn))
+        config = json.loads(d.export_as_json(conn, columnar_associations=True))
+        associations = config["associations"]
+        self.assertEqual(
+            associations["columns"], fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS
+        )
+        self.assertEqual(
+            [dict(zip(associations["columns"], row)) for row in associations["rows"]],
+            objects["associations"],
+        )
+        # the rest of the export is unchanged
+        del config["associations"]
+        del objects["associations"]
+        self.assertEqual(config, objects)
+
+    # no associations are exported as a columnar encoding with no rows
+    def test_03_columnar_no_associations(self):
+        self.assertEqual(
+            d.columnar([]),
+            {"columns": fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS, "rows": []},
+        )
+
+    # the columnar encoding is smaller than the list of objects
+    def test_04_columnar_size(self):
+        objects = d.export_as_json(conn)
+        columnar = d.export_as_json(conn, columnar_associations=True)
+        self.assertLess(len(columnar), len(objects))
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import select
+import sqlite3
+import threading
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import read_pool as rp
+
+
+class TestReadPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+        global pool
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=50001)
+        pool = rp.ReadPool(self.dbname, 2)
+
+    # submit work to the pool and wait for its completion to be delivered
+    def submit(self, func):
+        completions = []
+        pool.submit(func, lambda result, exc: completions.append((result, exc)))
+        deadline = time.monotonic() + 10
+        while not completions:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.fail("read pool work did not complete")
+            readable, _, _ = select.select([pool.notify_fd], [], [], remaining)
+            if readable:
+                pool.run_completions()
+        return completions[0]
+
+    # work is run on a read-only connection and its result is delivered
+    def test_01_read(self):
+        result, exc = self.submit(
+            lambda conn: conn.execute(
+                "SELECT username FROM association_table"
+            ).fetchall()
+        )
+        self.assertIsNone(exc)
+        self.assertEqual([row["username"] for row in result], ["user1"])
+
+    # the pool's connections can't write to the DB
+    def test_02_read_only(self):
+        result, exc = self.submit(
+            lambda conn: conn.execute("DELETE FROM association_table")
+        )
+        self.assertIsNone(result)
+        self.assertIsInstance(exc, sqlite3.OperationalError)
+        count = conn.execute("SELECT COUNT(*) FROM association_table").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    # an exception raised by the work is delivered to its callback
+    def test_03_exception(self):
+        def fail(conn):
+            raise ValueError("foo")
+
+        result, exc = self.submit(fail)
+        self.assertIsNone(result)
+        self.assertIsInstance(exc, ValueError)
+
+    # reads are not blocked by an open write transaction
+    def test_04_read_during_write(self):
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE association_table SET shares=5 WHERE username='user1'")
+        try:
+            result, exc = self.submit(
+                lambda conn: conn.execute(
+                    "SELECT shares FROM association_table"
+                ).fetchone()[0]
+            )
+        finally:
+            conn.commit()
+        self.assertIsNone(exc)
+        self.assertEqual(result, 1)
+        # once committed, the write is seen by the next read
+        result, exc = self.submit(
+            lambda conn: conn.execute(
+                "SELECT shares FROM association_table"
+            ).fetchone()[0]
+        )
+        self.assertEqual(result, 5)
+
+    # work runs concurrently on every thread in the pool
+    def test_05_concurrent(self):
+        barrier = threading.Barrier(2, timeout=10)
+        completions = []
+        for _ in range(2):
+            pool.submit(
+                lambda conn: barrier.wait(),
+                lambda result, exc: completions.append(exc),
+            )
+        deadline = time.monotonic() + 10
+        while len(completions) < 2 and time.monotonic() < deadline:
+            select.select([pool.notify_fd], [], [], 1)
+            pool.run_completions()
+        self.assertEqual(completions, [None, None])
+
+    # a pool needs at least one thread
+    def test_06_bad_size(self):
+        with self.assertRaises(ValueError):
+            rp.ReadPool(self.dbname, 0)
+
+    # closing the pool stops its threads
+    def test_07_close(self):
+        closed = rp.ReadPool(self.dbname, 2)
+        threads = list(closed._threads)
+        closed.close()
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+    @classmethod
+    def tearDownClass(self):
+        pool.close()
+        conn.close()
+        os.remove(self.dbname)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.dbname + suffix):
+                os.remove(self.dbname + suffix)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import response_cache as rc
+
+
+class TestResponseCache(unittest.TestCase):
+    # the key of a request does not depend on the order of its payload's keys
+    def test_01_key(self):
+        key1 = rc.ResponseCache.key("view_user", {"username": "user1", "json": True})
+        key2 = rc.ResponseCache.key("view_user", {"json": True, "username": "user1"})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(
+            key1, rc.ResponseCache.key("view_bank", {"username": "user1", "json": True})
+        )
+        self.assertNotEqual(
+            key1, rc.ResponseCache.key("view_user", {"username": "user2", "json": True})
+        )
+
+    # a response that is held is returned until the cache is invalidated
+    def test_02_get_put(self):
+        cache = rc.ResponseCache(4)
+        self.assertIsNone(cache.get("a"))
+        self.assertTrue(cache.put("a", "foo", cache.generation))
+        self.assertEqual(cache.get("a"), "foo")
+        cache.invalidate()
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["invalidations"], 1)
+        self.assertEqual(stats["generation"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    # a response read from a generation that has since been invalidated is not held
+    def test_03_stale_put(self):
+        cache = rc.ResponseCache(4)
+        generation = cache.generation
+        cache.invalidate()
+        self.assertFalse(cache.put("a", "foo", generation))
+        self.assertIsNone(cache.get("a"))
+
+    # once the cache is full, the least recently used response is evicted
+    def test_04_evict(self):
+        cache = rc.ResponseCache(2)
+        cache.put("a", "foo", cache.generation)
+        cache.put("b", "bar", cache.generation)
+        cache.get("a")
+        cache.put("c", "baz", cache.generation)
+        self.assertEqual(cache.get("a"), "foo")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "baz")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["size"], 2)
+
+    # a cache with a max size of 0 holds nothing
+    def test_05_disabled(self):
+        cache = rc.ResponseCache(0)
+        self.assertFalse(cache.put("a", "foo", cache.generation))
+        self.assertIsNone(cache.get("a"))
+
+
+class TestDataVersion(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+
+    # the service notices writes made by other processes through the data version
+    # of its own connection, which only changes when another connection commits
+    def test_01_data_version(self):
+        conn = sqlite3.connect(self.dbname)
+        other = sqlite3.connect(self.dbname)
+        try:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            b.add_bank(conn, "root", 1)
+            self.assertEqual(conn.execute("PRAGMA data_version").fetchone()[0], version)
+            b.add_bank(other, "A", 1, "root")
+            self.assertNotEqual(
+                conn.execute("PRAGMA data_version").fetchone()[0], version
+            )
+        finally:
+            conn.close()
+            other.close()
+
+    @classmethod
+    def tearDownClass(self):
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
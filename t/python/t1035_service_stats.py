@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import json
+import sqlite3
+
+from fluxacct.accounting import service_stats as ss
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    # an empty histogram reports zeroes
+    def test_01_empty(self):
+        histogram = ss.LatencyHistogram()
+        self.assertEqual(histogram.percentile(99), 0.0)
+        self.assertEqual(histogram.to_dict()["count"], 0)
+        self.assertEqual(histogram.to_dict()["mean"], 0.0)
+
+    # a percentile is the upper bound of the bucket it falls in
+    def test_02_percentiles(self):
+        histogram = ss.LatencyHistogram(bounds=(0.001, 0.01, 0.1))
+        for _ in range(90):
+            histogram.add(0.0005)
+        for _ in range(9):
+            histogram.add(0.005)
+        histogram.add(0.05)
+        self.assertEqual(histogram.percentile(50), 0.001)
+        self.assertEqual(histogram.percentile(90), 0.001)
+        self.assertEqual(histogram.percentile(99), 0.01)
+        self.assertEqual(histogram.percentile(100), 0.05)
+        self.assertEqual(histogram.to_dict()["count"], 100)
+        self.assertEqual(histogram.to_dict()["max"], 0.05)
+
+    # a latency over the largest bound is counted in the overflow bucket
+    def test_03_overflow(self):
+        histogram = ss.LatencyHistogram(bounds=(0.001,))
+        histogram.add(5.0)
+        self.assertEqual(histogram.counts, [0, 1])
+        self.assertEqual(histogram.percentile(50), 5.0)
+
+    # a histogram takes the same amount of memory no matter how much is added
+    def test_04_bounded(self):
+        histogram = ss.LatencyHistogram()
+        for i in range(10000):
+            histogram.add(i / 1000)
+        self.assertEqual(len(histogram.counts), len(ss.LATENCY_BUCKETS) + 1)
+
+
+class TestServiceStats(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE t (a INTEGER)")
+        self.stats = ss.ServiceStats(slow_statements=2)
+        self.conn.set_trace_callback(self.stats.trace_statement)
+
+    def tearDown(self):
+        self.conn.close()
+
+    # requests are counted per endpoint
+    def test_01_record_request(self):
+        self.stats.record_request("view_user", 0.002, 10, 100)
+        self.stats.record_request("view_user", 0.001, 20, 50, error=True)
+        self.stats.record_request("view_user", 0.0001, 10, 100, cache_hit=True)
+        endpoint = self.stats.to_dict()["endpoints"]["view_user"]
+        self.assertEqual(endpoint["requests"], 3)
+        self.assertEqual(endpoint["errors"], 1)
+        self.assertEqual(endpoint["cache_hits"], 1)
+        self.assertEqual(endpoint["latency"]["count"], 3)
+        self.assertEqual(endpoint["request_bytes"], {"total": 40, "max": 20})
+        self.assertEqual(endpoint["response_bytes"], {"total": 250, "max": 100})
+
+    # the statements run by a handler are attributed to its endpoint
+    def test_02_trace(self):
+        self.stats.begin_sql("add_user")
+        self.conn.execute("INSERT INTO t VALUES (1)")
+        self.conn.commit()
+        self.stats.end_sql()
+        endpoint = self.stats.to_dict()["endpoints"]["add_user"]
+        # the INSERT, the COMMIT, and (depending on the Python version) the BEGIN
+        # implicitly run before the INSERT
+        self.assertGreaterEqual(endpoint["sql"]["statements"], 2)
+        self.assertGreater(endpoint["sql"]["seconds"], 0)
+
+    # statements run outside of a handler are not recorded
+    def test_03_untraced(self):
+        self.conn.execute("SELECT * FROM t").fetchall()
+        self.assertEqual(self.stats.to_dict()["endpoints"], {})
+        self.assertEqual(self.stats.to_dict()["slowest_statements"], [])
+
+    # only the slowest statements are held, slowest first
+    def test_04_slowest(self):
+        self.stats.begin_sql("view_user")
+        for i in range(5):
+            self.conn.execute(f"SELECT {i} FROM t").fetchall()
+        self.stats.end_sql()
+        slowest = self.stats.to_dict()["slowest_statements"]
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]["seconds"], slowest[1]["seconds"])
+        self.assertEqual(slowest[0]["endpoint"], "view_user")
+
+    # long statements are truncated
+    def test_05_truncate(self):
+        self.stats.begin_sql("view_user")
+        self.conn.execute(f"SELECT {'1 + ' * 200}1").fetchall()
+        self.stats.end_sql()
+        statement = self.stats.to_dict()["slowest_statements"][0]["statement"]
+        self.assertEqual(len(statement), ss.MAX_STATEMENT_LENGTH)
+        self.assertTrue(statement.endswith("..."))
+
+    # resetting the statistics drops everything held
+    def test_06_reset(self):
+        self.stats.record_request("view_user", 0.002, 10, 100)
+        self.stats.reset()
+        self.assertEqual(self.stats.to_dict()["endpoints"], {})
+
+    # the statistics can be formatted as a table or as JSON
+    def test_07_format(self):
+        self.stats.record_request("view_user", 0.002, 10, 100)
+        stats = self.stats.to_dict()
+        table = ss.format_stats(stats)
+        self.assertIn("view_user", table)
+        self.assertIn("slowest SQL statements:", table)
+        self.assertEqual(json.loads(ss.format_stats(stats, json_fmt=True)), stats)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import select
+import sqlite3
+import threading
+import time
+import json
+import subprocess
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import refresh as rf
+
+from job_resources import make_r_spec
+
+
+class TestRefresh(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=50001)
+
+        # a job that completed after the association was added
+        t_run = time.time()
+        jobspec = json.dumps({"attributes": {"system": {"bank": "A"}}})
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (1, 50001, t_run, t_run, t_run + 100, "0", make_r_spec(1), jobspec, "A"),
+        )
+        conn.commit()
+
+    # wait for the refresh that is running to be done and collect its status
+    def wait(self, refresher):
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            readable, _, _ = select.select([refresher.notify_fd], [], [], 1)
+            if readable:
+                status = refresher.finish()
+                if status is not None:
+                    return status
+        self.fail("refresh did not finish")
+
+    # each phase is run in order and its duration and rows touched are recorded
+    def test_01_phases(self):
+        ran = []
+        phases = [
+            ("one", lambda path, conn: ran.append("one") or 1),
+            ("two", lambda path, conn: ran.append("two") or 2),
+        ]
+        refresher = rf.Refresher(self.dbname, phases)
+        self.assertTrue(refresher.start())
+        status = self.wait(refresher)
+        refresher.close()
+        self.assertEqual(ran, ["one", "two"])
+        self.assertIsNone(status["error"])
+        self.assertEqual([phase["name"] for phase in status["phases"]], ["one", "two"])
+        self.assertEqual([phase["rows"] for phase in status["phases"]], [1, 2])
+        self.assertGreaterEqual(status["finished"], status["started"])
+        self.assertEqual(refresher.status()["runs"], 1)
+        self.assertEqual(refresher.status()["last"], status)
+        self.assertFalse(refresher.status()["running"])
+
+    # the update-usage phase updates the job usage of the association
+    def test_02_update_usage(self):
+        refresher = rf.Refresher(self.dbname, [("update-usage", rf.update_usage)])
+        refresher.start()
+        status = self.wait(refresher)
+        refresher.close()
+        self.assertIsNone(status["error"])
+        self.assertGreater(status["phases"][0]["rows"], 0)
+        job_usage = conn.execute(
+            "SELECT job_usage FROM association_table WHERE username='user1'"
+        ).fetchone()[0]
+        self.assertGreater(job_usage, 0)
+
+    # a phase that fails ends the refresh
+    def test_03_failure(self):
+        ran = []
+
+        def fail(path, conn):
+            raise ValueError("foo")
+
+        phases = [("fail", fail), ("after", lambda path, conn: ran.append(1) or 0)]
+        refresher = rf.Refresher(self.dbname, phases)
+        refresher.start()
+        status = self.wait(refresher)
+        refresher.close()
+        self.assertEqual(status["error"], "fail: ValueError: foo")
+        self.assertEqual(status["phases"], [])
+        self.assertEqual(ran, [])
+        self.assertEqual(refresher.status()["failures"], 1)
+
+    # a refresh that is started while another is running is skipped
+    def test_04_skipped(self):
+        release = threading.Event()
+        phases = [("wait", lambda path, conn: release.wait(10) and 0)]
+        refresher = rf.Refresher(self.dbname, phases)
+        self.assertTrue(refresher.start())
+        self.assertFalse(refresher.start())
+        self.assertIsNone(refresher.finish())
+        release.set()
+        self.wait(refresher)
+        refresher.close()
+        self.assertEqual(refresher.status()["runs"], 1)
+        self.assertEqual(refresher.status()["skipped"], 1)
+
+    # a refresh that can't open the DB reports the error
+    def test_05_bad_path(self):
+        refresher = rf.Refresher("/nonexistent/FluxAccounting.db", [])
+        refresher.start()
+        status = self.wait(refresher)
+        refresher.close()
+        self.assertTrue(status["error"].startswith("connect: OperationalError"))
+
+    # the update-fshare phase counts the associations whose fair-share changed
+    def test_06_update_fshare(self):
+        u.add_user(conn, username="user2", bank="A", uid=50002)
+
+        def update_fshare(args, **kwargs):
+            fshare_conn = sqlite3.connect(self.dbname)
+            fshare_conn.execute(
+                "UPDATE association_table SET fairshare=0.25 WHERE username='user2'"
+            )
+            fshare_conn.commit()
+            fshare_conn.close()
+            return subprocess.CompletedProcess(args, 0, stdout="")
+
+        refresh_conn = rf.connect(self.dbname)
+        with mock.patch("subprocess.run", side_effect=update_fshare):
+            self.assertEqual(rf.update_fshare(self.dbname, refresh_conn), 1)
+        refresh_conn.close()
+
+    # a refresh that is still running when the Refresher is closed is waited for
+    # only until the timeout
+    def test_07_close_timeout(self):
+        release = threading.Event()
+        phases = [("wait", lambda path, conn: release.wait(10) and 0)]
+        refresher = rf.Refresher(self.dbname, phases)
+        refresher.start()
+        self.assertFalse(refresher.close(timeout=0.1))
+        release.set()
+        self.assertTrue(refresher.close(timeout=10))
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
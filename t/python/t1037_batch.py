@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import batch as bt
+
+
+# run an operation of a batch with the subcommand of the same name
+def run_operation(conn, name, payload):
+    if name == "add_user":
+        return u.add_user(conn, **payload)
+    if name == "edit_user":
+        return u.edit_user(conn, **payload)
+    if name == "add_bank":
+        return b.add_bank(conn, **payload)
+    if name == "delete_bank":
+        return b.delete_bank(conn, **payload)
+    raise bt.OperationError(f"{name}: not supported")
+
+
+def add_user(username, uid, bank="A"):
+    return {
+        "op": "add_user",
+        "payload": {"username": username, "uid": uid, "bank": bank},
+    }
+
+
+class TestBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+
+    def associations(self):
+        return [
+            row[0]
+            for row in conn.execute(
+                "SELECT username FROM association_table ORDER BY username"
+            )
+        ]
+
+    # every operation of a batch is applied in one transaction
+    def test_01_batch(self):
+        operations = [add_user(f"user{i}", 5000 + i) for i in range(100)]
+        operations.append(
+            {
+                "op": "edit_user",
+                "payload": {"username": "user0", "max_running_jobs": 3},
+            }
+        )
+        results = bt.run_batch(conn, operations, run_operation)
+        self.assertTrue(results["committed"])
+        self.assertEqual(results["succeeded"], 101)
+        self.assertEqual(results["failed"], 0)
+        self.assertEqual(len(self.associations()), 100)
+        self.assertFalse(conn.in_transaction)
+        max_running_jobs = conn.execute(
+            "SELECT max_running_jobs FROM association_table WHERE username='user0'"
+        ).fetchone()[0]
+        self.assertEqual(max_running_jobs, 3)
+
+    # a failed operation ends the batch and nothing in it is applied
+    def test_02_all_or_nothing(self):
+        before = self.associations()
+        operations = [
+            add_user("user200", 5200),
+            add_user("user0", 5000),
+            add_user("user201", 5201),
+        ]
+        results = bt.run_batch(conn, operations, run_operation)
+        self.assertFalse(results["committed"])
+        self.assertEqual(results["failed"], 1)
+        self.assertEqual(len(results["results"]), 2)
+        self.assertEqual(results["results"][1]["index"], 1)
+        self.assertIn("already active", results["results"][1]["error"])
+        self.assertEqual(self.associations(), before)
+        self.assertFalse(conn.in_transaction)
+
+    # with keep_going, only the operations that fail are not applied
+    def test_03_keep_going(self):
+        operations = [
+            add_user("user300", 5300),
+            add_user("user301", 5301, bank="foo"),
+            add_user("user302", 5302),
+        ]
+        results = bt.run_batch(conn, operations, run_operation, keep_going=True)
+        self.assertTrue(results["committed"])
+        self.assertEqual(results["succeeded"], 2)
+        self.assertEqual(results["failed"], 1)
+        associations = self.associations()
+        self.assertIn("user300", associations)
+        self.assertNotIn("user301", associations)
+        self.assertIn("user302", associations)
+
+    # a subcommand that rolls back its own changes only rolls back its operation
+    def test_04_rollback(self):
+        conn.execute("CREATE TEMP TABLE t (x)")
+
+        def run_rollback(batch_conn, name, payload):
+            batch_conn.execute("INSERT INTO t VALUES (?)", (payload["x"],))
+            if payload["x"] == 2:
+                batch_conn.rollback()
+                raise sqlite3.OperationalError("foo")
+            batch_conn.commit()
+            return 0
+
+        operations = [{"op": "edit_user", "payload": {"x": x}} for x in range(1, 4)]
+        results = bt.run_batch(conn, operations, run_rollback, keep_going=True)
+        self.assertEqual(results["results"][1]["error"], "OperationalError: foo")
+        rows = [row[0] for row in conn.execute("SELECT x FROM t ORDER BY x")]
+        self.assertEqual(rows, [1, 3])
+
+    # operations that can't be run in a batch are rejected before any are run
+    def test_05_invalid_operations(self):
+        with self.assertRaises(ValueError):
+            bt.run_batch(conn, {"op": "add_user"}, run_operation)
+        with self.assertRaises(ValueError):
+            bt.run_batch(conn, [add_user("user400", 5400), "foo"], run_operation)
+        with self.assertRaises(ValueError):
+            bt.run_batch(conn, [{"op": "shutdown_service"}], run_operation)
+        with self.assertRaises(ValueError):
+            bt.run_batch(conn, [{"op": "add_user", "payload": []}], run_operation)
+        self.assertNotIn("user400", self.associations())
+        self.assertFalse(conn.in_transaction)
+
+    # the results of a batch are summarized
+    def test_06_format_results(self):
+        results = bt.run_batch(
+            conn,
+            [add_user("user500", 5500), add_user("user500", 5500)],
+            run_operation,
+            keep_going=True,
+        )
+        summary = bt.format_results(results).splitlines()
+        self.assertEqual(len(summary), 2)
+        self.assertTrue(summary[0].startswith("operation 1 (add_user): "))
+        self.assertEqual(summary[1], "applied 1 of 2 operations")
+
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import random
+
+from fluxacct.accounting import fairshare_emulator as fe
+
+try:
+    from fluxacct.accounting import fairshare_numpy as fn
+except ImportError:
+    fn = None
+
+
+# build a tree from a list of (parent index, name, is_user, shares, usage)
+# tuples where every parent comes before its children
+def build_tree(nodes):
+    built = []
+    for parent, name, is_user, shares, usage in nodes:
+        node = fe.FairShareNode(name, shares, usage, is_user=is_user)
+        if parent >= 0:
+            built[parent].add_child(node)
+        built.append(node)
+    return built[0]
+
+
+# a random hierarchy of banks with users only at its lowest level; sibling
+# banks never have the same weight, so tied banks' users are never merged
+def random_tree(seed):
+    rng = random.Random(seed)
+    nodes = [(-1, "root", False, 1, 0)]
+    depth = rng.randint(1, 4)
+    i = 0
+    while i < len(nodes):
+        parent, name, is_user, _, _ = nodes[i]
+        if not is_user:
+            users = name.count(".") + 1 == depth
+            for child in range(rng.randint(1, 6)):
+                if users:
+                    shares = rng.choice([0, 1, 1, 2, 10, 100])
+                    usage = rng.choice([0, 1, 10, 100, rng.randint(0, 1000)])
+                else:
+                    shares, usage = 1, child + 1
+                nodes.append((i, f"{name}.{child}", users, shares, usage))
+        i += 1
+    return nodes
+
+
+def calculate(calculator, nodes):
+    return [
+        (user.name, user.fairshare)
+        for user in calculator(build_tree(nodes)).calculate()
+    ]
+
+
+@unittest.skipIf(fn is None, "NumPy is not installed")
+class TestNumPyFairShare(unittest.TestCase):
+    # both engines calculate the same fair-share values for the same hierarchy
+    def test_01_small_tie(self):
+        nodes = [
+            (-1, "root", False, 1000, 133),
+            (0, "account1", False, 1000, 120),
+            (0, "account2", False, 100, 12),
+            (0, "account3", False, 10, 1),
+            (1, "leaf.1.1", True, 10000, 100),
+            (1, "leaf.1.2", True, 1000, 10),
+            (1, "leaf.1.3", True, 100000, 10),
+            (2, "leaf.2.1", True, 10000, 10),
+            (2, "leaf.2.2", True, 1000, 1),
+            (2, "leaf.2.3", True, 100000, 1),
+            (3, "leaf.3.1", True, 100, 0),
+            (3, "leaf.3.2", True, 10, 1),
+        ]
+        expected = calculate(fe.FairShareCalculator, nodes)
+        self.assertEqual(calculate(fn.NumPyFairShareCalculator, nodes), expected)
+        self.assertEqual(
+            [fairshare for _, fairshare in expected],
+            [1.0, 0.875, 0.75, 0.75, 0.5, 0.5, 0.5, 0.5],
+        )
+
+    # both engines agree on random hierarchies
+    def test_02_random_trees(self):
+        for seed in range(200):
+            nodes = random_tree(seed)
+            self.assertEqual(
+                dict(calculate(fn.NumPyFairShareCalculator, nodes)),
+                dict(calculate(fe.FairShareCalculator, nodes)),
+                f"seed {seed}",
+            )
+
+    # usage is summed across siblings as an integer, like in weighted_tree.cpp,
+    # so users whose usage adds up to less than 1 have the same weight
+    def test_03_truncated_usage_sum(self):
+        nodes = [
+            (-1, "root", False, 1, 0),
+            (0, "user1", True, 1, 0.5),
+            (0, "user2", True, 1, 0.25),
+        ]
+        self.assertEqual(
+            calculate(fn.NumPyFairShareCalculator, nodes),
+            [("user1", 1.0), ("user2", 1.0)],
+        )
+
+    # a user that ties with a bank is visited before the bank's users
+    def test_04_user_bank_tie(self):
+        nodes = [
+            (-1, "root", False, 1, 0),
+            (0, "user1", True, 1, 100),
+            (0, "A", False, 0, 1),
+            (0, "user2", True, 0, 1),
+            (2, "user3", True, 10, 524),
+            (2, "B", False, 0, 1),
+            (5, "user4", True, 5, 10),
+        ]
+        self.assertEqual(
+            dict(calculate(fn.NumPyFairShareCalculator, nodes)),
+            {"user1": 1.0, "user2": 0.75, "user3": 0.5, "user4": 0.25},
+        )
+
+    # a hierarchy without users has no fair-share values to calculate
+    def test_05_no_users(self):
+        nodes = [(-1, "root", False, 1, 0), (0, "A", False, 1, 0)]
+        self.assertEqual(calculate(fn.NumPyFairShareCalculator, nodes), [])
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
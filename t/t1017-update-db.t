@@ -61,6 +61,11 @@ test_expect_success 'get all the tables of the old DB and check that new table w
 	priority_factor_weight_table
 	config_table
 	job_usage_per_association_table
+	job_records_checkpoint_table
+	usage_rollup_table
+	usage_rollup_checkpoint_table
+	priority_push_table
+	fshare_cache_table
 	organization
 	queue_table
 	EOF
@@ -194,6 +194,15 @@ test_expect_success 'delete-config should not be accessible by all users' '
 	)
 '
 
+test_expect_success 'index should not be accessible by all users' '
+	newid=$(($(id -u)+1)) &&
+	( export FLUX_HANDLE_ROLEMASK=0x2 &&
+	  export FLUX_HANDLE_USERID=$newid &&
+		test_must_fail flux account index --rebuild > no_access_index.out 2>&1 &&
+		grep "Request requires owner credentials" no_access_index.out
+	)
+'
+
 test_expect_success 'remove flux-accounting DB' '
 	rm $(pwd)/FluxAccountingTest.db
 '
@@ -11,6 +11,8 @@ EXPECTED_FILES=${SHARNESS_TEST_SRCDIR}/expected/fairshare_emulate
 export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
 test_under_flux 4 job -o,--config-path=$(pwd)/config -Slog-stderr-level=1
 
+flux python -c "import numpy" 2>/dev/null && test_set_prereq NUMPY
+
 test_expect_success '--help message works' '
 	flux account-fairshare-emulate --help
 '
@@ -377,4 +379,38 @@ test_expect_success 'users with identical weights get equal fairshare' '
 	test_cmp identical_weights.test identical_weights.expected
 '
 
+test_expect_success 'unknown engine raises error' '
+	test_must_fail flux account-fairshare-emulate \
+		-i small_tie.json --engine=foo > bad_engine.err 2>&1 &&
+	grep "invalid choice" bad_engine.err
+'
+
+test_expect_success NUMPY 'numpy engine on small_tie_all with parsable output' '
+	flux account-fairshare-emulate \
+		-i small_tie_all.json -P --engine=numpy > small_tie_all_numpy.test &&
+	test_cmp small_tie_all_numpy.test small_tie_all_parsable.expected
+'
+
+test_expect_success NUMPY 'numpy engine on small_tie_all with JSON output' '
+	flux account-fairshare-emulate \
+		-i small_tie_all.json --json --engine=numpy > small_tie_all_numpy_json.test &&
+	test_cmp small_tie_all_numpy_json.test ${EXPECTED_FILES}/small_tie_all_json.expected
+'
+
+test_expect_success NUMPY 'numpy engine matches python engine' '
+	for input in small_no_tie small_tie deeply_nested identical_weights; do
+		flux account-fairshare-emulate -i ${input}.json -P \
+			--engine=python > ${input}_python.test &&
+		flux account-fairshare-emulate -i ${input}.json -P \
+			--engine=numpy > ${input}_numpy.test &&
+		test_cmp ${input}_python.test ${input}_numpy.test || return 1
+	done
+'
+
+test_expect_success !NUMPY 'numpy engine raises error without NumPy' '
+	test_must_fail flux account-fairshare-emulate \
+		-i small_tie.json --engine=numpy > no_numpy.err 2>&1 &&
+	grep "fairshare-emulate: ImportError: --engine=numpy requires NumPy" no_numpy.err
+'
+
 test_done
@@ -0,0 +1,85 @@
+#!/bin/bash
+
+test_description='test fetching job records in chunks with a bounded number of outstanding lookups'
+
+. $(dirname $0)/sharness.sh
+
+DB_PATH1=$(pwd)/FluxAccountingTest1.db
+DB_PATH2=$(pwd)/FluxAccountingTest2.db
+DB_PATH3=$(pwd)/FluxAccountingTest3.db
+QUERYCMD="flux python ${SHARNESS_TEST_SRCDIR}/scripts/query.py"
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# select job records from flux-accounting DB in a stable order
+select_job_records() {
+		local dbpath=$1
+		query="SELECT id, userid, t_inactive, nnodes FROM jobs ORDER BY id;"
+		${QUERYCMD} -t 100 ${dbpath} "${query}"
+}
+
+test_expect_success 'create flux-accounting DBs' '
+	flux account -p ${DB_PATH1} create-db &&
+	flux account -p ${DB_PATH2} create-db
+'
+
+test_expect_success 'submit a job that does not run' '
+	job=$(flux submit --urgency=0 sleep 60) &&
+	flux job wait-event -vt 10 ${job} priority &&
+	flux cancel ${job} &&
+	flux job wait-event -t 5 ${job} clean
+'
+
+test_expect_success 'submit some jobs and wait for them to finish running' '
+	flux submit --cc=1-10 --wait hostname
+'
+
+test_expect_success 'fetch job records with one outstanding lookup at a time' '
+	flux account-fetch-job-records -p ${DB_PATH1} --max-inflight=1 &&
+	select_job_records ${DB_PATH1} > records1.out &&
+	test $(grep -c "^id = " records1.out) -eq 10
+'
+
+test_expect_success 'fetch job records with several outstanding lookups' '
+	flux account-fetch-job-records -p ${DB_PATH2} --max-inflight=4 &&
+	select_job_records ${DB_PATH2} > records2.out &&
+	test_cmp records1.out records2.out
+'
+
+test_expect_success 'fetch job records a few at a time' '
+	flux account -p ${DB_PATH3} create-db &&
+	flux account-fetch-job-records -p ${DB_PATH3} --chunk-size=3 &&
+	select_job_records ${DB_PATH3} > records_chunked.out &&
+	test_cmp records1.out records_chunked.out
+'
+
+test_expect_success 'the last job record fetched is recorded as a checkpoint' '
+	${QUERYCMD} -t 100 ${DB_PATH3} \
+		"SELECT c.jobid = CAST(j.id AS INTEGER) AND c.t_inactive = j.t_inactive
+		AS same FROM job_records_checkpoint_table c, (SELECT id, t_inactive
+		FROM jobs ORDER BY t_inactive DESC, CAST(id AS INTEGER) DESC LIMIT 1) j" \
+		> checkpoint.out &&
+	grep "same = 1" checkpoint.out
+'
+
+test_expect_success 'fetching job records again does not add any duplicates' '
+	flux account-fetch-job-records -p ${DB_PATH2} &&
+	select_job_records ${DB_PATH2} > records3.out &&
+	test_cmp records1.out records3.out
+'
+
+test_expect_success '--max-inflight must be at least 1' '
+	test_must_fail flux account-fetch-job-records -p ${DB_PATH1} \
+		--max-inflight=0 2> max_inflight.err &&
+	grep "must be at least 1" max_inflight.err
+'
+
+test_expect_success '--chunk-size must be at least 1' '
+	test_must_fail flux account-fetch-job-records -p ${DB_PATH1} \
+		--chunk-size=0 2> chunk_size.err &&
+	grep "must be at least 1" chunk_size.err
+'
+
+test_done
@@ -0,0 +1,154 @@
+#!/bin/bash
+
+test_description='test sending only changed data to the plugin with flux account-priority-update --since-last-push'
+
+. `dirname $0`/sharness.sh
+MULTI_FACTOR_PRIORITY=${FLUX_BUILD_DIR}/src/plugins/.libs/mf_priority.so
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+count_pushed() {
+	flux python - $1 <<-EOF
+	import sqlite3
+	import sys
+	conn = sqlite3.connect("${DB_PATH}")
+	select_stmt = "SELECT COUNT(*) FROM priority_push_table WHERE tbl=?"
+	print(conn.execute(select_stmt, (sys.argv[1],)).fetchone()[0])
+	EOF
+}
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'load multi-factor priority plugin' '
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY}
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=A &&
+	flux account add-user --username=user5003 --userid=5003 --bank=A
+'
+
+test_expect_success 'the first push sends everything and records it' '
+	flux account-priority-update -p ${DB_PATH} --since-last-push &&
+	test $(count_pushed association_table) -eq 3 &&
+	test $(count_pushed bank_table) -eq 1
+'
+
+test_expect_success HAVE_JQ 'the plugin holds every association' '
+	flux jobtap query mf_priority.so > query_1.json &&
+	test_debug "jq -S . <query_1.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001)" <query_1.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002)" <query_1.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5003)" <query_1.json
+'
+
+test_expect_success 'pushing again with no changes succeeds' '
+	flux account-priority-update -p ${DB_PATH} --since-last-push &&
+	test $(count_pushed association_table) -eq 3
+'
+
+test_expect_success 'edit an association and add a queue' '
+	flux account edit-user user5002 --max-running-jobs=17 &&
+	flux account add-queue bronze --priority=100
+'
+
+test_expect_success HAVE_JQ 'changed rows are sent to the plugin' '
+	flux account-priority-update -p ${DB_PATH} --since-last-push &&
+	flux jobtap query mf_priority.so > query_2.json &&
+	test_debug "jq -S . <query_2.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002) | .banks[0].max_run_jobs == 17" <query_2.json &&
+	jq -e ".queues.bronze.priority == 100" <query_2.json
+'
+
+test_expect_success 'remove an association from the DB' '
+	flux account delete-user user5003 A --force
+'
+
+test_expect_success HAVE_JQ 'a removed association is sent as a tombstone' '
+	flux account-priority-update -p ${DB_PATH} --since-last-push &&
+	test $(count_pushed association_table) -eq 2 &&
+	flux jobtap query mf_priority.so > query_3.json &&
+	test_debug "jq -S . <query_3.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5003) | .banks[0].active == 0" <query_3.json
+'
+
+test_expect_success 'reload the plugin so that it holds no data' '
+	flux jobtap remove mf_priority.so &&
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY}
+'
+
+test_expect_success HAVE_JQ 'a plugin with no data gets a full push' '
+	flux account-priority-update -p ${DB_PATH} --since-last-push &&
+	flux jobtap query mf_priority.so > query_4.json &&
+	test_debug "jq -S . <query_4.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001)" <query_4.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002) | .banks[0].max_run_jobs == 17" <query_4.json &&
+	jq -e ".queues.bronze.priority == 100" <query_4.json
+'
+
+test_expect_success 'a bulk update with an invalid section is rejected' '
+	cat <<-EOF >bad_update.py &&
+	import flux
+	association = {
+	    "userid": 5001, "bank": "A", "def_bank": "A", "fairshare": 0.5,
+	    "max_running_jobs": 99, "max_active_jobs": 99, "queues": "", "active": 1,
+	    "projects": "*", "def_project": "*", "max_nodes": 1, "max_cores": 1,
+	    "max_sched_jobs": 1,
+	}
+	update = {"associations": [association], "queues": [{"queue": "foo"}]}
+	flux.Flux().rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+	EOF
+	test_must_fail flux python bad_update.py
+'
+
+test_expect_success HAVE_JQ 'none of the sections of a rejected bulk update are applied' '
+	flux jobtap query mf_priority.so > query_5.json &&
+	test_debug "jq -S . <query_5.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001) | .banks[0].max_run_jobs != 99" <query_5.json &&
+	jq -e ".queues.bronze.priority == 100" <query_5.json
+'
+
+test_expect_success 'reload the plugin and send everything one association at a time' '
+	flux jobtap remove mf_priority.so &&
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY} &&
+	flux account-priority-update -p ${DB_PATH} --chunk-size=1
+'
+
+test_expect_success HAVE_JQ 'every chunk of the update is applied' '
+	flux jobtap query mf_priority.so > query_6.json &&
+	test_debug "jq -S . <query_6.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001)" <query_6.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002) | .banks[0].max_run_jobs == 17" <query_6.json &&
+	jq -e ".queues.bronze.priority == 100" <query_6.json
+'
+
+test_expect_success 'a chunk sent out of order is rejected' '
+	cat <<-EOF >bad_chunk.py &&
+	import flux
+	update = {"chunk": 1, "nchunks": 3, "associations": []}
+	flux.Flux().rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+	EOF
+	test_must_fail flux python bad_chunk.py
+'
+
+test_expect_success 'an invalid chunk size is rejected' '
+	test_must_fail flux account-priority-update -p ${DB_PATH} --chunk-size=0
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
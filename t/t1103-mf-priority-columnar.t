@@ -0,0 +1,137 @@
+#!/bin/bash
+
+test_description='test sending associations to the priority plugin in the columnar encoding'
+
+. `dirname $0`/sharness.sh
+MULTI_FACTOR_PRIORITY=${FLUX_BUILD_DIR}/src/plugins/.libs/mf_priority.so
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=A \
+		--max-running-jobs=17
+'
+
+test_expect_success HAVE_JQ 'export-json --columnar sends the field names once' '
+	flux account export-json --columnar > columnar.json &&
+	test_debug "jq -S . <columnar.json" &&
+	jq -e ".associations.columns | index(\"userid\") == 0" <columnar.json &&
+	jq -e ".associations.rows | length == 2" <columnar.json &&
+	jq -e ".associations.rows[1][4] == 17" <columnar.json
+'
+
+test_expect_success 'load multi-factor priority plugin with a columnar config' '
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY} \
+		"config=$(flux account export-json --columnar)"
+'
+
+test_expect_success HAVE_JQ 'the plugin holds every association' '
+	flux jobtap query mf_priority.so > query_1.json &&
+	test_debug "jq -S . <query_1.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001)" <query_1.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002) | .banks[0].max_run_jobs == 17" <query_1.json
+'
+
+test_expect_success HAVE_JQ 'the plugin advertises the encodings it accepts' '
+	jq -e ".association_formats | index(\"columnar\")" <query_1.json &&
+	jq -e ".association_formats | index(\"objects\")" <query_1.json
+'
+
+test_expect_success 'edit an association and send an update' '
+	flux account edit-user user5001 --max-running-jobs=9 &&
+	flux account-priority-update -p ${DB_PATH} --chunk-size=1
+'
+
+test_expect_success HAVE_JQ 'the columnar update is applied' '
+	flux jobtap query mf_priority.so > query_2.json &&
+	test_debug "jq -S . <query_2.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001) | .banks[0].max_run_jobs == 9" <query_2.json
+'
+
+test_expect_success 'columns can be sent in any order' '
+	cat <<-EOF >reordered.py &&
+	import flux
+	import fluxacct.accounting
+	columns = list(reversed(fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS))
+	row = {
+	    "userid": 5003, "bank": "A", "def_bank": "A", "fairshare": 0.5,
+	    "max_running_jobs": 3, "max_active_jobs": 7, "queues": "", "active": 1,
+	    "projects": "*", "def_project": "*", "max_nodes": 1, "max_cores": 1,
+	    "max_sched_jobs": 1,
+	}
+	update = {"associations": {"columns": columns, "rows": [[row[c] for c in columns]]}}
+	flux.Flux().rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+	EOF
+	flux python reordered.py
+'
+
+test_expect_success HAVE_JQ 'the reordered columns are unpacked by name' '
+	flux jobtap query mf_priority.so > query_3.json &&
+	test_debug "jq -S . <query_3.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5003) | .banks[0].max_run_jobs == 3" <query_3.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5003) | .banks[0].max_active_jobs == 7" <query_3.json
+'
+
+test_expect_success 'columnar associations missing a column are rejected' '
+	cat <<-EOF >missing_column.py &&
+	import flux
+	update = {"associations": {"columns": ["userid", "bank"], "rows": [[5004, "A"]]}}
+	flux.Flux().rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+	EOF
+	test_must_fail flux python missing_column.py
+'
+
+test_expect_success 'a columnar row with a value of the wrong type is rejected' '
+	cat <<-EOF >bad_row.py &&
+	import flux
+	import fluxacct.accounting
+	columns = fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS
+	row = [
+	    "5004", "A", "A", 0.5, 1, 1, "", 1, "*", "*", 1, 1, 1,
+	]
+	update = {"associations": {"columns": columns, "rows": [row]}}
+	flux.Flux().rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+	EOF
+	test_must_fail flux python bad_row.py
+'
+
+test_expect_success HAVE_JQ 'rejected columnar associations are not applied' '
+	flux jobtap query mf_priority.so > query_4.json &&
+	test_debug "jq -S . <query_4.json" &&
+	test_must_fail jq -e ".mf_priority_map[] | select(.userid == 5004)" <query_4.json
+'
+
+test_expect_success HAVE_JQ 'rec_update also accepts columnar associations' '
+	cat <<-EOF >rec_update.py &&
+	import flux
+	import fluxacct.accounting
+	columns = fluxacct.accounting.PLUGIN_ASSOCIATION_FIELDS
+	row = [5005, "A", "A", 0.5, 4, 7, "", 1, "*", "*", 1, 1, 1]
+	data = {"columns": columns, "rows": [row]}
+	flux.Flux().rpc("job-manager.mf_priority.rec_update", {"data": data}).get()
+	EOF
+	flux python rec_update.py &&
+	flux jobtap query mf_priority.so > query_5.json &&
+	test_debug "jq -S . <query_5.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5005) | .banks[0].max_run_jobs == 4" <query_5.json
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
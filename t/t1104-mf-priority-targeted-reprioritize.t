@@ -0,0 +1,129 @@
+#!/bin/bash
+
+test_description='test reprioritizing only the jobs affected by an update to the priority plugin'
+
+. `dirname $0`/sharness.sh
+MULTI_FACTOR_PRIORITY=${FLUX_BUILD_DIR}/src/plugins/.libs/mf_priority.so
+SUBMIT_AS=${SHARNESS_TEST_SRCDIR}/scripts/submit_as.py
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# send an association with a new fair-share to the plugin without
+# reprioritizing any jobs, then reprioritize and print the plugin's response
+cat <<-EOF >update_fairshare.py
+import flux
+import json
+import sys
+
+h = flux.Flux()
+association = {
+    "userid": int(sys.argv[1]), "bank": sys.argv[2], "def_bank": sys.argv[2],
+    "fairshare": float(sys.argv[3]), "max_running_jobs": 5,
+    "max_active_jobs": 7, "queues": "", "active": 1, "projects": "*",
+    "def_project": "*", "max_nodes": 2147483647, "max_cores": 2147483647,
+    "max_sched_jobs": 2147483647,
+}
+update = {"associations": [association], "reprioritize": False}
+h.rpc("job-manager.mf_priority.rec_bulk_update", update).get()
+print(json.dumps(h.rpc("job-manager.mf_priority.reprioritize").get()))
+EOF
+
+test_expect_success 'allow guest access to testexec' '
+	flux config load <<-EOF
+	[exec.testexec]
+	allow-guests = true
+	EOF
+'
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'load multi-factor priority plugin' '
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY}
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-bank --parent-bank=root B 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=B
+'
+
+test_expect_success 'send flux-accounting DB information to the plugin' '
+	flux account-priority-update -p ${DB_PATH}
+'
+
+test_expect_success 'stop the queue and submit a job as each user' '
+	flux queue stop &&
+	job1=$(flux python ${SUBMIT_AS} 5001 hostname) &&
+	job2=$(flux python ${SUBMIT_AS} 5002 hostname) &&
+	flux job wait-event -vt 5 ${job1} priority &&
+	flux job wait-event -vt 5 ${job2} priority &&
+	test $(flux jobs -no {priority} ${job1}) -eq 50000 &&
+	test $(flux jobs -no {priority} ${job2}) -eq 50000
+'
+
+test_expect_success HAVE_JQ 'only the job of the changed association is reprioritized' '
+	flux python update_fairshare.py 5001 A 0.9 > resp_1.json &&
+	test_debug "cat resp_1.json" &&
+	jq -e ".reprioritized == 1 and .all == false" <resp_1.json &&
+	test $(flux jobs -no {priority} ${job1}) -eq 90000 &&
+	test $(flux jobs -no {priority} ${job2}) -eq 50000
+'
+
+test_expect_success HAVE_JQ 'an update that changes nothing reprioritizes no jobs' '
+	flux python update_fairshare.py 5001 A 0.9 > resp_2.json &&
+	test_debug "cat resp_2.json" &&
+	jq -e ".reprioritized == 0 and .all == false" <resp_2.json
+'
+
+test_expect_success HAVE_JQ 'every job can still be reprioritized on request' '
+	flux python -c "import flux, json; print(json.dumps(flux.Flux().rpc(\"job-manager.mf_priority.reprioritize\", {\"all\": True}).get()))" > resp_3.json &&
+	test_debug "cat resp_3.json" &&
+	jq -e ".all == true" <resp_3.json &&
+	test $(flux jobs -no {priority} ${job1}) -eq 90000 &&
+	test $(flux jobs -no {priority} ${job2}) -eq 50000
+'
+
+test_expect_success 'flux account-priority-update can reprioritize every job' '
+	flux account-priority-update -p ${DB_PATH} --reprioritize-all &&
+	test $(flux jobs -no {priority} ${job1}) -eq 50000 &&
+	test $(flux jobs -no {priority} ${job2}) -eq 50000
+'
+
+test_expect_success HAVE_JQ 'a new priority factor weight reprioritizes every job' '
+	flux account edit-factor --factor=fairshare --weight=1000 &&
+	flux account-priority-update -p ${DB_PATH} &&
+	flux python update_fairshare.py 5002 B 0.5 > resp_4.json &&
+	test_debug "cat resp_4.json" &&
+	jq -e ".reprioritized == 0 and .all == false" <resp_4.json &&
+	test $(flux jobs -no {priority} ${job1}) -eq 500 &&
+	test $(flux jobs -no {priority} ${job2}) -eq 500
+'
+
+test_expect_success HAVE_JQ 'a canceled job is no longer reprioritized' '
+	flux cancel ${job1} &&
+	flux job wait-event -vt 5 ${job1} clean &&
+	flux python update_fairshare.py 5001 A 0.1 > resp_5.json &&
+	test_debug "cat resp_5.json" &&
+	jq -e ".reprioritized == 0" <resp_5.json
+'
+
+test_expect_success 'cancel remaining job' '
+	flux cancel ${job2}
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
@@ -0,0 +1,103 @@
+#!/bin/bash
+
+test_description='test running read-only requests to flux-accounting service in a pool of threads'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'a negative number of read threads is rejected' '
+	test_must_fail flux account-service -p ${DB_PATH} --read-threads=-1 \
+		> bad_threads.out 2>&1 &&
+	grep "read-threads must be 0 or greater" bad_threads.out
+'
+
+test_expect_success 'start flux-accounting service with the default options' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'the DB is not put in WAL mode by default' '
+	flux python -c "import sqlite3; \
+		print(sqlite3.connect(\"${DB_PATH}\").execute(\"PRAGMA journal_mode\").fetchone()[0])" \
+		> journal_mode_default.out &&
+	grep "^delete$" journal_mode_default.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_expect_success 'start flux-accounting service with a pool of read threads' '
+	flux account-service -p ${DB_PATH} --read-threads=2 -t
+'
+
+test_expect_success 'the DB is put in WAL mode' '
+	flux python -c "import sqlite3; \
+		print(sqlite3.connect(\"${DB_PATH}\").execute(\"PRAGMA journal_mode\").fetchone()[0])" \
+		> journal_mode.out &&
+	grep "^wal$" journal_mode.out
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=A
+'
+
+test_expect_success 'read-only requests are answered from the pool' '
+	flux account view-user user5001 > user5001.out &&
+	grep "user5001" user5001.out &&
+	flux account list-banks > banks.out &&
+	grep "A" banks.out
+'
+
+test_expect_success 'a read sees a write that has completed' '
+	flux account edit-user user5001 --max-running-jobs=9 &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> user5001_edited.out &&
+	grep "user5001|9" user5001_edited.out
+'
+
+test_expect_success 'errors in read-only requests are returned' '
+	test_must_fail flux account view-user user9999 > user9999.out 2>&1 &&
+	grep "user9999 not found in association_table" user9999.out
+'
+
+test_expect_success 'many concurrent reads and writes are all answered' '
+	for i in $(seq 1 8); do
+		flux account view-user user5002 > concurrent_${i}.out &
+	done &&
+	flux account edit-user user5002 --max-active-jobs=11 &&
+	wait &&
+	for i in $(seq 1 8); do
+		grep "user5002" concurrent_${i}.out || return 1
+	done
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_expect_success 'start flux-accounting service without a pool of read threads' '
+	flux account-service -p ${DB_PATH} --read-threads=0 -t
+'
+
+test_expect_success 'read-only requests are answered without a pool' '
+	flux account view-user -o "{username}|{max_active_jobs}" user5002 \
+		> user5002_edited.out &&
+	grep "user5002|11" user5002_edited.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
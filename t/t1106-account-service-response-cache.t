@@ -0,0 +1,105 @@
+#!/bin/bash
+
+test_description='test caching the responses to read-only requests to flux-accounting service'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# print the response cache statistics of the flux-accounting service
+cat <<-EOF >cache_stats.py
+import flux
+import json
+
+stats = flux.Flux().rpc("accounting.stats", {"json": True}).get()["stats"]
+print(json.dumps(json.loads(stats)["cache"]))
+EOF
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'a negative cache size is rejected' '
+	test_must_fail flux account-service -p ${DB_PATH} --cache-size=-1 \
+		> bad_cache_size.out 2>&1 &&
+	grep "cache-size must be 0 or greater" bad_cache_size.out
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A
+'
+
+test_expect_success HAVE_JQ 'a repeated read-only request is answered from the cache' '
+	flux python cache_stats.py > stats_1.json &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> view_1.out &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> view_2.out &&
+	test_cmp view_1.out view_2.out &&
+	flux python cache_stats.py > stats_2.json &&
+	test_debug "cat stats_2.json" &&
+	test $(jq ".hits" stats_2.json) -eq $(($(jq ".hits" stats_1.json) + 1)) &&
+	test $(jq ".misses" stats_2.json) -eq $(($(jq ".misses" stats_1.json) + 1))
+'
+
+test_expect_success HAVE_JQ 'a write through the service invalidates the cache' '
+	flux account edit-user user5001 --max-running-jobs=9 &&
+	flux python cache_stats.py > stats_3.json &&
+	test $(jq ".size" stats_3.json) -eq 0 &&
+	test $(jq ".generation" stats_3.json) -gt $(jq ".generation" stats_2.json) &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> view_3.out &&
+	grep "user5001|9" view_3.out
+'
+
+test_expect_success 'a write made by another process invalidates the cache' '
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> view_4.out &&
+	grep "user5001|9" view_4.out &&
+	flux python -c "import sqlite3; conn = sqlite3.connect(\"${DB_PATH}\"); \
+		conn.execute(\"UPDATE association_table SET max_running_jobs=3\"); \
+		conn.commit()" &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5001 \
+		> view_5.out &&
+	grep "user5001|3" view_5.out
+'
+
+test_expect_success 'errors are not cached' '
+	test_must_fail flux account view-user user9999 > user9999.out 2>&1 &&
+	grep "user9999 not found in association_table" user9999.out &&
+	flux account add-user --username=user9999 --userid=9999 --bank=A &&
+	flux account view-user user9999 > user9999_added.out &&
+	grep "user9999" user9999_added.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_expect_success 'start flux-accounting service without a response cache' '
+	flux account-service -p ${DB_PATH} --cache-size=0 -t
+'
+
+test_expect_success HAVE_JQ 'nothing is held in a disabled cache' '
+	flux account list-banks > banks_1.out &&
+	flux account list-banks > banks_2.out &&
+	test_cmp banks_1.out banks_2.out &&
+	flux python cache_stats.py > stats_4.json &&
+	test $(jq ".size" stats_4.json) -eq 0 &&
+	test $(jq ".hits" stats_4.json) -eq 0
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
@@ -0,0 +1,83 @@
+#!/bin/bash
+
+test_description='test request, latency, and SQL statistics of flux-accounting service'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=A
+'
+
+test_expect_success 'make some read-only requests' '
+	flux account view-user user5001 &&
+	flux account view-user user5001 &&
+	flux account list-banks &&
+	test_must_fail flux account view-user user9999
+'
+
+test_expect_success 'flux account stats lists each endpoint and the slowest statements' '
+	flux account stats > stats.out &&
+	test_debug "cat stats.out" &&
+	grep "^add_user  *2  *0 " stats.out &&
+	grep "^view_user  *3  *1  *1 " stats.out &&
+	grep "^list_banks  *1 " stats.out &&
+	grep "response cache:" stats.out &&
+	grep "slowest SQL statements:" stats.out &&
+	grep "INSERT INTO association_table" stats.out
+'
+
+test_expect_success HAVE_JQ 'flux account stats --json reports latencies and sizes' '
+	flux account stats --json > stats.json &&
+	jq -e ".endpoints.view_user.requests == 3" stats.json &&
+	jq -e ".endpoints.view_user.errors == 1" stats.json &&
+	jq -e ".endpoints.view_user.cache_hits == 1" stats.json &&
+	jq -e ".endpoints.view_user.latency.count == 3" stats.json &&
+	jq -e ".endpoints.view_user.latency.p50 <= .endpoints.view_user.latency.p99" stats.json &&
+	jq -e ".endpoints.view_user.request_bytes.total > 0" stats.json &&
+	jq -e ".endpoints.view_user.response_bytes.max > 0" stats.json &&
+	jq -e ".endpoints.add_user.sql.statements > 0" stats.json &&
+	jq -e ".slowest_statements | length > 0" stats.json &&
+	jq -e ".cache.hits == 1" stats.json
+'
+
+test_expect_success 'statistics can not be seen by a user other than the instance owner' '
+	newid=$(($(id -u)+1)) &&
+	( export FLUX_HANDLE_ROLEMASK=0x2 &&
+	  export FLUX_HANDLE_USERID=$newid &&
+		test_must_fail flux account stats > no_access_stats.out 2>&1 &&
+		grep "Request requires owner credentials" no_access_stats.out &&
+		test_must_fail flux account stats --reset > no_access_reset.out 2>&1 &&
+		grep "Request requires owner credentials" no_access_reset.out
+	)
+'
+
+test_expect_success HAVE_JQ 'statistics are reset on demand' '
+	flux account stats --reset > before_reset.out &&
+	grep "^view_user" before_reset.out &&
+	flux account stats --json > after_reset.json &&
+	jq -e ".endpoints == {}" after_reset.json &&
+	jq -e ".slowest_statements == []" after_reset.json &&
+	jq -e ".cache.hits == 0" after_reset.json
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
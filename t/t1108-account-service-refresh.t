@@ -0,0 +1,120 @@
+#!/bin/bash
+
+test_description='test refreshing job usage, fair-share, and the priority plugin in flux-accounting service'
+
+. `dirname $0`/sharness.sh
+MULTI_FACTOR_PRIORITY=${FLUX_BUILD_DIR}/src/plugins/.libs/mf_priority.so
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# print the refresh status of the flux-accounting service
+cat <<-EOF >refresh_status.py
+import flux
+import json
+
+print(json.dumps(flux.Flux().rpc("accounting.refresh_status").get()))
+EOF
+
+# wait for the flux-accounting service to have finished at least $1 refreshes
+wait_for_refreshes() {
+	for i in $(seq 1 100); do
+		flux python refresh_status.py > refresh_status.json &&
+		test $(jq ".runs" refresh_status.json) -ge $1 && return 0
+		sleep 0.1
+	done
+	return 1
+}
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'an invalid refresh interval is rejected' '
+	test_must_fail flux account-service -p ${DB_PATH} --refresh-interval=foo \
+		> bad_interval.out 2>&1 &&
+	grep "refresh-interval" bad_interval.out
+'
+
+test_expect_success 'start flux-accounting service without a refresh' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success HAVE_JQ 'the refresh is disabled by default' '
+	flux python refresh_status.py > disabled.json &&
+	jq -e ".enabled == false" disabled.json
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_expect_success 'load multi-factor priority plugin' '
+	flux jobtap load -r .priority-default ${MULTI_FACTOR_PRIORITY}
+'
+
+test_expect_success 'start flux-accounting service with a refresh' '
+	flux account-service -p ${DB_PATH} --refresh-interval=0.5s -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A &&
+	flux account add-user --username=user5002 --userid=5002 --bank=A
+'
+
+test_expect_success HAVE_JQ 'a refresh runs every phase' '
+	wait_for_refreshes 1 &&
+	test_debug "jq -S . refresh_status.json" &&
+	jq -e ".enabled == true" refresh_status.json &&
+	jq -e ".interval == 0.5" refresh_status.json &&
+	jq -e ".last.error == null" refresh_status.json &&
+	jq -e "[.last.phases[].name] == [\"update-usage\", \"update-fshare\", \"priority-update\"]" \
+		refresh_status.json
+'
+
+test_expect_success HAVE_JQ 'the plugin is sent associations without a flux account-priority-update' '
+	flux jobtap query mf_priority.so > query_1.json &&
+	test_debug "jq -S . <query_1.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5001)" <query_1.json &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002)" <query_1.json
+'
+
+test_expect_success HAVE_JQ 'an edit is sent to the plugin by a later refresh' '
+	flux account edit-user user5002 --max-running-jobs=17 &&
+	runs=$(jq ".runs" refresh_status.json) &&
+	wait_for_refreshes $((runs + 2)) &&
+	flux jobtap query mf_priority.so > query_2.json &&
+	test_debug "jq -S . <query_2.json" &&
+	jq -e ".mf_priority_map[] | select(.userid == 5002) | .banks[0].max_run_jobs == 17" <query_2.json
+'
+
+test_expect_success 'read-only requests are answered while refreshes run' '
+	flux account view-user user5001 &&
+	flux account list-banks
+'
+
+test_expect_success 'add-user requests made while refreshes run are all applied' '
+	runs=$(jq ".runs" refresh_status.json) &&
+	for i in $(seq 6001 6020); do
+		flux account add-user --username=user${i} --userid=${i} --bank=A \
+			|| return 1
+	done &&
+	wait_for_refreshes $((runs + 1)) &&
+	for i in $(seq 6001 6020); do
+		flux account view-user user${i} > /dev/null || return 1
+	done
+'
+
+test_expect_success HAVE_JQ 'no privileged requests are left held after a refresh' '
+	jq -e ".deferred_writes == 0" refresh_status.json
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
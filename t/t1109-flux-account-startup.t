@@ -0,0 +1,91 @@
+#!/bin/bash
+
+test_description='test that flux account only builds and imports what a command needs'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+FLUX_ACCOUNT=${SHARNESS_TEST_SRCDIR}/../src/cmd/flux-account.py
+
+# the time, in microseconds, that importing flux-accounting modules may take
+# when flux account forwards a command to the flux-accounting service
+IMPORT_BUDGET_US=${FLUX_ACCOUNT_IMPORT_BUDGET_US:-50000}
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# sum the cumulative import time of the top-level flux-accounting imports in
+# the output of python -X importtime, failing if it is over budget
+cat <<-EOF >check_importtime.py
+import sys
+
+total = 0
+for line in open(sys.argv[1]):
+    if not line.startswith("import time:") or "|" not in line:
+        continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    # only count modules imported directly by flux-account.py
+    if name.startswith(" fluxacct"):
+        try:
+            total += int(cumulative)
+        except ValueError:
+            continue
+print(f"fluxacct imports took {total}us")
+sys.exit(0 if total <= int(sys.argv[2]) else 1)
+EOF
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	flux account add-user --username=user5001 --userid=5001 --bank=A
+'
+
+test_expect_success 'a forwarded command does not import the modules that access the DB' '
+	flux python -X importtime ${FLUX_ACCOUNT} view-user user5001 \
+		> view_user.out 2> importtime.log &&
+	grep "user5001" view_user.out &&
+	test_must_fail grep "fluxacct.accounting.create_db" importtime.log &&
+	test_must_fail grep "| *sqlite3$" importtime.log
+'
+
+test_expect_success 'importing flux-accounting modules is within budget' '
+	flux python check_importtime.py importtime.log ${IMPORT_BUDGET_US}
+'
+
+test_expect_success 'the top-level help message lists every subcommand' '
+	flux account --help > help.out &&
+	for subcommand in view-user add-bank list-queues jobs stats; do
+		grep "${subcommand}" help.out || return 1
+	done
+'
+
+test_expect_success 'the help message of a subcommand is shown' '
+	flux account -p ${DB_PATH} view-user --help > view_user_help.out &&
+	grep "view-user \\[-h\\]" view_user_help.out &&
+	grep "\-\-parsable" view_user_help.out
+'
+
+test_expect_success 'an unknown subcommand lists every subcommand' '
+	test_must_fail flux account foo > unknown.out 2>&1 &&
+	grep "invalid choice: .foo." unknown.out &&
+	grep "list-banks" unknown.out
+'
+
+test_expect_success 'a subcommand given after --path is found' '
+	flux account --path ${DB_PATH} view-user user5001 > path.out &&
+	grep "user5001" path.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
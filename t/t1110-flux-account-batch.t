@@ -0,0 +1,138 @@
+#!/bin/bash
+
+test_description='test applying many operations in one transaction with flux account batch'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add banks and users in a batch' '
+	cat <<-EOF >ops_1.jsonl &&
+	{"op": "add-bank", "bank": "root", "shares": 1}
+	{"op": "add-bank", "bank": "A", "shares": 1, "parent-bank": "root"}
+
+	{"op": "add-user", "username": "user5001", "userid": 5001, "bank": "A"}
+	{"op": "add_user", "username": "user5002", "userid": 5002, "bank": "A", "max_running_jobs": 10}
+	EOF
+	flux account batch -f ops_1.jsonl > batch_1.out &&
+	grep "applied 4 of 4 operations" batch_1.out
+'
+
+test_expect_success 'operations in a batch get the defaults of their subcommand' '
+	flux account view-user -o "{username}|{max_running_jobs}|{max_active_jobs}" \
+		user5001 > user5001.out &&
+	grep "user5001|5|7" user5001.out &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5002 \
+		> user5002.out &&
+	grep "user5002|10" user5002.out
+'
+
+test_expect_success 'a batch with a failed operation is not applied' '
+	cat <<-EOF >ops_2.jsonl &&
+	{"op": "add-user", "username": "user5003", "userid": 5003, "bank": "A"}
+	{"op": "add-user", "username": "user5001", "userid": 5001, "bank": "A"}
+	{"op": "edit-user", "username": "user5002", "max-running-jobs": 20}
+	EOF
+	test_must_fail flux account batch -f ops_2.jsonl > batch_2.out 2>&1 &&
+	test_debug "cat batch_2.out" &&
+	grep "operation 1 (add_user)" batch_2.out &&
+	grep "no operations were applied" batch_2.out &&
+	test_must_fail flux account view-user user5003 &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5002 \
+		> user5002_2.out &&
+	grep "user5002|10" user5002_2.out
+'
+
+test_expect_success 'the operations that succeed are applied with --keep-going' '
+	flux account batch -f ops_2.jsonl --keep-going > batch_3.out &&
+	test_debug "cat batch_3.out" &&
+	grep "operation 1 (add_user)" batch_3.out &&
+	grep "applied 2 of 3 operations" batch_3.out &&
+	flux account view-user user5003 &&
+	flux account view-user -o "{username}|{max_running_jobs}" user5002 \
+		> user5002_3.out &&
+	grep "user5002|20" user5002_3.out
+'
+
+test_expect_success HAVE_JQ 'the result of each operation is printed with --json' '
+	cat <<-EOF >ops_3.jsonl &&
+	{"op": "edit-user", "username": "user5003", "max-running-jobs": 4}
+	{"op": "add-queue", "queue": "bronze", "priority": 100}
+	EOF
+	flux account batch -f ops_3.jsonl --json > batch_4.json &&
+	test_debug "jq -S . batch_4.json" &&
+	jq -e ".committed == true" batch_4.json &&
+	jq -e ".succeeded == 2" batch_4.json &&
+	jq -e ".results[1].op == \"add_queue\"" batch_4.json
+'
+
+test_expect_success 'operations can be read from stdin' '
+	echo "{\"op\": \"delete-queue\", \"queue\": \"bronze\"}" | \
+		flux account batch -f - > batch_5.out &&
+	grep "applied 1 of 1 operations" batch_5.out &&
+	test_must_fail flux account view-queue bronze
+'
+
+test_expect_success 'subcommands that can not be run in a batch are rejected' '
+	echo "{\"op\": \"list-banks\"}" > ops_4.jsonl &&
+	test_must_fail flux account batch -f ops_4.jsonl > batch_6.out 2>&1 &&
+	grep "list_banks can.t be run in a batch" batch_6.out
+'
+
+test_expect_success 'a malformed operation is reported with its line number' '
+	printf "{\"op\": \"add-user\", \"username\": \"user5004\", \"bank\": \"A\"}\nfoo\n" \
+		> ops_5.jsonl &&
+	test_must_fail flux account batch -f ops_5.jsonl > batch_7.out 2>&1 &&
+	grep "ops_5.jsonl:2" batch_7.out &&
+	echo "{\"username\": \"user5004\"}" > ops_6.jsonl &&
+	test_must_fail flux account batch -f ops_6.jsonl > batch_8.out 2>&1 &&
+	grep "must have an \"op\" key" batch_8.out &&
+	echo "{\"op\": \"foo\"}" > ops_7.jsonl &&
+	test_must_fail flux account batch -f ops_7.jsonl > batch_9.out 2>&1 &&
+	grep "unknown subcommand foo" batch_9.out
+'
+
+test_expect_success 'an operation with an unknown argument is rejected' '
+	cat <<-EOF >ops_8.jsonl &&
+	{"op": "add-user", "username": "user5004", "bank": "A"}
+	{"op": "add-user", "username": "user5005", "bank": "A", "max-runing-jobs": 5}
+	EOF
+	test_must_fail flux account batch -f ops_8.jsonl > batch_10.out 2>&1 &&
+	grep "ops_8.jsonl:2: add-user: unknown argument max-runing-jobs" batch_10.out &&
+	test_must_fail flux account view-user user5004
+'
+
+test_expect_success 'an operation without a required argument is rejected' '
+	cat <<-EOF >ops_9.jsonl &&
+	{"op": "add-user", "username": "user5004", "bank": "A"}
+	{"op": "add-user", "username": "user5005"}
+	EOF
+	test_must_fail flux account batch -f ops_9.jsonl > batch_11.out 2>&1 &&
+	grep "ops_9.jsonl:2: .*the following arguments are required: -B/--bank" \
+		batch_11.out &&
+	test_must_fail flux account view-user user5004
+'
+
+test_expect_success 'an operation with an invalid value is rejected' '
+	echo "{\"op\": \"add-bank\", \"bank\": \"B\", \"shares\": 1, \"priority\": \"high\"}" \
+		> ops_10.jsonl &&
+	test_must_fail flux account batch -f ops_10.jsonl > batch_12.out 2>&1 &&
+	grep "ops_10.jsonl:1: .*invalid float value" batch_12.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
@@ -0,0 +1,96 @@
+#!/bin/bash
+
+test_description='test running commands read from stdin with flux account --stdin'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+test_expect_success 'add some banks and users to the DB' '
+	flux account add-bank root 1 &&
+	flux account add-bank --parent-bank=root A 1 &&
+	for i in $(seq 1 50); do
+		echo "{\"op\": \"add-user\", \"username\": \"user$((5000 + i))\", \"userid\": $((5000 + i)), \"bank\": \"A\"}"
+	done > users.jsonl &&
+	flux account batch -f users.jsonl
+'
+
+test_expect_success 'responses to commands read from stdin are printed in order' '
+	for i in $(seq 1 50); do
+		echo "view-user -o {username} user$((5000 + i))"
+	done > lookups.txt &&
+	flux account --stdin --max-inflight=8 < lookups.txt > lookups.out &&
+	for i in $(seq 1 50); do
+		printf "username\nuser$((5000 + i))\n"
+	done > lookups.expected &&
+	test_cmp lookups.expected lookups.out
+'
+
+test_expect_success 'the output of each command matches running it on its own' '
+	cat <<-EOF >commands.txt &&
+	view-user user5001
+
+	list-banks
+	EOF
+	flux account view-user user5001 > expected.out &&
+	flux account list-banks >> expected.out &&
+	flux account --stdin < commands.txt > stdin.out &&
+	test_cmp expected.out stdin.out
+'
+
+test_expect_success 'a command that fails does not stop the rest' '
+	cat <<-EOF >failures.txt &&
+	view-user -o {username} user5001
+	view-user user9999
+	view-user
+	foo
+	create-db
+	view-user -h
+	view-user -o {username} user5002
+	EOF
+	test_must_fail flux account --stdin < failures.txt > failures.out \
+		2> failures.err &&
+	test_debug "cat failures.err" &&
+	printf "username\nuser5001\nusername\nuser5002\n" > failures.expected &&
+	test_cmp failures.expected failures.out &&
+	grep "line 2: .*user9999" failures.err &&
+	grep "line 3: .*required: USERNAME" failures.err &&
+	grep "line 4: .*invalid choice" failures.err &&
+	grep "line 5: command can.t be run with --stdin" failures.err &&
+	grep "line 6: -h/--help can.t be used in a line read with --stdin" \
+		failures.err
+'
+
+test_expect_success 'a subcommand and --stdin can not be given together' '
+	test_must_fail flux account --stdin view-user user5001 < /dev/null \
+		> both.out 2>&1 &&
+	grep "a subcommand can.t be given with --stdin" both.out
+'
+
+test_expect_success 'a bad --max-inflight is rejected' '
+	test_must_fail flux account --stdin --max-inflight=0 < /dev/null \
+		> max_inflight.out 2>&1 &&
+	grep "max-inflight must be at least 1" max_inflight.out
+'
+
+test_expect_success 'a subcommand is still required without --stdin' '
+	test_must_fail flux account > no_subcommand.out 2>&1 &&
+	grep "required: subcommand" no_subcommand.out
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
@@ -0,0 +1,113 @@
+#!/bin/bash
+
+test_description='test updating fair-share values with flux account-update-fshare --incremental'
+
+. `dirname $0`/sharness.sh
+CREATE_TEST_DB=${SHARNESS_TEST_SRCDIR}/scripts/create_test_db.py
+UPDATE_USAGE_COL=${SHARNESS_TEST_SRCDIR}/scripts/update_usage_column.py
+FULL_DB=$(pwd)/full.db
+INCREMENTAL_DB=$(pwd)/incremental.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# print the fair-share value of every association in a DB
+dump_fshares() {
+	flux python - $1 <<-EOF
+	import sqlite3
+	import sys
+	conn = sqlite3.connect(sys.argv[1])
+	select_stmt = (
+	    "SELECT username, bank, fairshare FROM association_table "
+	    "ORDER BY username, bank"
+	)
+	for row in conn.execute(select_stmt):
+	    print(*row)
+	EOF
+}
+
+# count the fair-share values written to a DB since the last call
+count_written() {
+	flux python - $1 <<-EOF
+	import sqlite3
+	import sys
+	conn = sqlite3.connect(sys.argv[1])
+	conn.execute(
+	    "CREATE TABLE IF NOT EXISTS fshare_writes (username tinytext)"
+	)
+	conn.execute(
+	    "CREATE TRIGGER IF NOT EXISTS count_fshare_writes "
+	    "AFTER UPDATE OF fairshare ON association_table "
+	    "BEGIN INSERT INTO fshare_writes VALUES (new.username); END"
+	)
+	print(conn.execute("SELECT COUNT(*) FROM fshare_writes").fetchone()[0])
+	conn.execute("DELETE FROM fshare_writes")
+	conn.commit()
+	EOF
+}
+
+# count the banks in a DB whose children are cached
+count_cached_banks() {
+	flux python - $1 <<-EOF
+	import sqlite3
+	import sys
+	conn = sqlite3.connect(sys.argv[1])
+	select_stmt = "SELECT COUNT(DISTINCT bank) FROM fshare_cache_table"
+	print(conn.execute(select_stmt).fetchone()[0])
+	EOF
+}
+
+update_both() {
+	flux account-update-fshare -p ${FULL_DB} &&
+	flux account-update-fshare -p ${INCREMENTAL_DB} --incremental
+}
+
+test_expect_success 'create a DB and a copy of it' '
+	flux python ${CREATE_TEST_DB} ${FULL_DB} &&
+	cp ${FULL_DB} ${INCREMENTAL_DB} &&
+	test $(count_written ${INCREMENTAL_DB}) -eq 0
+'
+
+test_expect_success 'the first incremental update matches a full update' '
+	update_both &&
+	dump_fshares ${FULL_DB} > full_1.out &&
+	dump_fshares ${INCREMENTAL_DB} > incremental_1.out &&
+	test_cmp full_1.out incremental_1.out &&
+	test $(count_written ${INCREMENTAL_DB}) -gt 0
+'
+
+test_expect_success 'the children of every bank are cached' '
+	test $(count_cached_banks ${INCREMENTAL_DB}) -eq 4
+'
+
+test_expect_success 'an incremental update with no changes writes nothing' '
+	flux account-update-fshare -p ${INCREMENTAL_DB} --incremental &&
+	test $(count_written ${INCREMENTAL_DB}) -eq 0 &&
+	dump_fshares ${INCREMENTAL_DB} > incremental_2.out &&
+	test_cmp full_1.out incremental_2.out
+'
+
+test_expect_success 'update the usage of an association in both DBs' '
+	flux python ${UPDATE_USAGE_COL} ${FULL_DB} leaf.2.1 55 &&
+	flux python ${UPDATE_USAGE_COL} ${INCREMENTAL_DB} leaf.2.1 55
+'
+
+test_expect_success 'an incremental update after a change matches a full update' '
+	update_both &&
+	dump_fshares ${FULL_DB} > full_3.out &&
+	dump_fshares ${INCREMENTAL_DB} > incremental_3.out &&
+	test_cmp full_3.out incremental_3.out &&
+	! cmp -s full_1.out full_3.out
+'
+
+test_expect_success 'only the fair-share values that changed are written' '
+	changed=$(diff full_1.out full_3.out | grep -c "^>") &&
+	test $(count_written ${INCREMENTAL_DB}) -eq ${changed}
+'
+
+test_expect_success 'remove the DBs' '
+	rm ${FULL_DB} ${INCREMENTAL_DB}
+'
+
+test_done